@@ -1,6 +1,67 @@
+"""
+Poll the battery controller (LBC) for cell voltages, temperatures and shunts
+
+Sends ISO-TP diagnostic requests on EV-CAN and prints the decoded replies
+every few seconds. --virtual answers them from a stand-in LBC on a virtual
+bus instead, for trying it off the car.
+
+    python picantest.py
+    python picantest.py --channel can1 --interval 5
+    python picantest.py --virtual
+"""
+import argparse
 import can
+import os
+import sys
+import time
+
+# The diagnostic poller lives with the dash code
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'dash'))
+from src.can_bus import BusIngest
+from src.diagnostics import (DECODERS, LBC_RESPONSE_ID, DiagnosticPoller, DiagnosticQuery,
+                             VirtualEcu, lbc_responses)
+
+QUERIES = {'cell_voltages': '2102', 'temperatures': '2104', 'shunts': '2106'}
+
+parser = argparse.ArgumentParser(description='Poll the LBC over ISO-TP')
+parser.add_argument('--channel', default='can1', help='EV-CAN channel')
+parser.add_argument('--interval', type=float, default=5.0, help='Seconds between polls')
+parser.add_argument('--virtual', action='store_true', help='Poll a stand-in LBC on a virtual bus')
+args = parser.parse_args()
+
+interface = 'virtual' if args.virtual else 'socketcan'
+ecu = None
+if args.virtual:
+    ecu = VirtualEcu(can.interface.Bus(channel=args.channel, interface='virtual'), lbc_responses())
+    ecu.start()
 
-with can.interface.Bus(bustype='socketcan', channel='can0', bitrate=500000) as bus:
-    msg = can.Message(arbitration_id=0x7de, data=[0, 25, 0, 1, 3, 1, 4, 1])
-    bus.send(msg)
+queries = [DiagnosticQuery(name, bytes.fromhex(request), args.interval, decode=DECODERS[name][0])
+           for name, request in QUERIES.items()]
+ingest = BusIngest({LBC_RESPONSE_ID}, channel=args.channel, interface=interface)
+ingest.open()
+poller = DiagnosticPoller(ingest, queries)
+poller.start()
 
+try:
+    while True:
+        time.sleep(args.interval)
+        cells = poller.result('cell_voltages', max_age=2 * args.interval)
+        temperatures = poller.result('temperatures', max_age=2 * args.interval)
+        shunts = poller.result('shunts', max_age=2 * args.interval)
+        if cells:
+            print(f"Cells {cells.values['LBC_CellVoltageMin']:.3f}-"
+                  f"{cells.values['LBC_CellVoltageMax']:.3f} V "
+                  f"(spread {cells.values['LBC_CellVoltageSpread']:.0f} mV)", end='   ')
+        if temperatures:
+            print(f"Modules {temperatures.values['LBC_ModuleTemperatures']} C", end='   ')
+        if shunts:
+            print(f"Shunts on {shunts.values['LBC_ShuntCount']}", end='   ')
+        print(f"Requests {poller.requests}  Errors {sum(poller.errors.values())}")
+except KeyboardInterrupt:
+    pass
+finally:
+    poller.stop()
+    if ecu:
+        ecu.stop()
+        ecu.bus.shutdown()
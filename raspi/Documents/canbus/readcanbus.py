@@ -1,103 +1,102 @@
+import asyncio
 import can
-import cantools
 import time
+import os
+import sys
 
-# file = 'EV-can_ZE0.dbc'
-file = 'CAR-can_AZE0_fixed.dbc'
-
-# Load the DBC file
-try:
-    db = cantools.database.load_file(file)
-except FileNotFoundError:
-    print("Error: {file}% not found. Please place it in the same directory.")
-    exit()
+# The decoder table lives with the dash code
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'dash'))
+from src.can_bus import BusIngest
+from src.can_service import CanIngestService, POLICY_DROP_OLDEST, log_lag
+from src.multi_bus import CanBusConfig, MultiBusDecoder
 
+# EV-CAN and CAR-CAN are read together; signals from both land in one namespace
+BUSES = [
+    CanBusConfig('car', os.path.join(HERE, 'CAR-can_AZE0_fixed.dbc'), channel='can0'),
+    CanBusConfig('ev', os.path.join(HERE, 'EV-can_ZE0.dbc'), channel='can1'),
+]
 
-def evCan(bus):                    
-    print("Listening for LBC messages (SOC, SOH)...")
+EV_SIGNALS = ['LB_SOC']
+CAR_SIGNALS = ['BatteryStateOfHealth', 'BatteryGIDS', 'BatteryPackTemperature',
+               'VehicleSpeedCluster']
 
-    while True:
-        message = bus.recv()  # Wait for a message
-
-        
-        if message.arbitration_id == 0x55B: # LBC SOC message ID
-            try:
-                decoded_message = db.decode_message(message.arbitration_id, message.data)
-                soc = decoded_message.get('LBC_StateOfCharge')
-                if soc is not None:
-                    print(f"Received LBC SOC: {soc:.1f}%")
-            except Exception as e:
-                print(f"Error decoding message 0x55B: {e}")
+# Decoders are compiled once; only the signals above are ever extracted
+try:
+    decoders = MultiBusDecoder.from_buses(BUSES, prefer=['car', 'ev'],
+                                          signals=EV_SIGNALS + CAR_SIGNALS)
+except FileNotFoundError as e:
+    print(f"Error: {e.filename} not found. Please place it in the same directory.")
+    exit()
 
-        elif message.arbitration_id == 0x5B3: # LBC SOH message ID
-            try:
-                decoded_message = db.decode_message(message.arbitration_id, message.data)
-                soh = decoded_message.get('SOH')
-                if soh is not None:
-                    print(f"Received SOH: {soh:.1f}%")
-            except Exception as e:
-                print(f"Error decoding message 0x5B3: {e}")
 
-def carCan(bus):                    
-    print("Listening for CAR-CAN messages ...")
+async def printValues(updates):
+    print("Listening for EV-CAN and CAR-CAN messages ...")
+    soc = 0
     soh = 0
     gids = 0
     speed = 0
     temp = 0
 
-    while True:
-        message = bus.recv()  # Wait for a message
-        
-        if message.arbitration_id == 0x5B3: # LBC SOH message ID
-            try:
-                decoded_message = db.decode_message(message.arbitration_id, message.data)
-                soh = decoded_message.get('BatteryStateOfHealth')
-                gids = decoded_message.get('BatteryGIDS')
-                temp = decoded_message.get('BatteryPackTemperature')
-            except Exception as e:
-                print(f"Error decoding message 0x5B3: {e}")
-
+    async for update in updates:  # Only frames that passed the kernel filters
+        values = update.values
+        soc = values.get('LB_SOC', soc)
+        soh = values.get('BatteryStateOfHealth', soh)
+        gids = values.get('BatteryGIDS', gids)
+        temp = values.get('BatteryPackTemperature', temp)
+        speed = values.get('VehicleSpeedCluster', speed)
 
-        elif message.arbitration_id == 0x280: # VehicleSpeedCluster
-            try:
-                decoded_message = db.decode_message(message.arbitration_id, message.data)
-                speed = decoded_message.get('VehicleSpeedCluster')
-            except Exception as e:
-                print(f"Error decoding message 0x280: {e}")
-             
+        print(f"SOC: {soc:.1f}%   ", end="")
         print(f"SOH: {soh:.1f}%   ", end="")
         print(f"Gids: {gids}   ", end="")
         print(f"BattTemp: {temp}    ", end="")
-        print(f"Speed: {speed:.1f} mph    ", end="\r")             
-             
-#        else:
-#           print(f"Message ID in hex ", hex(message.arbitration_id))
+        print(f"Speed: {speed:.1f} mph    ", end="\r")
+
+async def listen(buses, loop):
+    """
+    Runs the ingest service over every bus with the console printer as one of its subscribers.
+    """
+    service = CanIngestService(buses, decoders)
+    # The console can fall behind without holding up the buses
+    console = service.subscribe('console', maxsize=50, policy=POLICY_DROP_OLDEST)
+
+    printer = asyncio.ensure_future(loop(console))
+    lag = asyncio.ensure_future(log_lag(service, 30.0))
+    try:
+        await service.run()
+    finally:
+        printer.cancel()
+        lag.cancel()
 
 def main():
     """
-    Initializes the CAN bus and continuously reads and decodes messages.
+    Opens every bus and continuously reads and decodes messages from all of them.
     """
+    ingests = []
     try:
-        # Initialize the CAN bus interface (ensure 'can0' is correct for your setup)
-        bus = can.interface.Bus(channel='can0', bustype='socketcan')
-        print("Successfully connected to can0.")
-        
-        if file.startswith("EV"):
-            evCan(bus)
-        elif file.startswith("CAR"):
-            carCan(bus)
-        else:
-            print("Unrecognized CAN bus data")             
+        for bus in BUSES:
+            # Only the subscribed IDs are let through by the socketcan filters
+            ingest = BusIngest(decoders.ids(bus.name), channel=bus.channel,
+                               interface=bus.interface)
+            try:
+                ingest.open()
+            except (can.CanError, OSError) as e:
+                print(f"CAN Error on {bus.channel} ({bus.name}): {e}")
+                print(f"Please ensure the '{bus.channel}' interface is up "
+                      f"('sudo ip link set {bus.channel} up type can bitrate 500000')")
+                continue
+            print(f"Successfully connected to {bus.channel} ({bus.name}).")
+            ingests.append(ingest)
+
+        if not ingests:
+            return
+        asyncio.run(listen([ingest.bus for ingest in ingests], printValues))
 
-    except can.CanError as e:
-        print(f"CAN Error: {e}")
-        print("Please ensure the 'can0' interface is up ('sudo ip link set can0 up type can bitrate 500000')")
     except KeyboardInterrupt:
         print("\nShutting down logger.")
     finally:
-        if 'bus' in locals() and bus:
-            bus.shutdown()
+        for ingest in ingests:
+            ingest.close()
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark vectorized bulk decoding against per-frame decode_message
+
+Simulates a saturated-bus drive into a capture file, then decodes every
+signal in the CAR DBC with the per-frame cantools path (as readcanbus.py
+did), the precompiled decoder table, and the NumPy bulk decoder. The
+per-frame paths are timed on a sample and extrapolated.
+
+Run from the dash directory:
+    python benchmarks/bench_bulk_decode.py
+    python benchmarks/bench_bulk_decode.py --minutes 30
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.bulk_decode import BulkDecoder, frames_from_capture, save_columns
+from src.can_decoder import CAR_CAN_DBC, DecoderTable
+from src.capture import CaptureReader, CaptureWriter
+from src.simulator import DriveSimulator
+
+SAMPLE = 200000
+
+
+def make_capture(path: str, minutes: float) -> int:
+    """Write a saturated-bus drive to a capture file"""
+    simulator = DriveSimulator(stress_load=1.0)
+    with CaptureWriter(path, os.path.basename(CAR_CAN_DBC)) as writer:
+        for timestamp, frame_id, data in simulator.frames(minutes * 60.0):
+            writer.write_frame(timestamp, frame_id, data)
+        return writer.count
+
+
+def bench_cantools(db, reader: CaptureReader, count: int) -> float:
+    """Seconds per frame for decode_message on every known ID"""
+    known = {message.frame_id for message in db.messages}
+    decode = db.decode_message
+    start = time.perf_counter()
+    for i, frame in enumerate(reader.iter_frames()):
+        if i == count:
+            break
+        if frame.arbitration_id in known:
+            try:
+                decode(frame.arbitration_id, frame.payload)
+            except Exception:
+                pass
+    return (time.perf_counter() - start) / count
+
+
+def bench_table(table: DecoderTable, reader: CaptureReader, count: int) -> float:
+    """Seconds per frame for the precompiled table with every signal subscribed"""
+    decode = table.decode
+    start = time.perf_counter()
+    for i, frame in enumerate(reader.iter_frames()):
+        if i == count:
+            break
+        decode(frame.arbitration_id, frame.payload)
+    return (time.perf_counter() - start) / count
+
+
+def run(minutes: float = 10.0) -> dict:
+    """Decode a simulated drive three ways and return seconds for the whole log"""
+    bulk = BulkDecoder.from_file(CAR_CAN_DBC)
+    table = DecoderTable(bulk.db)
+    for frame_id in bulk.messages:
+        table.subscribe_message(frame_id)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'drive.d52')
+        count = make_capture(path, minutes)
+        with CaptureReader(path) as reader:
+            sample = min(SAMPLE, count)
+            cantools_time = bench_cantools(bulk.db, reader, sample) * count
+            table_time = bench_table(table, reader, sample) * count
+
+            start = time.perf_counter()
+            frames = frames_from_capture(reader)
+            columns = bulk.decode(frames)
+            bulk_time = time.perf_counter() - start
+            del frames
+
+        start = time.perf_counter()
+        out = os.path.join(tmp, 'drive.npz')
+        save_columns(out, columns)
+        save_time = time.perf_counter() - start
+        size = os.path.getsize(out)
+
+    return {
+        'minutes': minutes,
+        'frames': count,
+        'signals': len(columns),
+        'cantools_s': cantools_time,
+        'table_s': table_time,
+        'bulk_s': bulk_time,
+        'save_s': save_time,
+        'npz_mb': size / 1e6,
+        'speedup': cantools_time / bulk_time,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bulk decoding")
+    parser.add_argument('--minutes', type=float, default=10.0,
+                        help='Minutes of saturated-bus driving to simulate')
+    args = parser.parse_args()
+
+    result = run(args.minutes)
+    hours = 3.0
+    scale = hours * 60.0 / result['minutes']
+    print(f"{result['minutes']:.0f} min drive, {result['frames']:,} frames, "
+          f"{result['signals']} signals")
+    print(f"  cantools per frame  {result['cantools_s']:7.2f}s  (extrapolated)")
+    print(f"  decoder table       {result['table_s']:7.2f}s  (extrapolated)")
+    print(f"  numpy bulk          {result['bulk_s']:7.2f}s  ({result['speedup']:.0f}x)")
+    print(f"  save .npz           {result['save_s']:7.2f}s  ({result['npz_mb']:.1f} MB)")
+    print(f"  a {hours:.0f} hour drive: cantools ~{result['cantools_s'] * scale / 60:.0f} min, "
+          f"bulk ~{result['bulk_s'] * scale:.0f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark the precompiled decoder table against cantools decode_message
+
+Run from the dash directory:
+    python benchmarks/bench_decode.py
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.can_decoder import DecoderTable, CAR_CAN_DBC, EV_CAN_DBC
+
+# A saturated 500 kbit/s bus carries roughly 4000 8-byte frames per second
+BUS_FRAMES_PER_SECOND = 4000
+
+
+def make_frames(db, frame_ids, count: int, seed: int = 52):
+    """Build a random mix of frames for the given message IDs"""
+    rng = random.Random(seed)
+    messages = [db.get_message_by_frame_id(frame_id) for frame_id in sorted(frame_ids)]
+    frames = []
+    for _ in range(count):
+        message = rng.choice(messages)
+        data = bytes(rng.getrandbits(8) for _ in range(message.length))
+        frames.append((message.frame_id, data))
+    return frames
+
+
+def bench_cantools(db, frames, wanted_ids) -> float:
+    """Time the original if/elif + decode_message path"""
+    start = time.perf_counter()
+    for frame_id, data in frames:
+        if frame_id in wanted_ids:
+            try:
+                db.decode_message(frame_id, data)
+            except Exception:
+                pass
+    return time.perf_counter() - start
+
+
+def bench_table(table, frames) -> float:
+    """Time the precompiled table path"""
+    decode = table.decode
+    start = time.perf_counter()
+    for frame_id, data in frames:
+        decode(frame_id, data)
+    return time.perf_counter() - start
+
+
+def run(dbc_file: str, signals, count: int = 200000) -> dict:
+    """Run both decoders over the same frames and return frames/second"""
+    table = DecoderTable.from_file(dbc_file, signals)
+    wanted_ids = table.ids
+    frames = make_frames(table.db, wanted_ids, count)
+
+    cantools_time = bench_cantools(table.db, frames, wanted_ids)
+    table_time = bench_table(table, frames)
+
+    return {
+        'dbc': os.path.basename(dbc_file),
+        'frames': count,
+        'cantools_fps': count / cantools_time,
+        'table_fps': count / table_time,
+        'speedup': cantools_time / table_time,
+    }
+
+
+def main():
+    cases = [
+        (CAR_CAN_DBC, ['BatteryGIDS', 'BatteryStateOfHealth', 'BatteryPackTemperature',
+                       'VehicleSpeedCluster']),
+        (EV_CAN_DBC, ['LB_SOC']),
+    ]
+    for dbc_file, signals in cases:
+        result = run(dbc_file, signals)
+        print(f"{result['dbc']}: cantools {result['cantools_fps']:,.0f} frames/s, "
+              f"table {result['table_fps']:,.0f} frames/s, "
+              f"speedup {result['speedup']:.1f}x "
+              f"(saturated bus needs {BUS_FRAMES_PER_SECOND:,} frames/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Load-test the CAN reader and DashGame with simulated drive traffic
+
+The simulator sends a drive (optionally padding each bus to saturation) onto
+two in-process virtual buses or vcan0/vcan1, CAR-CAN on one and EV-CAN on the
+other. The normal dual-bus CanReader decodes both into one SignalStore, and
+DashGame renders it under the SDL dummy driver. Reports frames lost between
+sender and store, and the bus-to-decode, -store and -screen latency recorded
+by the LatencyTracker.
+
+Run from the dash directory:
+    python benchmarks/bench_load.py                    # virtual buses, saturated
+    python benchmarks/bench_load.py --stress 0         # realistic traffic only
+    python benchmarks/bench_load.py --interface socketcan --car-channel vcan0 --ev-channel vcan1
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+from src.can_bus import BusIngest
+from src.can_decoder import CAR_CAN_DBC, EV_CAN_DBC
+from src.can_reader import CanReader
+from src.config import GameConfig
+from src.game import DashGame
+from src.latency import LatencyTracker
+from src.metrics import start_metrics
+from src.multi_bus import CanBusConfig, MultiBusDecoder
+from src.signal_store import SignalStore
+from src.simulator import CAR_BUS, EV_BUS, DriveSimulator
+
+import can
+
+SIGNALS = ['BatteryStateOfHealth', 'BatteryGIDS', 'BatteryPackTemperature',
+           'VehicleSpeedCluster', 'LB_SOC', 'LB_Current', 'LB_Total_Voltage']
+
+
+def run_dash(game: DashGame, stop: threading.Event):
+    """DashGame's loop, without the event handling that would end it"""
+    game.initialize_pygame()
+    game.running = True
+    while game.running and not stop.is_set():
+        game.handle_events()
+        game.update()
+        game.draw()
+        game.pacer.tick(game.drawn)
+
+
+def run(duration: float = 10.0, stress: float = 1.0, interface: str = 'virtual',
+        car_channel: str = 'bench_load_car', ev_channel: str = 'bench_load_ev') -> dict:
+    """
+    Run the simulator, reader and dash together for a while
+
+    Returns:
+        Sent/received counts, drop rate, and latency histograms
+    """
+    buses = [CanBusConfig(CAR_BUS, CAR_CAN_DBC, car_channel, interface),
+             CanBusConfig(EV_BUS, EV_CAN_DBC, ev_channel, interface)]
+    decoders = MultiBusDecoder.from_buses(buses, [CAR_BUS, EV_BUS], SIGNALS)
+    config = GameConfig()
+    store = SignalStore()
+    start_metrics(config, store)
+    latency = LatencyTracker()
+    ingests = {}
+    for bus in buses:
+        ingests[bus.name] = BusIngest(decoders.ids(bus.name), channel=bus.channel,
+                                      interface=interface)
+        ingests[bus.name].open()
+    reader = CanReader(ingests, decoders, store, latency=latency)
+    reader.start()
+
+    game = DashGame(signal_store=store, config=config, latency=latency)
+    stop = threading.Event()
+    dash = threading.Thread(target=run_dash, args=(game, stop), daemon=True)
+    dash.start()
+
+    simulator = DriveSimulator(stress_load=stress)
+    cpu_start = time.process_time()
+    with can.interface.Bus(channel=car_channel, interface=interface) as car, \
+            can.interface.Bus(channel=ev_channel, interface=interface) as ev:
+        stats = simulator.run({CAR_BUS: car, EV_BUS: ev}, duration)
+        # Let the reader drain what is still queued
+        time.sleep(0.5)
+    cpu = time.process_time() - cpu_start
+
+    stop.set()
+    dash.join(2.0)
+    reader.stop()
+
+    wanted = sum(stats.count(decoders.ids(bus.name), bus.name) for bus in buses)
+    received = latency.histograms['store'].count
+    return {
+        'sent': stats.total,
+        'wanted': wanted,
+        'received': received,
+        'dropped': wanted - received,
+        'send_errors': stats.send_errors,
+        'behind_ms': stats.max_behind * 1000,
+        'cpu_percent': cpu / stats.elapsed * 100 if stats.elapsed else 0.0,
+        'latency': latency,
+        'dash_frames': game.pacer.frame_times.count,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the reader and dash")
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--stress', type=float, default=1.0,
+                        help="Fraction of each bus's capacity to fill (0 for drive traffic only)")
+    parser.add_argument('--interface', default='virtual')
+    parser.add_argument('--car-channel', default='bench_load_car')
+    parser.add_argument('--ev-channel', default='bench_load_ev')
+    args = parser.parse_args()
+
+    result = run(args.duration, args.stress, args.interface, args.car_channel, args.ev_channel)
+    print(f"\n{args.duration:.0f}s at {args.stress * 100:.0f}% bus load on {args.interface}")
+    print(f"  sent {result['sent']} frames ({result['sent'] / args.duration:.0f}/s), "
+          f"{result['wanted']} for the dash, {result['send_errors']} send errors")
+    print(f"  received {result['received']}, dropped {result['dropped']}")
+    print(f"  sender fell up to {result['behind_ms']:.1f}ms behind schedule, "
+          f"process CPU {result['cpu_percent']:.0f}%")
+    for line in result['latency'].lines():
+        print(f"  {line}")
+    print(f"  dash frames drawn: {result['dash_frames']}")
+
+
+if __name__ == "__main__":
+    main()
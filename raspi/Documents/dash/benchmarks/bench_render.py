@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark full-screen redraw against the retained-mode renderer
+
+Uses the SDL dummy video driver so it runs without a display. CPU time per
+frame is the stand-in for power: on the Pi, CPU-seconds track watts far more
+closely than wall time does.
+
+Run from the dash directory:
+    python benchmarks/bench_render.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+
+from src.game import DashGame
+from src.signal_store import SignalStore
+
+WIDTH = 800
+HEIGHT = 480
+
+
+def legacy_draw(screen, signals):
+    """The original DashGame.draw: new font, full fill and flip every frame"""
+    screen.fill((0, 0, 0))
+    font = pygame.font.Font(None, 36)
+    text = font.render("Dash Game Running!", True, (255, 255, 255))
+    screen.blit(text, text.get_rect(center=(WIDTH // 2, HEIGHT // 2)))
+    screen.blit(font.render("Platform: Linux", True, (255, 255, 255)), (10, 10))
+    lines = [
+        f"Speed: {signals.get('VehicleSpeedCluster', 0):.1f}",
+        f"SOH: {signals.get('BatteryStateOfHealth', 0)}%",
+        f"GIDs: {signals.get('BatteryGIDS', 0)}",
+        f"Batt Temp: {signals.get('BatteryPackTemperature', 0)}",
+    ]
+    for i, line in enumerate(lines):
+        screen.blit(font.render(line, True, (255, 255, 255)), (10, 60 + i * 40))
+    pygame.display.flip()
+
+
+def feed(store, frame: int, change_every: int):
+    """Simulate CAN updates: speed changes every change_every frames, the rest rarely"""
+    if frame % change_every == 0:
+        store.update({'VehicleSpeedCluster': (frame // change_every) % 1200 / 10.0})
+    if frame % 600 == 0:
+        store.update({'BatteryGIDS': 250 - frame // 600, 'BatteryStateOfHealth': 92,
+                      'BatteryPackTemperature': 80})
+
+
+def measure(draw, store, frames: int, change_every: int) -> dict:
+    """Time a draw function over a number of frames"""
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    for frame in range(frames):
+        feed(store, frame, change_every)
+        draw(store.snapshot())
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    return {
+        'ms_per_frame': wall / frames * 1000,
+        'cpu_ms_per_frame': cpu / frames * 1000,
+        'frames_per_cpu_second': frames / cpu if cpu else float('inf'),
+    }
+
+
+def run(frames: int = 600, change_every: int = 1) -> dict:
+    """Benchmark both paths with the same update pattern"""
+    store = SignalStore()
+    game = DashGame(WIDTH, HEIGHT, signal_store=store)
+    game.initialize_pygame()
+    try:
+        legacy = measure(lambda snapshot: legacy_draw(game.screen, snapshot),
+                         SignalStore(), frames, change_every)
+
+        def retained(snapshot):
+            game.signals = snapshot
+            game.draw()
+        current = measure(retained, store, frames, change_every)
+    finally:
+        pygame.quit()
+    return {'legacy': legacy, 'retained': current}
+
+
+def main():
+    for change_every, label in ((1, "speed changing every frame"),
+                                (60, "parked, one change per second")):
+        result = run(change_every=change_every)
+        print(f"{label}:")
+        for name, stats in result.items():
+            print(f"  {name:9s} {stats['ms_per_frame']:.3f} ms/frame, "
+                  f"{stats['cpu_ms_per_frame']:.3f} CPU ms/frame, "
+                  f"{stats['frames_per_cpu_second']:,.0f} frames per CPU-second")
+
+
+if __name__ == "__main__":
+    main()
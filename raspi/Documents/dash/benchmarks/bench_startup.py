@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Measure how long the dash takes to appear, phase by phase
+
+Each run is a fresh interpreter that goes through main.py's startup order:
+imports, config, the first frame, then the CAN stack. The first run uses an
+empty DBC cache (the first boot after a DBC change), the rest hit the cache.
+
+Run from the dash directory:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 5
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+DASH_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+SIGNALS = ['BatteryStateOfHealth', 'BatteryGIDS', 'BatteryPackTemperature',
+           'VehicleSpeedCluster']
+
+# Budget from launching main.py to the first frame on screen
+TARGET_MS = 1000.0
+
+
+def child():
+    """Start up like main.py and print the time taken by each phase as JSON"""
+    phases = []
+    launched = float(os.environ['BENCH_STARTUP_LAUNCHED'])
+    last = time.time()
+    phases.append(('interpreter', last - launched))
+
+    def mark(name: str):
+        nonlocal last
+        now = time.time()
+        phases.append((name, now - last))
+        last = now
+
+    sys.path.insert(0, DASH_DIR)
+    import pygame
+    mark('import pygame')
+
+    from src.config import GameConfig
+    from src.game import DashGame
+    from src.signal_store import SignalStore
+    mark('import src.game')
+
+    config = GameConfig(os.path.join(DASH_DIR, 'config', 'game_config.json'))
+    mark('config')
+
+    store = SignalStore()
+    game = DashGame(signal_store=store, config=config)
+    game.start()
+    mark('first frame')
+    visible = last - launched
+
+    from src.can_bus import BusIngest
+    from src.can_decoder import CAR_CAN_DBC, DecoderTable
+    from src.can_reader import CanReader
+    mark('import can/cantools')
+
+    from src.dbc_cache import load_dbc
+    db = load_dbc(CAR_CAN_DBC)
+    mark('DBC load')
+
+    table = DecoderTable(db, SIGNALS)
+    mark('decoder table')
+
+    ingest = BusIngest(table.ids, channel='bench_startup', interface='virtual')
+    ingest.open()
+    reader = CanReader({'can': ingest}, table, store)
+    reader.start()
+    mark('reader start')
+
+    reader.stop()
+    pygame.quit()
+    print(json.dumps({'phases': phases, 'visible': visible}))
+
+
+def measure(cache_dir: str) -> dict:
+    """Time one startup in a fresh interpreter"""
+    env = dict(os.environ, DASH_CACHE_DIR=cache_dir, SDL_VIDEODRIVER='dummy',
+               SDL_AUDIODRIVER='dummy', PYGAME_HIDE_SUPPORT_PROMPT='1',
+               BENCH_STARTUP_LAUNCHED=repr(time.time()))
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), '--child'],
+                            cwd=DASH_DIR, env=env, check=True, capture_output=True,
+                            text=True).stdout
+    # The last line is ours; anything before it is the dash's own logging
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run(runs: int = 3) -> list:
+    """Start up once with an empty DBC cache, then runs - 1 times with it warm"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        return [measure(cache_dir) for _ in range(runs)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dash startup")
+    parser.add_argument('--runs', type=int, default=3, help='Startups to time (the first is cold)')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child()
+        return
+
+    results = run(max(2, args.runs))
+    names = [name for name, _ in results[0]['phases']]
+    labels = ['cold'] + [f"warm {i}" for i in range(1, len(results))]
+    print(f"{'phase':<22}" + ''.join(f"{label:>10}" for label in labels))
+    for i, name in enumerate(names):
+        print(f"{name:<22}" + ''.join(f"{r['phases'][i][1] * 1000:8.1f}ms" for r in results))
+    totals = [sum(seconds for _, seconds in r['phases']) for r in results]
+    print(f"{'total':<22}" + ''.join(f"{t * 1000:8.1f}ms" for t in totals))
+    print(f"{'dash visible':<22}" + ''.join(f"{r['visible'] * 1000:8.1f}ms" for r in results))
+    worst = max(r['visible'] for r in results[1:]) * 1000
+    verdict = "within" if worst <= TARGET_MS else "over"
+    print(f"Warm dash-visible worst case {worst:.0f}ms, {verdict} the {TARGET_MS:.0f}ms target")
+
+
+if __name__ == "__main__":
+    main()
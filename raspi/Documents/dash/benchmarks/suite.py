@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the decode, ingest, config, render and actuation hot paths
+
+Runs without Pi hardware: frames go over python-can's virtual bus, the dash
+draws under the SDL dummy driver and the gauges drive a FakeMotorKit. Each
+benchmark runs --repeat times and keeps its best result, which is saved as
+JSON and compared with a baseline. Any metric worse than the baseline by
+more than --tolerance is a regression, and the exit status is 1.
+
+Record a baseline on the machine you compare against (ideally the Pi), then
+check before deploying:
+
+Run from the dash directory:
+    python benchmarks/suite.py --save-baseline
+    python benchmarks/suite.py
+    python benchmarks/suite.py --only decode,render --output results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+from bench_decode import make_frames
+from src.can_decoder import CAR_CAN_DBC, EV_CAN_DBC, DecoderTable
+from src.config import GameConfig
+from src.signal_store import SignalStore
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+CAR_SIGNALS = ['BatteryGIDS', 'BatteryStateOfHealth', 'BatteryPackTemperature',
+               'VehicleSpeedCluster']
+EV_SIGNALS = ['LB_SOC']
+
+HIGHER = 'higher'
+LOWER = 'lower'
+
+# name -> (value, unit, which way is better)
+Metrics = Dict[str, Tuple[float, str, str]]
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def bench_decode(quick: bool) -> Metrics:
+    """Decoder table throughput on a random mix of each DBC's subscribed messages"""
+    count = 20000 if quick else 200000
+    metrics = {}
+    for label, dbc_file, signals in (('car', CAR_CAN_DBC, CAR_SIGNALS),
+                                     ('ev', EV_CAN_DBC, EV_SIGNALS)):
+        table = DecoderTable.from_file(dbc_file, signals)
+        frames = make_frames(table.db, table.ids, count)
+        decode = table.decode
+        start = time.perf_counter()
+        for frame_id, data in frames:
+            decode(frame_id, data)
+        elapsed = time.perf_counter() - start
+        metrics[f'decode.{label}'] = (count / elapsed, 'frames/s', HIGHER)
+    return metrics
+
+
+def bench_ingest(quick: bool) -> Metrics:
+    """Virtual bus to signal store: notifier, decode and publish, as CanReader does"""
+    import asyncio
+    import can
+    from src.can_bus import open_virtual_pair
+    from src.can_service import CanIngestService
+    from src.simulator import DriveSimulator
+
+    table = DecoderTable.from_file(CAR_CAN_DBC, CAR_SIGNALS)
+    store = SignalStore()
+    sender, ingest = open_virtual_pair('bench_suite', table.ids)
+    service = CanIngestService(ingest.bus, table, store)
+    try:
+        simulator = DriveSimulator(stress_load=0.0)
+        seconds = 20.0 if quick else 120.0
+        messages = [can.Message(timestamp=timestamp, arbitration_id=frame_id, data=data,
+                                is_extended_id=False)
+                    for timestamp, frame_id, data in simulator.frames(seconds)
+                    if frame_id in table.ids]
+        # The virtual bus queues everything, so sending first times only the receive side
+        for message in messages:
+            sender.send(message)
+
+        async def drain() -> float:
+            task = asyncio.ensure_future(service.run())
+            start = time.perf_counter()
+            deadline = start + 10.0
+            while service.frames < len(messages) and time.perf_counter() < deadline:
+                await asyncio.sleep(0.001)
+            # Stopping waits out the notifier's poll, which isn't ingest time
+            elapsed = time.perf_counter() - start
+            service.stop()
+            await task
+            return elapsed
+
+        elapsed = asyncio.run(drain())
+    finally:
+        sender.shutdown()
+        ingest.close()
+    return {
+        'ingest.frames': (service.frames / elapsed, 'frames/s', HIGHER),
+        'ingest.batch': (service.frames / max(1, service.batches), 'frames', HIGHER),
+    }
+
+
+def bench_config(quick: bool) -> Metrics:
+    """GameConfig.get on a shallow and a deep key, and a compiled accessor"""
+    config = GameConfig()
+    count = 100000 if quick else 1000000
+    metrics = {}
+    for label, key in (('get', 'display.fps'), ('get_deep', 'gauges.channels.pon.slew_rate')):
+        get = config.get
+        start = time.perf_counter()
+        for _ in range(count):
+            get(key)
+        metrics[f'config.{label}'] = ((time.perf_counter() - start) / count * 1e9, 'ns', LOWER)
+    accessor = config.accessor('gauges.channels.pon.slew_rate')
+    start = time.perf_counter()
+    for _ in range(count):
+        accessor()
+    metrics['config.accessor'] = ((time.perf_counter() - start) / count * 1e9, 'ns', LOWER)
+    return metrics
+
+
+def bench_render(quick: bool) -> Metrics:
+    """DashGame.draw with the speed changing every frame"""
+    import pygame
+    from src.game import DashGame
+
+    frames = 300 if quick else 1200
+    store = SignalStore()
+    game = DashGame(signal_store=store)
+    game.initialize_pygame()
+    times = []
+    try:
+        store.update({'BatteryGIDS': 250, 'BatteryStateOfHealth': 92,
+                      'BatteryPackTemperature': 20})
+        for frame in range(frames):
+            store.update({'VehicleSpeedCluster': frame % 1200 / 10.0})
+            game.signals = store.snapshot()
+            start = time.perf_counter()
+            game.draw()
+            times.append(time.perf_counter() - start)
+    finally:
+        pygame.quit()
+    # The first frame is a full redraw; the steady state is what matters
+    times = times[1:]
+    return {
+        'render.mean': (sum(times) / len(times) * 1000, 'ms', LOWER),
+        'render.p99': (percentile(times, 0.99) * 1000, 'ms', LOWER),
+    }
+
+
+def bench_gauges(quick: bool) -> Metrics:
+    """GaugeDriver.step over the configured gauges against a FakeMotorKit"""
+    from src.fake_hardware import FakeMotorKit
+    from src.gauge_driver import GaugeDriver
+
+    config = GameConfig()
+    store = SignalStore()
+    driver = GaugeDriver.from_config(config, FakeMotorKit(), source=store.snapshot)
+    steps = 20000 if quick else 200000
+    dt = driver.period
+    start = time.perf_counter()
+    for i in range(steps):
+        # New CAN values a few times per control period, as on a busy bus
+        if i % 5 == 0:
+            store.update({'VehicleSpeedCluster': (i // 5) % 1600 / 10.0,
+                          'BatteryGIDS': 281 - (i // 500) % 281}, float(i))
+        driver.step(dt)
+    elapsed = time.perf_counter() - start
+    return {
+        'gauges.step': (elapsed / steps * 1e6, 'us', LOWER),
+        'gauges.writes': (driver.writes / steps, 'writes/step', LOWER),
+    }
+
+
+BENCHMARKS: Dict[str, Callable[[bool], Metrics]] = {
+    'decode': bench_decode,
+    'ingest': bench_ingest,
+    'config': bench_config,
+    'render': bench_render,
+    'gauges': bench_gauges,
+}
+
+
+def run(names: List[str], repeat: int = 3, quick: bool = False) -> dict:
+    """
+    Run benchmarks, keeping the best of each metric over the repeats
+
+    Returns:
+        JSON-ready results with machine details
+    """
+    results = {}
+    for name in names:
+        for _ in range(repeat):
+            for metric, (value, unit, better) in BENCHMARKS[name](quick).items():
+                best = results.get(metric)
+                if (best is None or (better == HIGHER and value > best['value'])
+                        or (better == LOWER and value < best['value'])):
+                    results[metric] = {'value': value, 'unit': unit, 'better': better}
+    return {
+        'meta': {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'machine': platform.machine(),
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'quick': quick,
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> List[dict]:
+    """
+    Compare each metric with the baseline
+
+    Returns:
+        One row per metric in either run: name, baseline, current, change
+        (positive is better) and whether it regressed past the tolerance
+    """
+    rows = []
+    base_results = baseline.get('results', {})
+    for name, result in current['results'].items():
+        base = base_results.get(name)
+        if base is None or not base['value']:
+            rows.append({'name': name, 'baseline': None, 'current': result['value'],
+                         'unit': result['unit'], 'change': None, 'regressed': False})
+            continue
+        change = (result['value'] - base['value']) / base['value']
+        if result['better'] == LOWER:
+            change = -change
+        rows.append({'name': name, 'baseline': base['value'], 'current': result['value'],
+                     'unit': result['unit'], 'change': change, 'regressed': change < -tolerance})
+    for name, base in base_results.items():
+        if name not in current['results']:
+            rows.append({'name': name, 'baseline': base['value'], 'current': None,
+                         'unit': base['unit'], 'change': None, 'regressed': False})
+    return rows
+
+
+def print_results(results: dict, rows: Optional[List[dict]] = None):
+    """Table of every metric, with the change against the baseline if there is one"""
+    if rows is None:
+        for name, result in results['results'].items():
+            print(f"  {name:18s} {result['value']:>14,.3f} {result['unit']}")
+        return
+    for row in rows:
+        current = f"{row['current']:,.3f}" if row['current'] is not None else "-"
+        baseline = f"{row['baseline']:,.3f}" if row['baseline'] is not None else "-"
+        change = f"{row['change'] * 100:+.1f}%" if row['change'] is not None else ""
+        flag = "  REGRESSED" if row['regressed'] else ""
+        print(f"  {row['name']:18s} {current:>14s} {row['unit']:12s} "
+              f"baseline {baseline:>14s} {change:>8s}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dash benchmark suite")
+    parser.add_argument('--only', help=f"Comma-separated benchmarks ({', '.join(BENCHMARKS)})")
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per benchmark; best is kept')
+    parser.add_argument('--quick', action='store_true', help='Smaller workloads, for a smoke test')
+    parser.add_argument('--output', help='Write results to this JSON file')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON to compare with')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='Store these results as the baseline instead of comparing')
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help='Fraction a metric may be worse than the baseline')
+    args = parser.parse_args()
+
+    names = args.only.split(',') if args.only else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"Unknown benchmarks: {', '.join(unknown)}")
+
+    results = run(names, args.repeat, args.quick)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        print_results(results)
+        return
+
+    try:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        print(f"No baseline at {args.baseline} (record one with --save-baseline)")
+        print_results(results)
+        return
+
+    if baseline['meta'].get('quick') != args.quick:
+        print("Warning: baseline and this run used different workload sizes (--quick)")
+    rows = compare(results, baseline, args.tolerance)
+    print(f"Against {args.baseline} ({baseline['meta']['machine']}, {baseline['meta']['time']}):")
+    print_results(results, rows)
+    regressed = [row['name'] for row in rows if row['regressed']]
+    if regressed:
+        print(f"{len(regressed)} regressed by more than {args.tolerance * 100:.0f}%: "
+              f"{', '.join(regressed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,11 +4,69 @@ Main entry point for the Dash Game
 Supports both Raspberry Pi and Windows development environments
 """
 
+import time
+
+# Measured from as early as possible, for the dash-visible time below
+START_TIME = time.perf_counter()
+
 import sys
+import signal
 import platform
 import argparse
 from src.game import DashGame
+from src.config import GameConfig, start_config_watcher
+from src.signal_store import SignalStore
+from src.latency import LatencyTracker
+
+
+def start_services(config, signal_store, latency):
+    """
+    Start CAN ingest, diagnostics, the gauge motors and analog inputs once the first frame is up
+
+    python-can, cantools and the DBC are imported and loaded here rather than
+    at the top of the file, so they don't hold up the first frame.
+
+    Returns:
+        The services that started, each with a stop() method
+
+    Raises:
+        Exception: Whatever stopped a service starting, once those already running are stopped
+    """
+    from src.analog import start_analog_sampler
+    from src.can_reader import start_can_reader
+    from src.diagnostics import start_diagnostics
+    from src.drive_logger import start_drive_logger
+    from src.gauge_driver import start_gauge_driver
+    from src.metrics import start_metrics
+    from src.staleness import start_staleness
+    
+    started = []
 
+    def keep(service):
+        if service:
+            started.append(service)
+
+    try:
+        # Range, efficiency and power are published with the signals they come from
+        start_metrics(config, signal_store)
+        # Attached before the reader so the first frames are logged; writes go out in batches
+        keep(start_drive_logger(config, signal_store))
+        keep(start_can_reader(config, signal_store, latency))
+        # LBC cell data is polled on its own socket and thread, so it never holds up the reader
+        keep(start_diagnostics(config, signal_store))
+        keep(start_gauge_driver(config, signal_store, latency))
+        # MCP3008 inputs are scanned and filtered in the background, published like CAN signals
+        keep(start_analog_sampler(config, signal_store))
+        # Signals that stop arriving are flagged stale: dimmed on the dash, needles parked
+        keep(start_staleness(config, signal_store))
+        # Edits to the config file are picked up live by the services subscribed to them
+        keep(start_config_watcher(config))
+    except Exception:
+        # Stop what already started, so the drive logger writes what it has buffered
+        for service in reversed(started):
+            service.stop()
+        raise
+    return started
 
 def main():
     parser = argparse.ArgumentParser(description="Dash Game")
@@ -16,6 +74,8 @@ def main():
                        help='Run development environment check')
     parser.add_argument('--config', type=str, 
                        help='Path to configuration file')
+    parser.add_argument('--multiprocess', action='store_true',
+                       help='Run CAN ingest, the dash and the gauges as separate processes')
     args = parser.parse_args()
     
     print(f"Starting Dash Game on {platform.system()}")
@@ -27,14 +87,40 @@ def main():
         print(DevUtils.create_deployment_summary())
         return
     
+    config = GameConfig(args.config) if args.config else GameConfig()
+    
+    if args.multiprocess or config.get('processes.enabled', False):
+        from src.supervisor import Supervisor
+        try:
+            Supervisor(config, args.config).run()
+        except KeyboardInterrupt:
+            print("\nStopped by user")
+        return
+    
+    # CAN ingest runs on its own thread and publishes into the store
+    signal_store = SignalStore()
+    latency = LatencyTracker()
+    services = []
+    
+    # kill -USR1 <pid> dumps the latency histograms on a headless Pi
+    if hasattr(signal, 'SIGUSR1'):
+        signal.signal(signal.SIGUSR1, lambda signum, frame: latency.dump("latency.json"))
+    
     try:
-        game = DashGame()
+        game = DashGame(signal_store=signal_store, config=config, latency=latency)
+        # Show the dash first; values fill in once the CAN stack is up
+        game.start()
+        print(f"Dash visible after {(time.perf_counter() - START_TIME) * 1000:.0f} ms")
+        services = start_services(config, signal_store, latency)
         game.run()
     except KeyboardInterrupt:
         print("\nGame interrupted by user")
     except Exception as e:
         print(f"Error starting game: {e}")
         sys.exit(1)
+    finally:
+        for service in reversed(services):
+            service.stop()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,261 @@
+"""
+Background MCP3008 acquisition
+
+One AnalogIn object is created per configured input, and a thread scans
+every input at a fixed rate. Each scan oversamples (several conversions
+averaged), runs the input's filter (moving average, IIR or median) and
+publishes a new dict of values by swapping one reference, so the render loop
+reads the latest pedal, dimmer or sensor value without an SPI round-trip.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, Optional
+
+from .fake_hardware import FakeAnalogIn, FakeMCP3008
+from .platform_utils import load_mcp3xxx, platform_manager
+
+# AnalogIn.value is the 10-bit conversion scaled up to 16 bits
+FULL_SCALE = 65535.0
+
+# Keys an analog.inputs entry may have
+INPUT_SETTINGS = ('channel', 'oversample', 'filter', 'size', 'alpha', 'value_min', 'value_max',
+                  'signal', 'deadband')
+
+
+class MovingAverage:
+    """Mean of the last `size` samples, kept as a running sum"""
+
+    def __init__(self, size: int = 8):
+        self.samples: deque = deque(maxlen=size)
+        self.total = 0.0
+
+    def update(self, value: float) -> float:
+        samples = self.samples
+        if len(samples) == samples.maxlen:
+            self.total -= samples[0]
+        samples.append(value)
+        self.total += value
+        return self.total / len(samples)
+
+
+class ExponentialFilter:
+    """First-order IIR low-pass: y += alpha * (x - y)"""
+
+    def __init__(self, alpha: float = 0.2):
+        self.alpha = alpha
+        self.value: Optional[float] = None
+
+    def update(self, value: float) -> float:
+        if self.value is None:
+            self.value = value
+        else:
+            self.value += self.alpha * (value - self.value)
+        return self.value
+
+
+class MedianFilter:
+    """Median of the last `size` samples; rejects single-sample spikes"""
+
+    def __init__(self, size: int = 5):
+        self.samples: deque = deque(maxlen=size)
+
+    def update(self, value: float) -> float:
+        self.samples.append(value)
+        ordered = sorted(self.samples)
+        middle = len(ordered) // 2
+        if len(ordered) % 2:
+            return ordered[middle]
+        return (ordered[middle - 1] + ordered[middle]) * 0.5
+
+
+def make_filter(kind: Optional[str], size: int = 5, alpha: float = 0.2):
+    """
+    Build a filter by name
+
+    Args:
+        kind: 'average', 'iir', 'median', or None for no filtering
+        size: Window of the average and median filters
+        alpha: Smoothing factor of the IIR filter (0..1, smaller is smoother)
+    """
+    if kind is None or kind == 'none':
+        return None
+    if kind == 'average':
+        return MovingAverage(size)
+    if kind == 'iir':
+        return ExponentialFilter(alpha)
+    if kind == 'median':
+        return MedianFilter(size)
+    raise ValueError(f"Unknown analog filter '{kind}'")
+
+
+class AnalogInput:
+    """One MCP3008 channel and how its readings are conditioned"""
+
+    def __init__(self, name: str, channel: int, oversample: int = 4, filter=None,
+                 value_min: float = 0.0, value_max: float = 1.0,
+                 signal: Optional[str] = None, deadband: float = 0.0):
+        """
+        Args:
+            name: Input name, e.g. 'dimmer'
+            channel: MCP3008 channel, 0-7
+            oversample: Conversions averaged into each sample
+            filter: Filter applied to each sample (see make_filter), or None
+            value_min: Value reported at 0 V
+            value_max: Value reported at full scale
+            signal: Signal name to publish to the signal store (None to not publish)
+            deadband: Smallest change in value worth publishing
+        """
+        if not 0 <= channel <= 7:
+            raise ValueError(f"MCP3008 channel must be 0-7, not {channel}")
+        self.name = name
+        self.channel = channel
+        self.oversample = max(1, oversample)
+        self.filter = filter
+        self.value_min = value_min
+        self.value_max = value_max
+        self.signal = signal
+        self.deadband = deadband
+        self.published: Optional[float] = None
+
+    def process(self, raw_total: int) -> float:
+        """Turn the sum of one scan's conversions into a filtered, scaled value"""
+        level = raw_total / (self.oversample * FULL_SCALE)
+        if self.filter is not None:
+            level = self.filter.update(level)
+        return self.value_min + level * (self.value_max - self.value_min)
+
+
+class AnalogSampler(threading.Thread):
+    """Scans MCP3008 inputs at a fixed rate and keeps the latest values"""
+
+    def __init__(self, mcp, inputs: Iterable[AnalogInput], rate_hz: float = 100.0,
+                 analog_in: Callable = FakeAnalogIn, store=None):
+        """
+        Args:
+            mcp: MCP3008 object (adafruit_mcp3xxx or FakeMCP3008)
+            inputs: Inputs to scan
+            rate_hz: Scans per second
+            analog_in: AnalogIn class matching mcp
+            store: SignalStore that inputs with a signal name are published to
+        """
+        super().__init__(name="AnalogSampler", daemon=True)
+        self.inputs = list(inputs)
+        self.period = 1.0 / rate_hz
+        self.store = store
+        # One channel object per input for the life of the sampler
+        self._pins = [analog_in(mcp, getattr(mcp, f'P{i.channel}')) for i in self.inputs]
+        self.values: Dict[str, float] = {}
+        self.scans = 0
+        self.read_errors = 0
+        self._stop_event = threading.Event()
+
+    def get(self, name: str, default: Optional[float] = None) -> Optional[float]:
+        """Latest filtered value of an input (a dict lookup, never SPI)"""
+        return self.values.get(name, default)
+
+    def scan(self) -> Dict[str, float]:
+        """Read every input once, oversampled, and publish the results"""
+        values = dict(self.values)
+        changed = {}
+        for analog_input, pin in zip(self.inputs, self._pins):
+            try:
+                total = 0
+                for _ in range(analog_input.oversample):
+                    total += pin.value
+            except Exception as e:
+                self.read_errors += 1
+                print(f"Error reading analog channel {analog_input.channel}: {e}")
+                continue
+            value = analog_input.process(total)
+            values[analog_input.name] = value
+            if analog_input.signal and (analog_input.published is None or
+                                        abs(value - analog_input.published) > analog_input.deadband):
+                analog_input.published = value
+                changed[analog_input.signal] = value
+        # Readers see either the old dict or the new one, never a half-updated one
+        self.values = values
+        self.scans += 1
+        if changed and self.store is not None:
+            self.store.update(changed)
+        return values
+
+    def run(self):
+        """Thread body: fixed-rate scan loop"""
+        next_tick = time.monotonic()
+        try:
+            while not self._stop_event.is_set():
+                self.scan()
+                next_tick += self.period
+                delay = next_tick - time.monotonic()
+                if delay > 0:
+                    self._stop_event.wait(delay)
+                else:
+                    # Fell behind; don't try to catch up with a burst of scans
+                    next_tick = time.monotonic()
+        except Exception as e:
+            print(f"Analog sampler stopped: {e}")
+
+    def stop(self, timeout: Optional[float] = 1.0):
+        """Stop scanning and wait for the thread"""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+
+    @classmethod
+    def from_config(cls, config, mcp, analog_in: Callable = FakeAnalogIn,
+                    store=None) -> 'AnalogSampler':
+        """
+        Build a sampler from the 'analog' config section
+
+        Each entry of analog.inputs maps an input name to its channel, oversample,
+        filter ('average', 'iir', 'median'), size, alpha, value_min, value_max,
+        signal and deadband. Unknown keys are ignored, and an input that can't be
+        built (e.g. a channel outside 0-7) is skipped with a warning.
+        """
+        inputs = []
+        for name, settings in config.get('analog.inputs', {}).items():
+            settings = dict(settings)
+            for key in list(settings):
+                if key not in INPUT_SETTINGS:
+                    print(f"Unknown setting {key} for analog input {name}, ignored")
+                    del settings[key]
+            try:
+                filter = make_filter(settings.pop('filter', None), settings.pop('size', 5),
+                                     settings.pop('alpha', 0.2))
+                inputs.append(AnalogInput(name, filter=filter, **settings))
+            except (TypeError, ValueError) as e:
+                print(f"Error in analog input {name}: {e}, skipping it")
+        return cls(mcp, inputs, rate_hz=config.get('analog.rate_hz', 100), analog_in=analog_in,
+                   store=store)
+
+
+def create_mcp3008():
+    """
+    Open the MCP3008 on SPI, or a FakeMCP3008 off the Pi
+
+    Returns:
+        (mcp, AnalogIn class)
+    """
+    if platform_manager.mcp is not None or platform_manager.initialize_spi():
+        return platform_manager.mcp, load_mcp3xxx().AnalogIn
+    print("MCP3008 not available, using FakeMCP3008")
+    return FakeMCP3008(), FakeAnalogIn
+
+
+def start_analog_sampler(config, store=None) -> Optional[AnalogSampler]:
+    """
+    Start analog acquisition from the 'analog' config section
+
+    Returns:
+        The running sampler, or None if analog inputs are disabled
+    """
+    if not config.get('analog.enabled', False):
+        return None
+    mcp, analog_in = create_mcp3008()
+    sampler = AnalogSampler.from_config(config, mcp, analog_in, store)
+    sampler.start()
+    print(f"Analog sampler scanning {len(sampler.inputs)} inputs at "
+          f"{1.0 / sampler.period:.0f} Hz")
+    return sampler
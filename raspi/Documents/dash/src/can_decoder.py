@@ -0,0 +1,274 @@
+"""
+Precompiled per-ID CAN decoder table
+
+Builds one extractor per DBC signal up front (struct unpack + shift/mask +
+scale/offset) so the receive loop only does a dict lookup and a few integer
+operations per frame, and only for the signals somebody subscribed to.
+"""
+
+import os
+import struct
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .dbc_cache import CANTOOLS_AVAILABLE, load_dbc
+
+
+# DBC files live next to the CAN scripts
+DBC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'canbus')
+CAR_CAN_DBC = os.path.join(DBC_DIR, 'CAR-can_AZE0_fixed.dbc')
+EV_CAN_DBC = os.path.join(DBC_DIR, 'EV-can_ZE0.dbc')
+
+_LITTLE = struct.Struct('<Q')
+_BIG = struct.Struct('>Q')
+_PADDING = bytes(8)
+
+Extractor = Callable[[int, int], object]
+
+
+def signal_layout(signal) -> Tuple[bool, int]:
+    """
+    Where a signal sits in the 64-bit payload
+
+    Returns:
+        (use_big, shift): whether to read the payload as a big-endian integer,
+        and the right shift that brings the signal's LSB to bit 0
+    """
+    if signal.byte_order == 'little_endian':
+        return False, signal.start
+    # Motorola: start is the MSB in DBC sawtooth numbering; convert it to
+    # a position counted from the MSB of the whole 64-bit frame
+    msb = (signal.start // 8) * 8 + (7 - signal.start % 8)
+    return True, 63 - (msb + signal.length - 1)
+
+
+def compile_signal(signal) -> Extractor:
+    """
+    Compile a cantools signal into an extractor
+
+    The extractor takes the frame payload as little-endian and big-endian
+    64-bit integers and returns the scaled physical value, matching
+    cantools' decode_message(..., decode_choices=False).
+    """
+    length = signal.length
+    mask = (1 << length) - 1
+    sign_bit = 1 << (length - 1)
+    wrap = 1 << length
+    is_signed = signal.is_signed
+    scale = signal.scale
+    offset = signal.offset
+    identity = scale == 1 and offset == 0
+
+    use_big, shift = signal_layout(signal)
+
+    if signal.is_float:
+        fmt = struct.Struct('<f' if length == 32 else '<d')
+        pack = struct.Struct('<I' if length == 32 else '<Q')
+
+        def extract(little: int, big: int):
+            raw = ((big if use_big else little) >> shift) & mask
+            return fmt.unpack(pack.pack(raw))[0] * scale + offset
+        return extract
+
+    if use_big:
+        if is_signed:
+            def extract(little: int, big: int):
+                raw = (big >> shift) & mask
+                if raw & sign_bit:
+                    raw -= wrap
+                return raw * scale + offset
+        elif identity:
+            def extract(little: int, big: int):
+                return (big >> shift) & mask
+        else:
+            def extract(little: int, big: int):
+                return ((big >> shift) & mask) * scale + offset
+    else:
+        if is_signed:
+            def extract(little: int, big: int):
+                raw = (little >> shift) & mask
+                if raw & sign_bit:
+                    raw -= wrap
+                return raw * scale + offset
+        elif identity:
+            def extract(little: int, big: int):
+                return (little >> shift) & mask
+        else:
+            def extract(little: int, big: int):
+                return ((little >> shift) & mask) * scale + offset
+    return extract
+
+
+class MessageDecoder:
+    """Decodes the subscribed signals of a single message"""
+
+    def __init__(self, message):
+        self.message = message
+        self.frame_id = message.frame_id
+        self.name = message.name
+        self._compiled: Dict[str, Extractor] = {}
+        self._mux: Dict[str, Tuple[str, Tuple[int, ...]]] = {}
+
+        for signal in message.signals:
+            self._compiled[signal.name] = compile_signal(signal)
+            if signal.multiplexer_ids:
+                self._mux[signal.name] = (signal.multiplexer_signal,
+                                          tuple(signal.multiplexer_ids))
+
+        # (name, extractor) for plain signals, (name, extractor, mux extractor, ids) for muxed
+        self._plain: List[Tuple[str, Extractor]] = []
+        self._muxed: List[Tuple[str, Extractor, Extractor, Tuple[int, ...]]] = []
+        # Published name -> DBC signal name; they differ for namespaced signals
+        self.subscribed: Dict[str, str] = {}
+
+    @property
+    def signal_names(self) -> List[str]:
+        """All signal names defined for this message"""
+        return list(self._compiled)
+
+    def subscribe(self, names: Iterable[str]):
+        """Add signals to the set this decoder extracts"""
+        self.subscribe_as({name: name for name in names})
+
+    def subscribe_as(self, names: Dict[str, str]):
+        """
+        Add signals, each decoded under its own published name
+
+        Args:
+            names: Published name -> DBC signal name, e.g. {'ev.MotorTemperature': 'MotorTemperature'}
+        """
+        for published, name in names.items():
+            if name not in self._compiled:
+                raise KeyError(f"Signal {name} not in message {self.name}")
+            self.subscribed[published] = name
+        self._rebuild()
+
+    def _rebuild(self):
+        """Rebuild the flat extractor lists used on the hot path"""
+        plain = []
+        muxed = []
+        for published, name in self.subscribed.items():
+            if name in self._mux:
+                mux_name, ids = self._mux[name]
+                muxed.append((published, self._compiled[name], self._compiled[mux_name], ids))
+            else:
+                plain.append((published, self._compiled[name]))
+        self._plain = plain
+        self._muxed = muxed
+
+    def decode(self, data: bytes) -> Dict[str, object]:
+        """Decode the subscribed signals from a frame payload"""
+        if len(data) < 8:
+            data = bytes(data) + _PADDING[len(data):]
+        little = _LITTLE.unpack_from(data)[0]
+        big = _BIG.unpack_from(data)[0]
+
+        values = {name: extract(little, big) for name, extract in self._plain}
+        for name, extract, mux_extract, ids in self._muxed:
+            if mux_extract(little, big) in ids:
+                values[name] = extract(little, big)
+        return values
+
+
+class DecoderTable:
+    """Maps arbitration IDs to precompiled message decoders"""
+
+    def __init__(self, db, signals: Optional[Iterable[str]] = None):
+        """
+        Build the table from a loaded cantools database
+
+        Args:
+            db: cantools Database
+            signals: Signal names to subscribe to (default: none)
+        """
+        self.db = db
+        self._all: Dict[int, MessageDecoder] = {}
+        self._by_signal: Dict[str, MessageDecoder] = {}
+
+        for message in db.messages:
+            if message.length == 0:
+                continue
+            decoder = MessageDecoder(message)
+            self._all[message.frame_id] = decoder
+            for name in decoder.signal_names:
+                self._by_signal.setdefault(name, decoder)
+
+        # Only IDs with at least one subscribed signal are decoded
+        self._active: Dict[int, MessageDecoder] = {}
+
+        if signals:
+            self.subscribe(signals)
+
+    @classmethod
+    def from_file(cls, dbc_file: str, signals: Optional[Iterable[str]] = None) -> 'DecoderTable':
+        """Load a DBC file (parsed once, then from the cache) and build a table from it"""
+        return cls(load_dbc(dbc_file), signals)
+
+    def subscribe(self, names: Iterable[str]) -> Set[int]:
+        """
+        Subscribe to signals by name
+
+        Returns:
+            Set of arbitration IDs that now have subscribed signals
+        """
+        return self.subscribe_as({name: name for name in names})
+
+    def subscribe_as(self, names: Dict[str, str]) -> Set[int]:
+        """
+        Subscribe to signals, publishing each under its own name
+
+        Args:
+            names: Published name -> DBC signal name
+
+        Returns:
+            Set of arbitration IDs that now have subscribed signals
+        """
+        grouped: Dict[int, Dict[str, str]] = {}
+        for published, name in names.items():
+            decoder = self._by_signal.get(name)
+            if decoder is None:
+                raise KeyError(f"Signal {name} not found in DBC")
+            grouped.setdefault(decoder.frame_id, {})[published] = name
+
+        for frame_id, frame_signals in grouped.items():
+            decoder = self._all[frame_id]
+            decoder.subscribe_as(frame_signals)
+            self._active[frame_id] = decoder
+
+        return set(grouped)
+
+    def has_signal(self, name: str) -> bool:
+        """Whether the DBC defines a signal"""
+        return name in self._by_signal
+
+    @property
+    def signal_names(self) -> Set[str]:
+        """Every signal the DBC defines"""
+        return set(self._by_signal)
+
+    def subscribe_message(self, frame_id: int) -> MessageDecoder:
+        """Subscribe to every signal in a message"""
+        decoder = self._all[frame_id]
+        decoder.subscribe(decoder.signal_names)
+        self._active[frame_id] = decoder
+        return decoder
+
+    @property
+    def subscribed(self) -> Set[str]:
+        """Names of the subscribed signals"""
+        return {name for decoder in list(self._active.values()) for name in decoder.subscribed}
+
+    @property
+    def ids(self) -> Set[int]:
+        """Arbitration IDs with subscribed signals"""
+        return set(self._active)
+
+    def get(self, frame_id: int) -> Optional[MessageDecoder]:
+        """Get the active decoder for an ID, or None if nothing is subscribed"""
+        return self._active.get(frame_id)
+
+    def decode(self, frame_id: int, data: bytes) -> Optional[Dict[str, object]]:
+        """Decode subscribed signals, or return None for IDs we don't care about"""
+        decoder = self._active.get(frame_id)
+        if decoder is None:
+            return None
+        return decoder.decode(data)
@@ -0,0 +1,163 @@
+"""
+Background CAN reader that feeds the signal store
+
+Runs one CanIngestService event loop for every bus on a thread of its own,
+so the render loop never waits on the bus, and the reader never waits on
+rendering. On socketcan the loop watches each bus's socket directly, so two
+buses cost one thread, not one each.
+"""
+
+import asyncio
+import threading
+from typing import Dict, Optional, Union
+
+from .can_bus import BusIngest, CAN_AVAILABLE
+from .can_decoder import DecoderTable, CANTOOLS_AVAILABLE
+from .can_service import CanIngestService
+from .latency import LatencyTracker
+from .multi_bus import MultiBusDecoder, bus_configs
+from .signal_store import SignalStore
+
+
+class CanReader(threading.Thread):
+    """Reads, decodes and publishes CAN signals from one or more buses until stopped"""
+
+    def __init__(self, ingests: Dict[str, BusIngest],
+                 decoders: Union[DecoderTable, MultiBusDecoder], store: SignalStore,
+                 latency: Optional[LatencyTracker] = None, name: str = "CanReader"):
+        """
+        Args:
+            ingests: Open bus ingest by bus name, each filtered to its bus's IDs
+            decoders: Decoder table for a single bus, or a MultiBusDecoder whose
+                bus names are the keys of ingests
+            store: Store the decoded values are published to
+            latency: Records decode and store latency if given
+            name: Thread name
+        """
+        super().__init__(name=name, daemon=True)
+        self.ingests = ingests
+        self.decoders = decoders
+        self.store = store
+        self.service = CanIngestService([ingest.bus for ingest in ingests.values()], decoders,
+                                        store, latency)
+
+    @property
+    def decode_errors(self) -> int:
+        return self.service.decode_errors
+
+    def _ids(self, bus: str):
+        """IDs a bus's ingest should receive"""
+        if isinstance(self.decoders, MultiBusDecoder):
+            return self.decoders.ids(bus)
+        return self.decoders.ids
+
+    def resubscribe(self, names):
+        """
+        Start decoding more signals while running
+
+        Signals dropped from the list keep being decoded until a restart, and
+        only buses that were opened at startup can gain signals.
+        """
+        subscribed = self.decoders.subscribed
+        wanted = [name for name in names if name not in subscribed]
+        if not wanted:
+            return
+        for name in wanted:
+            try:
+                self.decoders.subscribe([name])
+            except KeyError as e:
+                print(f"Error subscribing to {name}: {e}")
+        for bus, ingest in self.ingests.items():
+            ingest.set_ids(self._ids(bus))
+
+    def apply_config(self, config, changed=None):
+        """Config subscriber for can.signals"""
+        self.resubscribe(config.get('can.signals', []))
+
+    def run(self):
+        """Thread body"""
+        try:
+            asyncio.run(self.service.run())
+        except Exception as e:
+            print(f"CAN reader stopped: {e}")
+        finally:
+            for ingest in self.ingests.values():
+                ingest.close()
+
+    def stop(self, timeout: Optional[float] = 1.0):
+        """Ask the thread to stop and wait for it"""
+        self.service.stop()
+        if self.is_alive():
+            self.join(timeout)
+
+
+def start_multi_bus_reader(config, store: SignalStore,
+                           latency: Optional[LatencyTracker] = None) -> Optional[CanReader]:
+    """
+    Start one reader for every bus in can.buses
+
+    Buses with nothing subscribed aren't opened, and a bus that fails to open
+    is skipped so the others still run.
+    """
+    try:
+        decoders = MultiBusDecoder.from_buses(bus_configs(config), config.get('can.prefer', []),
+                                              config.get('can.signals', []))
+    except Exception as e:
+        print(f"Error starting CAN reader: {e}")
+        return None
+
+    ingests = {}
+    for bus in bus_configs(config):
+        ids = decoders.ids(bus.name)
+        if not ids:
+            continue
+        try:
+            ingest = BusIngest(ids, channel=bus.channel, interface=bus.interface)
+            ingest.open()
+        except Exception as e:
+            print(f"Error opening {bus.name} bus on {bus.channel}: {e}")
+            continue
+        ingests[bus.name] = ingest
+    if not ingests:
+        return None
+
+    reader = CanReader(ingests, decoders, store, latency=latency)
+    config.subscribe(reader.apply_config, ['can.signals'])
+    reader.start()
+    for name, ingest in ingests.items():
+        print(f"CAN reader listening on {ingest.channel} ({name})")
+    return reader
+
+
+def start_can_reader(config, store: SignalStore,
+                     latency: Optional[LatencyTracker] = None) -> Optional[CanReader]:
+    """
+    Start a CAN reader from the 'can' section of the game config
+
+    Returns:
+        The running CanReader (over every bus in can.buses when that is set),
+        or None if CAN is disabled or unavailable
+    """
+    if not config.get('can.enabled', False):
+        return None
+    if not CAN_AVAILABLE or not CANTOOLS_AVAILABLE:
+        print("python-can/cantools not available, running without CAN")
+        return None
+    if config.get('can.buses', []):
+        return start_multi_bus_reader(config, store, latency)
+
+    try:
+        decoders = DecoderTable.from_file(config.get('can.dbc'), config.get('can.signals', []))
+        ingest = BusIngest(decoders.ids,
+                           channel=config.get('can.channel', 'can0'),
+                           interface=config.get('can.interface', 'socketcan'))
+        ingest.open()
+    except Exception as e:
+        print(f"Error starting CAN reader: {e}")
+        return None
+
+    reader = CanReader({'can': ingest}, decoders, store, latency=latency)
+    config.subscribe(reader.apply_config, ['can.signals'])
+    reader.start()
+    print(f"CAN reader listening on {ingest.channel}")
+    return reader
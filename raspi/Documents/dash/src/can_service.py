@@ -0,0 +1,278 @@
+"""
+Asyncio CAN ingest service
+
+One event loop reads the bus (or several, routed by channel through a
+MultiBusDecoder) through python-can's Notifier (which watches the socketcan
+file descriptors directly, no reader thread), decodes each frame once
+and fans the decoded signals out to any number of subscribers, e.g. the
+dashboard, the gauge motors and a logger. The dash runs it on a thread of
+its own through can_reader.CanReader.
+"""
+
+import asyncio
+import time
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional
+
+try:
+    import can
+    CAN_AVAILABLE = True
+except ImportError:
+    CAN_AVAILABLE = False
+
+from .can_decoder import DecoderTable
+from .latency import LatencyTracker
+from .signal_store import SignalStore
+
+
+# What a subscriber's queue does when it is full
+POLICY_BLOCK = 'block'              # Backpressure: ingest waits for the subscriber
+POLICY_DROP_OLDEST = 'drop_oldest'  # Discard the oldest queued update
+POLICIES = (POLICY_BLOCK, POLICY_DROP_OLDEST)
+
+
+class SignalUpdate(NamedTuple):
+    """Decoded signals from one frame"""
+    frame_id: int
+    values: Dict[str, object]
+    timestamp: float
+
+
+class SubscriberLag(NamedTuple):
+    """How far behind a subscriber is"""
+    queued: int
+    delivered: int
+    dropped: int
+    lag_seconds: float
+
+
+class Subscription:
+    """A subscriber's bounded queue of decoded updates"""
+
+    def __init__(self, service: 'CanIngestService', name: str,
+                 signals: Optional[FrozenSet[str]], maxsize: int, policy: str):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown queue policy {policy}")
+        self.service = service
+        self.name = name
+        self.signals = signals
+        self.policy = policy
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.delivered = 0
+        self.dropped = 0
+        self.last_timestamp = 0.0
+
+    def _filter(self, update: SignalUpdate) -> Optional[SignalUpdate]:
+        """Trim an update down to the signals this subscriber wants"""
+        if self.signals is None:
+            return update
+        values = {k: v for k, v in update.values.items() if k in self.signals}
+        if not values:
+            return None
+        return SignalUpdate(update.frame_id, values, update.timestamp)
+
+    async def _put(self, update: SignalUpdate):
+        """Queue an update according to the subscriber's policy"""
+        update = self._filter(update)
+        if update is None:
+            return
+        if self.policy == POLICY_BLOCK:
+            await self.queue.put(update)
+            return
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(update)
+
+    async def get(self) -> SignalUpdate:
+        """Wait for the next update"""
+        update = await self.queue.get()
+        self.delivered += 1
+        self.last_timestamp = update.timestamp
+        return update
+
+    def get_nowait(self) -> Optional[SignalUpdate]:
+        """Get the next update if one is queued"""
+        try:
+            update = self.queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return None
+        self.delivered += 1
+        self.last_timestamp = update.timestamp
+        return update
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> SignalUpdate:
+        return await self.get()
+
+    def lag(self) -> SubscriberLag:
+        """Queue depth, counters, and bus time between newest published and last consumed"""
+        queued = self.queue.qsize()
+        lag_seconds = 0.0
+        if queued:
+            lag_seconds = max(0.0, self.service.latest_timestamp - self.last_timestamp)
+        return SubscriberLag(queued, self.delivered, self.dropped, lag_seconds)
+
+    def close(self):
+        """Stop receiving updates"""
+        self.service.unsubscribe(self)
+
+
+class CanIngestService:
+    """Reads, decodes and fans out CAN signals on a single event loop"""
+
+    def __init__(self, bus, decoders, store: Optional[SignalStore] = None,
+                 latency: Optional[LatencyTracker] = None):
+        """
+        Args:
+            bus: Open python-can bus, ideally filtered to decoders.ids, or a list
+                of buses when decoders is a MultiBusDecoder
+            decoders: Decoder table with the wanted signals subscribed, or a
+                MultiBusDecoder, which routes each frame by its channel
+            store: Optional latest-value store to publish into as well
+            latency: Records decode and store latency if given
+        """
+        self.bus = bus
+        self.decoders = decoders
+        # Decoder table by channel when several buses share the loop
+        self._routes: Optional[Dict[str, DecoderTable]] = (
+            decoders.routes() if hasattr(decoders, 'routes') else None)
+        self.store = store
+        self.latency = latency
+        self.subscribers: List[Subscription] = []
+        self.latest_timestamp = 0.0
+        self.frames = 0
+        self.batches = 0
+        self.decode_errors = 0
+        self._reader = None
+        self._notifier = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop_requested = False
+
+    def subscribe(self, name: str, signals: Optional[Iterable[str]] = None,
+                  maxsize: int = 100, policy: str = POLICY_DROP_OLDEST) -> Subscription:
+        """
+        Add a subscriber
+
+        Args:
+            name: Name used in lag reports
+            signals: Signal names to receive (default: all decoded signals)
+            maxsize: Queue bound
+            policy: POLICY_BLOCK or POLICY_DROP_OLDEST
+        """
+        subscription = Subscription(self, name,
+                                    frozenset(signals) if signals is not None else None,
+                                    maxsize, policy)
+        self.subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """Remove a subscriber"""
+        if subscription in self.subscribers:
+            self.subscribers.remove(subscription)
+
+    def lag_report(self) -> Dict[str, SubscriberLag]:
+        """Per-subscriber lag"""
+        return {sub.name: sub.lag() for sub in self.subscribers}
+
+    async def publish(self, updates: List[SignalUpdate]):
+        """Push decoded updates to the store and every subscriber"""
+        if not updates:
+            return
+        self.batches += 1
+        latency = self.latency
+        if latency is not None:
+            latency.record_batch('decode', (u.timestamp for u in updates))
+        if self.store is not None:
+            self.store.update_batch([(u.values, u.timestamp) for u in updates])
+            if latency is not None:
+                latency.record_batch('store', (u.timestamp for u in updates))
+        for update in updates:
+            if update.timestamp > self.latest_timestamp:
+                self.latest_timestamp = update.timestamp
+            for subscription in self.subscribers:
+                await subscription._put(update)
+
+    def _decode(self, message) -> Optional[SignalUpdate]:
+        """Decode one frame"""
+        self.frames += 1
+        decoders = self.decoders
+        if self._routes is not None:
+            decoders = self._routes.get(message.channel)
+            if decoders is None:
+                return None
+        try:
+            values = decoders.decode(message.arbitration_id, message.data)
+        except Exception as e:
+            self.decode_errors += 1
+            print(f"Error decoding message {hex(message.arbitration_id)}: {e}")
+            return None
+        if not values:
+            return None
+        return SignalUpdate(message.arbitration_id, values, message.timestamp)
+
+    async def run(self):
+        """Read until stop() is called"""
+        if not CAN_AVAILABLE:
+            raise ImportError("python-can is required for the ingest service")
+
+        self._loop = asyncio.get_running_loop()
+        self._reader = can.AsyncBufferedReader()
+        self._notifier = can.Notifier(self.bus, [self._reader], timeout=0.1, loop=self._loop)
+        buffer = self._reader.buffer
+        # stop() may have come from another thread before the loop was known
+        if self._stop_requested:
+            buffer.put_nowait(None)
+        try:
+            while True:
+                message = await buffer.get()
+                if message is None:
+                    break
+
+                # Drain whatever else arrived so subscribers see one burst
+                updates = []
+                while message is not None:
+                    update = self._decode(message)
+                    if update is not None:
+                        updates.append(update)
+                    try:
+                        message = buffer.get_nowait()
+                    except asyncio.QueueEmpty:
+                        message = None
+                    else:
+                        if message is None:
+                            buffer.put_nowait(None)
+                            break
+
+                await self.publish(updates)
+        finally:
+            self._notifier.stop()
+            self._notifier = None
+            self._loop = None
+
+    def _wake(self):
+        """Put the end marker in the buffer run() waits on"""
+        if self._reader is not None:
+            self._reader.buffer.put_nowait(None)
+
+    def stop(self):
+        """Stop run(); safe to call from any thread, before or after run() starts"""
+        self._stop_requested = True
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            loop.call_soon_threadsafe(self._wake)
+        except RuntimeError:
+            # The loop already closed, so run() has finished
+            pass
+
+
+async def log_lag(service: CanIngestService, interval: float = 5.0):
+    """Print the lag report periodically"""
+    while True:
+        await asyncio.sleep(interval)
+        for name, lag in service.lag_report().items():
+            print(f"[{time.strftime('%H:%M:%S')}] {name}: queued={lag.queued} "
+                  f"dropped={lag.dropped} lag={lag.lag_seconds * 1000:.1f}ms")
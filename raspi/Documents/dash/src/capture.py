@@ -0,0 +1,350 @@
+"""
+Compact binary CAN capture format with memory-mapped replay
+
+A capture is a small header naming the DBC the traffic belongs to, followed
+by fixed-size 24-byte records:
+
+    timestamp  float64   bus timestamp in seconds
+    id         uint32    arbitration ID
+    dlc        uint8     data length
+    flags      uint8     FLAG_* bits
+    (2 bytes padding)
+    data       8 bytes   payload, zero padded
+
+Fixed-size records mean the reader can mmap the file and index or iterate it
+without parsing, and replay hours of driving through the decode pipeline in
+seconds.
+"""
+
+import mmap
+import os
+import struct
+import time
+from typing import Callable, Iterator, NamedTuple, Optional
+
+try:
+    import can
+    CAN_AVAILABLE = True
+except ImportError:
+    CAN_AVAILABLE = False
+
+
+MAGIC = b'D52CAP\x00\x00'
+VERSION = 1
+
+# magic, version, record size, header size
+HEADER = struct.Struct('<8sHHI')
+RECORD = struct.Struct('<dIBB2x8s')
+
+FLAG_EXTENDED = 0x01
+FLAG_REMOTE = 0x02
+FLAG_ERROR = 0x04
+
+
+class Frame(NamedTuple):
+    """One captured frame"""
+    timestamp: float
+    arbitration_id: int
+    dlc: int
+    flags: int
+    data: bytes
+
+    @property
+    def payload(self) -> bytes:
+        """Data trimmed to the DLC"""
+        return self.data[:self.dlc]
+
+
+class CaptureFormatError(ValueError):
+    """The file is not a capture this version understands"""
+
+
+def _header_bytes(dbc_name: str) -> bytes:
+    name = dbc_name.encode('utf-8')
+    size = HEADER.size + 2 + len(name)
+    # Records start on an 8-byte boundary
+    size = (size + 7) & ~7
+    header = HEADER.pack(MAGIC, VERSION, RECORD.size, size) + struct.pack('<H', len(name)) + name
+    return header.ljust(size, b'\x00')
+
+
+class CaptureWriter:
+    """Appends frames to a capture file in large buffered writes"""
+
+    def __init__(self, path: str, dbc_name: str = '', flush_every: int = 4096):
+        """
+        Args:
+            path: File to create
+            dbc_name: DBC file the traffic should be decoded with
+            flush_every: Records buffered in memory between writes
+        """
+        self.path = path
+        self.dbc_name = dbc_name
+        self.flush_every = flush_every
+        self.count = 0
+        self._buffer = bytearray()
+        self._pending = 0
+        self._file = open(path, 'wb')
+        self._file.write(_header_bytes(dbc_name))
+
+    def write_frame(self, timestamp: float, arbitration_id: int, data: bytes,
+                    flags: int = 0):
+        """Append one frame"""
+        self._buffer += RECORD.pack(timestamp, arbitration_id, len(data), flags, bytes(data))
+        self.count += 1
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self.flush()
+
+    def write(self, message):
+        """Append a python-can Message"""
+        flags = 0
+        if message.is_extended_id:
+            flags |= FLAG_EXTENDED
+        if message.is_remote_frame:
+            flags |= FLAG_REMOTE
+        if message.is_error_frame:
+            flags |= FLAG_ERROR
+        self.write_frame(message.timestamp, message.arbitration_id, bytes(message.data), flags)
+
+    # Lets the writer be passed straight to a can.Notifier
+    on_message_received = write
+    __call__ = write
+
+    def flush(self):
+        """Write buffered records to disk"""
+        if self._buffer:
+            self._file.write(self._buffer)
+            self._buffer = bytearray()
+            self._pending = 0
+        self._file.flush()
+
+    def close(self):
+        """Flush and close the file"""
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+
+    stop = close
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class CaptureReader:
+    """Memory-mapped, random-access view of a capture file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise CaptureFormatError(f"{path} is empty")
+
+        if len(self._mmap) < HEADER.size + 2:
+            self.close()
+            raise CaptureFormatError(f"{path} is too short to be a capture")
+        magic, version, record_size, header_size = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self.close()
+            raise CaptureFormatError(f"{path} is not a capture file")
+        if version != VERSION or record_size != RECORD.size:
+            self.close()
+            raise CaptureFormatError(f"{path} is capture version {version}, expected {VERSION}")
+
+        (name_length,) = struct.unpack_from('<H', self._mmap, HEADER.size)
+        start = HEADER.size + 2
+        self.dbc_name = bytes(self._mmap[start:start + name_length]).decode('utf-8')
+        self.header_size = header_size
+        # A partially written final record (e.g. power cut) is ignored
+        self.count = (len(self._mmap) - header_size) // RECORD.size
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index: int) -> Frame:
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        return Frame(*RECORD.unpack_from(self._mmap, self.header_size + index * RECORD.size))
+
+    @property
+    def records(self) -> memoryview:
+        """The raw record bytes, for bulk consumers such as NumPy"""
+        end = self.header_size + self.count * RECORD.size
+        return memoryview(self._mmap)[self.header_size:end]
+
+    def iter_frames(self, start: int = 0) -> Iterator[Frame]:
+        """Iterate frames from an index onwards"""
+        # unpack_from doesn't hold a buffer export, so close() is never blocked
+        unpack_from = RECORD.unpack_from
+        data = self._mmap
+        size = RECORD.size
+        end = self.header_size + self.count * size
+        for offset in range(self.header_size + start * size, end, size):
+            yield Frame(*unpack_from(data, offset))
+
+    def __iter__(self) -> Iterator[Frame]:
+        return self.iter_frames()
+
+    @property
+    def duration(self) -> float:
+        """Seconds between the first and last frame"""
+        if self.count < 2:
+            return 0.0
+        return self[-1].timestamp - self[0].timestamp
+
+    def replay(self, sink: Callable[[Frame], None], speed: Optional[float] = 1.0,
+               sleep: Callable[[float], None] = time.sleep) -> int:
+        """
+        Feed frames to a sink with their original spacing
+
+        Args:
+            sink: Called with each Frame
+            speed: 1.0 for real time, N for N times faster, None or 0 for as fast as possible
+            sleep: Sleep function, replaceable for tests
+
+        Returns:
+            Number of frames replayed
+        """
+        if not speed:
+            count = 0
+            for frame in self.iter_frames():
+                sink(frame)
+                count += 1
+            return count
+
+        count = 0
+        start_wall = time.monotonic()
+        start_bus = None
+        for frame in self.iter_frames():
+            if start_bus is None:
+                start_bus = frame.timestamp
+            due = start_wall + (frame.timestamp - start_bus) / speed
+            delay = due - time.monotonic()
+            if delay > 0:
+                sleep(delay)
+            sink(frame)
+            count += 1
+        return count
+
+    def close(self):
+        """Unmap and close the file"""
+        if getattr(self, '_mmap', None) is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # Something (e.g. a NumPy array from records) still views the
+                # map; it is unmapped once that is garbage collected
+                pass
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def frame_to_message(frame: Frame):
+    """Convert a captured frame back into a python-can Message"""
+    return can.Message(timestamp=frame.timestamp,
+                       arbitration_id=frame.arbitration_id,
+                       is_extended_id=bool(frame.flags & FLAG_EXTENDED),
+                       is_remote_frame=bool(frame.flags & FLAG_REMOTE),
+                       is_error_frame=bool(frame.flags & FLAG_ERROR),
+                       dlc=frame.dlc,
+                       data=frame.payload)
+
+
+def replay_to_bus(reader: CaptureReader, bus, speed: Optional[float] = 1.0) -> int:
+    """Send a capture onto a bus (e.g. vcan0 or a virtual bus) so the live pipeline sees it"""
+    return reader.replay(lambda frame: bus.send(frame_to_message(frame)), speed)
+
+
+def replay_to_store(reader: CaptureReader, decoders, store, batch_size: int = 256) -> int:
+    """Decode a capture as fast as possible straight into a signal store"""
+    decode = decoders.decode
+    updates = []
+    count = 0
+    for frame in reader.iter_frames():
+        decoded = decode(frame.arbitration_id, frame.payload)
+        if decoded:
+            updates.append((decoded, frame.timestamp))
+            if len(updates) >= batch_size:
+                store.update_batch(updates)
+                updates = []
+        count += 1
+    if updates:
+        store.update_batch(updates)
+    return count
+
+
+def record(bus, path: str, dbc_name: str = '', duration: Optional[float] = None) -> int:
+    """
+    Record everything the bus delivers until the duration expires or Ctrl-C
+
+    Returns:
+        Number of frames recorded
+    """
+    deadline = time.monotonic() + duration if duration else None
+    with CaptureWriter(path, dbc_name) as writer:
+        try:
+            while deadline is None or time.monotonic() < deadline:
+                message = bus.recv(0.5)
+                if message is not None:
+                    writer.write(message)
+        except KeyboardInterrupt:
+            pass
+        return writer.count
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Record or replay CAN captures")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    rec = sub.add_parser('record', help='Record a bus to a capture file')
+    rec.add_argument('path')
+    rec.add_argument('--channel', default='can0')
+    rec.add_argument('--interface', default='socketcan')
+    rec.add_argument('--dbc', default='CAR-can_AZE0_fixed.dbc')
+    rec.add_argument('--duration', type=float)
+
+    play = sub.add_parser('replay', help='Replay a capture onto a bus')
+    play.add_argument('path')
+    play.add_argument('--channel', default='vcan0')
+    play.add_argument('--interface', default='socketcan')
+    play.add_argument('--speed', type=float, default=1.0,
+                      help='1 = real time, N = N times faster, 0 = as fast as possible')
+
+    info = sub.add_parser('info', help='Describe a capture file')
+    info.add_argument('path')
+
+    args = parser.parse_args()
+
+    if args.command == 'info':
+        with CaptureReader(args.path) as reader:
+            print(f"{args.path}: {len(reader)} frames, {reader.duration:.1f}s, "
+                  f"DBC {reader.dbc_name or '(none)'}, "
+                  f"{os.path.getsize(args.path) / 1e6:.1f} MB")
+    else:
+        with can.interface.Bus(channel=args.channel, interface=args.interface) as bus:
+            if args.command == 'record':
+                count = record(bus, args.path, os.path.basename(args.dbc), args.duration)
+                print(f"Recorded {count} frames to {args.path}")
+            else:
+                with CaptureReader(args.path) as reader:
+                    count = replay_to_bus(reader, bus, args.speed)
+                print(f"Replayed {count} frames onto {args.channel}")
@@ -1,10 +1,139 @@
 """
 Configuration management for the game
+
+Settings are validated against SCHEMA when loaded, with the typed defaults
+filling anything missing or wrong. accessor() resolves a dotted key once
+and hands back a getter that costs a version check per call. A
+ConfigWatcher polls the file's mtime and reloads it while the dash runs;
+the new settings replace the old in one reference swap, and subscribers are
+told which keys changed. The file's own settings are kept apart from the
+validated copy, so save_config() writes back only what the file held plus
+anything set(), never the defaults.
 """
 
+import copy
 import json
 import os
-from typing import Dict, Any
+import threading
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+# Type of every setting the dash reads; defaults come from get_default_config().
+# An int is accepted where a float is expected.
+SCHEMA: Dict[str, type] = {
+    'display.width': int,
+    'display.height': int,
+    'display.fullscreen': bool,
+    'display.fps': float,
+    'display.idle_fps': float,
+    'display.idle_after': float,
+    'buttons.enabled': bool,
+    'buttons.debounce': float,
+    'buttons.long_press': float,
+    'buttons.double_press': float,
+    'buttons.actions': dict,
+    'can.enabled': bool,
+    'can.channel': str,
+    'can.interface': str,
+    'can.dbc': str,
+    'can.signals': list,
+    'can.buses': list,
+    'can.prefer': list,
+    'gauges.enabled': bool,
+    'gauges.rate_hz': float,
+    'gauges.channels': dict,
+    'analog.enabled': bool,
+    'analog.rate_hz': float,
+    'analog.inputs': dict,
+    'metrics.enabled': bool,
+    'metrics.gid_wh': float,
+    'metrics.window': float,
+    'history.span': float,
+    'processes.enabled': bool,
+    'processes.cores': dict,
+    'hot_reload.enabled': bool,
+    'hot_reload.interval': float,
+    'staleness.enabled': bool,
+    'staleness.timeout_periods': float,
+    'staleness.min_timeout': float,
+    'staleness.default_timeout': float,
+    'staleness.tick': float,
+    'staleness.periods': dict,
+    'logger.enabled': bool,
+    'logger.directory': str,
+    'logger.signals': list,
+    'logger.flush_interval': float,
+    'logger.max_pending': int,
+    'logger.session_gap': float,
+    'logger.mode_signal': str,
+    'logger.max_total_mb': float,
+    'diagnostics.enabled': bool,
+    'diagnostics.channel': str,
+    'diagnostics.interface': str,
+    'diagnostics.timeout': float,
+    'diagnostics.queries': dict,
+    'game.difficulty': str,
+    'game.sound_enabled': bool,
+    'game.debug_mode': bool,
+}
+
+Subscriber = Callable[['GameConfig', Set[str]], None]
+
+
+@lru_cache(maxsize=None)
+def split_key(key: str) -> Tuple[str, ...]:
+    """Dotted key as a tuple of path parts, split once per distinct key"""
+    return tuple(key.split('.'))
+
+
+def lookup(config: Dict[str, Any], keys: Tuple[str, ...], default=None):
+    """Walk a nested dict along a key path"""
+    value = config
+    for k in keys:
+        if isinstance(value, dict) and k in value:
+            value = value[k]
+        else:
+            return default
+    return value
+
+
+def assign(config: Dict[str, Any], keys: Tuple[str, ...], value):
+    """Set a value in a nested dict along a key path, adding dicts as needed"""
+    parent = config
+    for k in keys[:-1]:
+        if not isinstance(parent.get(k), dict):
+            parent[k] = {}
+        parent = parent[k]
+    parent[keys[-1]] = value
+
+
+def type_matches(value, kind: type) -> bool:
+    """Whether a JSON value fits a schema type (bools are not numbers here)"""
+    if kind is float:
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    if kind is int:
+        return isinstance(value, int) and not isinstance(value, bool)
+    return isinstance(value, kind)
+
+
+def flatten(config: Dict[str, Any], prefix: str = '') -> Dict[str, Any]:
+    """Every leaf of a nested dict by dotted key"""
+    leaves = {}
+    for name, value in config.items():
+        key = f"{prefix}{name}"
+        if isinstance(value, dict) and value:
+            leaves.update(flatten(value, key + '.'))
+        else:
+            leaves[key] = value
+    return leaves
+
+
+def changed_keys(old: Dict[str, Any], new: Dict[str, Any]) -> Set[str]:
+    """Dotted keys whose value differs between two configs"""
+    old_leaves = flatten(old)
+    new_leaves = flatten(new)
+    return {key for key in old_leaves.keys() | new_leaves.keys()
+            if old_leaves.get(key, KeyError) != new_leaves.get(key, KeyError)}
 
 
 class GameConfig:
@@ -13,20 +142,117 @@ class GameConfig:
     def __init__(self, config_file: str = "config/game_config.json"):
         self.config_file = config_file
         self.config: Dict[str, Any] = {}
+        # What the file itself says, without the defaults; this is what gets saved
+        self.user: Dict[str, Any] = {}
+        # Bumped on every load, after the new settings are in place
+        self.version = 0
+        self._subscribers: List[Tuple[Subscriber, Optional[Tuple[str, ...]]]] = []
         self.load_config()
         
     def load_config(self):
         """Load configuration from file"""
         try:
             if os.path.exists(self.config_file):
-                with open(self.config_file, 'r') as f:
-                    self.config = json.load(f)
+                user, config = self.read_file()
             else:
                 print(f"Config file {self.config_file} not found, using defaults")
-                self.config = self.get_default_config()
+                user, config = {}, self.get_default_config()
         except Exception as e:
             print(f"Error loading config: {e}, using defaults")
-            self.config = self.get_default_config()
+            user, config = {}, self.get_default_config()
+        self.user = user
+        self.config = config
+        self.version += 1
+        
+    def read_file(self) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Read and validate the config file
+
+        Returns:
+            The file's settings as written, and a validated copy with the defaults filled in
+
+        Raises:
+            OSError, ValueError: If the file can't be read or isn't a JSON object
+        """
+        with open(self.config_file, 'r') as f:
+            user = json.load(f)
+        if not isinstance(user, dict):
+            raise ValueError(f"{self.config_file} does not hold a JSON object")
+        config = copy.deepcopy(user)
+        for error in self.validate(config):
+            print(f"Config error: {error}, using the default")
+        return user, config
+        
+    def validate(self, config: Dict[str, Any]) -> List[str]:
+        """
+        Check a config against SCHEMA, fixing it up in place
+
+        Missing settings are filled in and mistyped ones replaced with defaults.
+
+        Returns:
+            A description of each mistyped setting
+        """
+        defaults = self.get_default_config()
+        errors = []
+        for key, kind in SCHEMA.items():
+            keys = split_key(key)
+            default = lookup(defaults, keys)
+            value = lookup(config, keys, KeyError)
+            if value is KeyError:
+                pass
+            elif type_matches(value, kind):
+                continue
+            else:
+                errors.append(f"{key} should be {kind.__name__}, not {value!r}")
+            assign(config, keys, copy.deepcopy(default))
+        return errors
+        
+    def reload(self) -> Set[str]:
+        """
+        Re-read the file and tell subscribers what changed
+
+        A file that can't be read or parsed leaves the current settings in place.
+
+        Returns:
+            Keys whose value changed
+        """
+        try:
+            user, config = self.read_file()
+        except Exception as e:
+            print(f"Error reloading config: {e}, keeping the current settings")
+            return set()
+        self.user = user
+        changed = changed_keys(self.config, config)
+        if not changed:
+            return changed
+        # Readers see the old settings or the new, never a mix
+        self.config = config
+        self.version += 1
+        self.notify(changed)
+        return changed
+        
+    def subscribe(self, callback: Subscriber, prefixes: Optional[Iterable[str]] = None):
+        """
+        Be told about reloads
+
+        Args:
+            callback: Called with (config, changed keys) on the reloading thread
+            prefixes: Only call it when a key under one of these changes, e.g. ['display']
+                (default: any change)
+        """
+        self._subscribers.append((callback, tuple(prefixes) if prefixes is not None else None))
+        
+    def notify(self, changed: Set[str]):
+        """Call the subscribers interested in any of the changed keys"""
+        for callback, prefixes in self._subscribers:
+            if prefixes is not None and not any(
+                    key == prefix or key.startswith(prefix + '.')
+                    for key in changed for prefix in prefixes):
+                continue
+            try:
+                callback(self, changed)
+            except Exception as e:
+                print(f"Error in config subscriber: {e}")
             
     def get_default_config(self) -> Dict[str, Any]:
         """Get default configuration"""
@@ -35,7 +261,76 @@ class GameConfig:
                 "width": 800,
                 "height": 480,
                 "fullscreen": False,
-                "fps": 60
+                "fps": 60,
+                "idle_fps": 5,
+                "idle_after": 3.0
+            },
+            "buttons": {
+                "enabled": True,
+                "debounce": 0.02,
+                "long_press": 0.8,
+                "double_press": 0.35,
+                "actions": {}
+            },
+            "can": {
+                "enabled": False,
+                "channel": "can0",
+                "interface": "socketcan",
+                "dbc": "../canbus/CAR-can_AZE0_fixed.dbc",
+                "signals": [],
+                "buses": [],
+                "prefer": []
+            },
+            "gauges": {
+                "enabled": False,
+                "rate_hz": 50,
+                "channels": {}
+            },
+            "analog": {
+                "enabled": False,
+                "rate_hz": 100,
+                "inputs": {}
+            },
+            "metrics": {
+                "enabled": True,
+                "gid_wh": 80,
+                "window": 300
+            },
+            "history": {
+                "span": 60
+            },
+            "processes": {
+                "enabled": False,
+                "cores": {}
+            },
+            "hot_reload": {
+                "enabled": True,
+                "interval": 1.0
+            },
+            "staleness": {
+                "enabled": True,
+                "timeout_periods": 2.0,
+                "min_timeout": 0.1,
+                "default_timeout": 2.0,
+                "tick": 0.05,
+                "periods": {}
+            },
+            "logger": {
+                "enabled": False,
+                "directory": "logs",
+                "signals": [],
+                "flush_interval": 30.0,
+                "max_pending": 50000,
+                "session_gap": 300.0,
+                "mode_signal": "",
+                "max_total_mb": 2048.0
+            },
+            "diagnostics": {
+                "enabled": False,
+                "channel": "can1",
+                "interface": "socketcan",
+                "timeout": 1.0,
+                "queries": {}
             },
             "game": {
                 "difficulty": "medium",
@@ -46,26 +341,112 @@ class GameConfig:
         
     def get(self, key: str, default=None):
         """Get configuration value by key (supports dot notation)"""
-        keys = key.split('.')
-        value = self.config
+        return lookup(self.config, split_key(key), default)
         
-        for k in keys:
-            if isinstance(value, dict) and k in value:
-                value = value[k]
-            else:
-                return default
-                
-        return value
+    def set(self, key: str, value):
+        """Change a setting (dot notation) for this run and for save_config()"""
+        keys = split_key(key)
+        assign(self.user, keys, copy.deepcopy(value))
+        assign(self.config, keys, value)
+        self.version += 1
+        
+    def accessor(self, key: str, default=None) -> Callable[[], Any]:
+        """
+        Compile a key into a getter for code that reads it every frame
+
+        The path is walked once per load; each call is a version check and a
+        return, and picks up reloads automatically.
+        """
+        keys = split_key(key)
+        cached = (None, None)
+        
+        def get():
+            nonlocal cached
+            version, value = cached
+            current = self.version
+            if version != current:
+                # Read the version before the settings: a reload in between only costs a re-walk
+                value = lookup(self.config, keys, default)
+                cached = (current, value)
+            return value
+        
+        return get
         
     def save_config(self):
-        """Save current configuration to file"""
+        """Save the file's own settings and anything set() to the file"""
         try:
             os.makedirs(os.path.dirname(self.config_file), exist_ok=True)
             with open(self.config_file, 'w') as f:
-                json.dump(self.config, f, indent=4)
+                json.dump(self.user, f, indent=4)
         except Exception as e:
             print(f"Error saving config: {e}")
 
 
-# Global config instance
-config = GameConfig()
+class ConfigWatcher(threading.Thread):
+    """Reloads a GameConfig when its file changes (mtime polling)"""
+
+    def __init__(self, config: GameConfig, interval: float = 1.0):
+        """
+        Args:
+            config: Config to reload
+            interval: Seconds between checks of the file
+        """
+        super().__init__(name="ConfigWatcher", daemon=True)
+        self.config = config
+        self.interval = interval
+        self.reloads = 0
+        self._stamp = self._stat()
+        self._stop_event = threading.Event()
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.config.config_file)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def check(self) -> Set[str]:
+        """Reload if the file changed since the last check; returns the changed keys"""
+        stamp = self._stat()
+        if stamp is None or stamp == self._stamp:
+            return set()
+        self._stamp = stamp
+        self.reloads += 1
+        return self.config.reload()
+
+    def run(self):
+        """Thread body"""
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"Error watching config: {e}")
+
+    def stop(self, timeout: Optional[float] = 1.0):
+        """Stop watching"""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+
+
+def start_config_watcher(config: GameConfig) -> Optional[ConfigWatcher]:
+    """
+    Start reloading the config when its file changes, per the 'hot_reload' section
+
+    Returns:
+        The running watcher, or None if hot reload is disabled
+    """
+    if not config.get('hot_reload.enabled', True):
+        return None
+    watcher = ConfigWatcher(config, config.get('hot_reload.interval', 1.0))
+    watcher.start()
+    print(f"Watching {config.config_file} for changes")
+    return watcher
+
+
+def __getattr__(name: str):
+    """Global config instance, loaded on first use rather than on import"""
+    if name == 'config':
+        instance = globals()['config'] = GameConfig()
+        return instance
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,79 @@
+"""
+Cache of parsed DBC databases
+
+Parsing the DBC text is one of the slowest steps of startup on the Pi. The
+parsed cantools Database is pickled under a key made from the file's SHA-256
+and the cantools version, so editing the DBC or upgrading cantools simply
+misses the cache and re-parses.
+"""
+
+import hashlib
+import os
+import pickle
+from typing import Optional
+
+try:
+    import cantools
+    CANTOOLS_AVAILABLE = True
+except ImportError:
+    CANTOOLS_AVAILABLE = False
+
+# Bump to invalidate every cache entry if the pickled form changes
+CACHE_VERSION = 1
+CACHE_DIR = os.environ.get('DASH_CACHE_DIR',
+                           os.path.join(os.path.expanduser('~'), '.cache', 'dash52', 'dbc'))
+
+
+def file_hash(path: str) -> str:
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_path(dbc_file: str, cache_dir: Optional[str] = None) -> str:
+    """Where the parsed form of a DBC file is cached"""
+    key = f"{file_hash(dbc_file)[:24]}-{cantools.__version__}-{CACHE_VERSION}"
+    name = os.path.splitext(os.path.basename(dbc_file))[0]
+    return os.path.join(cache_dir or CACHE_DIR, f"{name}.{key}.pickle")
+
+
+def load_dbc(dbc_file: str, cache_dir: Optional[str] = None, use_cache: bool = True):
+    """
+    Load a DBC file, from the cache when it has been parsed before
+
+    Args:
+        dbc_file: DBC file path
+        cache_dir: Cache directory (default: CACHE_DIR, overridable with DASH_CACHE_DIR)
+        use_cache: False always parses the text
+
+    Returns:
+        cantools Database
+    """
+    if not CANTOOLS_AVAILABLE:
+        raise ImportError("cantools is required to load DBC files")
+    if not use_cache:
+        return cantools.database.load_file(dbc_file)
+
+    path = cache_path(dbc_file, cache_dir)
+    try:
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Error reading DBC cache {path}: {e}, re-parsing")
+
+    db = cantools.database.load_file(dbc_file)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so a power cut never leaves a truncated cache entry
+        temp = f"{path}.{os.getpid()}.tmp"
+        with open(temp, 'wb') as f:
+            pickle.dump(db, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp, path)
+    except OSError as e:
+        print(f"Error writing DBC cache {path}: {e}")
+    return db
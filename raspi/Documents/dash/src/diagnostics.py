@@ -0,0 +1,675 @@
+"""
+ISO-TP diagnostic polling
+
+Cell voltages, shunts and module temperatures aren't broadcast; the Leaf's
+battery controller (LBC) only gives them out as replies to diagnostic
+requests (service 0x21 on 0x79B, answered on 0x7BB). A DiagnosticPoller
+runs on its own thread and its own socket, filtered to the response IDs, so
+the normal CAN readers never see diagnostic traffic and never wait on it.
+
+Requests and replies are ISO-TP (ISO 15765-2) messages: up to 4095 bytes
+split into a first frame and numbered consecutive frames, paced by flow
+control frames from the receiver. Each query has its own refresh interval.
+Queries to different ECUs are in flight at the same time; queries to the
+same ECU run back to back, the next one sent as soon as the last reply is
+in. Results are cached with their time, and numeric values are published
+into the SignalStore like decoded CAN signals.
+
+VirtualEcu answers requests on a python-can bus, standing in for the LBC in
+tests and off-car tools.
+"""
+
+import struct
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import can
+    CAN_AVAILABLE = True
+except ImportError:
+    CAN_AVAILABLE = False
+
+from .can_bus import BusIngest
+
+LBC_REQUEST_ID = 0x79B
+LBC_RESPONSE_ID = 0x7BB
+
+FRAME_LENGTH = 8
+PAD = 0xFF
+MAX_LENGTH = 0xFFF
+
+SINGLE = 0x0
+FIRST = 0x1
+CONSECUTIVE = 0x2
+FLOW = 0x3
+
+CONTINUE = 0x0
+WAIT = 0x1
+OVERFLOW = 0x2
+
+NEGATIVE_RESPONSE = 0x7F
+RESPONSE_PENDING = 0x78
+
+CELL_COUNT = 96
+TEMPERATURE_SENSORS = 4
+
+
+class IsoTpError(Exception):
+    """A malformed, out-of-sequence or refused ISO-TP transfer"""
+
+
+def pad(data: bytes) -> bytes:
+    return bytes(data) + bytes([PAD]) * (FRAME_LENGTH - len(data))
+
+
+def segment(payload: bytes) -> List[bytes]:
+    """
+    Split a payload into ISO-TP frames
+
+    Returns:
+        A single frame, or a first frame followed by consecutive frames
+    """
+    length = len(payload)
+    if length > MAX_LENGTH:
+        raise IsoTpError(f"Payload of {length} bytes is too long for ISO-TP")
+    if length <= 7:
+        return [pad(bytes([SINGLE << 4 | length]) + payload)]
+    frames = [bytes([FIRST << 4 | length >> 8, length & 0xFF]) + payload[:6]]
+    sequence = 1
+    for offset in range(6, length, 7):
+        frames.append(pad(bytes([CONSECUTIVE << 4 | sequence]) + payload[offset:offset + 7]))
+        sequence = (sequence + 1) & 0xF
+    return frames
+
+
+def flow_control(status: int = CONTINUE, block_size: int = 0, st_min: int = 0) -> bytes:
+    """Flow control frame: carry on, wait or overflow, block size and frame gap"""
+    return pad(bytes([FLOW << 4 | status, block_size, st_min]))
+
+
+def st_min_seconds(st_min: int) -> float:
+    """Decode a flow control frame's minimum gap between consecutive frames"""
+    if st_min <= 0x7F:
+        return st_min / 1000.0
+    if 0xF1 <= st_min <= 0xF9:
+        return (st_min - 0xF0) / 10000.0
+    # Reserved values mean the longest gap
+    return 0.127
+
+
+class Sender:
+    """Sends one payload, honouring the receiver's flow control"""
+
+    def __init__(self, payload: bytes):
+        self.frames = segment(payload)
+        self.sent = 0
+        self.awaiting_flow = False
+        self.block_size = 0
+        self.block_left = 0
+        self.gap = 0.0
+        self.next_time = 0.0
+
+    @property
+    def done(self) -> bool:
+        return self.sent == len(self.frames)
+
+    def ready(self, now: float) -> List[bytes]:
+        """Frames that may go out now"""
+        frames = []
+        while not self.done and not self.awaiting_flow and now >= self.next_time:
+            frames.append(self.frames[self.sent])
+            self.sent += 1
+            if self.sent == 1:
+                # A first frame waits for the receiver to say how to go on
+                self.awaiting_flow = len(self.frames) > 1
+                continue
+            if self.block_size:
+                self.block_left -= 1
+                if self.block_left == 0:
+                    self.awaiting_flow = True
+            if self.gap:
+                self.next_time = now + self.gap
+        return frames
+
+    def flow_control(self, data: bytes, now: float):
+        """
+        Take a flow control frame from the receiver
+
+        Raises:
+            IsoTpError: If the receiver has no room for the payload
+        """
+        status = data[0] & 0xF
+        if status == WAIT:
+            return
+        if status == OVERFLOW:
+            raise IsoTpError("Receiver overflow")
+        if status != CONTINUE:
+            raise IsoTpError(f"Bad flow control status {status}")
+        self.block_size = data[1]
+        self.block_left = data[1]
+        self.gap = st_min_seconds(data[2])
+        self.awaiting_flow = False
+        self.next_time = now
+
+
+class Receiver:
+    """Reassembles one payload from single, first and consecutive frames"""
+
+    def __init__(self, block_size: int = 0, st_min: int = 0):
+        """
+        Args:
+            block_size: Consecutive frames to accept per flow control (0 = all)
+            st_min: Gap to ask the sender for between consecutive frames (ISO-TP encoding)
+        """
+        self.block_size = block_size
+        self.st_min = st_min
+        self.buffer: Optional[bytearray] = None
+        self.length = 0
+        self.sequence = 0
+        self.block_left = 0
+        # Set when a flow control frame should be sent back
+        self.flow_control_due = False
+
+    def flow_control(self) -> bytes:
+        """The flow control frame to send when flow_control_due is set"""
+        self.flow_control_due = False
+        self.block_left = self.block_size
+        return flow_control(CONTINUE, self.block_size, self.st_min)
+
+    def feed(self, data: bytes) -> Optional[bytes]:
+        """
+        Take one frame
+
+        Returns:
+            The complete payload, or None while more frames are expected
+
+        Raises:
+            IsoTpError: On a malformed or out-of-sequence frame
+        """
+        kind = data[0] >> 4
+        if kind == SINGLE:
+            length = data[0] & 0xF
+            if not 0 < length <= 7 or length > len(data) - 1:
+                raise IsoTpError(f"Bad single frame length {length}")
+            self.buffer = None
+            return bytes(data[1:1 + length])
+        if kind == FIRST:
+            self.length = (data[0] & 0xF) << 8 | data[1]
+            if self.length <= 7:
+                raise IsoTpError(f"Bad first frame length {self.length}")
+            self.buffer = bytearray(data[2:FRAME_LENGTH])
+            self.sequence = 1
+            self.flow_control_due = True
+            return None
+        if kind == CONSECUTIVE:
+            if self.buffer is None:
+                raise IsoTpError("Consecutive frame without a first frame")
+            if data[0] & 0xF != self.sequence:
+                self.buffer = None
+                raise IsoTpError(f"Expected consecutive frame {self.sequence}, got {data[0] & 0xF}")
+            self.sequence = (self.sequence + 1) & 0xF
+            self.buffer += data[1:FRAME_LENGTH]
+            if len(self.buffer) >= self.length:
+                payload = bytes(self.buffer[:self.length])
+                self.buffer = None
+                return payload
+            if self.block_size:
+                self.block_left -= 1
+                if self.block_left == 0:
+                    self.flow_control_due = True
+            return None
+        raise IsoTpError(f"Unexpected frame type {kind}")
+
+
+def is_flow_control(data: bytes) -> bool:
+    return len(data) > 0 and data[0] >> 4 == FLOW
+
+
+# LBC group replies, in the layout worked out by the LeafSpy and OVMS projects.
+# Each starts with the positive response 0x61 and the group number.
+
+def decode_cell_voltages(payload: bytes) -> Dict[str, object]:
+    """Group 2: 96 cell voltages, big-endian millivolts"""
+    if len(payload) < 2 + CELL_COUNT * 2:
+        raise ValueError(f"Cell voltage reply is {len(payload)} bytes")
+    cells = tuple(mv / 1000.0 for mv in struct.unpack_from(f'>{CELL_COUNT}H', payload, 2))
+    low, high = min(cells), max(cells)
+    return {
+        'LBC_CellVoltages': cells,
+        'LBC_CellVoltageMin': low,
+        'LBC_CellVoltageMax': high,
+        'LBC_CellVoltageSpread': round((high - low) * 1000.0, 1),
+    }
+
+
+def decode_temperatures(payload: bytes) -> Dict[str, object]:
+    """Group 4: per sensor a raw thermistor reading (2 bytes) and degrees C (1 signed byte)"""
+    if len(payload) < 2 + TEMPERATURE_SENSORS * 3:
+        raise ValueError(f"Temperature reply is {len(payload)} bytes")
+    temperatures = []
+    for sensor in range(TEMPERATURE_SENSORS):
+        raw, celsius = struct.unpack_from('>Hb', payload, 2 + sensor * 3)
+        # Packs without a fourth sensor report it as all ones
+        if raw != 0xFFFF:
+            temperatures.append(celsius)
+    values: Dict[str, object] = {'LBC_ModuleTemperatures': tuple(temperatures)}
+    if temperatures:
+        values['LBC_ModuleTemperatureMin'] = min(temperatures)
+        values['LBC_ModuleTemperatureMax'] = max(temperatures)
+    return values
+
+
+def decode_shunts(payload: bytes) -> Dict[str, object]:
+    """Group 6: balancing shunts, four cells to the low nibble of each byte"""
+    count = CELL_COUNT // 4
+    if len(payload) < 2 + count:
+        raise ValueError(f"Shunt reply is {len(payload)} bytes")
+    shunts = tuple(bool(byte >> bit & 1)
+                   for byte in payload[2:2 + count] for bit in (3, 2, 1, 0))
+    return {'LBC_Shunts': shunts, 'LBC_ShuntCount': sum(shunts)}
+
+
+# Decoder name -> (decoder, the numeric values it publishes)
+DECODERS: Dict[str, Tuple[Callable[[bytes], Dict[str, object]], Tuple[str, ...]]] = {
+    'cell_voltages': (decode_cell_voltages, ('LBC_CellVoltageMin', 'LBC_CellVoltageMax',
+                                             'LBC_CellVoltageSpread')),
+    'temperatures': (decode_temperatures, ('LBC_ModuleTemperatureMin',
+                                           'LBC_ModuleTemperatureMax')),
+    'shunts': (decode_shunts, ('LBC_ShuntCount',)),
+}
+
+
+def encode_cell_voltages(cells: Sequence[float]) -> bytes:
+    """Group 2 reply for the given cell voltages (for VirtualEcu)"""
+    return bytes([0x61, 0x02]) + struct.pack(f'>{len(cells)}H',
+                                             *(round(volts * 1000) for volts in cells)) + bytes(4)
+
+
+def encode_temperatures(temperatures: Sequence[int]) -> bytes:
+    """Group 4 reply for the given module temperatures (for VirtualEcu)"""
+    data = bytes([0x61, 0x04])
+    for sensor in range(TEMPERATURE_SENSORS):
+        if sensor < len(temperatures):
+            data += struct.pack('>Hb', 0x300 - 8 * temperatures[sensor], temperatures[sensor])
+        else:
+            data += struct.pack('>Hb', 0xFFFF, -1)
+    return data
+
+
+def encode_shunts(shunts: Sequence[bool]) -> bytes:
+    """Group 6 reply for the given shunt states (for VirtualEcu)"""
+    data = bytearray([0x61, 0x06])
+    for index in range(0, len(shunts), 4):
+        nibble = 0
+        for flag in shunts[index:index + 4]:
+            nibble = nibble << 1 | bool(flag)
+        data.append(nibble)
+    return bytes(data)
+
+
+class DiagnosticQuery:
+    """One request polled on its own refresh interval"""
+
+    def __init__(self, name: str, request: bytes, interval: float = 5.0,
+                 request_id: int = LBC_REQUEST_ID, response_id: int = LBC_RESPONSE_ID,
+                 decode: Optional[Callable[[bytes], Dict[str, object]]] = None):
+        """
+        Args:
+            name: Query name results are cached under, e.g. 'cell_voltages'
+            request: Request payload, e.g. b'\\x21\\x02' (service 0x21, group 2)
+            interval: Seconds from one request to the next
+            request_id: Arbitration ID requests go to
+            response_id: Arbitration ID replies come back on
+            decode: Turns the reply payload into named values (None caches the payload only)
+        """
+        self.name = name
+        self.request = bytes(request)
+        self.interval = interval
+        self.request_id = request_id
+        self.response_id = response_id
+        self.decode = decode
+        self.due = 0.0
+
+    @classmethod
+    def from_dict(cls, name: str, settings: Dict) -> 'DiagnosticQuery':
+        """
+        Build a query from a 'diagnostics.queries' config entry
+
+        request is hex ("2102"), IDs are hex strings ("0x79B") and decoder
+        names an entry in DECODERS.
+        """
+        decoder = settings.get('decoder')
+        if decoder and decoder not in DECODERS:
+            raise ValueError(f"Unknown diagnostic decoder {decoder}")
+        return cls(name, bytes.fromhex(settings['request']),
+                   interval=settings.get('interval', 5.0),
+                   request_id=int(settings.get('request_id', hex(LBC_REQUEST_ID)), 0),
+                   response_id=int(settings.get('response_id', hex(LBC_RESPONSE_ID)), 0),
+                   decode=DECODERS[decoder][0] if decoder else None)
+
+
+class DiagnosticResult:
+    """A query's latest reply"""
+
+    __slots__ = ('timestamp', 'payload', 'values')
+
+    def __init__(self, timestamp: float, payload: bytes, values: Dict[str, object]):
+        self.timestamp = timestamp
+        self.payload = payload
+        self.values = values
+
+    def age(self, now: Optional[float] = None) -> float:
+        return (now if now is not None else time.time()) - self.timestamp
+
+
+class _Exchange:
+    """A request in flight to one ECU"""
+
+    __slots__ = ('query', 'sender', 'receiver', 'deadline')
+
+    def __init__(self, query: DiagnosticQuery, receiver: Receiver, deadline: float):
+        self.query = query
+        self.sender = Sender(query.request)
+        self.receiver = receiver
+        self.deadline = deadline
+
+
+class DiagnosticPoller(threading.Thread):
+    """Polls diagnostic queries on their intervals and caches the replies"""
+
+    def __init__(self, ingest: BusIngest, queries: Iterable[DiagnosticQuery], store=None,
+                 timeout: float = 1.0, block_size: int = 0, st_min: int = 0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            ingest: Bus ingest filtered to the queries' response IDs
+            queries: Queries to poll
+            store: SignalStore the numeric values are published to (optional)
+            timeout: Seconds to wait for each reply to complete
+            block_size: Consecutive frames the ECU may send per flow control (0 = all)
+            st_min: Gap to ask the ECU for between consecutive frames (ISO-TP encoding)
+            clock: Monotonic time source
+        """
+        super().__init__(name="DiagnosticPoller", daemon=True)
+        self.ingest = ingest
+        self.queries = list(queries)
+        self.store = store
+        self.timeout = timeout
+        self.block_size = block_size
+        self.st_min = st_min
+        self.clock = clock
+        self.results: Dict[str, DiagnosticResult] = {}
+        self.errors: Dict[str, int] = {}
+        self.requests = 0
+        self._active: Dict[int, _Exchange] = {}
+        self._stop_event = threading.Event()
+
+    @property
+    def response_ids(self) -> set:
+        return {query.response_id for query in self.queries}
+
+    def result(self, name: str, max_age: Optional[float] = None) -> Optional[DiagnosticResult]:
+        """A query's cached reply, or None if there isn't one newer than max_age seconds"""
+        result = self.results.get(name)
+        if result is None or (max_age is not None and result.age() > max_age):
+            return None
+        return result
+
+    def _send(self, arbitration_id: int, data: bytes):
+        self.ingest.bus.send(can.Message(arbitration_id=arbitration_id, data=data,
+                                         is_extended_id=False))
+
+    def start_due(self, now: float):
+        """Send the most overdue query to each idle ECU"""
+        for query in sorted(self.queries, key=lambda query: query.due):
+            if query.due > now:
+                break
+            if query.response_id in self._active:
+                continue
+            exchange = _Exchange(query, Receiver(self.block_size, self.st_min), now + self.timeout)
+            self._active[query.response_id] = exchange
+            self.requests += 1
+            self.pump(exchange, now)
+
+    def pump(self, exchange: _Exchange, now: float):
+        """Send whatever request frames flow control allows"""
+        for data in exchange.sender.ready(now):
+            self._send(exchange.query.request_id, data)
+
+    def on_frame(self, message, now: float):
+        """Handle one frame from an ECU"""
+        exchange = self._active.get(message.arbitration_id)
+        if exchange is None:
+            return
+        data = bytes(message.data)
+        try:
+            if is_flow_control(data):
+                exchange.sender.flow_control(data, now)
+                self.pump(exchange, now)
+                return
+            payload = exchange.receiver.feed(data)
+            if exchange.receiver.flow_control_due:
+                self._send(exchange.query.request_id, exchange.receiver.flow_control())
+        except IsoTpError as e:
+            self.fail(exchange, now, e)
+            return
+        if payload is not None:
+            self.finish(exchange, payload, now)
+
+    def finish(self, exchange: _Exchange, payload: bytes, now: float):
+        """Cache and publish a complete reply, and schedule the query's next run"""
+        query = exchange.query
+        if payload[0] == NEGATIVE_RESPONSE:
+            if len(payload) > 2 and payload[2] == RESPONSE_PENDING:
+                # The ECU is working on it; the real reply follows
+                exchange.deadline = now + self.timeout
+                return
+            self.fail(exchange, now, IsoTpError(f"Negative response {payload.hex()}"))
+            return
+        if payload[0] != query.request[0] + 0x40:
+            self.fail(exchange, now, IsoTpError(f"Unexpected reply {payload[:3].hex()}"))
+            return
+        try:
+            values = query.decode(payload) if query.decode else {}
+        except Exception as e:
+            self.fail(exchange, now, e)
+            return
+        timestamp = time.time()
+        self.results[query.name] = DiagnosticResult(timestamp, payload, values)
+        self._done(exchange, now)
+        if self.store is not None:
+            numeric = {name: value for name, value in values.items()
+                       if isinstance(value, (int, float))}
+            if numeric:
+                self.store.update(numeric, timestamp)
+
+    def fail(self, exchange: _Exchange, now: float, error: Exception):
+        """Drop a failed exchange; the query is retried on its next interval"""
+        name = exchange.query.name
+        self.errors[name] = self.errors.get(name, 0) + 1
+        if self.errors[name] == 1:
+            print(f"Error polling {name}: {error}")
+        self._done(exchange, now)
+
+    def _done(self, exchange: _Exchange, now: float):
+        query = exchange.query
+        del self._active[query.response_id]
+        # Keep to the schedule, but a first run (due 0) or a poller that fell
+        # behind waits a full interval rather than sending again straight away
+        due = query.due + query.interval
+        query.due = due if due > now else now + query.interval
+
+    def expire(self, now: float):
+        """Fail exchanges whose reply didn't complete in time, and pace request frames"""
+        for exchange in list(self._active.values()):
+            if now > exchange.deadline:
+                self.fail(exchange, now, IsoTpError("Timed out waiting for reply"))
+            elif not exchange.sender.done:
+                self.pump(exchange, now)
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until something needs doing without a frame arriving"""
+        wake = min((query.due for query in self.queries), default=now + 1.0)
+        for exchange in self._active.values():
+            wake = min(wake, exchange.deadline)
+            if not exchange.sender.done and not exchange.sender.awaiting_flow:
+                wake = min(wake, exchange.sender.next_time)
+        return min(1.0, max(0.0, wake - now))
+
+    def run(self):
+        """Thread body: send due queries, take replies, time out stuck ones"""
+        try:
+            while not self._stop_event.is_set():
+                now = self.clock()
+                self.expire(now)
+                self.start_due(now)
+                message = self.ingest.bus.recv(self.wait_time(now) or 0.001)
+                if message is not None:
+                    self.on_frame(message, self.clock())
+        except Exception as e:
+            print(f"Diagnostic poller stopped: {e}")
+        finally:
+            self.ingest.close()
+
+    def stop(self, timeout: Optional[float] = 1.0):
+        """Stop polling"""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+
+
+class VirtualEcu(threading.Thread):
+    """Answers diagnostic requests on a python-can bus, like the LBC"""
+
+    def __init__(self, bus, responses: Dict[bytes, object], request_id: int = LBC_REQUEST_ID,
+                 response_id: int = LBC_RESPONSE_ID):
+        """
+        Args:
+            bus: python-can bus the requests arrive on
+            responses: Reply payload by request payload; a callable is called for the reply
+            request_id: Arbitration ID the ECU listens on
+            response_id: Arbitration ID the ECU replies on
+        """
+        super().__init__(name="VirtualEcu", daemon=True)
+        self.bus = bus
+        self.responses = responses
+        self.request_id = request_id
+        self.response_id = response_id
+        self.requests = 0
+        self._receiver = Receiver()
+        self._sender: Optional[Sender] = None
+        self._stop_event = threading.Event()
+
+    def _send(self, data: bytes):
+        self.bus.send(can.Message(arbitration_id=self.response_id, data=data,
+                                  is_extended_id=False))
+
+    def reply_to(self, request: bytes) -> bytes:
+        """Reply payload for a request: a stored reply, or serviceNotSupported"""
+        response = self.responses.get(request)
+        if callable(response):
+            response = response()
+        if response is None:
+            return bytes([NEGATIVE_RESPONSE, request[0], 0x11])
+        return response
+
+    def handle(self, data: bytes):
+        """Take one frame from the tester"""
+        now = time.monotonic()
+        if is_flow_control(data):
+            if self._sender is not None:
+                self._sender.flow_control(data, now)
+            return
+        request = self._receiver.feed(data)
+        if self._receiver.flow_control_due:
+            self._send(self._receiver.flow_control())
+        if request is not None:
+            self.requests += 1
+            self._sender = Sender(self.reply_to(request))
+
+    def run(self):
+        """Thread body: answer requests until stopped"""
+        try:
+            while not self._stop_event.is_set():
+                sender = self._sender
+                wait = 0.05
+                if sender is not None:
+                    now = time.monotonic()
+                    for data in sender.ready(now):
+                        self._send(data)
+                    if sender.done:
+                        self._sender = None
+                    elif not sender.awaiting_flow:
+                        wait = max(0.0, sender.next_time - time.monotonic())
+                message = self.bus.recv(wait)
+                if message is not None and message.arbitration_id == self.request_id:
+                    try:
+                        self.handle(bytes(message.data))
+                    except IsoTpError as e:
+                        print(f"Virtual ECU: {e}")
+        except Exception as e:
+            print(f"Virtual ECU stopped: {e}")
+
+    def stop(self, timeout: Optional[float] = 1.0):
+        """Stop answering"""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+
+
+def lbc_responses(cells: Optional[Sequence[float]] = None,
+                  temperatures: Sequence[int] = (21, 22, 21),
+                  shunts: Optional[Sequence[bool]] = None) -> Dict[bytes, bytes]:
+    """Replies to the group 2, 4 and 6 requests for a VirtualEcu standing in for the LBC"""
+    if cells is None:
+        cells = [3.95 + 0.001 * (index % 7) for index in range(CELL_COUNT)]
+    if shunts is None:
+        shunts = [False] * CELL_COUNT
+    return {
+        b'\x21\x02': encode_cell_voltages(cells),
+        b'\x21\x04': encode_temperatures(temperatures),
+        b'\x21\x06': encode_shunts(shunts),
+    }
+
+
+def diagnostic_signal_names(config) -> List[str]:
+    """Names the configured queries publish into the SignalStore"""
+    if not config.get('diagnostics.enabled', False):
+        return []
+    names = []
+    for settings in config.get('diagnostics.queries', {}).values():
+        decoder = settings.get('decoder')
+        if decoder in DECODERS:
+            names += DECODERS[decoder][1]
+    return names
+
+
+def start_diagnostics(config, store) -> Optional[DiagnosticPoller]:
+    """
+    Start diagnostic polling from the 'diagnostics' config section
+
+    Returns:
+        The running poller, or None if diagnostics are disabled or the bus can't be opened
+    """
+    if not config.get('diagnostics.enabled', False):
+        return None
+    if not CAN_AVAILABLE:
+        print("python-can not available, running without diagnostics")
+        return None
+    try:
+        queries = [DiagnosticQuery.from_dict(name, settings)
+                   for name, settings in config.get('diagnostics.queries', {}).items()]
+        ingest = BusIngest({query.response_id for query in queries},
+                           channel=config.get('diagnostics.channel', 'can1'),
+                           interface=config.get('diagnostics.interface', 'socketcan'))
+        ingest.open()
+    except Exception as e:
+        print(f"Error starting diagnostics: {e}")
+        return None
+
+    poller = DiagnosticPoller(ingest, queries, store,
+                              timeout=config.get('diagnostics.timeout', 1.0))
+    poller.start()
+    print(f"Diagnostic poller running {len(queries)} queries on {ingest.channel}")
+    return poller
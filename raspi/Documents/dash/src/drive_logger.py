@@ -0,0 +1,453 @@
+"""
+Drive logger: decoded signals to SQLite on the SD card
+
+The SignalStore listener only appends each published batch to a deque, so
+CAN ingest pays for one uncontended lock and an append. A writer thread wakes every flush_interval
+(or sooner if too much is pending), turns the batches into one column of
+timestamps and one of values per signal, and writes each column as a single
+packed float64 blob in one transaction. SD cards are written in large
+sequential chunks rather than a row per frame, and a file holds a few
+hundred bytes of overhead per signal per flush.
+
+Each drive or charge session gets its own file. A new one starts after a gap
+in the data (the car slept) or when the mode signal changes value (e.g.
+plugged in). Whole old sessions are deleted to keep the directory under
+max_total_mb.
+
+A card that can't be written (read-only, full, missing) doesn't stop the
+writer: it retries with a growing delay, and anything it couldn't write goes
+back on the queue. The queue holds at most max_pending frames; past that the
+oldest are dropped and counted in `dropped`.
+"""
+
+import glob
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+SESSION_PREFIX = 'session-'
+SESSION_SUFFIX = '.db'
+# Longest wait between attempts to open a session on a failing card
+MAX_RETRY_DELAY = 300.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS info (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS signals (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL);
+CREATE TABLE IF NOT EXISTS chunks (
+    signal INTEGER NOT NULL REFERENCES signals(id),
+    start REAL NOT NULL,
+    count INTEGER NOT NULL,
+    times BLOB NOT NULL,
+    vals BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chunks_by_signal ON chunks (signal, start);
+"""
+
+
+def numeric(value) -> Optional[float]:
+    """A decoded value as a float (named choices by their raw value), or None"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raw = getattr(value, 'value', None)
+        return float(raw) if isinstance(raw, (int, float)) else None
+
+
+def session_files(directory: str) -> List[str]:
+    """Session files in a log directory, oldest first"""
+    return sorted(glob.glob(os.path.join(directory, f'{SESSION_PREFIX}*{SESSION_SUFFIX}')))
+
+
+def session_size(path: str) -> int:
+    """Bytes a session takes, including its WAL and shared-memory files"""
+    size = 0
+    for name in (path, path + '-wal', path + '-shm'):
+        try:
+            size += os.path.getsize(name)
+        except OSError:
+            pass
+    return size
+
+
+def read_session(path: str, names: Optional[Iterable[str]] = None
+                 ) -> Dict[str, Tuple[array, array]]:
+    """
+    Load a logged session
+
+    Args:
+        path: Session file
+        names: Signals to load (default: all)
+
+    Returns:
+        (timestamps, values) arrays by signal name, in time order
+    """
+    conn = sqlite3.connect(path)
+    try:
+        query = ("SELECT s.name, c.times, c.vals FROM chunks c JOIN signals s ON s.id = c.signal "
+                 "ORDER BY s.name, c.start")
+        wanted = set(names) if names is not None else None
+        columns: Dict[str, Tuple[array, array]] = {}
+        for name, times, vals in conn.execute(query):
+            if wanted is not None and name not in wanted:
+                continue
+            column = columns.setdefault(name, (array('d'), array('d')))
+            column[0].frombytes(times)
+            column[1].frombytes(vals)
+        return columns
+    finally:
+        conn.close()
+
+
+class DriveLogger(threading.Thread):
+    """Logs published signals in large batches, one SQLite file per session"""
+
+    def __init__(self, directory: str, signals: Optional[Iterable[str]] = None,
+                 flush_interval: float = 30.0, max_pending: int = 50000,
+                 session_gap: float = 300.0, mode_signal: Optional[str] = None,
+                 max_total_mb: float = 2048.0, retry_delay: float = 1.0):
+        """
+        Args:
+            directory: Where session files are written
+            signals: Signals to log (default: everything published)
+            flush_interval: Seconds between writes to the card
+            max_pending: Most frames held in memory; the oldest are dropped past
+                it, and a flush starts early once half of it is waiting
+            session_gap: Seconds without data that end a session
+            mode_signal: Signal whose change of value starts a new session
+            max_total_mb: Oldest sessions are deleted past this much disk use
+            retry_delay: First wait before retrying a session that failed to open;
+                doubles on each failure
+        """
+        super().__init__(name="DriveLogger", daemon=True)
+        self.directory = directory
+        self.signals = frozenset(signals) if signals else None
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.session_gap = session_gap
+        self.mode_signal = mode_signal
+        self.max_total_bytes = int(max_total_mb * 1024 * 1024)
+
+        # Batches from the store's writer thread. Capped in frames, so a writer that
+        # can't keep up drops the oldest instead of growing
+        self._pending: deque = deque()
+        self._pending_frames = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+
+        self.path: Optional[str] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._ids: Dict[str, int] = {}
+        self._last_timestamp: Optional[float] = None
+        self._mode = None
+        self.flushes = 0
+        self.samples = 0
+        self.sessions = 0
+        self.write_errors = 0
+        self.dropped = 0
+        self.retry_delay = retry_delay
+        self._retry_delay = retry_delay
+        self._retry_at = 0.0
+
+    def record(self, updates: list):
+        """SignalStore listener: queue a published batch (runs on the ingest thread)"""
+        with self._lock:
+            self._pending.append(updates)
+            self._pending_frames += len(updates)
+            if self._pending_frames > self.max_pending:
+                self._drop_oldest()
+            full = self._pending_frames * 2 >= self.max_pending
+        if full:
+            self._wake.set()
+
+    def attach(self, store) -> 'DriveLogger':
+        """Start receiving what the store publishes"""
+        store.add_listener(self.record)
+        return self
+
+    def _take(self) -> List[Tuple[Dict[str, object], float]]:
+        """Everything queued, oldest first"""
+        with self._lock:
+            batches = self._pending
+            self._pending = deque()
+            self._pending_frames = 0
+        updates = []
+        for batch in batches:
+            updates.extend(batch)
+        return updates
+
+    def _requeue(self, updates: list):
+        """Put unwritten updates back in front of anything queued since"""
+        with self._lock:
+            self._pending.appendleft(updates)
+            self._pending_frames += len(updates)
+            if self._pending_frames > self.max_pending:
+                self._drop_oldest()
+
+    def _drop_oldest(self):
+        """Drop frames from the front of the queue down to max_pending (lock held)"""
+        excess = self._pending_frames - self.max_pending
+        if self.dropped == 0:
+            print(f"Drive log queue over {self.max_pending} frames, dropping the oldest")
+        while excess > 0 and self._pending:
+            oldest = self._pending.popleft()
+            if len(oldest) > excess:
+                self._pending.appendleft(oldest[excess:])
+                count = excess
+            else:
+                count = len(oldest)
+            self._pending_frames -= count
+            self.dropped += count
+            excess -= count
+
+    def flush(self) -> int:
+        """
+        Write everything queued
+
+        Returns:
+            Number of samples written
+        """
+        if time.monotonic() < self._retry_at:
+            # The card failed recently; leave the data queued until the next attempt
+            return 0
+        updates = self._take()
+        if not updates:
+            return 0
+        columns: Dict[str, Tuple[array, array]] = {}
+        wanted = self.signals
+        mode_signal = self.mode_signal
+        written = 0
+        # First update not yet written, and the session state from before it
+        start = 0
+        state = (self._last_timestamp, self._mode)
+        for index, (values, timestamp) in enumerate(updates):
+            before = (self._last_timestamp, self._mode)
+            last = self._last_timestamp
+            new_session = self._conn is None or (last is not None and
+                                                 timestamp - last > self.session_gap)
+            if mode_signal is not None and mode_signal in values:
+                mode = values[mode_signal]
+                if self._mode is not None and mode != self._mode:
+                    new_session = True
+                self._mode = mode
+            if new_session:
+                try:
+                    written += self._write(columns)
+                except sqlite3.Error as e:
+                    self._back_off(f"Error writing drive log {self.path}: {e}",
+                                   updates[start:], state)
+                    return written
+                columns = {}
+                start, state = index, before
+                try:
+                    self._open_session(timestamp)
+                except (OSError, sqlite3.Error) as e:
+                    self._close_session()
+                    self._back_off(f"Error opening drive log in {self.directory}: {e}",
+                                   updates[start:], state)
+                    return written
+            if last is None or timestamp > last:
+                self._last_timestamp = timestamp
+            for name, value in values.items():
+                if wanted is not None and name not in wanted:
+                    continue
+                value = numeric(value)
+                if value is None:
+                    continue
+                column = columns.get(name)
+                if column is None:
+                    column = columns[name] = (array('d'), array('d'))
+                column[0].append(timestamp)
+                column[1].append(value)
+        try:
+            written += self._write(columns)
+        except sqlite3.Error as e:
+            self._back_off(f"Error writing drive log {self.path}: {e}", updates[start:], state)
+            return written
+        self._retry_delay = self.retry_delay
+        self.flushes += 1
+        # A long session grows past the cap too, so check after every flush
+        self.enforce_limit()
+        return written
+
+    def _back_off(self, message: str, updates: list, state: tuple):
+        """
+        Requeue updates that weren't written and schedule a retry with a growing delay
+
+        Args:
+            message: Error to report
+            updates: Updates not yet written, oldest first
+            state: Last timestamp and mode from before the first of them
+        """
+        self._last_timestamp, self._mode = state
+        self._requeue(updates)
+        self.write_errors += 1
+        print(f"{message}, retrying in {self._retry_delay:.0f}s")
+        self._retry_at = time.monotonic() + self._retry_delay
+        self._retry_delay = min(MAX_RETRY_DELAY, max(self._retry_delay * 2, self.retry_delay))
+
+    def _write(self, columns: Dict[str, Tuple[array, array]]) -> int:
+        """
+        One transaction with a chunk per signal
+
+        Raises:
+            sqlite3.Error: The transaction failed and was rolled back
+        """
+        if not columns or self._conn is None:
+            return 0
+        conn = self._conn
+        rows = []
+        count = 0
+        ids = {}
+        with conn:
+            for name, (times, vals) in columns.items():
+                signal_id = self._ids.get(name)
+                if signal_id is None:
+                    conn.execute("INSERT OR IGNORE INTO signals (name) VALUES (?)", (name,))
+                    signal_id = conn.execute("SELECT id FROM signals WHERE name = ?",
+                                             (name,)).fetchone()[0]
+                    ids[name] = signal_id
+                rows.append((signal_id, times[0], len(times), times.tobytes(), vals.tobytes()))
+                count += len(times)
+            conn.executemany("INSERT INTO chunks VALUES (?, ?, ?, ?, ?)", rows)
+            conn.execute("INSERT OR REPLACE INTO info VALUES ('end', ?)",
+                         (repr(self._last_timestamp),))
+        # Only cached once committed, since a rollback takes the new signal rows with it
+        self._ids.update(ids)
+        self.samples += count
+        return count
+
+    def _open_session(self, timestamp: float):
+        """Close the current session file and start a new one"""
+        self._close_session()
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(timestamp))
+        path = os.path.join(self.directory, f'{SESSION_PREFIX}{stamp}{SESSION_SUFFIX}')
+        suffix = 1
+        while os.path.exists(path):
+            path = os.path.join(self.directory, f'{SESSION_PREFIX}{stamp}-{suffix}{SESSION_SUFFIX}')
+            suffix += 1
+        conn = sqlite3.connect(path, check_same_thread=False)
+        try:
+            # Large pages and a WAL that's only synced at checkpoints keep SD writes sequential
+            conn.execute("PRAGMA page_size = 16384")
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.executescript(SCHEMA)
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO info VALUES ('start', ?)", (repr(timestamp),))
+                if self.mode_signal is not None and self._mode is not None:
+                    conn.execute("INSERT OR REPLACE INTO info VALUES ('mode', ?)",
+                                 (str(self._mode),))
+        except sqlite3.Error:
+            conn.close()
+            raise
+        self.path = path
+        self._conn = conn
+        self._ids = {}
+        self.sessions += 1
+        print(f"Logging drive session to {path}")
+
+    def _close_session(self):
+        if self._conn is None:
+            return
+        try:
+            # Fold the WAL back in so the finished file stands alone
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._conn.close()
+        except sqlite3.Error as e:
+            print(f"Error closing drive log {self.path}: {e}")
+        self._conn = None
+
+    def enforce_limit(self) -> List[str]:
+        """
+        Delete the oldest finished sessions until the directory fits max_total_mb
+
+        Returns:
+            Paths deleted
+        """
+        files = session_files(self.directory)
+        sizes = {path: session_size(path) for path in files}
+        total = sum(sizes.values())
+        deleted = []
+        for path in files:
+            if total <= self.max_total_bytes:
+                break
+            if path == self.path:
+                continue
+            for name in (path, path + '-wal', path + '-shm'):
+                try:
+                    os.remove(name)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    print(f"Error removing old drive log {name}: {e}")
+            total -= sizes[path]
+            deleted.append(path)
+        return deleted
+
+    def run(self):
+        """Thread body: flush every interval, or early when the queue is long"""
+        try:
+            while not self._stop_event.is_set():
+                self._wake.wait(self.flush_interval)
+                self._wake.clear()
+                try:
+                    self.flush()
+                except Exception as e:
+                    # Keep going: the queue is capped and the next flush may succeed
+                    self.write_errors += 1
+                    print(f"Error flushing drive log: {e}")
+                # Early wake-ups can't help until the card is due another try
+                delay = self._retry_at - time.monotonic()
+                if delay > 0:
+                    self._stop_event.wait(min(delay, self.flush_interval))
+        finally:
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error flushing drive log: {e}")
+            finally:
+                self._close_session()
+
+    def stop(self, timeout: Optional[float] = 5.0):
+        """Write what's queued, close the session and wait for the thread"""
+        # One last try even if the card is backing off
+        self._retry_at = 0.0
+        self._stop_event.set()
+        self._wake.set()
+        if self.is_alive():
+            self.join(timeout)
+        else:
+            self.flush()
+            self._close_session()
+
+    @classmethod
+    def from_config(cls, config) -> 'DriveLogger':
+        """Build a logger from the 'logger' config section"""
+        return cls(os.path.expanduser(config.get('logger.directory', 'logs')),
+                   signals=config.get('logger.signals', []),
+                   flush_interval=config.get('logger.flush_interval', 30.0),
+                   max_pending=config.get('logger.max_pending', 50000),
+                   session_gap=config.get('logger.session_gap', 300.0),
+                   mode_signal=config.get('logger.mode_signal') or None,
+                   max_total_mb=config.get('logger.max_total_mb', 2048.0))
+
+
+def start_drive_logger(config, store) -> Optional[DriveLogger]:
+    """
+    Start logging the store's signals from the 'logger' config section
+
+    Returns:
+        The running logger, or None if logging is disabled
+    """
+    if not config.get('logger.enabled', False):
+        return None
+    logger = DriveLogger.from_config(config).attach(store)
+    logger.start()
+    print(f"Drive logger writing to {logger.directory} every {logger.flush_interval:.0f}s")
+    return logger
@@ -0,0 +1,170 @@
+"""
+Stand-ins for Pi hardware so the drivers can be exercised on a dev box
+"""
+
+import random
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class FakeMotor:
+    """Records throttle writes like an adafruit_motor DC motor"""
+
+    def __init__(self):
+        self._throttle = None
+        self.writes = 0
+        self.history: List[float] = []
+
+    @property
+    def throttle(self):
+        return self._throttle
+
+    @throttle.setter
+    def throttle(self, value):
+        # Each assignment is one I2C transaction on the real PCA9685
+        self._throttle = value
+        self.writes += 1
+        self.history.append(value)
+
+
+class FakeMotorKit:
+    """Drop-in for adafruit_motorkit.MotorKit with four DC motor channels"""
+
+    def __init__(self, i2c=None):
+        self.motor1 = FakeMotor()
+        self.motor2 = FakeMotor()
+        self.motor3 = FakeMotor()
+        self.motor4 = FakeMotor()
+        self.stepper1 = FakeStepper()
+        self.stepper2 = FakeStepper()
+
+    @property
+    def total_writes(self) -> int:
+        return sum(getattr(self, f'motor{i}').writes for i in range(1, 5))
+
+
+class FakeStepper:
+    """Records steps like an adafruit_motor stepper on a MotorKit"""
+
+    FORWARD = 1
+    BACKWARD = 2
+
+    def __init__(self):
+        self.position = 0
+        self.steps = 0
+        self.released = False
+
+    def onestep(self, *, direction: int = FORWARD, style: int = 1) -> int:
+        self.position += 1 if direction == self.FORWARD else -1
+        self.steps += 1
+        self.released = False
+        return self.position
+
+    def release(self):
+        self.released = True
+
+
+class FakeMCP3008:
+    """Stand-in for adafruit_mcp3xxx.mcp3008.MCP3008 with settable input levels"""
+
+    P0, P1, P2, P3, P4, P5, P6, P7 = range(8)
+
+    def __init__(self, levels: Optional[List[float]] = None, noise: float = 0.0, seed: int = 0):
+        """
+        Args:
+            levels: Voltage on each channel as a fraction of full scale
+            noise: Peak random error added to each conversion, as a fraction of full scale
+            seed: Seed for the noise
+        """
+        self.levels = list(levels) if levels is not None else [0.0] * 8
+        self.noise = noise
+        self.reads = 0
+        self._random = random.Random(seed)
+
+    def read(self, pin: int) -> int:
+        """One 10-bit conversion (one SPI transaction on the real chip)"""
+        self.reads += 1
+        level = self.levels[pin]
+        if self.noise:
+            level += self._random.uniform(-self.noise, self.noise)
+        return min(1023, max(0, int(round(level * 1023))))
+
+
+class FakeAnalogIn:
+    """Stand-in for adafruit_mcp3xxx.analog_in.AnalogIn"""
+
+    def __init__(self, mcp: FakeMCP3008, pin: int):
+        self.mcp = mcp
+        self.pin = pin
+
+    @property
+    def value(self) -> int:
+        # Like AnalogIn, the 10-bit result is shifted up to 16 bits
+        return self.mcp.read(self.pin) << 6
+
+
+class FakeGPIO:
+    """Stand-in for the RPi.GPIO module; drive() plays the part of the outside world"""
+
+    BCM = 11
+    BOARD = 10
+    OUT = 0
+    IN = 1
+    LOW = 0
+    HIGH = 1
+    PUD_OFF = 20
+    PUD_DOWN = 21
+    PUD_UP = 22
+    RISING = 31
+    FALLING = 32
+    BOTH = 33
+
+    def __init__(self):
+        self.mode: Optional[int] = None
+        self.levels: Dict[int, int] = {}
+        self.directions: Dict[int, int] = {}
+        self.callbacks: Dict[int, Tuple[int, Callable[[int], None]]] = {}
+        self.reads = 0
+
+    def setmode(self, mode: int):
+        self.mode = mode
+
+    def setwarnings(self, flag: bool):
+        pass
+
+    def setup(self, pin: int, direction: int, pull_up_down: int = PUD_OFF, initial: int = LOW):
+        self.directions[pin] = direction
+        if direction == self.OUT:
+            self.levels[pin] = initial
+        else:
+            self.levels.setdefault(pin, self.HIGH if pull_up_down == self.PUD_UP else self.LOW)
+
+    def input(self, pin: int) -> int:
+        # One syscall per call on the real module
+        self.reads += 1
+        return self.levels.get(pin, self.LOW)
+
+    def output(self, pin: int, value):
+        self.levels[pin] = self.HIGH if value else self.LOW
+
+    def add_event_detect(self, pin: int, edge: int, callback=None, bouncetime: Optional[int] = None):
+        self.callbacks[pin] = (edge, callback)
+
+    def remove_event_detect(self, pin: int):
+        self.callbacks.pop(pin, None)
+
+    def cleanup(self):
+        self.levels.clear()
+        self.directions.clear()
+        self.callbacks.clear()
+        self.mode = None
+
+    def drive(self, pin: int, level: int):
+        """Set an input pin's level, calling its edge callback like RPi.GPIO would"""
+        previous = self.levels.get(pin, self.LOW)
+        self.levels[pin] = level
+        if level == previous or pin not in self.callbacks:
+            return
+        edge, callback = self.callbacks[pin]
+        rising = level == self.HIGH
+        if callback and (edge == self.BOTH or edge == (self.RISING if rising else self.FALLING)):
+            callback(pin)
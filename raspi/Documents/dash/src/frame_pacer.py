@@ -0,0 +1,98 @@
+"""
+Adaptive frame pacing for the dashboard
+
+Renders at up to the configured FPS while signals are changing, and drops to
+a low idle rate once values have been static for a while (car parked). While
+idle the loop sleeps until new data is published rather than polling.
+"""
+
+import time
+from typing import Callable, Optional
+
+from .histogram import Histogram
+
+
+class FramePacer:
+    """Decides how long to wait between frames and records frame times"""
+
+    def __init__(self, max_fps: float = 60, idle_fps: float = 5, idle_after: float = 3.0,
+                 wait_for_data: Optional[Callable[[float], bool]] = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        """
+        Args:
+            max_fps: Frame rate cap while values are changing, 0 for no cap
+            idle_fps: Frame rate once nothing has changed for idle_after seconds,
+                0 for 1 frame a second
+            idle_after: Seconds without a change before going idle
+            wait_for_data: Blocks up to a timeout for new data, returns True if
+                data arrived (e.g. SignalStore.wait_for_update)
+            clock: Monotonic clock, replaceable for tests
+            sleep: Sleep function, replaceable for tests
+        """
+        self.set_rates(max_fps, idle_fps)
+        self.idle_after = idle_after
+        self.wait_for_data = wait_for_data
+        self._clock = clock
+        self._sleep = sleep
+
+        self._frame_start = clock()
+        self.last_change = self._frame_start
+        self.idle = False
+
+        # Time spent doing work each frame, and the full frame-to-frame period
+        self.work_times = Histogram()
+        self.frame_times = Histogram()
+
+    def set_rates(self, max_fps: float, idle_fps: Optional[float] = None):
+        """Change the frame rates; an idle_fps of None keeps the current idle rate"""
+        self.min_interval = 1.0 / max_fps if max_fps > 0 else 0.0
+        if idle_fps is not None:
+            self.idle_interval = 1.0 / idle_fps if idle_fps > 0 else 1.0
+
+    def mark_changed(self):
+        """Note a change that didn't come through tick(), e.g. user input"""
+        self.last_change = self._clock()
+        self.idle = False
+
+    def tick(self, changed: bool) -> float:
+        """
+        Finish a frame and wait until the next one is due
+
+        Args:
+            changed: Whether anything visible changed this frame
+
+        Returns:
+            The frame period in seconds
+        """
+        now = self._clock()
+        self.work_times.record(now - self._frame_start)
+
+        if changed:
+            self.last_change = now
+        self.idle = now - self.last_change >= self.idle_after
+
+        min_deadline = self._frame_start + self.min_interval
+        if self.idle:
+            idle_deadline = self._frame_start + self.idle_interval
+            remaining = idle_deadline - now
+            if remaining > 0:
+                if self.wait_for_data is not None:
+                    # Wakes early as soon as a new value is published
+                    self.wait_for_data(remaining)
+                else:
+                    self._sleep(remaining)
+            now = self._clock()
+
+        if now < min_deadline:
+            self._sleep(min_deadline - now)
+            now = self._clock()
+
+        period = now - self._frame_start
+        self.frame_times.record(period)
+        self._frame_start = now
+        return period
+
+    def report(self) -> str:
+        """Frame time summary"""
+        return (f"frame {self.frame_times.format()} | work {self.work_times.format()}")
@@ -5,40 +5,102 @@ Main Game Class
 import pygame
 import platform
 import sys
-from typing import Optional
+from typing import Dict, Optional
 
-try:
-    # Raspberry Pi specific imports
-    if platform.machine() in ["armv7l", "aarch64"]:
-        import RPi.GPIO as GPIO
-        GPIO_AVAILABLE = True
-    else:
-        GPIO_AVAILABLE = False
-except ImportError:
-    GPIO_AVAILABLE = False
+from .config import GameConfig
+from .frame_pacer import FramePacer
+from .gpio_input import ButtonEvent, ButtonInput, start_button_input
+from .history import HistoryRecorder
+from .latency import LatencyTracker
+from .platform_utils import load_gpio
+from .signal_store import SignalStore, Snapshot
+from .renderer import Renderer, Label, Sparkline, TextPanel, ValueDisplay
 
 
 class DashGame:
     """Main game class for the Dash Game"""
     
-    def __init__(self, width: int = 800, height: int = 480):
+    # Caption, signal and format of each live value
+    ROWS = [
+        ("Speed:", 'VehicleSpeedCluster', "{:.1f}"),
+        ("SOH:", 'BatteryStateOfHealth', "{:.0f}%"),
+        ("GIDs:", 'BatteryGIDS', "{:.0f}"),
+        ("Batt Temp:", 'BatteryPackTemperature', "{:.0f}"),
+        ("Range mi:", 'range_miles', "{:.0f}"),
+        ("Wh/mi:", 'wh_per_mile', "{:.0f}"),
+    ]
+    
+    # Methods the buttons.actions config may bind to button events
+    BUTTON_ACTIONS = ('toggle_debug', 'dump_latency', 'quit')
+    
+    def __init__(self, width: int = 800, height: int = 480,
+                 signal_store: Optional[SignalStore] = None,
+                 config: Optional[GameConfig] = None,
+                 latency: Optional[LatencyTracker] = None,
+                 history: Optional[HistoryRecorder] = None,
+                 buttons: Optional[ButtonInput] = None):
         """
         Initialize the game
         
         Args:
             width: Screen width (default 800 for development, 800 for Pi touchscreen)
             height: Screen height (default 480 for Pi touchscreen)
+            signal_store: Store the CAN reader publishes decoded signals to
+            config: Game configuration (default: config/game_config.json)
+            latency: Shared CAN-to-pixel latency tracker (default: a new one)
+            history: Signal history for the trend lines (default: record the rows shown)
+            buttons: Button input (default: started with GPIO from the raspberry_pi pins)
         """
+        self.config = config if config is not None else GameConfig()
         self.width = width
         self.height = height
         self.running = False
-        self.clock: Optional[pygame.time.Clock] = None
+        self.started = False
+        self.gpio = None
         self.screen: Optional[pygame.Surface] = None
+        self.renderer: Optional[Renderer] = None
+        self.debug_overlay: Optional[TextPanel] = None
+        
+        # Bus-to-screen latency; the overlay shows it when game.debug_mode is set
+        self.latency = latency if latency is not None else LatencyTracker()
+        self.debug_mode = self.config.get('game.debug_mode', False)
+        self.latency_dump_file = "latency.json"
+        # Bus timestamp each widget's render latency was last recorded for
+        self.rendered_timestamps: Dict[object, float] = {}
+        
+        # Latest CAN signals, refreshed once per frame in update()
+        self.signal_store = signal_store if signal_store is not None else SignalStore()
+        self.signals: Snapshot = self.signal_store.snapshot()
+        # Whether the last frame drew anything; publishes of unchanged values don't count
+        self.drawn = True
+        
+        # Bounded per-signal history drawn as sparklines beside each value
+        if history is None:
+            history = HistoryRecorder(signal for _, signal, _ in self.ROWS)
+            history.attach(self.signal_store)
+        self.history = history
+        self.history_span = self.config.get('history.span', 60.0)
+        
+        # GPIO button events are queued by edge callbacks and drained with the pygame events;
+        # buttons.actions maps '<button>.<event>' to one of BUTTON_ACTIONS
+        self.buttons = buttons
+        self.button_actions = self.config.accessor('buttons.actions', {})
+        
+        # Render on change at up to display.fps, drop to display.idle_fps when static
+        self.pacer = FramePacer(max_fps=self.config.get('display.fps', 60),
+                                idle_fps=self.config.get('display.idle_fps', 5),
+                                idle_after=self.config.get('display.idle_after', 3.0),
+                                wait_for_data=self.wait_for_signals)
+        
+        # Live config edits arrive on the watcher thread and are applied between frames
+        self.sparklines: list = []
+        self.config_changes: Optional[set] = None
+        self.config.subscribe(self.on_config_change,
+                              ['display', 'history.span', 'game.debug_mode'])
         
         # Platform detection
         self.is_raspberry_pi = platform.machine() in ["armv7l", "aarch64"]
         print(f"Running on Raspberry Pi: {self.is_raspberry_pi}")
-        print(f"GPIO Available: {GPIO_AVAILABLE}")
         
     def initialize_pygame(self):
         """Initialize pygame"""
@@ -52,58 +114,184 @@ class DashGame:
             self.screen = pygame.display.set_mode((self.width, self.height))
             
         pygame.display.set_caption("Dash Game")
-        self.clock = pygame.time.Clock()
+        
+        self.renderer = Renderer(self.screen)
+        self.build_widgets()
+        
+    def build_widgets(self):
+        """Lay out the static labels and live values"""
+        renderer = self.renderer
+        font = renderer.fonts.get(36)
+        atlas = renderer.atlas(36)
+        
+        renderer.add(Label("Dash Game Running!", (self.width // 2, self.height - 150), font,
+                           center=True))
+        renderer.add(Label(f"Platform: {platform.system()}", (10, 10), font))
+        
+        # Latest CAN values, each with its trend over the last history.span seconds
+        for i, (caption, signal, fmt) in enumerate(self.ROWS):
+            y = 60 + i * 40
+            renderer.add(Label(caption, (10, y), font))
+            renderer.add(ValueDisplay(signal, (200, y), atlas, fmt=fmt, max_chars=7))
+            history = self.history.get(signal)
+            if history is not None:
+                self.sparklines.append(renderer.add(Sparkline(
+                    pygame.Rect(360, y, self.width - 380, 30), history, self.history_span)))
+        
+        # Latency and frame-time overlay along the bottom of the screen
+        small = renderer.fonts.get(22)
+        panel_height = small.get_linesize() * 5
+        self.debug_overlay = renderer.add(TextPanel(
+            pygame.Rect(10, self.height - panel_height - 10, self.width - 20, panel_height),
+            small, self.debug_lines))
+        self.debug_overlay.visible = self.debug_mode
+        
+    def debug_lines(self) -> list:
+        """Lines shown by the debug overlay"""
+        return self.latency.lines() + [f"frame   {self.pacer.frame_times.format()}"]
+        
+    def toggle_debug(self):
+        """Show or hide the debug overlay"""
+        self.debug_mode = not self.debug_mode
+        if self.debug_overlay is not None:
+            self.debug_overlay.visible = self.debug_mode
+        if self.renderer:
+            self.renderer.invalidate()
         
     def initialize_gpio(self):
         """Initialize GPIO pins if on Raspberry Pi"""
-        if GPIO_AVAILABLE and self.is_raspberry_pi:
-            GPIO.setmode(GPIO.BCM)
-            # Add your GPIO pin setups here
+        # Imported here rather than with the module so it stays off the startup path
+        self.gpio = load_gpio() if self.is_raspberry_pi else None
+        print(f"GPIO Available: {self.gpio is not None}")
+        if self.gpio is not None:
+            self.gpio.setmode(self.gpio.BCM)
+            if self.buttons is None:
+                # Edges wake an idle render loop so a press never waits for the next frame
+                self.buttons = start_button_input(self.config, self.gpio, self.signal_store.wake)
             print("GPIO initialized")
         
     def cleanup_gpio(self):
         """Clean up GPIO on exit"""
-        if GPIO_AVAILABLE and self.is_raspberry_pi:
-            GPIO.cleanup()
+        if self.buttons is not None:
+            self.buttons.stop()
+        if self.gpio is not None:
+            self.gpio.cleanup()
             print("GPIO cleaned up")
             
     def handle_events(self):
         """Handle pygame events"""
         for event in pygame.event.get():
+            self.pacer.mark_changed()
             if event.type == pygame.QUIT:
                 self.running = False
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     self.running = False
+                elif event.key == pygame.K_F3:
+                    self.toggle_debug()
+                elif event.key == pygame.K_F12:
+                    self.dump_latency()
+        if self.buttons is not None:
+            for button_event in self.buttons.drain():
+                self.pacer.mark_changed()
+                self.handle_button(button_event)
+                
+    def handle_button(self, event: ButtonEvent):
+        """Run the action configured for a button event, if any"""
+        action = self.button_actions().get(f"{event.button}.{event.kind}")
+        if action is None:
+            return
+        if action not in self.BUTTON_ACTIONS:
+            print(f"Unknown button action '{action}'")
+            return
+        getattr(self, action)()
+        
+    def dump_latency(self):
+        """Write the latency histograms to latency_dump_file"""
+        self.latency.dump(self.latency_dump_file)
+        
+    def quit(self):
+        """End the game loop"""
+        self.running = False
                     
+    def wait_for_signals(self, timeout: float) -> bool:
+        """Sleep until a snapshot newer than the one on screen is published"""
+        return self.signal_store.wait_for_update(timeout, self.signals.version)
+        
+    def on_config_change(self, config: GameConfig, changed: set):
+        """Config subscriber: note the change for the render loop to apply"""
+        pending = self.config_changes
+        self.config_changes = changed if pending is None else pending | changed
+        self.signal_store.wake()
+        
+    def apply_config(self, changed: set):
+        """Pick up reloaded frame rates, trend span and debug overlay"""
+        config = self.config
+        self.pacer.set_rates(config.get('display.fps', 60), config.get('display.idle_fps', 5))
+        self.pacer.idle_after = config.get('display.idle_after', 3.0)
+        self.pacer.mark_changed()
+        span = config.get('history.span', 60.0)
+        if span != self.history_span:
+            self.history_span = span
+            for sparkline in self.sparklines:
+                sparkline.span = span
+                sparkline.interval = span / max(1, sparkline.rect.width)
+        if config.get('game.debug_mode', False) != self.debug_mode:
+            self.toggle_debug()
+        if changed & {'display.width', 'display.height', 'display.fullscreen'}:
+            print("Display size changes take effect after a restart")
+        
     def update(self):
         """Update game logic"""
-        pass
+        changes = self.config_changes
+        if changes is not None:
+            self.config_changes = None
+            self.apply_config(changes)
+        # One reference read gives a consistent view of every signal for this frame
+        self.signals = self.signal_store.snapshot()
         
     def draw(self):
         """Draw the game"""
-        if self.screen:
-            # Clear screen
-            self.screen.fill((0, 0, 0))
-            
-            # Draw game elements here
-            font = pygame.font.Font(None, 36)
-            text = font.render("Dash Game Running!", True, (255, 255, 255))
-            text_rect = text.get_rect(center=(self.width // 2, self.height // 2))
-            self.screen.blit(text, text_rect)
-            
-            # Platform info
-            platform_text = font.render(f"Platform: {platform.system()}", True, (255, 255, 255))
-            self.screen.blit(platform_text, (10, 10))
-            
-            pygame.display.flip()
+        if self.renderer:
+            # Only widgets whose signal changed are redrawn and pushed
+            self.drawn = bool(self.renderer.render(self.signals))
+            if self.drawn:
+                self.record_render_latency()
+                
+    def record_render_latency(self):
+        """
+        Record how long after its CAN frame each redrawn value reached the screen
+
+        Only a new value counts: a redraw because the signal went stale (or
+        came back with nothing newer) would measure the outage, not the
+        pipeline.
+        """
+        now = self.latency.clock()
+        record = self.latency.record
+        recorded = self.rendered_timestamps
+        signals = self.signals
+        for widget in self.renderer.redrawn:
+            if not widget.signal or signals.is_stale(widget.signal):
+                continue
+            entry = signals.get_signal(widget.signal)
+            if entry is None or recorded.get(widget) == entry.timestamp:
+                continue
+            recorded[widget] = entry.timestamp
+            record('render', entry.timestamp, now)
             
-    def run(self):
-        """Main game loop"""
+    def start(self):
+        """Open the display and put up the first frame, before anything slower starts"""
         print("Initializing game...")
+        self.initialize_pygame()
+        self.update()
+        self.draw()
+        self.started = True
         
+    def run(self):
+        """Main game loop"""
         try:
-            self.initialize_pygame()
+            if not self.started:
+                self.start()
             self.initialize_gpio()
             
             self.running = True
@@ -114,13 +302,14 @@ class DashGame:
                 self.update()
                 self.draw()
                 
-                if self.clock:
-                    self.clock.tick(60)  # 60 FPS
+                self.pacer.tick(self.drawn)
                     
         except Exception as e:
             print(f"Error in game loop: {e}")
             raise
         finally:
             self.cleanup_gpio()
+            print(f"Frame times: {self.pacer.report()}")
+            print(f"CAN-to-pixel latency:\n{self.latency.report()}")
             pygame.quit()
             print("Game shut down cleanly")
@@ -0,0 +1,168 @@
+"""
+Nonlinear gauge calibration
+
+Air-core and PWM-driven needles don't move in proportion to throttle. Each
+gauge can list calibration points, [value, throttle] pairs measured with
+sweep(), under 'gauges.channels.<name>.calibration'. The points are
+compiled once into a dense lookup table across the value range, so mapping
+a value on the control loop is an index, a multiply and an add however
+many points there are. Without points the gauge is linear between
+min_position and max_position, through the same table.
+"""
+
+import bisect
+import time
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+TABLE_SIZE = 256
+
+Point = Tuple[float, float]
+
+
+def interpolate(points: Sequence[Point], value: float) -> float:
+    """Piecewise-linear throttle for a value, clamped to the end points"""
+    values = [point[0] for point in points]
+    index = bisect.bisect_right(values, value)
+    if index == 0:
+        return points[0][1]
+    if index == len(points):
+        return points[-1][1]
+    (v0, t0), (v1, t1) = points[index - 1], points[index]
+    return t0 + (t1 - t0) * (value - v0) / (v1 - v0)
+
+
+def collapse(points: Iterable[Sequence[float]]) -> List[Point]:
+    """
+    Sort points by value and keep one throttle per value
+
+    A needle pegged at a dial stop reads the same value over several
+    throttles. At either end of the range the throttle nearest the rest of
+    the points is kept, as that is where the needle starts to move; a flat
+    run in the middle keeps its mean.
+    """
+    groups: List[Tuple[float, List[float]]] = []
+    for value, throttle in sorted((float(value), float(throttle)) for value, throttle in points):
+        if groups and groups[-1][0] == value:
+            groups[-1][1].append(throttle)
+        else:
+            groups.append((value, [throttle]))
+    collapsed = []
+    for index, (value, throttles) in enumerate(groups):
+        if len(throttles) == 1:
+            collapsed.append((value, throttles[0]))
+            continue
+        if len(groups) > 1 and index in (0, len(groups) - 1):
+            neighbour = groups[1 if index == 0 else index - 1][1]
+            inner = sum(neighbour) / len(neighbour)
+            collapsed.append((value, min(throttles, key=lambda throttle: abs(throttle - inner))))
+        else:
+            collapsed.append((value, sum(throttles) / len(throttles)))
+    return collapsed
+
+
+class CalibrationTable:
+    """Value to throttle map compiled into a lookup array"""
+
+    __slots__ = ('points', 'value_min', 'value_max', '_scale', '_last', '_base', '_slope')
+
+    def __init__(self, points: Iterable[Sequence[float]], size: int = TABLE_SIZE):
+        """
+        Args:
+            points: (value, throttle) pairs in any order; repeated values are
+                collapsed (see collapse)
+            size: Table cells across the value range
+
+        Raises:
+            ValueError: If there are no points
+        """
+        points = collapse(points)
+        if not points:
+            raise ValueError("Calibration needs at least one point")
+        self.points = points
+        self.value_min = points[0][0]
+        self.value_max = points[-1][0]
+        span = self.value_max - self.value_min
+        if span == 0:
+            # A single reading: every value maps to it
+            size = 0
+            self._scale = 0.0
+        else:
+            self._scale = size / span
+        self._last = size
+        step = span / size if size else 0.0
+        self._base = [interpolate(points, self.value_min + i * step) for i in range(size + 1)]
+        self._slope = [b1 - b0 for b0, b1 in zip(self._base, self._base[1:])]
+
+    @classmethod
+    def linear(cls, value_min: float, value_max: float,
+               min_position: float, max_position: float) -> 'CalibrationTable':
+        """Straight line from min_position at value_min to max_position at value_max"""
+        if value_min == value_max:
+            return cls([(value_min, min_position)])
+        return cls([(value_min, min_position), (value_max, max_position)])
+
+    def __call__(self, value: float) -> float:
+        """Throttle for a value, clamped to the calibrated range"""
+        position = (value - self.value_min) * self._scale
+        # 'not >' also catches NaN
+        if not position > 0.0:
+            return self._base[0]
+        if position >= self._last:
+            return self._base[-1]
+        index = int(position)
+        return self._base[index] + self._slope[index] * (position - index)
+
+
+def sweep_throttles(min_position: float, max_position: float, steps: int = 10) -> List[float]:
+    """Evenly spaced throttles from min_position to max_position inclusive"""
+    if steps < 1:
+        return [min_position]
+    return [min_position + (max_position - min_position) * i / steps for i in range(steps + 1)]
+
+
+def sweep(motor, throttles: Sequence[float], read: Callable[[float], Optional[float]],
+          settle: float = 1.0, both_ways: bool = True,
+          sleep: Callable[[float], None] = time.sleep) -> List[Point]:
+    """
+    Step a motor through throttles and record where the needle lands
+
+    The motor is written directly, bypassing any calibration. With both_ways
+    the throttles are visited up and then back down, and the two readings at
+    each throttle are averaged to cancel the needle's hysteresis.
+
+    Args:
+        motor: Motor to drive, e.g. MotorKit().motor3
+        throttles: Throttles to visit, lowest first
+        read: Given the throttle once the needle settles, returns the dial
+            reading in signal units, or None to skip the point
+        settle: Seconds to let the needle settle after each move
+        both_ways: Sweep back down as well
+        sleep: Delay function (for tests)
+
+    Returns:
+        (value, throttle) calibration points, ordered by throttle
+    """
+    order = list(throttles)
+    if both_ways:
+        order += order[-2::-1]
+    readings = {}
+    for throttle in order:
+        motor.throttle = throttle
+        sleep(settle)
+        reading = read(throttle)
+        if reading is not None:
+            readings.setdefault(throttle, []).append(float(reading))
+    return [(sum(values) / len(values), throttle)
+            for throttle, values in sorted(readings.items())]
+
+
+def is_monotonic(points: Sequence[Point]) -> bool:
+    """
+    True if the readings never go back on themselves as throttle rises
+
+    Repeated readings, e.g. a needle resting on its stop, are allowed; they
+    are collapsed when the table is compiled.
+    """
+    values = [value for value, _ in sorted(points, key=lambda point: point[1])]
+    pairs = list(zip(values, values[1:]))
+    return all(v0 <= v1 for v0, v1 in pairs) or all(v0 >= v1 for v0, v1 in pairs)
@@ -0,0 +1,291 @@
+"""
+Background gauge motor driver
+
+Runs the PWM-driven gauges at a fixed control rate: targets come from decoded
+CAN signals, are mapped through each gauge's compiled calibration table, then
+damped and slew-limited. The I2C write to the motor bonnet is skipped unless
+the throttle moved by more than a deadband, so a steady needle costs nothing.
+"""
+
+import inspect
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from .fake_hardware import FakeMotorKit
+from .gauge_calibration import CalibrationTable
+from .latency import LatencyTracker
+
+
+class GaugeChannel:
+    """One needle driven by one motor output"""
+
+    def __init__(self, name: str, motor: str, signal: Optional[str] = None,
+                 value_min: float = 0.0, value_max: float = 1.0,
+                 min_position: float = 0.0, max_position: float = 1.0,
+                 slew_rate: float = 1.0, damping: float = 0.0, deadband: float = 0.002,
+                 park_position: float = 0.0, calibration: Optional[List] = None):
+        """
+        Args:
+            name: Gauge name, e.g. 'pon'
+            motor: MotorKit attribute, e.g. 'motor3'
+            signal: Signal the needle follows (None for set_target() only)
+            value_min: Signal value at the bottom of the scale
+            value_max: Signal value at the top of the scale
+            min_position: Throttle at the bottom of the scale
+            max_position: Throttle at the top of the scale
+            slew_rate: Fastest the throttle may move, in throttle units per second
+            damping: Time constant in seconds of the first-order smoothing (0 = none)
+            deadband: Smallest throttle change worth an I2C write
+            park_position: Throttle written when the driver stops or the signal goes stale
+            calibration: [value, throttle] points measured on the gauge; these replace
+                the linear value_min..value_max to min_position..max_position map
+        """
+        self.name = name
+        self.motor = motor
+        self.signal = signal
+        self.value_min = value_min
+        self.value_max = value_max
+        self.min_position = min_position
+        self.max_position = max_position
+        self.slew_rate = slew_rate
+        self.damping = damping
+        self.deadband = deadband
+        self.park_position = park_position
+        self.calibration = calibration
+
+        self.target_value: Optional[float] = None
+        # The signal stopped arriving: slew to park rather than hold a frozen reading
+        self.stale = False
+        self.position: Optional[float] = None
+        self.written: Optional[float] = None
+        self.actuated_timestamp: Optional[float] = None
+        self.calibrate()
+
+    @classmethod
+    def settings(cls) -> Dict[str, object]:
+        """Every config setting a channel takes, with its default (motor has none)"""
+        parameters = list(inspect.signature(cls.__init__).parameters.values())[2:]
+        return {parameter.name: parameter.default for parameter in parameters}
+
+    @classmethod
+    def from_dict(cls, name: str, settings: Dict) -> 'GaugeChannel':
+        """Build a channel from a 'gauges.channels' config entry, ignoring unknown keys"""
+        known = cls.settings()
+        for key in settings:
+            if key not in known:
+                print(f"Unknown setting {key} for gauge {name}, ignored")
+        return cls(name, **{key: value for key, value in settings.items() if key in known})
+
+    def calibrate(self):
+        """
+        Compile the calibration into the lookup table step() maps values through
+
+        Points that can't be used fall back to the linear range with a warning,
+        so one bad calibration can't keep the dash from starting.
+        """
+        self.table = None
+        if self.calibration:
+            try:
+                self.table = CalibrationTable(self.calibration)
+            except (TypeError, ValueError) as e:
+                print(f"Bad calibration for gauge {self.name} ({e}), using the linear range")
+        if self.table is None:
+            self.table = CalibrationTable.linear(self.value_min, self.value_max,
+                                                 self.min_position, self.max_position)
+        # Remap the current target through the new table
+        self._mapped_value: Optional[float] = None
+        self._mapped_throttle = 0.0
+
+    def throttle_for(self, value: float) -> float:
+        """Map a signal value onto the calibrated throttle range"""
+        return self.table(value)
+
+    def step(self, dt: float) -> Optional[float]:
+        """
+        Advance the needle one control period
+
+        Returns:
+            The throttle to write, or None if the change is inside the deadband
+        """
+        if self.target_value is None:
+            return None
+        if self.stale:
+            target = self.park_position
+        else:
+            # Only a new value costs a table lookup
+            if self.target_value != self._mapped_value:
+                self._mapped_value = self.target_value
+                self._mapped_throttle = self.table(self.target_value)
+            target = self._mapped_throttle
+
+        if self.position is None:
+            self.position = target
+        else:
+            desired = target
+            if self.damping > 0:
+                desired = self.position + (target - self.position) * (dt / (self.damping + dt))
+            limit = self.slew_rate * dt
+            delta = min(limit, max(-limit, desired - self.position))
+            self.position += delta
+            # Snap once we are inside the deadband so the needle actually lands
+            if abs(target - self.position) < self.deadband:
+                self.position = target
+
+        written = self.written
+        if written is not None:
+            if written == self.position:
+                return None
+            # Small moves are only written when they land the needle on target
+            if abs(self.position - written) < self.deadband and self.position != target:
+                return None
+        self.written = self.position
+        return self.position
+
+
+class GaugeDriver(threading.Thread):
+    """Drives every gauge channel at a fixed rate on its own thread"""
+
+    def __init__(self, kit, channels: List[GaugeChannel], rate_hz: float = 50.0,
+                 source: Optional[Callable[[], object]] = None,
+                 latency: Optional[LatencyTracker] = None):
+        """
+        Args:
+            kit: MotorKit (or FakeMotorKit)
+            channels: Gauges to drive
+            rate_hz: Control loop rate
+            source: Returns the latest signal snapshot, e.g. SignalStore.snapshot
+            latency: Records actuate latency if given
+        """
+        super().__init__(name="GaugeDriver", daemon=True)
+        self.kit = kit
+        self.channels = {channel.name: channel for channel in channels}
+        self.period = 1.0 / rate_hz
+        self.source = source
+        self.latency = latency
+        self.writes = 0
+        self.ticks = 0
+        self._motors = {channel.name: getattr(kit, channel.motor) for channel in channels}
+        self._stop_event = threading.Event()
+
+    @classmethod
+    def from_config(cls, config, kit, source=None, latency=None) -> 'GaugeDriver':
+        """Build a driver from the 'gauges' config section; a gauge that can't be built is skipped"""
+        channels = []
+        for name, settings in config.get('gauges.channels', {}).items():
+            try:
+                channels.append(GaugeChannel.from_dict(name, settings))
+            except (TypeError, ValueError) as e:
+                print(f"Error in gauge {name}: {e}, skipping it")
+        return cls(kit, channels, config.get('gauges.rate_hz', 50.0), source, latency)
+
+    def apply_config(self, config, changed=None):
+        """
+        Recalibrate from a reloaded 'gauges' section
+
+        Ranges, calibration points, slew, damping and deadband change in place
+        (the lookup table is recompiled), so the needles keep their positions;
+        adding or removing gauges, or moving one to another motor, takes a
+        restart. A setting removed from the file goes back to its default.
+        """
+        defaults = GaugeChannel.settings()
+        for name, settings in config.get('gauges.channels', {}).items():
+            channel = self.channels.get(name)
+            if channel is None:
+                print(f"New gauge {name} takes effect after a restart")
+                continue
+            for key, default in defaults.items():
+                if key == 'motor':
+                    if settings.get(key, channel.motor) != channel.motor:
+                        print(f"Moving gauge {name} to {settings[key]} takes effect after a restart")
+                else:
+                    setattr(channel, key, settings.get(key, default))
+            channel.calibrate()
+        self.period = 1.0 / config.get('gauges.rate_hz', 50.0)
+
+    def set_target(self, name: str, value: float):
+        """Set a gauge's target value directly"""
+        self.channels[name].target_value = value
+
+    def step(self, dt: float):
+        """Run one control period"""
+        self.ticks += 1
+        snapshot = self.source() if self.source is not None else None
+        for name, channel in self.channels.items():
+            entry = None
+            if snapshot is not None and channel.signal:
+                entry = snapshot.get_signal(channel.signal)
+                if entry is not None:
+                    channel.target_value = entry.value
+                channel.stale = snapshot.is_stale(channel.signal)
+            throttle = channel.step(dt)
+            if throttle is not None:
+                self._motors[name].throttle = throttle
+                self.writes += 1
+                # Time from the frame to the first write it caused, not the whole slew
+                if (self.latency is not None and entry is not None
+                        and entry.timestamp != channel.actuated_timestamp):
+                    channel.actuated_timestamp = entry.timestamp
+                    self.latency.record('actuate', entry.timestamp)
+
+    def park(self):
+        """Move every needle to its park position"""
+        for name, channel in self.channels.items():
+            self._motors[name].throttle = channel.park_position
+            channel.written = channel.park_position
+            channel.position = None
+
+    def run(self):
+        """Thread body: fixed-rate control loop"""
+        next_tick = time.monotonic()
+        last = next_tick
+        try:
+            while not self._stop_event.is_set():
+                now = time.monotonic()
+                self.step(now - last)
+                last = now
+
+                next_tick += self.period
+                delay = next_tick - time.monotonic()
+                if delay > 0:
+                    self._stop_event.wait(delay)
+                else:
+                    # Fell behind; don't try to catch up with a burst of ticks
+                    next_tick = time.monotonic()
+        except Exception as e:
+            print(f"Gauge driver stopped: {e}")
+        finally:
+            self.park()
+
+    def stop(self, timeout: Optional[float] = 1.0):
+        """Stop the loop and park the needles"""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+
+
+def create_motor_kit():
+    """Create the real MotorKit, or a FakeMotorKit when the Adafruit libraries are missing"""
+    try:
+        from adafruit_motorkit import MotorKit
+        return MotorKit()
+    except (ImportError, NotImplementedError, RuntimeError, ValueError) as e:
+        print(f"MotorKit not available ({e}), using FakeMotorKit")
+        return FakeMotorKit()
+
+
+def start_gauge_driver(config, store, latency: Optional[LatencyTracker] = None) -> Optional[GaugeDriver]:
+    """
+    Start the gauge driver from the 'gauges' config section
+
+    Returns:
+        The running driver, or None if gauges are disabled
+    """
+    if not config.get('gauges.enabled', False):
+        return None
+    driver = GaugeDriver.from_config(config, create_motor_kit(), store.snapshot, latency)
+    config.subscribe(driver.apply_config, ['gauges'])
+    driver.start()
+    print(f"Gauge driver running {len(driver.channels)} gauges at "
+          f"{1.0 / driver.period:.0f} Hz")
+    return driver
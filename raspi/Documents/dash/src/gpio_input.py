@@ -0,0 +1,208 @@
+"""
+Edge-triggered button input
+
+Each button pin gets an RPi.GPIO edge callback instead of being polled every
+frame. The callback (on RPi.GPIO's own thread) debounces the edge in
+software, recognizes press, release, long press and double press, and
+appends a ButtonEvent to a deque. An edge that lands inside the debounce
+window may be a real change rather than a bounce, so the pin is read again
+once the window is over and the state settles on what it reads. deque.append and popleft are atomic, so the
+render loop drains the queue with no lock, and a press is caught however slow
+the frame rate is.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+PRESS = 'press'
+RELEASE = 'release'
+LONG_PRESS = 'long_press'
+DOUBLE_PRESS = 'double_press'
+
+
+class ButtonEvent(NamedTuple):
+    """Something a button did"""
+    button: str
+    kind: str           # PRESS, RELEASE, LONG_PRESS or DOUBLE_PRESS
+    timestamp: float    # clock() when the edge was accepted
+
+
+class Button:
+    """Debounced state of one active-low button (pulled up, pressed pulls it to ground)"""
+
+    def __init__(self, name: str, pin: int):
+        self.name = name
+        self.pin = pin
+        self.pressed = False
+        self.changed_at = float('-inf')
+        # Time of the last press that could start a double press
+        self.last_press = float('-inf')
+        self.long_timer: Optional[threading.Timer] = None
+        # Re-reads the pin when an edge was ignored inside the debounce window
+        self.settle_timer: Optional[threading.Timer] = None
+
+
+class ButtonInput:
+    """Turns GPIO edges on button pins into a queue of ButtonEvents"""
+
+    def __init__(self, gpio, buttons: Dict[str, int], debounce: float = 0.02,
+                 long_press: float = 0.8, double_press: float = 0.35,
+                 on_event: Optional[Callable[[], None]] = None,
+                 clock: Callable[[], float] = time.monotonic, max_events: int = 256):
+        """
+        Args:
+            gpio: RPi.GPIO module or a FakeGPIO
+            buttons: Button name -> BCM pin
+            debounce: Seconds after an accepted edge during which the pin is ignored
+            long_press: Seconds held before LONG_PRESS is sent
+            double_press: Most seconds between two presses for the second to be DOUBLE_PRESS
+            on_event: Called after each event is queued, e.g. to wake an idle render loop
+            clock: Monotonic clock, replaceable for tests
+            max_events: Oldest events are dropped past this many undrained
+        """
+        self.gpio = gpio
+        self.buttons = {name: Button(name, pin) for name, pin in buttons.items()}
+        self._by_pin = {button.pin: button for button in self.buttons.values()}
+        self.debounce = debounce
+        self.long_press = long_press
+        self.double_press = double_press
+        self.on_event = on_event
+        self._clock = clock
+        self.events: deque = deque(maxlen=max_events)
+        self.edges = 0
+        self.bounces = 0
+        # Edges arrive on RPi.GPIO's thread and settle re-reads on timer threads
+        self._lock = threading.Lock()
+        self.started = False
+
+    def start(self):
+        """Configure the pins and register the edge callbacks"""
+        gpio = self.gpio
+        gpio.setmode(gpio.BCM)
+        for button in self.buttons.values():
+            gpio.setup(button.pin, gpio.IN, pull_up_down=gpio.PUD_UP)
+            button.pressed = not gpio.input(button.pin)
+            gpio.add_event_detect(button.pin, gpio.BOTH, callback=self._edge)
+        self.started = True
+
+    def stop(self):
+        """Remove the edge callbacks and cancel pending long presses"""
+        for button in self.buttons.values():
+            for timer in (button.long_timer, button.settle_timer):
+                if timer is not None:
+                    timer.cancel()
+            button.long_timer = None
+            button.settle_timer = None
+            if self.started:
+                try:
+                    self.gpio.remove_event_detect(button.pin)
+                except Exception as e:
+                    print(f"Error removing edge detect on pin {button.pin}: {e}")
+        self.started = False
+
+    def _edge(self, pin: int):
+        """GPIO callback for either edge on a button pin"""
+        button = self._by_pin.get(pin)
+        if button is None:
+            return
+        self.edges += 1
+        with self._lock:
+            self._update(button, self._clock())
+
+    def _settle(self, button: Button):
+        """Timer callback: the debounce window is over, so take the level the pin settled on"""
+        with self._lock:
+            button.settle_timer = None
+            self._update(button, self._clock())
+
+    def _update(self, button: Button, now: float):
+        """Read the pin and act on a change of state, unless inside the debounce window"""
+        pressed = not self.gpio.input(button.pin)
+        if pressed == button.pressed:
+            return
+        wait = button.changed_at + self.debounce - now
+        if wait > 0:
+            self.bounces += 1
+            if button.settle_timer is None:
+                timer = threading.Timer(wait, self._settle, (button,))
+                timer.daemon = True
+                button.settle_timer = timer
+                timer.start()
+            return
+        button.pressed = pressed
+        button.changed_at = now
+
+        if pressed:
+            if now - button.last_press <= self.double_press:
+                # A third quick press starts a new pair rather than another double
+                button.last_press = float('-inf')
+                self._emit(button, DOUBLE_PRESS, now)
+            else:
+                button.last_press = now
+                self._emit(button, PRESS, now)
+            timer = threading.Timer(self.long_press, self._held, (button, now))
+            timer.daemon = True
+            button.long_timer = timer
+            timer.start()
+        else:
+            if button.long_timer is not None:
+                button.long_timer.cancel()
+                button.long_timer = None
+            self._emit(button, RELEASE, now)
+
+    def _held(self, button: Button, pressed_at: float):
+        """Timer callback: still down since the same press, so it's a long press"""
+        if (button.pressed and button.changed_at == pressed_at
+                and not self.gpio.input(button.pin)):
+            button.long_timer = None
+            self._emit(button, LONG_PRESS, self._clock())
+
+    def _emit(self, button: Button, kind: str, timestamp: float):
+        self.events.append(ButtonEvent(button.name, kind, timestamp))
+        if self.on_event is not None:
+            self.on_event()
+
+    def drain(self) -> List[ButtonEvent]:
+        """Take every queued event, oldest first"""
+        events = []
+        popleft = self.events.popleft
+        while True:
+            try:
+                events.append(popleft())
+            except IndexError:
+                return events
+
+
+def start_button_input(config, gpio, on_event: Optional[Callable[[], None]] = None
+                       ) -> Optional[ButtonInput]:
+    """
+    Start button input for the raspberry_pi.gpio_pins whose name contains 'button'
+
+    Args:
+        config: Game config; the 'buttons' section sets the timings
+        gpio: RPi.GPIO module or FakeGPIO (None when there is no GPIO)
+        on_event: Called after each event is queued
+
+    Returns:
+        The running input, or None if buttons are disabled or there is no GPIO
+    """
+    if gpio is None or not config.get('buttons.enabled', True):
+        return None
+    pins = {name: pin for name, pin in config.get('raspberry_pi.gpio_pins', {}).items()
+            if 'button' in name}
+    if not pins:
+        return None
+    buttons = ButtonInput(gpio, pins,
+                          debounce=config.get('buttons.debounce', 0.02),
+                          long_press=config.get('buttons.long_press', 0.8),
+                          double_press=config.get('buttons.double_press', 0.35),
+                          on_event=on_event)
+    try:
+        buttons.start()
+    except Exception as e:
+        print(f"Error starting button input: {e}")
+        return None
+    print(f"Button input on pins {sorted(pins.values())}")
+    return buttons
@@ -0,0 +1,84 @@
+"""
+Fixed-bucket histogram for timing measurements
+
+Recording is a bisect and an increment, so it is cheap enough to call every
+frame; percentiles are read back from the bucket counts.
+"""
+
+import bisect
+from typing import Dict, List, Optional, Sequence
+
+# Bucket upper bounds in seconds, from 100us up to 1s
+DEFAULT_BOUNDS = (
+    0.0001, 0.0002, 0.0005,
+    0.001, 0.002, 0.004, 0.006, 0.008, 0.010, 0.0125, 0.0167, 0.0175,
+    0.020, 0.025, 0.0333, 0.050, 0.075, 0.100, 0.200, 0.500, 1.0,
+)
+
+
+class Histogram:
+    """Counts samples into fixed buckets"""
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BOUNDS):
+        self.bounds: List[float] = list(bounds)
+        # One extra bucket for samples above the last bound
+        self.counts: List[int] = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value: float):
+        """Add a sample"""
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def reset(self):
+        """Clear all samples"""
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, pct: float) -> float:
+        """Upper bound of the bucket holding the pct'th percentile (max if above all buckets)"""
+        if not self.count:
+            return 0.0
+        target = pct / 100.0 * self.count
+        running = 0
+        for i, bucket in enumerate(self.counts):
+            running += bucket
+            if running >= target:
+                return min(self.bounds[i], self.max) if i < len(self.bounds) else self.max
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        """Count, mean, p50, p99 and max"""
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'p50': self.percentile(50),
+            'p99': self.percentile(99),
+            'max': self.max,
+        }
+
+    def format(self, scale: float = 1000.0, unit: str = "ms") -> str:
+        """One-line summary, in milliseconds by default"""
+        s = self.summary()
+        return (f"n={s['count']} p50={s['p50'] * scale:.2f}{unit} "
+                f"p99={s['p99'] * scale:.2f}{unit} max={s['max'] * scale:.2f}{unit}")
+
+    def buckets(self) -> Dict[str, int]:
+        """Non-empty buckets keyed by their upper bound"""
+        result = {}
+        for i, bucket in enumerate(self.counts):
+            if bucket:
+                label = f"<={self.bounds[i]}" if i < len(self.bounds) else f">{self.bounds[-1]}"
+                result[label] = bucket
+        return result
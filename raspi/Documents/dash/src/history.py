@@ -0,0 +1,267 @@
+"""
+Bounded per-signal history for trend graphs
+
+Each signal keeps a few fixed-size ring buffers backed by array('d') for
+timestamps and array('f') for values:
+
+    full rate   last ~minute of every frame
+    1 s         last hour, one mean per second
+    30 s        last day (a whole drive), one mean per 30 seconds
+
+Memory is allocated up front and never grows, however long the Pi runs, and
+a sparkline reads from the coarsest buffer that still has a point per pixel.
+"""
+
+import math
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# (step in seconds, capacity); step 0 keeps every sample
+DEFAULT_RESOLUTIONS = (
+    (0.0, 3000),    # 60 s of a 50 Hz signal
+    (1.0, 3600),    # an hour at 1 Hz
+    (30.0, 2880),   # a day at 30 s
+)
+
+Sample = Tuple[float, float]
+
+
+class RingBuffer:
+    """Fixed-capacity time series that overwrites its oldest sample"""
+
+    def __init__(self, capacity: int, typecode: str = 'f'):
+        """
+        Args:
+            capacity: Number of samples kept
+            typecode: array typecode for the values ('f' halves memory against 'd')
+        """
+        self.capacity = capacity
+        self.times = array('d', [0.0]) * capacity
+        self.values = array(typecode, [0]) * capacity
+        self._next = 0
+        self.count = 0
+
+    def append(self, timestamp: float, value: float):
+        """Add a sample; timestamps must not go backwards"""
+        i = self._next
+        self.times[i] = timestamp
+        self.values[i] = value
+        i += 1
+        self._next = i if i < self.capacity else 0
+        if self.count < self.capacity:
+            self.count += 1
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def full(self) -> bool:
+        return self.count == self.capacity
+
+    def _slot(self, index: int) -> int:
+        """Array slot of the index'th oldest sample"""
+        return (self._next - self.count + index) % self.capacity
+
+    def __getitem__(self, index: int) -> Sample:
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        slot = self._slot(index)
+        return self.times[slot], self.values[slot]
+
+    @property
+    def oldest(self) -> Optional[float]:
+        """Timestamp of the oldest sample"""
+        return self.times[self._slot(0)] if self.count else None
+
+    def index_at(self, timestamp: float) -> int:
+        """Index of the first sample at or after a timestamp (binary search)"""
+        times = self.times
+        low, high = 0, self.count
+        while low < high:
+            mid = (low + high) // 2
+            if times[self._slot(mid)] < timestamp:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def since(self, timestamp: float) -> Iterator[Sample]:
+        """Samples at or after a timestamp, oldest first"""
+        first = self.index_at(timestamp)
+        times, values, capacity = self.times, self.values, self.capacity
+        slot = self._slot(first)
+        for _ in range(self.count - first):
+            yield times[slot], values[slot]
+            slot += 1
+            if slot == capacity:
+                slot = 0
+
+
+class Tier:
+    """One resolution of a signal's history"""
+
+    def __init__(self, step: float, capacity: int):
+        """
+        Args:
+            step: Seconds averaged into each sample (0 keeps every sample)
+            capacity: Samples kept
+        """
+        self.step = step
+        self.buffer = RingBuffer(capacity)
+        self._bucket: Optional[float] = None
+        self._sum = 0.0
+        self._samples = 0
+
+    def add(self, timestamp: float, value: float):
+        """Add a sample, closing the current bucket if this one is past it"""
+        step = self.step
+        if not step:
+            self.buffer.append(timestamp, value)
+            return
+        bucket = math.floor(timestamp / step) * step
+        if bucket != self._bucket:
+            self._flush()
+            self._bucket = bucket
+        self._sum += value
+        self._samples += 1
+
+    def _flush(self):
+        if self._samples:
+            self.buffer.append(self._bucket, self._sum / self._samples)
+        self._sum = 0.0
+        self._samples = 0
+
+    def covers(self, timestamp: float) -> bool:
+        """Whether this tier still holds everything since a timestamp"""
+        buffer = self.buffer
+        return not buffer.full or buffer.oldest <= timestamp
+
+    def since(self, timestamp: float) -> Iterator[Sample]:
+        """Samples since a timestamp, including the bucket still being filled"""
+        yield from self.buffer.since(timestamp)
+        if self._samples and self._bucket >= timestamp - self.step:
+            yield self._bucket, self._sum / self._samples
+
+
+class SignalHistory:
+    """Multi-resolution history of one signal"""
+
+    def __init__(self, name: str, resolutions: Sequence[Tuple[float, int]] = DEFAULT_RESOLUTIONS):
+        self.name = name
+        # Finest first
+        self.tiers = [Tier(step, capacity) for step, capacity in sorted(resolutions)]
+        self.latest: Optional[Sample] = None
+
+    def add(self, timestamp: float, value: float):
+        """Record a sample in every tier"""
+        for tier in self.tiers:
+            tier.add(timestamp, value)
+        self.latest = (timestamp, value)
+
+    def tier_for(self, start: float, resolution: float) -> Tier:
+        """
+        Pick the cheapest tier for a window
+
+        Args:
+            start: Oldest timestamp wanted
+            resolution: Seconds per point the caller can use (e.g. span / pixels)
+        """
+        tiers = self.tiers
+        chosen = tiers[-1]
+        for i, tier in enumerate(tiers):
+            if tier.covers(start):
+                chosen = tier
+                # Coarser tiers are cheaper while they still give a point per pixel
+                for coarser in tiers[i + 1:]:
+                    if coarser.step <= resolution:
+                        chosen = coarser
+                break
+        return chosen
+
+    def window(self, span: float, resolution: float = 0.0,
+               now: Optional[float] = None) -> List[Sample]:
+        """
+        Samples in the last span seconds
+
+        Args:
+            span: Seconds of history
+            resolution: Coarsest acceptable seconds per sample
+            now: End of the window (default: the latest sample)
+        """
+        if self.latest is None:
+            return []
+        if now is None:
+            now = self.latest[0]
+        start = now - span
+        return list(self.tier_for(start, resolution).since(start))
+
+    def sparkline(self, width: int, span: float, now: Optional[float] = None) -> List[Sample]:
+        """
+        At most one (x, mean value) point per pixel column
+
+        Args:
+            width: Pixel columns
+            span: Seconds across the width
+            now: Right-hand edge (default: the latest sample)
+        """
+        if self.latest is None or width <= 0:
+            return []
+        if now is None:
+            now = self.latest[0]
+        start = now - span
+        scale = width / span
+        points = []
+        column = -1
+        total = 0.0
+        samples = 0
+        for timestamp, value in self.window(span, span / width, now):
+            x = min(width - 1, max(0, int((timestamp - start) * scale)))
+            if x != column:
+                if samples:
+                    points.append((column, total / samples))
+                column, total, samples = x, 0.0, 0
+            total += value
+            samples += 1
+        if samples:
+            points.append((column, total / samples))
+        return points
+
+
+class HistoryRecorder:
+    """Keeps SignalHistory for chosen signals, fed from the signal store"""
+
+    def __init__(self, signals: Optional[Iterable[str]] = None,
+                 resolutions: Sequence[Tuple[float, int]] = DEFAULT_RESOLUTIONS):
+        """
+        Args:
+            signals: Signals to record (None records every numeric signal seen)
+            resolutions: (step, capacity) per tier
+        """
+        self.resolutions = resolutions
+        self.signals = frozenset(signals) if signals is not None else None
+        self.histories: Dict[str, SignalHistory] = {
+            name: SignalHistory(name, resolutions) for name in self.signals or ()
+        }
+
+    def get(self, name: str) -> Optional[SignalHistory]:
+        """History for a signal, if it is recorded"""
+        return self.histories.get(name)
+
+    def record(self, updates: Iterable[Tuple[Dict[str, object], float]]):
+        """Add (decoded values, bus timestamp) pairs, e.g. as a SignalStore listener"""
+        histories = self.histories
+        for values, timestamp in updates:
+            for name, value in values.items():
+                history = histories.get(name)
+                if history is None:
+                    if self.signals is not None or not isinstance(value, (int, float)):
+                        continue
+                    history = histories[name] = SignalHistory(name, self.resolutions)
+                history.add(timestamp, value)
+
+    def attach(self, store) -> 'HistoryRecorder':
+        """Record everything the store publishes from now on"""
+        store.add_listener(self.record)
+        return self
@@ -0,0 +1,102 @@
+"""
+CAN-to-pixel latency tracking
+
+Every decoded value carries the bus timestamp of its frame (socketcan stamps
+it in the kernel, in time.time() seconds). Each stage records how long after
+that timestamp the value reached it:
+
+    decode   decoded by the CAN reader
+    store    published in the signal store
+    render   pushed to the display by DashGame
+    actuate  written to a gauge motor
+
+so every histogram is end-to-end from the bus, not per stage.
+"""
+
+import json
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .histogram import Histogram
+
+STAGES = ('decode', 'store', 'render', 'actuate')
+
+
+class LatencyTracker:
+    """Per-stage histograms of bus-timestamp-to-now latency"""
+
+    def __init__(self, stages: Iterable[str] = STAGES, clock: Callable[[], float] = time.time):
+        """
+        Args:
+            stages: Stage names, in pipeline order
+            clock: Wall clock in the same domain as the bus timestamps
+        """
+        self.stages = list(stages)
+        self.clock = clock
+        # Several threads record into the histograms (the CAN reader, the gauge driver
+        # and the render loop), so updates are locked; a batch takes the lock once.
+        # Readers only display, so don't.
+        self.histograms: Dict[str, Histogram] = {stage: Histogram() for stage in self.stages}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, bus_timestamp: float, now: Optional[float] = None):
+        """Record one value reaching a stage"""
+        if now is None:
+            now = self.clock()
+        with self._lock:
+            self.histograms[stage].record(max(0.0, now - bus_timestamp))
+
+    def record_batch(self, stage: str, bus_timestamps: Iterable[float],
+                     now: Optional[float] = None):
+        """Record several values that reached a stage at the same moment"""
+        if now is None:
+            now = self.clock()
+        latencies = [max(0.0, now - timestamp) for timestamp in bus_timestamps]
+        record = self.histograms[stage].record
+        with self._lock:
+            for latency in latencies:
+                record(latency)
+
+    def reset(self):
+        """Clear every histogram"""
+        with self._lock:
+            for histogram in self.histograms.values():
+                histogram.reset()
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Count, mean, p50, p99 and max per stage, in seconds"""
+        return {stage: histogram.summary() for stage, histogram in self.histograms.items()}
+
+    def lines(self) -> List[str]:
+        """One line per stage that has samples, for the debug overlay"""
+        lines = []
+        for stage in self.stages:
+            histogram = self.histograms[stage]
+            if histogram.count:
+                lines.append(f"{stage:<8}{histogram.format()}")
+        return lines
+
+    def report(self) -> str:
+        """Multi-line summary"""
+        return "\n".join(self.lines()) or "no latency samples"
+
+    def dump(self, path: Optional[str] = None) -> str:
+        """
+        Print the report and optionally write the summary and buckets as JSON
+
+        Returns:
+            The report text
+        """
+        report = self.report()
+        print(f"CAN-to-pixel latency:\n{report}")
+        if path:
+            data = {stage: dict(histogram.summary(), buckets=histogram.buckets())
+                    for stage, histogram in self.histograms.items()}
+            try:
+                with open(path, 'w') as f:
+                    json.dump(data, f, indent=4)
+                print(f"Latency written to {path}")
+            except OSError as e:
+                print(f"Error writing latency dump: {e}")
+        return report
@@ -0,0 +1,289 @@
+"""
+Derived metrics computed incrementally from CAN signals
+
+Metrics are declared with the names of their inputs (signals or other
+metrics). The engine orders them once, and on each frame recomputes only the
+metrics downstream of a value that actually changed. Rolling figures keep
+running totals and a window of cumulative samples, so each update is O(1)
+amortized instead of a rescan of history.
+
+    kwh_remaining   BatteryGIDS * gid_wh
+    trip_miles      integral of VehicleSpeedCluster
+    trip_kwh        energy used since the first GIDs reading
+    wh_per_mile     trip_kwh / trip_miles over the last `window` seconds
+    range_miles     kwh_remaining / wh_per_mile
+    power_kw        LB_Current * LB_Total_Voltage (EV bus), negative under regen
+"""
+
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+KM_PER_MILE = 1.609344
+
+# LB_Current is 11-bit two's complement in 0.5 A steps, but the EV DBC declares it
+# unsigned, so negative (regen or charging) currents decode this much too high
+LB_CURRENT_WRAP = 1024.0
+
+
+def signed_current(current: float) -> float:
+    """LB_Current as decoded from the unsigned DBC signal, in signed amps"""
+    return current - LB_CURRENT_WRAP if current > 511.5 else current
+
+
+class Metric:
+    """A value computed from signals or other metrics"""
+
+    # Recompute on every new sample of an input, not just when its value changes
+    every_sample = False
+
+    def __init__(self, name: str, inputs: Iterable[str]):
+        self.name = name
+        self.inputs = list(inputs)
+
+    def compute(self, values: Dict[str, object], timestamp: float) -> Optional[float]:
+        """
+        Compute the metric
+
+        Args:
+            values: Latest value of every signal and metric seen so far
+            timestamp: Bus timestamp of the change
+
+        Returns:
+            The new value, or None to leave the metric unchanged
+        """
+        raise NotImplementedError
+
+
+class Formula(Metric):
+    """A stateless function of its inputs"""
+
+    def __init__(self, name: str, inputs: Iterable[str], function: Callable[..., Optional[float]]):
+        super().__init__(name, inputs)
+        self.function = function
+
+    def compute(self, values, timestamp):
+        return self.function(*(values[name] for name in self.inputs))
+
+
+class Integral(Metric):
+    """Running trapezoidal integral of an input over bus time"""
+
+    every_sample = True
+
+    def __init__(self, name: str, source: str, scale: float = 1.0, max_gap: float = 5.0):
+        """
+        Args:
+            name: Metric name
+            source: Input integrated
+            scale: Multiplier applied to input * seconds, e.g. to turn km/h into miles
+            max_gap: Longer gaps between samples (bus asleep) are not integrated
+        """
+        super().__init__(name, [source])
+        self.source = source
+        self.scale = scale
+        self.max_gap = max_gap
+        self.total = 0.0
+        self._last: Optional[Tuple[float, float]] = None
+
+    def compute(self, values, timestamp):
+        value = values[self.source]
+        last = self._last
+        self._last = (timestamp, value)
+        if last is not None:
+            dt = timestamp - last[0]
+            if 0 < dt <= self.max_gap:
+                self.total += (value + last[1]) * 0.5 * dt * self.scale
+        return self.total
+
+
+class Drop(Metric):
+    """How far an input has fallen since its first reading"""
+
+    def __init__(self, name: str, source: str, scale: float = 1.0):
+        super().__init__(name, [source])
+        self.source = source
+        self.scale = scale
+        self.start: Optional[float] = None
+
+    def compute(self, values, timestamp):
+        value = values[self.source]
+        if self.start is None:
+            self.start = value
+        return (self.start - value) * self.scale
+
+
+class RollingRatio(Metric):
+    """Ratio of the changes in two cumulative inputs over a sliding time window"""
+
+    every_sample = True
+
+    def __init__(self, name: str, numerator: str, denominator: str, window: float,
+                 scale: float = 1.0, min_denominator: float = 0.0):
+        """
+        Args:
+            name: Metric name
+            numerator: Cumulative input, e.g. trip_kwh
+            denominator: Cumulative input, e.g. trip_miles
+            window: Seconds of history the ratio covers
+            scale: Multiplier for the ratio, e.g. 1000 for kWh to Wh
+            min_denominator: Change in the denominator below which there is no answer
+        """
+        super().__init__(name, [numerator, denominator])
+        self.numerator = numerator
+        self.denominator = denominator
+        self.window = window
+        self.scale = scale
+        self.min_denominator = min_denominator
+        # (timestamp, numerator, denominator); the oldest is the window's baseline
+        self.samples: deque = deque()
+
+    def compute(self, values, timestamp):
+        samples = self.samples
+        samples.append((timestamp, values[self.numerator], values[self.denominator]))
+        # Keep exactly one sample at or before the window start as the baseline
+        cutoff = timestamp - self.window
+        while len(samples) > 1 and samples[1][0] <= cutoff:
+            samples.popleft()
+        _, numerator, denominator = samples[0]
+        change = values[self.denominator] - denominator
+        if change <= self.min_denominator:
+            return None
+        return (values[self.numerator] - numerator) / change * self.scale
+
+
+class MetricsEngine:
+    """Keeps derived metrics up to date as signals arrive"""
+
+    def __init__(self, metrics: Iterable[Metric]):
+        """
+        Args:
+            metrics: Metrics to compute; inputs that aren't metrics are signals
+
+        Raises:
+            ValueError: If metrics depend on each other in a cycle
+        """
+        by_name = {metric.name: metric for metric in metrics}
+        self.metrics: List[Metric] = self._order(by_name)
+        self.values: Dict[str, object] = {}
+        # input name -> metrics that read it, in evaluation order
+        self.dependents: Dict[str, List[Metric]] = {}
+        for metric in self.metrics:
+            for name in metric.inputs:
+                self.dependents.setdefault(name, []).append(metric)
+        self.signals: Set[str] = {name for metric in self.metrics for name in metric.inputs
+                                  if name not in by_name}
+        self._position = {metric.name: i for i, metric in enumerate(self.metrics)}
+        self.computations = 0
+
+    @staticmethod
+    def _order(by_name: Dict[str, Metric]) -> List[Metric]:
+        """Topological order, so every metric is computed after its inputs"""
+        ordered: List[Metric] = []
+        state: Dict[str, int] = {}  # 1 = visiting, 2 = done
+
+        def visit(metric: Metric):
+            mark = state.get(metric.name)
+            if mark == 2:
+                return
+            if mark == 1:
+                raise ValueError(f"Metric {metric.name} depends on itself")
+            state[metric.name] = 1
+            for name in metric.inputs:
+                if name in by_name:
+                    visit(by_name[name])
+            state[metric.name] = 2
+            ordered.append(metric)
+
+        for metric in by_name.values():
+            visit(metric)
+        return ordered
+
+    def process(self, changes: Dict[str, object], timestamp: float) -> Dict[str, object]:
+        """
+        Take one frame's signal values and recompute what depends on them
+
+        Returns:
+            Metrics whose value changed
+        """
+        values = self.values
+        dependents = self.dependents
+        position = self._position
+        dirty: Dict[int, Metric] = {}
+
+        for name, value in changes.items():
+            readers = dependents.get(name)
+            if readers is None:
+                continue
+            changed = values.get(name) != value
+            values[name] = value
+            for metric in readers:
+                if changed or metric.every_sample:
+                    dirty[position[metric.name]] = metric
+
+        updated = {}
+        while dirty:
+            # Lowest position first keeps the topological order
+            index = min(dirty)
+            metric = dirty.pop(index)
+            if not all(name in values for name in metric.inputs):
+                continue
+            self.computations += 1
+            value = metric.compute(values, timestamp)
+            if value is None:
+                continue
+            changed = values.get(metric.name) != value
+            values[metric.name] = value
+            updated[metric.name] = value
+            for reader in dependents.get(metric.name, ()):
+                if changed or reader.every_sample:
+                    dirty[position[reader.name]] = reader
+        return updated
+
+    def derive(self, updates: List[Tuple[Dict[str, object], float]]) -> list:
+        """SignalStore deriver: metric updates for a batch of decoded frames"""
+        derived = []
+        for values, timestamp in updates:
+            changed = self.process(values, timestamp)
+            if changed:
+                derived.append((changed, timestamp))
+        return derived
+
+    def attach(self, store) -> 'MetricsEngine':
+        """Publish metrics into a signal store alongside the signals they come from"""
+        store.add_deriver(self.derive)
+        return self
+
+
+def leaf_metrics(gid_wh: float = 80.0, window: float = 300.0) -> List[Metric]:
+    """
+    The standard set for a Leaf
+
+    Args:
+        gid_wh: Watt-hours per GID
+        window: Seconds the efficiency figure averages over
+    """
+    return [
+        Formula('kwh_remaining', ['BatteryGIDS'], lambda gids: gids * gid_wh / 1000.0),
+        Integral('trip_miles', 'VehicleSpeedCluster', scale=1.0 / 3600.0 / KM_PER_MILE),
+        Drop('trip_kwh', 'kwh_remaining'),
+        RollingRatio('wh_per_mile', 'trip_kwh', 'trip_miles', window, scale=1000.0,
+                     min_denominator=0.1),
+        Formula('range_miles', ['kwh_remaining', 'wh_per_mile'],
+                lambda kwh, wh_per_mile: kwh * 1000.0 / wh_per_mile if wh_per_mile > 0 else None),
+        Formula('power_kw', ['LB_Current', 'LB_Total_Voltage'],
+                lambda current, voltage: signed_current(current) * voltage / 1000.0),
+    ]
+
+
+def start_metrics(config, store) -> Optional[MetricsEngine]:
+    """
+    Attach the derived metrics from the 'metrics' config section to a store
+
+    Returns:
+        The engine, or None if metrics are disabled
+    """
+    if not config.get('metrics.enabled', True):
+        return None
+    engine = MetricsEngine(leaf_metrics(gid_wh=config.get('metrics.gid_wh', 80.0),
+                                        window=config.get('metrics.window', 300.0)))
+    return engine.attach(store)
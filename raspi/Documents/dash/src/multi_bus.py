@@ -0,0 +1,158 @@
+"""
+Several CAN buses, one signal namespace
+
+The Leaf has two buses with their own DBCs: EV-CAN (battery controller,
+inverter, charger) and CAR-CAN (cluster, ABS, climate). Each configured bus
+gets its own channel and DecoderTable. Every decoded signal lands in the
+same SignalStore under one flat set of names:
+
+    LB_SOC                   a name only one bus defines is used as-is
+    MotorTemperature         a name both buses define means the preferred bus's copy
+    ev.MotorTemperature      bus-qualified names pick a bus explicitly
+
+Nine IDs (0x284, 0x50A, 0x54A, 0x54B, 0x55A, 0x5A9, 0x5C0, 0x603, 0x68C)
+appear in both DBCs and about thirty signal names are shared, some for
+different quantities, so colliding names resolve through can.prefer and
+can always be qualified. The decoder tables publish each signal directly
+under the name it was subscribed as, so namespacing costs nothing per frame.
+"""
+
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .can_decoder import DecoderTable
+from .dbc_cache import load_dbc
+
+SEPARATOR = '.'
+
+
+def qualify(bus: str, name: str) -> str:
+    """Bus-qualified signal name, e.g. 'ev.LB_SOC'"""
+    return f"{bus}{SEPARATOR}{name}"
+
+
+class CanBusConfig:
+    """Where one bus is and which DBC describes it"""
+
+    def __init__(self, name: str, dbc: str, channel: str = 'can0', interface: str = 'socketcan'):
+        """
+        Args:
+            name: Short bus name used to qualify signals, e.g. 'ev' or 'car'
+            dbc: DBC file path
+            channel: CAN channel, e.g. 'can0'
+            interface: python-can interface, e.g. 'socketcan' or 'virtual'
+        """
+        if SEPARATOR in name:
+            raise ValueError(f"Bus name {name!r} can't contain '{SEPARATOR}'")
+        self.name = name
+        self.dbc = dbc
+        self.channel = channel
+        self.interface = interface
+
+    @classmethod
+    def from_dict(cls, settings: Dict) -> 'CanBusConfig':
+        """Build a bus from a 'can.buses' config entry"""
+        return cls(**settings)
+
+
+def bus_configs(config) -> List[CanBusConfig]:
+    """
+    The buses in the 'can' config section
+
+    can.buses lists them; without it the single can.channel/can.dbc bus is
+    used, named 'can'.
+    """
+    buses = config.get('can.buses', [])
+    if buses:
+        return [CanBusConfig.from_dict(settings) for settings in buses]
+    return [CanBusConfig('can', config.get('can.dbc'), config.get('can.channel', 'can0'),
+                         config.get('can.interface', 'socketcan'))]
+
+
+class MultiBusDecoder:
+    """Per-bus decoder tables behind one namespace of signal names"""
+
+    def __init__(self, tables: Dict[str, DecoderTable], prefer: Optional[Iterable[str]] = None,
+                 signals: Optional[Iterable[str]] = None, channels: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            tables: Decoder table by bus name, in priority order
+            prefer: Bus names in the order that wins a name both define (default: table order)
+            signals: Names to subscribe to (see resolve)
+            channels: Bus name by CAN channel, for routing frames by can.Message.channel
+        """
+        self.tables = dict(tables)
+        self.channels = dict(channels or {})
+        order = list(prefer or [])
+        order += [bus for bus in self.tables if bus not in order]
+        self.prefer = [bus for bus in order if bus in self.tables]
+        self.shared = self._shared_names()
+        if signals:
+            self.subscribe(signals)
+
+    def _shared_names(self) -> Set[str]:
+        """Signal names more than one bus defines"""
+        seen: Set[str] = set()
+        shared: Set[str] = set()
+        for table in self.tables.values():
+            names = table.signal_names
+            shared |= seen & names
+            seen |= names
+        return shared
+
+    def resolve(self, name: str) -> Tuple[str, str]:
+        """
+        Find which bus and DBC signal a published name refers to
+
+        Returns:
+            (bus name, DBC signal name)
+
+        Raises:
+            KeyError: If no bus defines the signal
+        """
+        bus, _, signal = name.partition(SEPARATOR)
+        if signal and bus in self.tables:
+            if not self.tables[bus].has_signal(signal):
+                raise KeyError(f"Signal {signal} not found on bus {bus}")
+            return bus, signal
+        for bus in self.prefer:
+            if self.tables[bus].has_signal(name):
+                return bus, name
+        raise KeyError(f"Signal {name} not found on any bus")
+
+    def subscribe(self, names: Iterable[str]) -> Dict[str, Set[int]]:
+        """
+        Subscribe to signals by published name
+
+        Returns:
+            Arbitration IDs that now have subscribed signals, by bus
+        """
+        grouped: Dict[str, Dict[str, str]] = {}
+        for name in names:
+            bus, signal = self.resolve(name)
+            grouped.setdefault(bus, {})[name] = signal
+        return {bus: self.tables[bus].subscribe_as(signals) for bus, signals in grouped.items()}
+
+    @property
+    def subscribed(self) -> Set[str]:
+        """Published names of every subscribed signal"""
+        return set().union(*(table.subscribed for table in self.tables.values()))
+
+    def ids(self, bus: str) -> Set[int]:
+        """Arbitration IDs to receive on one bus"""
+        return self.tables[bus].ids
+
+    def decode(self, bus: str, frame_id: int, data: bytes) -> Optional[Dict[str, object]]:
+        """Decode a frame from one bus, or None if nothing on it is subscribed"""
+        return self.tables[bus].decode(frame_id, data)
+
+    def routes(self) -> Dict[str, DecoderTable]:
+        """Decoder table by CAN channel"""
+        return {channel: self.tables[bus] for channel, bus in self.channels.items()}
+
+    @classmethod
+    def from_buses(cls, buses: Iterable[CanBusConfig], prefer: Optional[Iterable[str]] = None,
+                   signals: Optional[Iterable[str]] = None) -> 'MultiBusDecoder':
+        """Load each bus's DBC (from the cache) and build the decoder"""
+        buses = list(buses)
+        tables = {bus.name: DecoderTable(load_dbc(bus.dbc)) for bus in buses}
+        return cls(tables, prefer, signals, {bus.channel: bus.name for bus in buses})
@@ -4,6 +4,7 @@ Platform-specific utilities for handling differences between Windows and Raspber
 
 import platform
 import sys
+from types import SimpleNamespace
 from typing import Optional, Dict, Any
 
 # Platform detection
@@ -11,26 +12,41 @@ IS_RASPBERRY_PI = platform.machine() in ["armv7l", "aarch64"]
 IS_WINDOWS = platform.system() == "Windows"
 IS_LINUX = platform.system() == "Linux"
 
-# Try to import platform-specific modules
-GPIO_AVAILABLE = False
-MCP3XXX_AVAILABLE = False
+# Hardware libraries are imported on first use, not at import time, so the
+# dash can put up its first frame before paying for them
+_modules: Dict[str, Any] = {}
 
-if IS_RASPBERRY_PI:
-    try:
-        import RPi.GPIO as GPIO
-        GPIO_AVAILABLE = True
-    except ImportError:
-        print("Warning: RPi.GPIO not available")
-        
-    try:
-        import board
-        import busio
-        import digitalio
-        from adafruit_mcp3xxx import mcp3008
-        from adafruit_mcp3xxx.analog_in import AnalogIn
-        MCP3XXX_AVAILABLE = True
-    except ImportError:
-        print("Warning: Adafruit CircuitPython libraries not available")
+
+def load_gpio():
+    """RPi.GPIO, imported on first call (None off the Pi or if it is missing)"""
+    if 'gpio' not in _modules:
+        module = None
+        if IS_RASPBERRY_PI:
+            try:
+                import RPi.GPIO as module
+            except ImportError:
+                print("Warning: RPi.GPIO not available")
+        _modules['gpio'] = module
+    return _modules['gpio']
+
+
+def load_mcp3xxx():
+    """The CircuitPython MCP3008 modules, imported on first call (None if unavailable)"""
+    if 'mcp3xxx' not in _modules:
+        modules = None
+        if IS_RASPBERRY_PI:
+            try:
+                import board
+                import busio
+                import digitalio
+                from adafruit_mcp3xxx import mcp3008
+                from adafruit_mcp3xxx.analog_in import AnalogIn
+                modules = SimpleNamespace(board=board, busio=busio, digitalio=digitalio,
+                                          mcp3008=mcp3008, AnalogIn=AnalogIn)
+            except ImportError:
+                print("Warning: Adafruit CircuitPython libraries not available")
+        _modules['mcp3xxx'] = modules
+    return _modules['mcp3xxx']
 
 
 class PlatformManager:
@@ -40,10 +56,13 @@ class PlatformManager:
         self.gpio_initialized = False
         self.spi = None
         self.mcp = None
+        # One AnalogIn per channel, created on first read
+        self.analog_inputs: Dict[int, Any] = {}
         
     def initialize_gpio(self, gpio_config: Optional[Dict[str, Any]] = None):
         """Initialize GPIO if on Raspberry Pi"""
-        if not GPIO_AVAILABLE or not IS_RASPBERRY_PI:
+        GPIO = load_gpio()
+        if GPIO is None:
             print("GPIO not available or not on Raspberry Pi")
             return False
             
@@ -69,19 +88,20 @@ class PlatformManager:
             
     def initialize_spi(self, spi_config: Optional[Dict[str, Any]] = None):
         """Initialize SPI devices like MCP3008"""
-        if not MCP3XXX_AVAILABLE or not IS_RASPBERRY_PI:
+        hw = load_mcp3xxx()
+        if hw is None:
             print("SPI/MCP3XXX not available or not on Raspberry Pi")
             return False
             
         try:
             # Create the SPI bus
-            self.spi = busio.SPI(clock=board.SCK, MISO=board.MISO, MOSI=board.MOSI)
+            self.spi = hw.busio.SPI(clock=hw.board.SCK, MISO=hw.board.MISO, MOSI=hw.board.MOSI)
             
             # Create the CS (chip select)
-            cs = digitalio.DigitalInOut(board.CE0)
+            cs = hw.digitalio.DigitalInOut(hw.board.CE0)
             
             # Create the MCP object
-            self.mcp = mcp3008.MCP3008(self.spi, cs)
+            self.mcp = hw.mcp3008.MCP3008(self.spi, cs)
             
             print("SPI/MCP3008 initialized successfully")
             return True
@@ -92,22 +112,23 @@ class PlatformManager:
             
     def read_button(self, pin: int) -> bool:
         """Read button state (returns True when pressed)"""
-        if not self.gpio_initialized or not GPIO_AVAILABLE:
+        if not self.gpio_initialized:
             return False
             
         try:
             # Button is pressed when pin reads LOW (due to pull-up resistor)
-            return not GPIO.input(pin)
+            return not load_gpio().input(pin)
         except Exception as e:
             print(f"Error reading button on pin {pin}: {e}")
             return False
             
     def set_led(self, pin: int, state: bool):
         """Set LED state"""
-        if not self.gpio_initialized or not GPIO_AVAILABLE:
+        if not self.gpio_initialized:
             return
             
         try:
+            GPIO = load_gpio()
             GPIO.output(pin, GPIO.HIGH if state else GPIO.LOW)
         except Exception as e:
             print(f"Error setting LED on pin {pin}: {e}")
@@ -118,7 +139,10 @@ class PlatformManager:
             return 0.0
             
         try:
-            analog_channel = AnalogIn(self.mcp, getattr(self.mcp, f'P{channel}'))
+            analog_channel = self.analog_inputs.get(channel)
+            if analog_channel is None:
+                analog_channel = load_mcp3xxx().AnalogIn(self.mcp, getattr(self.mcp, f'P{channel}'))
+                self.analog_inputs[channel] = analog_channel
             return analog_channel.value / 65535.0  # Convert to 0.0-1.0 range
         except Exception as e:
             print(f"Error reading analog channel {channel}: {e}")
@@ -126,12 +150,14 @@ class PlatformManager:
             
     def cleanup(self):
         """Clean up platform resources"""
-        if self.gpio_initialized and GPIO_AVAILABLE:
-            GPIO.cleanup()
+        if self.gpio_initialized:
+            load_gpio().cleanup()
             self.gpio_initialized = False
             print("GPIO cleaned up")
             
         if self.spi:
+            self.analog_inputs.clear()
+            self.mcp = None
             self.spi.deinit()
             self.spi = None
             print("SPI cleaned up")
@@ -0,0 +1,349 @@
+"""
+Retained-mode renderer for the dashboard
+
+Fonts and static labels are rendered once, numbers are assembled from a
+pre-rendered digit atlas, and each frame only widgets whose bound signal
+changed (or whose content depends on time, see Widget.needs_redraw) are
+redrawn and pushed with pygame.display.update(rects).
+"""
+
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pygame
+
+Color = Tuple[int, int, int]
+
+# Characters needed to show any formatted number
+NUMBER_CHARS = "0123456789.-+% "
+
+# Multiplier applied to a value whose signal has stopped arriving
+STALE_DIM = (100, 100, 100)
+
+
+class FontCache:
+    """Creates each (font, size) once"""
+
+    def __init__(self):
+        self._fonts: Dict[Tuple[Optional[str], int], pygame.font.Font] = {}
+
+    def get(self, size: int, name: Optional[str] = None) -> pygame.font.Font:
+        """Get a font, loading it on first use"""
+        key = (name, size)
+        font = self._fonts.get(key)
+        if font is None:
+            font = pygame.font.Font(name, size)
+            self._fonts[key] = font
+        return font
+
+
+class GlyphAtlas:
+    """Pre-rendered glyphs for drawing numbers without calling font.render"""
+
+    def __init__(self, font: pygame.font.Font, color: Color, chars: str = NUMBER_CHARS):
+        self.glyphs: Dict[str, pygame.Surface] = {
+            char: font.render(char, True, color) for char in chars
+        }
+        self.height = max(glyph.get_height() for glyph in self.glyphs.values())
+        self.max_width = max(glyph.get_width() for glyph in self.glyphs.values())
+
+    def text_width(self, text: str) -> int:
+        """Width in pixels of text drawn from the atlas"""
+        glyphs = self.glyphs
+        return sum(glyphs[char].get_width() for char in text)
+
+    def blit(self, surface: pygame.Surface, text: str, pos: Tuple[int, int]):
+        """Draw text one glyph at a time"""
+        x, y = pos
+        glyphs = self.glyphs
+        for char in text:
+            glyph = glyphs[char]
+            surface.blit(glyph, (x, y))
+            x += glyph.get_width()
+
+
+class Widget:
+    """Something drawn in a fixed rectangle of the screen"""
+
+    def __init__(self, rect: pygame.Rect, signal: Optional[str] = None):
+        self.rect = rect
+        self.signal = signal
+
+    def update(self, snapshot) -> bool:
+        """Take new data from a snapshot; return True if the widget needs redrawing"""
+        return False
+
+    def needs_redraw(self, now: float) -> bool:
+        """True if the widget may have changed without a new snapshot, e.g. a clock"""
+        return False
+
+    def draw(self, surface: pygame.Surface):
+        """Draw the widget into its rect"""
+        raise NotImplementedError
+
+
+class Label(Widget):
+    """Static text, rendered once"""
+
+    def __init__(self, text: str, pos: Tuple[int, int], font: pygame.font.Font,
+                 color: Color = (255, 255, 255), center: bool = False):
+        self.surface = font.render(text, True, color)
+        rect = self.surface.get_rect(center=pos) if center else self.surface.get_rect(topleft=pos)
+        super().__init__(rect)
+
+    def draw(self, surface: pygame.Surface):
+        surface.blit(self.surface, self.rect)
+
+
+class ValueDisplay(Widget):
+    """A numeric signal drawn from a glyph atlas"""
+
+    def __init__(self, signal: str, pos: Tuple[int, int], atlas: GlyphAtlas,
+                 fmt: str = "{:.0f}", max_chars: int = 6, default=0,
+                 background: Color = (0, 0, 0), align_right: bool = True):
+        """
+        Args:
+            signal: Name of the signal shown
+            pos: Top-left of the widget
+            atlas: Glyphs to draw with
+            fmt: Format string for the value
+            max_chars: Widest string the widget reserves room for
+            default: Value shown until the signal arrives
+            background: Colour the widget's rect is cleared to
+            align_right: Right-align so digits don't jump around
+        """
+        rect = pygame.Rect(pos, (atlas.max_width * max_chars, atlas.height))
+        super().__init__(rect, signal)
+        self.atlas = atlas
+        self.fmt = fmt
+        self.max_chars = max_chars
+        self.default = default
+        self.background = background
+        self.align_right = align_right
+        self.text: Optional[str] = None
+        self.stale = False
+
+    def format(self, value) -> str:
+        """Format a value, keeping only characters the atlas has"""
+        try:
+            text = self.fmt.format(value)
+        except (TypeError, ValueError):
+            text = "-"
+        glyphs = self.atlas.glyphs
+        return "".join(char for char in text if char in glyphs)[:self.max_chars]
+
+    def update(self, snapshot) -> bool:
+        text = self.format(snapshot.get(self.signal, self.default))
+        stale = snapshot.is_stale(self.signal)
+        if text == self.text and stale == self.stale:
+            return False
+        self.text = text
+        self.stale = stale
+        return True
+
+    def draw(self, surface: pygame.Surface):
+        surface.fill(self.background, self.rect)
+        if not self.text:
+            return
+        x = self.rect.x
+        if self.align_right:
+            x = self.rect.right - self.atlas.text_width(self.text)
+        self.atlas.blit(surface, self.text, (x, self.rect.y))
+        if self.stale:
+            # Keep the last value readable but dimmed, so a dead sender is obvious
+            surface.fill(STALE_DIM, self.rect, special_flags=pygame.BLEND_RGB_MULT)
+
+
+class TextPanel(Widget):
+    """A block of text lines from a callback, refreshed at most every interval"""
+
+    def __init__(self, rect: pygame.Rect, font: pygame.font.Font,
+                 lines: Callable[[], List[str]], color: Color = (255, 255, 0),
+                 background: Color = (0, 0, 0), interval: float = 0.5):
+        """
+        Args:
+            rect: Area the panel owns
+            font: Font to draw with
+            lines: Returns the lines to show
+            color: Text colour
+            background: Colour the panel is cleared to
+            interval: Seconds between refreshes, so the panel never dominates a frame
+        """
+        super().__init__(rect)
+        self.font = font
+        self.lines = lines
+        self.color = color
+        self.background = background
+        self.interval = interval
+        self.visible = True
+        self.text: List[str] = []
+        self._next_refresh = 0.0
+
+    def needs_redraw(self, now: float) -> bool:
+        # The lines come from a callback, not the snapshot
+        return self.visible and now >= self._next_refresh
+
+    def update(self, snapshot) -> bool:
+        if not self.visible:
+            return False
+        now = time.monotonic()
+        if now < self._next_refresh:
+            return False
+        self._next_refresh = now + self.interval
+        text = self.lines()
+        if text == self.text:
+            return False
+        self.text = text
+        return True
+
+    def draw(self, surface: pygame.Surface):
+        surface.fill(self.background, self.rect)
+        if not self.visible:
+            return
+        y = self.rect.y
+        for line in self.text:
+            surface.blit(self.font.render(line, True, self.color), (self.rect.x, y))
+            y += self.font.get_linesize()
+
+
+class Sparkline(Widget):
+    """Trend line of a signal's recent history"""
+
+    def __init__(self, rect: pygame.Rect, history, span: float = 60.0,
+                 color: Color = (0, 200, 255), background: Color = (0, 0, 0),
+                 value_min: Optional[float] = None, value_max: Optional[float] = None):
+        """
+        Args:
+            rect: Area of the graph
+            history: SignalHistory of the signal to plot
+            span: Seconds across the width
+            color: Line colour
+            background: Colour the rect is cleared to
+            value_min: Bottom of the scale (default: fit the data)
+            value_max: Top of the scale (default: fit the data)
+        """
+        # No bound signal: the line follows the history, not the snapshot
+        super().__init__(rect)
+        self.history = history
+        self.span = span
+        self.color = color
+        self.background = background
+        self.value_min = value_min
+        self.value_max = value_max
+        # Redrawing faster than one pixel column per refresh shows nothing new
+        self.interval = span / max(1, rect.width)
+        self.points: List[Tuple[int, int]] = []
+        self._next_refresh = 0.0
+        self._latest = None
+
+    def update(self, snapshot) -> bool:
+        latest = self.history.latest
+        if latest is None or latest == self._latest:
+            return False
+        now = time.monotonic()
+        if now < self._next_refresh:
+            return False
+        self._next_refresh = now + self.interval
+        self._latest = latest
+
+        samples = self.history.sparkline(self.rect.width, self.span)
+        low = self.value_min
+        high = self.value_max
+        if low is None:
+            low = min(value for _, value in samples)
+        if high is None:
+            high = max(value for _, value in samples)
+        spread = (high - low) or 1.0
+        bottom = self.rect.bottom - 1
+        height = self.rect.height - 1
+        points = [(self.rect.x + x,
+                   bottom - int(height * min(1.0, max(0.0, (value - low) / spread))))
+                  for x, value in samples]
+        # A flat signal whose window is full plots the same line again
+        if points == self.points:
+            return False
+        self.points = points
+        return True
+
+    def draw(self, surface: pygame.Surface):
+        surface.fill(self.background, self.rect)
+        if len(self.points) > 1:
+            pygame.draw.lines(surface, self.color, False, self.points)
+
+
+class Renderer:
+    """Draws widgets and pushes only the rectangles that changed"""
+
+    def __init__(self, surface: pygame.Surface, background: Color = (0, 0, 0)):
+        self.surface = surface
+        self.background = background
+        self.widgets: List[Widget] = []
+        self.fonts = FontCache()
+        self._atlases: Dict[Tuple[int, Color], GlyphAtlas] = {}
+        self._needs_full_redraw = True
+        self._last_version: Optional[int] = None
+        self.frames = 0
+        self.rects_pushed = 0
+        # Widgets drawn by the last render(), e.g. for latency tracking
+        self.redrawn: List[Widget] = []
+
+    def atlas(self, size: int, color: Color = (255, 255, 255)) -> GlyphAtlas:
+        """Get a number atlas for the default font at a size and colour"""
+        key = (size, color)
+        atlas = self._atlases.get(key)
+        if atlas is None:
+            atlas = GlyphAtlas(self.fonts.get(size), color)
+            self._atlases[key] = atlas
+        return atlas
+
+    def add(self, widget: Widget) -> Widget:
+        """Add a widget to the scene"""
+        self.widgets.append(widget)
+        self._needs_full_redraw = True
+        return widget
+
+    def invalidate(self):
+        """Force the next frame to redraw everything"""
+        self._needs_full_redraw = True
+
+    def render(self, snapshot) -> List[pygame.Rect]:
+        """
+        Draw one frame
+
+        Returns:
+            The rectangles that were pushed to the display (empty if nothing changed)
+        """
+        self.frames += 1
+        self.redrawn = []
+        version = getattr(snapshot, 'version', None)
+        if version is not None and version == self._last_version and not self._needs_full_redraw:
+            # Nothing published since the last frame, so only time-driven widgets can change
+            now = time.monotonic()
+            if not any(widget.needs_redraw(now) for widget in self.widgets):
+                return []
+        self._last_version = version
+
+        if self._needs_full_redraw:
+            self._needs_full_redraw = False
+            self.surface.fill(self.background)
+            for widget in self.widgets:
+                if widget.update(snapshot):
+                    # Only widgets with new data count as redrawn
+                    self.redrawn.append(widget)
+                widget.draw(self.surface)
+            pygame.display.flip()
+            rects = [self.surface.get_rect()]
+            self.rects_pushed += 1
+            return rects
+
+        rects = []
+        redrawn = self.redrawn
+        for widget in self.widgets:
+            if widget.update(snapshot):
+                widget.draw(self.surface)
+                rects.append(widget.rect)
+                redrawn.append(widget)
+        if rects:
+            pygame.display.update(rects)
+            self.rects_pushed += len(rects)
+        return rects
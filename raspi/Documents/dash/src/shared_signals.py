@@ -0,0 +1,258 @@
+"""
+Signal table in shared memory for passing values between processes
+
+A fixed list of signal names maps to fixed slots in a SharedMemory block:
+
+    header  magic (8s), version (u64), slot count (u32), pad
+    slot    sequence (u64), value (f64), bus timestamp (f64)
+
+One process writes, any number read. Each slot is a seqlock: the writer
+makes the sequence odd, writes value and timestamp, then makes it even; a
+reader retries if the sequence was odd or moved while it read. Python gives
+no memory fences, so on a weakly ordered CPU such as the Pi's ARM cores
+another core may see these stores out of order, and a reader can
+occasionally take a value and timestamp from two different updates. The
+seqlock makes that rare, not impossible; fields are aligned 8-byte stores,
+so each one is a real value, and the slot's next update corrects it. The
+header version is bumped after each batch so readers can tell there is
+something new with a single read.
+
+A writer can die between its two sequence stores and leave a slot odd. Readers
+skip a busy slot for that poll rather than wait on it, and a restarted writer
+attaches with writer=True, which carries on from the sequences already in the
+table and makes any stranded slot even again.
+"""
+
+import struct
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+MAGIC = b'D52SIG\x00\x00'
+HEADER = struct.Struct('<8sQI4x')
+SLOT = struct.Struct('<Qdd')
+_SEQ = struct.Struct('<Q')
+_DATA = struct.Struct('<dd')
+VERSION_OFFSET = 8
+READ_RETRIES = 100
+# Attempts before a reader starts yielding its time slice to the writer
+SPIN_RETRIES = 10
+
+
+class SharedSignalTable:
+    """Latest value and timestamp of each signal, in shared memory"""
+
+    def __init__(self, shm: shared_memory.SharedMemory, names: Sequence[str], owner: bool,
+                 writer: bool = False):
+        self.shm = shm
+        self.names = list(names)
+        self.index: Dict[str, int] = {name: i for i, name in enumerate(self.names)}
+        self.owner = owner
+        self._buf = shm.buf
+        # Sequence of each slot as this handle last wrote it, and as changes() last saw it
+        self._written = [0] * len(self.names)
+        self._seen = [0] * len(self.names)
+        self.unknown = 0
+        if writer:
+            self._claim()
+
+    def _claim(self):
+        """
+        Take over writing from a previous writer
+
+        Sequences carry on from the table, so readers don't mistake a new
+        write for one they've already seen, and a slot left odd by a writer
+        that died mid-write is rounded up to even.
+        """
+        for i in range(len(self.names)):
+            offset = HEADER.size + i * SLOT.size
+            seq = _SEQ.unpack_from(self._buf, offset)[0]
+            if seq & 1:
+                seq += 1
+                _SEQ.pack_into(self._buf, offset, seq)
+            self._written[i] = seq
+
+    @classmethod
+    def create(cls, names: Iterable[str], name: Optional[str] = None) -> 'SharedSignalTable':
+        """
+        Allocate a new table
+
+        Args:
+            names: Signal names, in slot order; every process must use the same list
+            name: Shared memory name (default: a random one)
+        """
+        names = list(dict.fromkeys(names))
+        size = HEADER.size + SLOT.size * max(1, len(names))
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        shm.buf[:size] = bytes(size)
+        HEADER.pack_into(shm.buf, 0, MAGIC, 0, len(names))
+        return cls(shm, names, owner=True)
+
+    @classmethod
+    def attach(cls, name: str, names: Iterable[str], writer: bool = False) -> 'SharedSignalTable':
+        """
+        Open a table another process created
+
+        Args:
+            name: Shared memory name
+            names: Signal names, in slot order
+            writer: This handle will publish (only one may at a time)
+
+        Raises:
+            ValueError: If the block isn't a signal table with this many slots
+        """
+        names = list(dict.fromkeys(names))
+        # Processes started by the creator share its resource tracker, so attaching
+        # here doesn't unlink the block when this process exits
+        shm = shared_memory.SharedMemory(name=name)
+        magic, _, count = HEADER.unpack_from(shm.buf, 0)
+        if magic != MAGIC or count != len(names):
+            shm.close()
+            raise ValueError(f"Shared memory {name} is not a table of {len(names)} signals")
+        return cls(shm, names, owner=False, writer=writer)
+
+    @property
+    def name(self) -> str:
+        """Shared memory name to pass to attach()"""
+        return self.shm.name
+
+    @property
+    def version(self) -> int:
+        """Number of batches published"""
+        return _SEQ.unpack_from(self._buf, VERSION_OFFSET)[0]
+
+    def publish(self, updates: Iterable[Tuple[Dict[str, object], float]]):
+        """
+        Write decoded values (single writer only)
+
+        Args:
+            updates: (decoded values, bus timestamp) pairs, e.g. from a SignalStore listener
+        """
+        buf = self._buf
+        index = self.index
+        seqs = self._written
+        seq_pack = _SEQ.pack_into
+        data_pack = _DATA.pack_into
+        for values, timestamp in updates:
+            for name, value in values.items():
+                i = index.get(name)
+                if i is None:
+                    self.unknown += 1
+                    continue
+                try:
+                    value = float(value)
+                except (TypeError, ValueError):
+                    self.unknown += 1
+                    continue
+                offset = HEADER.size + i * SLOT.size
+                seq = seqs[i] + 1
+                seq_pack(buf, offset, seq)
+                data_pack(buf, offset + 8, value, timestamp)
+                seq_pack(buf, offset, seq + 1)
+                seqs[i] = seq + 1
+        seq_pack(buf, VERSION_OFFSET, self.version + 1)
+
+    def read(self, name: str) -> Optional[Tuple[float, float]]:
+        """(value, timestamp) of one signal, or None if it was never written or is mid-write"""
+        slot = self._read_slot(self.index[name])
+        if slot is None or not slot[0]:
+            return None
+        return slot[1], slot[2]
+
+    def _read_slot(self, i: int) -> Optional[Tuple[int, float, float]]:
+        """(sequence, value, timestamp) of a slot, or None if it stayed busy"""
+        buf = self._buf
+        offset = HEADER.size + i * SLOT.size
+        for attempt in range(READ_RETRIES):
+            seq = _SEQ.unpack_from(buf, offset)[0]
+            if not seq & 1:
+                value, timestamp = _DATA.unpack_from(buf, offset + 8)
+                if _SEQ.unpack_from(buf, offset)[0] == seq:
+                    return seq, value, timestamp
+            if attempt >= SPIN_RETRIES:
+                time.sleep(0)
+        # Still mid-write, or stranded odd by a writer that died; try again next poll
+        return None
+
+    def changes(self) -> List[Tuple[Dict[str, object], float]]:
+        """
+        Signals written since this process last called changes()
+
+        Returns:
+            (values, bus timestamp) pairs grouped by timestamp, oldest first,
+            ready for SignalStore.update_batch
+        """
+        seqs = self._seen
+        by_time: Dict[float, Dict[str, object]] = {}
+        for i, name in enumerate(self.names):
+            slot = self._read_slot(i)
+            if slot is None:
+                continue
+            seq, value, timestamp = slot
+            if seq != seqs[i]:
+                seqs[i] = seq
+                by_time.setdefault(timestamp, {})[name] = value
+        return sorted(((values, timestamp) for timestamp, values in by_time.items()),
+                      key=lambda update: update[1])
+
+    def close(self):
+        """Detach; the creating process also frees the memory"""
+        self._buf = None
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class SharedStoreMirror(threading.Thread):
+    """Copies a shared table into a process-local SignalStore so existing readers work unchanged"""
+
+    def __init__(self, table: SharedSignalTable, store, poll_interval: float = 1.0 / 60,
+                 stop_event=None):
+        """
+        Args:
+            table: Table attached in this process
+            store: Local SignalStore to publish into
+            poll_interval: Seconds between checks of the table version; the rate
+                the process consumes at (e.g. the frame rate) is fast enough
+            stop_event: Event (threading or multiprocessing) that ends the thread
+        """
+        super().__init__(name="SharedStoreMirror", daemon=True)
+        self.table = table
+        self.store = store
+        self.poll_interval = poll_interval
+        self._stop_event = stop_event if stop_event is not None else threading.Event()
+        self._version = -1
+
+    def poll(self) -> bool:
+        """Publish anything new; returns True if there was"""
+        version = self.table.version
+        if version == self._version:
+            return False
+        updates = self.table.changes()
+        self._version = version
+        if updates:
+            self.store.update_batch(updates)
+        return bool(updates)
+
+    def run(self):
+        """Thread body: an error costs one poll, never the mirror"""
+        failed = False
+        while not self._stop_event.is_set():
+            try:
+                self.poll()
+                failed = False
+            except Exception as e:
+                if not failed:
+                    print(f"Error mirroring shared signals: {e}")
+                failed = True
+            # Updates that land between polls go over as one batch
+            self._stop_event.wait(self.poll_interval)
+
+    def stop(self, timeout: Optional[float] = 1.0):
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
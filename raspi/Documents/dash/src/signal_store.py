@@ -0,0 +1,174 @@
+"""
+Latest-value signal store shared between the CAN reader and the dashboard
+
+The writer builds a new immutable snapshot and swaps a single reference, so
+readers just grab the current snapshot: no locks, no copies, and every value
+in it comes from the same publish.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+
+class SignalValue(NamedTuple):
+    """A decoded value and the bus timestamp of the frame it came from"""
+    value: object
+    timestamp: float
+
+
+class Snapshot:
+    """Immutable view of every signal at one point in time"""
+
+    __slots__ = ('version', 'values', 'timestamp', 'stale')
+
+    def __init__(self, version: int, values: Dict[str, SignalValue], timestamp: float,
+                 stale: FrozenSet[str] = frozenset()):
+        self.version = version
+        self.values = values
+        self.timestamp = timestamp
+        # Signals that stopped arriving (see staleness.StalenessMonitor)
+        self.stale = stale
+
+    def get(self, name: str, default=None):
+        """Get a signal's value"""
+        entry = self.values.get(name)
+        return entry.value if entry is not None else default
+
+    def get_signal(self, name: str) -> Optional[SignalValue]:
+        """Get a signal's value and timestamp"""
+        return self.values.get(name)
+
+    def is_stale(self, name: str) -> bool:
+        """True if the signal has stopped arriving; its value is the last one received"""
+        return name in self.stale
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.values
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class SignalStore:
+    """Thread-safe latest-value store with lock-free reads"""
+
+    def __init__(self):
+        self._snapshot = Snapshot(0, {}, 0.0)
+        # Serializes writers only; readers never touch it
+        self._write_lock = threading.Lock()
+        # Set on every publish so an idle render loop can sleep until data arrives
+        self._published = threading.Event()
+        # Called with every batch, in publish order, on the writer's thread
+        self._listeners: List[Callable[[list], None]] = []
+        # Compute extra values (e.g. derived metrics) from each batch before it is published
+        self._derivers: List[Callable[[list], list]] = []
+
+    def snapshot(self) -> Snapshot:
+        """Get the current snapshot (a single reference read)"""
+        return self._snapshot
+
+    @property
+    def version(self) -> int:
+        """Number of publishes so far"""
+        return self._snapshot.version
+
+    def add_listener(self, callback: Callable[[list], None]):
+        """
+        Receive every published batch, e.g. to keep history
+
+        Args:
+            callback: Called with the list of (decoded values, bus timestamp) pairs;
+                it runs on the writer's thread so must be quick
+        """
+        self._listeners.append(callback)
+
+    def add_deriver(self, callback: Callable[[list], list]):
+        """
+        Add values computed from each batch to the same snapshot
+
+        Args:
+            callback: Called with the list of (decoded values, bus timestamp) pairs,
+                returns more pairs to publish with them
+        """
+        self._derivers.append(callback)
+
+    def update(self, values: Dict[str, object], timestamp: Optional[float] = None):
+        """Publish one frame's decoded values"""
+        self.update_batch([(values, timestamp if timestamp is not None else time.time())])
+
+    def update_batch(self, updates: Iterable[Tuple[Dict[str, object], float]]):
+        """
+        Publish several frames' decoded values as one snapshot
+
+        Args:
+            updates: (decoded values, bus timestamp) pairs in arrival order
+        """
+        if self._listeners or self._derivers:
+            updates = list(updates)
+        with self._write_lock:
+            for deriver in self._derivers:
+                try:
+                    derived = deriver(updates)
+                except Exception as e:
+                    print(f"Error in signal store deriver: {e}")
+                    continue
+                if derived:
+                    updates = updates + derived
+            current = self._snapshot
+            values = dict(current.values)
+            latest = current.timestamp
+            stale = current.stale
+            for decoded, timestamp in updates:
+                for name, value in decoded.items():
+                    values[name] = SignalValue(value, timestamp)
+                if timestamp > latest:
+                    latest = timestamp
+                # Anything that arrived again is fresh
+                if stale and not stale.isdisjoint(decoded):
+                    stale = stale.difference(decoded)
+            self._snapshot = Snapshot(current.version + 1, values, latest, stale)
+            for listener in self._listeners:
+                try:
+                    listener(updates)
+                except Exception as e:
+                    print(f"Error in signal store listener: {e}")
+        self._published.set()
+
+    def mark_stale(self, names: Iterable[str]):
+        """
+        Flag signals that stopped arriving; the flag clears when they are next published
+
+        Listeners aren't called, since no values changed.
+        """
+        with self._write_lock:
+            current = self._snapshot
+            stale = current.stale.union(name for name in names if name in current.values)
+            if stale == current.stale:
+                return
+            self._snapshot = Snapshot(current.version + 1, current.values, current.timestamp, stale)
+        self._published.set()
+
+    def wake(self):
+        """Wake anything blocked in wait_for_update without publishing, e.g. on a button press"""
+        self._published.set()
+
+    def wait_for_update(self, timeout: float, since_version: Optional[int] = None) -> bool:
+        """
+        Block until something is published or the timeout expires
+
+        Args:
+            timeout: Seconds to wait
+            since_version: Return immediately if the store is already past this version
+                (default: the current version)
+
+        Returns:
+            True if a new snapshot is available
+        """
+        if since_version is None:
+            since_version = self._snapshot.version
+        self._published.clear()
+        if self._snapshot.version != since_version:
+            return True
+        self._published.wait(timeout)
+        return self._snapshot.version != since_version
@@ -0,0 +1,450 @@
+"""
+Synthetic drive traffic for running the dashboard stack without the car
+
+A simple vehicle model (speed profile, road load, pack energy and
+temperature) is encoded with the CAR and EV DBC files at each message's real
+transmit period, each DBC's traffic on its own bus as in the car. Stress mode
+pads each bus with random frames for other IDs from its DBC, up to a chosen
+fraction of the 500 kbit/s bus capacity, so the reader and DashGame can be
+load-tested on a dev box against vcan0/vcan1 or in-process virtual buses.
+"""
+
+import heapq
+import math
+import random
+import time
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import cantools
+    CANTOOLS_AVAILABLE = True
+except ImportError:
+    CANTOOLS_AVAILABLE = False
+
+try:
+    import can
+    CAN_AVAILABLE = True
+except ImportError:
+    CAN_AVAILABLE = False
+
+from .can_decoder import CAR_CAN_DBC, EV_CAN_DBC
+from .dbc_cache import load_dbc
+from .metrics import LB_CURRENT_WRAP
+
+
+BITRATE = 500000
+
+# Transmit periods (seconds) measured on the car; the DBCs carry no cycle times
+CAR_PERIODS = {
+    0x280: 0.02,    # VehicleSpeedCluster
+    0x284: 0.02,    # Wheel speeds
+    0x5B3: 0.5,     # GIDs, SOH, pack temperature
+}
+EV_PERIODS = {
+    0x1DB: 0.01,    # Pack current and voltage
+    0x55B: 0.1,     # SOC
+    0x5BC: 0.1,     # Remaining capacity, average temperature
+}
+
+# Names of the buses the traffic goes out on, as in the can.buses config
+CAR_BUS = 'car'
+EV_BUS = 'ev'
+
+SimFrame = Tuple[float, int, bytes]
+# The same, with the name of the bus it goes out on
+BusFrame = Tuple[float, str, int, bytes]
+
+
+def frame_bits(dlc: int) -> int:
+    """Worst-case bits on the wire for a standard-ID data frame, including stuffing"""
+    stuffed = 34 + 8 * dlc
+    return stuffed + (stuffed - 1) // 4 + 13
+
+
+def bus_capacity(dlc: int = 8, bitrate: int = BITRATE) -> float:
+    """Frames per second that fill the bus completely"""
+    return bitrate / frame_bits(dlc)
+
+
+class DriveModel:
+    """A Leaf driving a repeating stop / accelerate / cruise / brake cycle"""
+
+    MASS = 1520.0           # kg
+    DRAG_AREA = 0.66        # Cd * frontal area, m^2
+    ROLLING = 0.010
+    DRIVE_EFFICIENCY = 0.85
+    REGEN_EFFICIENCY = 0.6
+    AUX_POWER = 500.0       # W
+    GID_WH = 80.0
+    FULL_GIDS = 281
+    PACK_RESISTANCE = 0.08  # ohms
+    HEAT_CAPACITY = 180000.0  # J/K
+    COOLING = 15.0          # W/K to ambient
+
+    def __init__(self, seed: Optional[int] = 52, soc: float = 0.9, ambient: float = 20.0,
+                 soh: int = 92):
+        """
+        Args:
+            seed: Random seed for the speed profile (None for a different drive every run)
+            soc: Starting state of charge, 0-1
+            ambient: Ambient and starting pack temperature in C
+            soh: Reported battery state of health in percent
+        """
+        self.random = random.Random(seed)
+        self.time = 0.0
+        self.speed = 0.0            # m/s
+        self.acceleration = 0.0     # m/s^2
+        self.distance = 0.0         # m
+        self.energy = soc * self.FULL_GIDS * self.GID_WH  # Wh
+        self.ambient = ambient
+        self.pack_temperature = ambient
+        self.soh = soh
+        self.current = 0.0
+        self.voltage = self.open_circuit_voltage()
+        self._phase = 'stop'
+        self._phase_end = self.random.uniform(2.0, 8.0)
+        self._target = 0.0
+
+    @property
+    def speed_kph(self) -> float:
+        return self.speed * 3.6
+
+    @property
+    def soc(self) -> float:
+        """State of charge, 0-1"""
+        return max(0.0, min(1.0, self.energy / (self.FULL_GIDS * self.GID_WH)))
+
+    @property
+    def gids(self) -> int:
+        return max(0, int(self.energy / self.GID_WH))
+
+    def open_circuit_voltage(self) -> float:
+        return 310.0 + 85.0 * self.soc
+
+    def _next_phase(self):
+        """Pick the next leg of the drive"""
+        rand = self.random
+        if self._phase == 'stop':
+            self._phase = 'accelerate'
+            self._target = rand.uniform(40.0, 110.0) / 3.6
+            self.acceleration = rand.uniform(1.2, 2.5)
+            self._phase_end = math.inf
+        elif self._phase == 'accelerate':
+            self._phase = 'cruise'
+            self.acceleration = 0.0
+            self._phase_end = self.time + rand.uniform(15.0, 90.0)
+        elif self._phase == 'cruise':
+            self._phase = 'brake'
+            self.acceleration = -rand.uniform(1.5, 3.0)
+            self._phase_end = math.inf
+        else:
+            self._phase = 'stop'
+            self.acceleration = 0.0
+            self._phase_end = self.time + rand.uniform(5.0, 30.0)
+
+    def advance(self, dt: float):
+        """Step the model forward by dt seconds"""
+        if dt <= 0:
+            return
+        self.time += dt
+        if self.time >= self._phase_end:
+            self._next_phase()
+
+        speed = self.speed + self.acceleration * dt
+        if self._phase == 'accelerate' and speed >= self._target:
+            speed = self._target
+            self._next_phase()
+        elif self._phase == 'brake' and speed <= 0.0:
+            speed = 0.0
+            self._next_phase()
+        elif self._phase == 'cruise':
+            # Small wander around the cruise speed
+            speed = max(0.0, speed + self.random.gauss(0.0, 0.05))
+        self.speed = speed
+        self.distance += speed * dt
+
+        # Road load at the wheels, then through the drivetrain
+        wheel = (self.MASS * self.acceleration * speed
+                 + 0.5 * 1.2 * self.DRAG_AREA * speed ** 3
+                 + self.ROLLING * self.MASS * 9.81 * speed)
+        if wheel >= 0:
+            power = wheel / self.DRIVE_EFFICIENCY
+        else:
+            power = wheel * self.REGEN_EFFICIENCY
+        power += self.AUX_POWER
+
+        ocv = self.open_circuit_voltage()
+        self.current = power / ocv
+        self.voltage = ocv - self.current * self.PACK_RESISTANCE
+        self.energy = max(0.0, self.energy - power * dt / 3600.0)
+
+        heat = self.current ** 2 * self.PACK_RESISTANCE
+        cooling = self.COOLING * (self.pack_temperature - self.ambient)
+        self.pack_temperature += (heat - cooling) * dt / self.HEAT_CAPACITY
+
+    def values(self) -> Dict[str, float]:
+        """Physical signal values for every message the simulator encodes"""
+        kph = self.speed_kph
+        pulses = int(self.distance * 10) & 0xFF
+        # In the signal's 0.5 A steps, so a small regen current can't round up to the wrap
+        current = round(max(-400.0, min(200.0, self.current)) * 2) / 2
+        return {
+            # CAR 0x280
+            'VehicleSpeedCluster': kph,
+            # CAR 0x284
+            'Wheel_Speed_FR': kph,
+            'Wheel_Speed_FL': kph,
+            'VehicleSpeedFromABS': kph,
+            'DistanceTraveled1': pulses,
+            'DistanceTraveled2': pulses,
+            # CAR 0x5B3
+            'BatteryPackTemperature': max(0, round(self.pack_temperature)),
+            'BatteryStateOfHealth': self.soh,
+            'BatteryGIDS': self.gids,
+            'BatteryAvailableChargeBars': round(self.soc * 12) * 20,
+            # EV 0x1DB: LB_Current is two's complement on the bus but unsigned in the DBC
+            'LB_Current': current + LB_CURRENT_WRAP if current < 0 else current,
+            'LB_Total_Voltage': self.voltage,
+            'LB_MainRelayOn_flag': 1,
+            # EV 0x55B, in 0.1 %
+            'LB_SOC': round(self.soc * 1000),
+            'LB_ALU_ANSWER': 85,
+            # EV 0x5BC
+            'LB_Remain_Capacity': self.gids,
+            'LB_New_Full_Capacity': 22000,
+            'LB_Average_Battery_Temperature': round(self.pack_temperature),
+            'LB_Capacity_Deterioration_Rate': 100 - self.soh,
+        }
+
+
+class _Encoder:
+    """Encodes one periodic message from the model's values"""
+
+    def __init__(self, bus: str, message, period: float):
+        self.bus = bus
+        self.message = message
+        self.frame_id = message.frame_id
+        self.period = period
+        self.names = [signal.name for signal in message.signals]
+
+    def encode(self, values: Dict[str, float]) -> bytes:
+        # Checksum and unknown fields stay zero; nothing downstream verifies them
+        return self.message.encode({name: values.get(name, 0) for name in self.names},
+                                   scaling=True, strict=False)
+
+
+class SimulatorStats:
+    """What a simulator run put on the bus"""
+
+    def __init__(self):
+        # Frames sent by (bus, arbitration ID)
+        self.sent: Counter = Counter()
+        self.send_errors = 0
+        self.max_behind = 0.0
+        self.elapsed = 0.0
+
+    @property
+    def total(self) -> int:
+        return sum(self.sent.values())
+
+    def count(self, ids, bus: Optional[str] = None) -> int:
+        """Frames sent for a set of IDs, on one bus or all of them"""
+        return sum(count for (sent_bus, frame_id), count in self.sent.items()
+                   if frame_id in ids and (bus is None or sent_bus == bus))
+
+    def __str__(self) -> str:
+        rate = self.total / self.elapsed if self.elapsed else 0.0
+        return (f"{self.total} frames in {self.elapsed:.1f}s ({rate:.0f}/s), "
+                f"{self.send_errors} send errors, max {self.max_behind * 1000:.1f}ms behind schedule")
+
+
+class DriveSimulator:
+    """Generates time-ordered frames for a simulated drive"""
+
+    def __init__(self, car_db=None, ev_db=None, model: Optional[DriveModel] = None,
+                 car_periods: Optional[Dict[int, float]] = None,
+                 ev_periods: Optional[Dict[int, float]] = None,
+                 stress_load: float = 0.0, seed: Optional[int] = 52):
+        """
+        Args:
+            car_db: CAR bus cantools database (default: load CAR_CAN_DBC)
+            ev_db: EV bus cantools database (default: load EV_CAN_DBC)
+            model: Drive model supplying values (default: a new DriveModel)
+            car_periods: CAR frame ID -> period in seconds
+            ev_periods: EV frame ID -> period in seconds
+            stress_load: Fraction of each bus's capacity to fill with filler frames
+                (0 for realistic traffic only, 1.0 to saturate)
+            seed: Random seed for filler frames
+        """
+        if not CANTOOLS_AVAILABLE:
+            raise ImportError("cantools is required to encode simulated traffic")
+        if car_db is None:
+            car_db = load_dbc(CAR_CAN_DBC)
+        if ev_db is None:
+            ev_db = load_dbc(EV_CAN_DBC)
+        self.model = model if model is not None else DriveModel()
+        self.stress_load = stress_load
+        self.random = random.Random(seed)
+
+        self.encoders: List[_Encoder] = []
+        # Filler draws from every other ID the bus's own DBC knows about
+        self.filler_ids: Dict[str, List[int]] = {}
+        for bus, db, periods in ((CAR_BUS, car_db, car_periods or CAR_PERIODS),
+                                 (EV_BUS, ev_db, ev_periods or EV_PERIODS)):
+            for frame_id, period in periods.items():
+                self.encoders.append(_Encoder(bus, db.get_message_by_frame_id(frame_id), period))
+            self.filler_ids[bus] = sorted({message.frame_id for message in db.messages
+                                           if message.frame_id not in periods
+                                           and not message.is_extended_frame})
+
+    def bus_periodic_rate(self, bus: str) -> float:
+        """Frames per second of realistic traffic on one bus"""
+        return sum(1.0 / encoder.period for encoder in self.encoders if encoder.bus == bus)
+
+    def bus_filler_rate(self, bus: str) -> float:
+        """Frames per second of stress filler on one bus"""
+        if self.stress_load <= 0 or not self.filler_ids.get(bus):
+            return 0.0
+        return max(0.0, self.stress_load * bus_capacity() - self.bus_periodic_rate(bus))
+
+    @property
+    def periodic_rate(self) -> float:
+        """Frames per second of realistic traffic, over both buses"""
+        return sum(self.bus_periodic_rate(bus) for bus in self.filler_ids)
+
+    @property
+    def filler_rate(self) -> float:
+        """Frames per second of stress filler, over both buses"""
+        return sum(self.bus_filler_rate(bus) for bus in self.filler_ids)
+
+    def bus_frames(self, duration: Optional[float] = None, start: float = 0.0,
+                   buses: Optional[Iterable[str]] = None) -> Iterator[BusFrame]:
+        """
+        Yield (timestamp, bus, arbitration ID, data) in time order
+
+        Args:
+            duration: Seconds of traffic (None for endless)
+            start: Timestamp of the first frame
+            buses: Buses to generate traffic for (default: both)
+        """
+        buses = set(buses) if buses is not None else set(self.filler_ids)
+        end = start + duration if duration is not None else math.inf
+        model = self.model
+        # (due, tie-breaker, encoder, or the bus name for its filler)
+        queue = [(start, i, encoder) for i, encoder in enumerate(self.encoders)
+                 if encoder.bus in buses]
+        filler_periods = {}
+        for order, bus in enumerate(sorted(buses), len(self.encoders)):
+            filler_rate = self.bus_filler_rate(bus)
+            if filler_rate:
+                filler_periods[bus] = 1.0 / filler_rate
+                queue.append((start, order, bus))
+        heapq.heapify(queue)
+
+        filler_ids = self.filler_ids
+        rand = self.random
+        model_time = start
+        values = model.values()
+
+        while queue:
+            due, order, encoder = queue[0]
+            if due >= end:
+                break
+            if isinstance(encoder, str):
+                heapq.heapreplace(queue, (due + filler_periods[encoder], order, encoder))
+                yield (due, encoder, rand.choice(filler_ids[encoder]),
+                       rand.getrandbits(64).to_bytes(8, 'little'))
+                continue
+
+            if due > model_time:
+                model.advance(due - model_time)
+                model_time = due
+                values = model.values()
+            heapq.heapreplace(queue, (due + encoder.period, order, encoder))
+            yield due, encoder.bus, encoder.frame_id, encoder.encode(values)
+
+    def frames(self, duration: Optional[float] = None, start: float = 0.0,
+               bus: str = CAR_BUS) -> Iterator[SimFrame]:
+        """
+        Yield one bus's (timestamp, arbitration ID, data) in time order
+
+        Args:
+            duration: Seconds of traffic (None for endless)
+            start: Timestamp of the first frame
+            bus: CAR_BUS or EV_BUS
+        """
+        for timestamp, _, frame_id, data in self.bus_frames(duration, start, [bus]):
+            yield timestamp, frame_id, data
+
+    def run(self, buses: Dict[str, object], duration: Optional[float] = None,
+            realtime: bool = True) -> SimulatorStats:
+        """
+        Send the drive onto python-can buses
+
+        Args:
+            buses: Open bus by name (CAR_BUS, EV_BUS), e.g. vcan0 and vcan1, or
+                virtual buses sharing channels with the reader; a bus left out
+                gets no traffic
+            duration: Seconds of traffic (None until Ctrl-C)
+            realtime: Pace frames at their timestamps; False sends as fast as possible
+
+        Returns:
+            Counters for what was sent
+        """
+        if not CAN_AVAILABLE:
+            raise ImportError("python-can is required to send simulated traffic")
+        stats = SimulatorStats()
+        started = time.monotonic()
+        Message = can.Message
+        try:
+            for timestamp, bus, frame_id, data in self.bus_frames(duration, buses=buses):
+                if realtime:
+                    delay = started + timestamp - time.monotonic()
+                    if delay > 0.001:
+                        time.sleep(delay)
+                    elif delay < -stats.max_behind:
+                        stats.max_behind = -delay
+                try:
+                    buses[bus].send(Message(arbitration_id=frame_id, data=data,
+                                            is_extended_id=False))
+                except can.CanError:
+                    # e.g. ENOBUFS when vcan's transmit queue is full
+                    stats.send_errors += 1
+                    continue
+                stats.sent[bus, frame_id] += 1
+        except KeyboardInterrupt:
+            pass
+        stats.elapsed = time.monotonic() - started
+        return stats
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Simulate a drive on the CAR and EV buses")
+    parser.add_argument('--car-channel', default='vcan0', help='Channel CAR-CAN goes out on')
+    parser.add_argument('--ev-channel', default='vcan1', help='Channel EV-CAN goes out on')
+    parser.add_argument('--interface', default='socketcan')
+    parser.add_argument('--duration', type=float, help='Seconds to run (default: until Ctrl-C)')
+    parser.add_argument('--stress', type=float, default=0.0,
+                        help="Fraction of each bus's capacity to fill, e.g. 1.0 to saturate")
+    parser.add_argument('--seed', type=int, default=52)
+    parser.add_argument('--capture', help='Write the CAR bus to a capture file instead of sending')
+    args = parser.parse_args()
+
+    simulator = DriveSimulator(model=DriveModel(seed=args.seed), stress_load=args.stress,
+                               seed=args.seed)
+    print(f"Simulating {simulator.periodic_rate:.0f} frames/s of drive traffic"
+          f" + {simulator.filler_rate:.0f} frames/s filler")
+
+    if args.capture:
+        from .capture import CaptureWriter
+        with CaptureWriter(args.capture, 'CAR-can_AZE0_fixed.dbc') as writer:
+            for timestamp, frame_id, data in simulator.frames(args.duration or 60.0):
+                writer.write_frame(timestamp, frame_id, data)
+        print(f"Wrote {writer.count} frames to {args.capture}")
+    else:
+        with can.interface.Bus(channel=args.car_channel, interface=args.interface) as car, \
+                can.interface.Bus(channel=args.ev_channel, interface=args.interface) as ev:
+            print(simulator.run({CAR_BUS: car, EV_BUS: ev}, args.duration))
@@ -0,0 +1,276 @@
+"""
+Per-signal staleness detection
+
+Every tracked signal has a deadline: its last arrival plus timeout_periods
+times its period. The period comes from the DBC's cycle time, from the
+'staleness.periods' config (by message ID), or is learned from arrivals.
+
+Deadlines live in a hashed timer wheel. An arrival only moves the signal's
+deadline forward (a few attribute stores, no re-scheduling). When the wheel
+reaches a signal's slot it either re-files the signal at its new deadline or,
+if the deadline really passed, marks it stale in the signal store. One
+thread ticks the wheel for every signal, and a dropped bus or dead node shows
+up within about timeout_periods periods plus one tick.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+
+class Deadline:
+    """Timing state of one tracked signal"""
+
+    __slots__ = ('name', 'period', 'fixed', 'timeout', 'last', 'deadline', 'stale', 'scheduled')
+
+    def __init__(self, name: str, period: Optional[float], timeout: float):
+        self.name = name
+        self.period = period
+        # A period from the DBC or config is not overwritten by learning
+        self.fixed = period is not None
+        self.timeout = timeout
+        self.last: Optional[float] = None
+        self.deadline = 0.0
+        self.stale = False
+        self.scheduled = False
+
+
+class TimerWheel:
+    """Hashed timer wheel with lazy re-scheduling"""
+
+    def __init__(self, tick: float = 0.05, slots: int = 256, start: float = 0.0):
+        """
+        Args:
+            tick: Seconds per slot (the detection granularity)
+            slots: Number of slots; deadlines further out than tick * slots go round again
+            start: Time of the first tick
+        """
+        self.tick = tick
+        self.slots: List[List[Deadline]] = [[] for _ in range(slots)]
+        self.current = int(start / tick)
+
+    def schedule(self, item: Deadline):
+        """File an item in the slot of its deadline"""
+        target = max(self.current + 1, int(item.deadline / self.tick) + 1)
+        self.slots[target % len(self.slots)].append(item)
+        item.scheduled = True
+
+    def advance(self, now: float) -> List[Deadline]:
+        """
+        Turn the wheel up to now
+
+        Returns:
+            Items whose deadline has passed (they leave the wheel)
+        """
+        expired = []
+        target = int(now / self.tick)
+        slots = self.slots
+        count = len(slots)
+        # After a long pause one lap covers every slot
+        if target - self.current > count:
+            self.current = target - count
+        while self.current < target:
+            self.current += 1
+            index = self.current % count
+            bucket = slots[index]
+            if not bucket:
+                continue
+            slots[index] = []
+            for item in bucket:
+                item.scheduled = False
+                if item.deadline <= now:
+                    expired.append(item)
+                else:
+                    self.schedule(item)
+        return expired
+
+
+class StalenessMonitor(threading.Thread):
+    """Marks signals stale in a SignalStore when they stop arriving"""
+
+    def __init__(self, store, periods: Optional[Dict[str, float]] = None,
+                 signals: Optional[Iterable[str]] = None, timeout_periods: float = 2.0,
+                 min_timeout: float = 0.1, default_timeout: float = 2.0, tick: float = 0.05,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            store: SignalStore to watch and mark
+            periods: Known transmit period in seconds by signal name
+            signals: Signals to track (default: every signal with a period, plus
+                any that arrive, with learned periods)
+            timeout_periods: Missed periods before a signal is stale
+            min_timeout: Shortest timeout, so fast signals survive scheduling jitter
+            default_timeout: Timeout until a period has been learned
+            tick: Seconds between wheel turns
+            clock: Monotonic clock, replaceable for tests
+        """
+        super().__init__(name="StalenessMonitor", daemon=True)
+        self.store = store
+        self.periods = dict(periods or {})
+        self.signals = frozenset(signals) if signals is not None else None
+        self.timeout_periods = timeout_periods
+        self.min_timeout = min_timeout
+        self.default_timeout = default_timeout
+        self._clock = clock
+        self.wheel = TimerWheel(tick, start=clock())
+        self.deadlines: Dict[str, Deadline] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def _timeout_for(self, period: Optional[float]) -> float:
+        if period is None:
+            return self.default_timeout
+        return max(self.min_timeout, period * self.timeout_periods)
+
+    def seen(self, updates: list):
+        """SignalStore listener: push back the deadline of everything that arrived"""
+        now = self._clock()
+        deadlines = self.deadlines
+        tracked = self.signals
+        with self._lock:
+            for values, _ in updates:
+                for name in values:
+                    item = deadlines.get(name)
+                    if item is None:
+                        if tracked is not None and name not in tracked:
+                            continue
+                        period = self.periods.get(name)
+                        item = deadlines[name] = Deadline(name, period, self._timeout_for(period))
+                    elif not item.fixed and not item.stale and item.last is not None:
+                        # Learn the period from arrival gaps (not the gap across an outage)
+                        interval = now - item.last
+                        if interval > 0:
+                            item.period = (interval if item.period is None
+                                           else item.period * 0.9 + interval * 0.1)
+                            item.timeout = self._timeout_for(item.period)
+                    item.last = now
+                    item.deadline = now + item.timeout
+                    # The store clears the stale mark itself when a stale signal is published
+                    item.stale = False
+                    if not item.scheduled:
+                        self.wheel.schedule(item)
+
+    def check(self, now: Optional[float] = None) -> List[str]:
+        """
+        Turn the wheel and mark newly overdue signals stale
+
+        Returns:
+            Names that just went stale
+        """
+        if now is None:
+            now = self._clock()
+        with self._lock:
+            expired = [item for item in self.wheel.advance(now) if not item.stale]
+            for item in expired:
+                item.stale = True
+        names = [item.name for item in expired]
+        if names:
+            self.store.mark_stale(names)
+        return names
+
+    def stale(self) -> List[str]:
+        """Signals currently stale"""
+        return [name for name, item in self.deadlines.items() if item.stale]
+
+    def attach(self) -> 'StalenessMonitor':
+        """Start watching what the store publishes"""
+        self.store.add_listener(self.seen)
+        return self
+
+    def run(self):
+        """Thread body: turn the wheel every tick"""
+        try:
+            while not self._stop_event.wait(self.wheel.tick):
+                self.check()
+        except Exception as e:
+            print(f"Staleness monitor stopped: {e}")
+
+    def stop(self, timeout: Optional[float] = 1.0):
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+
+
+def signal_periods(db, message_periods: Optional[Dict[int, float]] = None) -> Dict[str, float]:
+    """
+    Transmit period of every signal in a DBC
+
+    Args:
+        db: cantools Database
+        message_periods: Seconds by frame ID, overriding the DBC's cycle times
+
+    Returns:
+        Seconds by signal name, for messages with a known period
+    """
+    message_periods = message_periods or {}
+    periods = {}
+    for message in db.messages:
+        period = message_periods.get(message.frame_id)
+        if period is None and message.cycle_time:
+            period = message.cycle_time / 1000.0
+        if period is None:
+            continue
+        for signal in message.signals:
+            periods.setdefault(signal.name, period)
+    return periods
+
+
+def bus_periods(config, message_periods: Optional[Dict[int, float]] = None) -> Dict[str, float]:
+    """
+    Signal periods for every configured bus, by bare and bus-qualified name
+
+    A bare name both buses define gets the period of the bus can.prefer picks.
+    """
+    from .dbc_cache import load_dbc
+    from .multi_bus import bus_configs, qualify
+
+    buses = bus_configs(config)
+    prefer = config.get('can.prefer', [])
+    buses.sort(key=lambda bus: prefer.index(bus.name) if bus.name in prefer else len(prefer))
+    periods: Dict[str, float] = {}
+    for bus in buses:
+        if not bus.dbc:
+            continue
+        try:
+            db = load_dbc(bus.dbc)
+        except Exception as e:
+            print(f"Error loading {bus.dbc} for signal periods: {e}, learning them instead")
+            continue
+        for name, period in signal_periods(db, message_periods).items():
+            periods.setdefault(name, period)
+            periods[qualify(bus.name, name)] = period
+    return periods
+
+
+def start_staleness(config, store, db=None) -> Optional[StalenessMonitor]:
+    """
+    Start staleness tracking from the 'staleness' config section
+
+    Args:
+        config: Game config; staleness.periods maps frame IDs ("0x5B3") to seconds
+        store: SignalStore to watch
+        db: cantools Database the signals come from (default: each bus's DBC, from the cache)
+
+    Returns:
+        The running monitor, or None if staleness tracking is disabled
+    """
+    if not config.get('staleness.enabled', True):
+        return None
+    message_periods = {int(frame_id, 0): seconds
+                       for frame_id, seconds in config.get('staleness.periods', {}).items()}
+    if db is not None:
+        periods = signal_periods(db, message_periods)
+    else:
+        periods = bus_periods(config, message_periods)
+    # Analog inputs only publish when they move, so silence from them isn't an outage
+    tracked = set(config.get('can.signals', []))
+    for settings in config.get('gauges.channels', {}).values():
+        if settings.get('signal'):
+            tracked.add(settings['signal'])
+    monitor = StalenessMonitor(store, periods, tracked,
+                               timeout_periods=config.get('staleness.timeout_periods', 2.0),
+                               min_timeout=config.get('staleness.min_timeout', 0.1),
+                               default_timeout=config.get('staleness.default_timeout', 2.0),
+                               tick=config.get('staleness.tick', 0.05))
+    monitor.attach().start()
+    return monitor
@@ -0,0 +1,237 @@
+"""
+Non-blocking stepper motion planner for needle gauges
+
+Plans a trapezoidal speed profile one step at a time (accelerate, cruise,
+decelerate onto the target), so the target can be changed mid-move and the
+needle simply re-plans from its current speed. A background scheduler thread
+issues the steps, so nothing else waits on a sweep.
+"""
+
+import math
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from .fake_hardware import FakeStepper
+
+
+class StepperPlanner:
+    """Trapezoidal step planner with position tracking"""
+
+    def __init__(self, max_speed: float = 400.0, acceleration: float = 2000.0,
+                 position: int = 0):
+        """
+        Args:
+            max_speed: Cruise speed in steps per second
+            acceleration: Acceleration and deceleration in steps per second squared
+            position: Starting position in steps
+        """
+        self.max_speed = max_speed
+        self.acceleration = acceleration
+        self.position = position
+        self.target = position
+        # Signed speed in steps per second
+        self.speed = 0.0
+
+    def move_to(self, target: int):
+        """Retarget; takes effect on the next step"""
+        self.target = int(target)
+
+    @property
+    def distance_to_go(self) -> int:
+        return self.target - self.position
+
+    @property
+    def is_moving(self) -> bool:
+        return self.speed != 0.0 or self.position != self.target
+
+    def plan_step(self) -> Optional[Tuple[int, float]]:
+        """
+        Take one step along the profile
+
+        Returns:
+            (direction, seconds until the next step), or None when at rest on target
+        """
+        distance = self.target - self.position
+        v = abs(self.speed)
+        two_a = 2.0 * self.acceleration
+
+        if distance == 0 and v * v <= two_a:
+            # Slow enough to stop dead on the target
+            self.speed = 0.0
+            return None
+
+        wanted = 1 if distance > 0 else -1
+        moving = (1 if self.speed > 0 else -1) if v else wanted
+
+        stopping_distance = v * v / two_a
+        if distance == 0 or moving != wanted or stopping_distance >= abs(distance):
+            # Heading the wrong way, or must brake to land on the target
+            v2 = v * v - two_a
+            if v2 >= two_a:
+                v = math.sqrt(v2)
+            elif distance == 0:
+                self.speed = 0.0
+                return None
+            else:
+                # Down to crawl speed; (re)start towards the target
+                moving = wanted
+                v = math.sqrt(two_a)
+        else:
+            v = min(self.max_speed, math.sqrt(v * v + two_a))
+
+        v = min(v, self.max_speed)
+        self.speed = v * moving
+        self.position += moving
+        return moving, 1.0 / v
+
+
+class SimulatedStepper:
+    """Backend that records steps instead of driving hardware"""
+
+    def __init__(self):
+        self.position = 0
+        self.steps: List[Tuple[float, int]] = []
+
+    def step(self, direction: int):
+        self.position += direction
+        self.steps.append((time.monotonic(), direction))
+
+    def release(self):
+        pass
+
+
+class MotorKitStepper:
+    """Backend for a stepper on the Adafruit motor bonnet"""
+
+    def __init__(self, stepper, style: Optional[int] = None):
+        self.stepper = stepper
+        try:
+            from adafruit_motor import stepper as stepper_module
+            self._forward = stepper_module.FORWARD
+            self._backward = stepper_module.BACKWARD
+            self._style = stepper_module.SINGLE if style is None else style
+        except ImportError:
+            # FakeStepper from a FakeMotorKit
+            self._forward = FakeStepper.FORWARD
+            self._backward = FakeStepper.BACKWARD
+            self._style = 1 if style is None else style
+
+    def step(self, direction: int):
+        self.stepper.onestep(direction=self._forward if direction > 0 else self._backward,
+                             style=self._style)
+
+    def release(self):
+        self.stepper.release()
+
+
+class StepperScheduler(threading.Thread):
+    """Issues planned steps on a background thread"""
+
+    def __init__(self, planner: StepperPlanner, backend, release_when_idle: bool = False):
+        """
+        Args:
+            planner: Planner producing the steps
+            backend: Anything with step(direction) and release()
+            release_when_idle: De-energize the coils when the needle stops
+        """
+        super().__init__(name="StepperScheduler", daemon=True)
+        self.planner = planner
+        self.backend = backend
+        self.release_when_idle = release_when_idle
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._arrived = threading.Event()
+        self._arrived.set()
+
+    def move_to(self, target: int):
+        """Retarget the needle; never blocks on the current move"""
+        with self._lock:
+            self.planner.move_to(target)
+            self._arrived.clear()
+        self._wake.set()
+
+    @property
+    def position(self) -> int:
+        return self.planner.position
+
+    def wait_until_arrived(self, timeout: Optional[float] = None) -> bool:
+        """Block until the planner is at rest on its target"""
+        return self._arrived.wait(timeout)
+
+    def run(self):
+        """Thread body"""
+        next_step = time.monotonic()
+        while not self._stop_event.is_set():
+            with self._lock:
+                planned = self.planner.plan_step()
+                if planned is None:
+                    self._arrived.set()
+
+            if planned is None:
+                if self.release_when_idle:
+                    self.backend.release()
+                self._wake.wait()
+                self._wake.clear()
+                next_step = time.monotonic()
+                continue
+
+            direction, interval = planned
+            self.backend.step(direction)
+
+            next_step += interval
+            delay = next_step - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_step = time.monotonic()
+
+        self.backend.release()
+
+    def stop(self, timeout: Optional[float] = 1.0):
+        """Stop stepping and release the coils"""
+        self._stop_event.set()
+        self._wake.set()
+        if self.is_alive():
+            self.join(timeout)
+
+
+class StepperGauge:
+    """Maps signal values onto stepper positions"""
+
+    def __init__(self, scheduler: StepperScheduler, value_min: float, value_max: float,
+                 steps: int, signal: Optional[str] = None):
+        """
+        Args:
+            scheduler: Running scheduler for the needle
+            value_min: Value at step 0
+            value_max: Value at full sweep
+            steps: Steps in a full sweep
+            signal: Signal followed by update()
+        """
+        self.scheduler = scheduler
+        self.value_min = value_min
+        self.value_max = value_max
+        self.steps = steps
+        self.signal = signal
+        self._last_target: Optional[int] = None
+
+    def steps_for(self, value: float) -> int:
+        """Step position for a value, clamped to the sweep"""
+        span = self.value_max - self.value_min
+        fraction = (value - self.value_min) / span if span else 0.0
+        return int(round(min(1.0, max(0.0, fraction)) * self.steps))
+
+    def set_value(self, value: float):
+        """Point the needle at a value"""
+        target = self.steps_for(value)
+        if target != self._last_target:
+            self._last_target = target
+            self.scheduler.move_to(target)
+
+    def update(self, snapshot):
+        """Follow the bound signal from a store snapshot"""
+        value = snapshot.get(self.signal) if self.signal else None
+        if value is not None:
+            self.set_value(value)
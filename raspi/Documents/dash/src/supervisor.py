@@ -0,0 +1,289 @@
+"""
+Run CAN ingest, the dash and the gauge motors as separate processes
+
+Each role gets its own interpreter (and GIL), optionally pinned to its own
+core, so a slow blit can't hold up bus reads and a slow I2C write can't hold
+up either. The ingest process publishes decoded signals and metrics into a
+SharedSignalTable; the dash and gauge processes mirror it into a local
+SignalStore, so DashGame and GaugeDriver run unchanged. The supervisor
+restarts any process that exits, with a growing back-off if it keeps dying.
+"""
+
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+from .shared_signals import SharedSignalTable, SharedStoreMirror
+
+
+def shared_signal_names(config) -> List[str]:
+    """Every signal a process other than ingest may read, in a stable order"""
+    from .diagnostics import diagnostic_signal_names
+    from .metrics import leaf_metrics
+    names = list(config.get('can.signals', []))
+    names += diagnostic_signal_names(config)
+    if config.get('metrics.enabled', True):
+        names += [metric.name for metric in leaf_metrics()]
+    for section in ('gauges.channels', 'analog.inputs'):
+        for settings in config.get(section, {}).values():
+            if settings.get('signal'):
+                names.append(settings['signal'])
+    return list(dict.fromkeys(names))
+
+
+def prepare_process(core: Optional[int]):
+    """
+    Set up a role process: leave Ctrl-C to the supervisor, which stops the roles
+    through the stop event, and pin to a CPU core where the OS supports it
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if core is None or not hasattr(os, 'sched_setaffinity'):
+        return
+    try:
+        os.sched_setaffinity(0, {core})
+    except OSError as e:
+        print(f"Could not pin to core {core}: {e}")
+
+
+def _load_config(config_file: Optional[str]):
+    """Each process loads and hot-reloads its own copy of the config"""
+    from .config import GameConfig, start_config_watcher
+    config = GameConfig(config_file) if config_file else GameConfig()
+    start_config_watcher(config)
+    return config
+
+
+def run_ingest(config_file, table_name, names, stop_event, core=None):
+    """Process body: read CAN and analog inputs, poll diagnostics, compute metrics, publish to the shared table"""
+    from .analog import start_analog_sampler
+    from .can_reader import start_can_reader
+    from .diagnostics import start_diagnostics
+    from .drive_logger import start_drive_logger
+    from .metrics import start_metrics
+    from .signal_store import SignalStore
+
+    prepare_process(core)
+    config = _load_config(config_file)
+    # Carries on from a previous ingest process that may have died mid-write
+    table = SharedSignalTable.attach(table_name, names, writer=True)
+    store = SignalStore()
+    start_metrics(config, store)
+    store.add_listener(table.publish)
+    drive_logger = start_drive_logger(config, store)
+    reader = start_can_reader(config, store)
+    diagnostics = start_diagnostics(config, store)
+    sampler = start_analog_sampler(config, store)
+    try:
+        stop_event.wait()
+    finally:
+        for service in (sampler, diagnostics, reader, drive_logger):
+            if service:
+                service.stop()
+        table.close()
+
+
+def run_dash(config_file, table_name, names, stop_event, core=None):
+    """Process body: the DashGame render loop fed from the shared table (exits when the window closes)"""
+    from .game import DashGame
+    from .signal_store import SignalStore
+    from .staleness import start_staleness
+
+    prepare_process(core)
+    config = _load_config(config_file)
+    table = SharedSignalTable.attach(table_name, names)
+    store = SignalStore()
+    # Staleness is judged from what reaches this process, so a hung ingest shows up too
+    staleness = start_staleness(config, store)
+    # Checked once a frame; an uncapped dash (fps 0) still checks at 60 Hz
+    mirror = SharedStoreMirror(table, store, 1.0 / (config.get('display.fps', 60) or 60),
+                               stop_event=stop_event)
+    mirror.start()
+    game = DashGame(signal_store=store, config=config)
+
+    def end_on_stop():
+        stop_event.wait()
+        game.running = False
+        store.wake()
+
+    threading.Thread(target=end_on_stop, name="StopWatcher", daemon=True).start()
+    try:
+        game.start()
+        game.run()
+    finally:
+        mirror.stop()
+        if staleness:
+            staleness.stop()
+        table.close()
+
+
+def run_gauges(config_file, table_name, names, stop_event, core=None):
+    """Process body: the gauge motor control loop fed from the shared table"""
+    from .gauge_driver import start_gauge_driver
+    from .signal_store import SignalStore
+    from .staleness import start_staleness
+
+    prepare_process(core)
+    config = _load_config(config_file)
+    table = SharedSignalTable.attach(table_name, names)
+    store = SignalStore()
+    staleness = start_staleness(config, store)
+    # Checked once per control loop step
+    mirror = SharedStoreMirror(table, store, 1.0 / config.get('gauges.rate_hz', 50.0),
+                               stop_event=stop_event)
+    mirror.start()
+    driver = start_gauge_driver(config, store)
+    try:
+        stop_event.wait()
+    finally:
+        if driver:
+            driver.stop()
+        if staleness:
+            staleness.stop()
+        mirror.stop()
+        table.close()
+
+
+ROLES: Dict[str, Callable] = {
+    'ingest': run_ingest,
+    'dash': run_dash,
+    'gauges': run_gauges,
+}
+
+
+class ManagedProcess:
+    """One supervised role and its restart state"""
+
+    def __init__(self, name: str, target: Callable, args: tuple, core: Optional[int] = None,
+                 final_on_clean_exit: bool = False):
+        """
+        Args:
+            name: Role name
+            target: Process body
+            args: Arguments for the body (the core is appended)
+            core: CPU core to pin it to
+            final_on_clean_exit: Exit code 0 means the user quit, so stop everything
+        """
+        self.name = name
+        self.target = target
+        self.args = args
+        self.core = core
+        self.final_on_clean_exit = final_on_clean_exit
+        self.process: Optional[multiprocessing.Process] = None
+        self.started_at = 0.0
+        self.restarts = 0
+        self.backoff = 0.0
+        self.restart_at: Optional[float] = None
+
+
+class Supervisor:
+    """Starts the role processes and restarts any that exit"""
+
+    def __init__(self, config, config_file: Optional[str] = None,
+                 roles: Sequence[str] = ('ingest', 'dash', 'gauges'),
+                 min_backoff: float = 0.5, max_backoff: float = 10.0, stable_after: float = 30.0,
+                 context=None, role_targets: Optional[Dict[str, Callable]] = None):
+        """
+        Args:
+            config: Game config; processes.cores maps roles to CPU cores
+            config_file: Path each process loads its own config from (default: the default path)
+            roles: Roles to run
+            min_backoff: Seconds before the first restart of a crashed process
+            max_backoff: Longest wait between restarts of a process that keeps crashing
+            stable_after: Seconds of running after which the back-off resets
+            context: multiprocessing context (default: the platform's)
+            role_targets: Process bodies by role (default: ROLES)
+        """
+        self.context = context or multiprocessing.get_context()
+        self.table = SharedSignalTable.create(shared_signal_names(config))
+        self.stop_event = self.context.Event()
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.stable_after = stable_after
+        targets = role_targets or ROLES
+        cores = config.get('processes.cores', {})
+        self.processes = [
+            ManagedProcess(role, targets[role], (config_file, self.table.name, self.table.names,
+                                                 self.stop_event), cores.get(role),
+                           final_on_clean_exit=(role == 'dash'))
+            for role in roles
+        ]
+        self.stopping = False
+
+    def _spawn(self, managed: ManagedProcess):
+        process = self.context.Process(target=managed.target, name=f"dash-{managed.name}",
+                                       args=managed.args + (managed.core,), daemon=True)
+        process.start()
+        managed.process = process
+        managed.started_at = time.monotonic()
+        managed.restart_at = None
+
+    def start(self):
+        """Start every role"""
+        for managed in self.processes:
+            self._spawn(managed)
+            print(f"Started {managed.name} process (pid {managed.process.pid})")
+
+    def check(self, now: Optional[float] = None) -> List[str]:
+        """
+        Restart processes that have exited, once their back-off has passed
+
+        Returns:
+            Names of the processes restarted
+        """
+        if now is None:
+            now = time.monotonic()
+        restarted = []
+        for managed in self.processes:
+            process = managed.process
+            if process is None or process.is_alive() or self.stopping:
+                continue
+            if managed.final_on_clean_exit and process.exitcode == 0:
+                print(f"{managed.name} process quit, stopping")
+                self.stopping = True
+                break
+            if managed.restart_at is None:
+                ran = now - managed.started_at
+                if ran >= self.stable_after:
+                    managed.backoff = self.min_backoff
+                else:
+                    managed.backoff = min(self.max_backoff,
+                                          max(self.min_backoff, managed.backoff * 2))
+                managed.restart_at = now + managed.backoff
+                print(f"{managed.name} process exited with code {process.exitcode}, "
+                      f"restarting in {managed.backoff:.1f}s")
+            if now >= managed.restart_at:
+                managed.restarts += 1
+                self._spawn(managed)
+                restarted.append(managed.name)
+        return restarted
+
+    def run(self, poll_interval: float = 0.2):
+        """Supervise until stopped or interrupted"""
+        self.start()
+        try:
+            while not self.stopping:
+                self.check()
+                time.sleep(poll_interval)
+        finally:
+            self.stop()
+
+    def stop(self, timeout: float = 2.0):
+        """Ask every process to stop, then terminate any that don't"""
+        self.stopping = True
+        self.stop_event.set()
+        deadline = time.monotonic() + timeout
+        for managed in self.processes:
+            process = managed.process
+            if process is None:
+                continue
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                print(f"{managed.name} process did not stop, terminating")
+                process.terminate()
+                process.join(1.0)
+        if self.table is not None:
+            self.table.close()
+            self.table = None
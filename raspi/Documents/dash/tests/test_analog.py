@@ -0,0 +1,155 @@
+"""
+Test cases for MCP3008 acquisition
+"""
+
+import unittest
+import time
+import sys
+import os
+
+# Add the dash directory to path so src is importable as a package
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.analog import (AnalogInput, AnalogSampler, ExponentialFilter, MedianFilter,
+                        MovingAverage, make_filter)
+from src.config import GameConfig
+from src.fake_hardware import FakeAnalogIn, FakeMCP3008
+from src.signal_store import SignalStore
+
+
+class CountingAnalogIn(FakeAnalogIn):
+    """FakeAnalogIn that counts how many were created"""
+    created = 0
+
+    def __init__(self, mcp, pin):
+        super().__init__(mcp, pin)
+        CountingAnalogIn.created += 1
+
+
+class TestFilters(unittest.TestCase):
+    """Test the per-input filters"""
+
+    def test_moving_average(self):
+        """Test the average covers only the last size samples"""
+        average = MovingAverage(3)
+        self.assertEqual(average.update(3.0), 3.0)
+        self.assertEqual(average.update(6.0), 4.5)
+        self.assertEqual(average.update(9.0), 6.0)
+        self.assertEqual(average.update(12.0), 9.0)
+
+    def test_exponential(self):
+        """Test the IIR filter starts at the first sample and moves by alpha"""
+        iir = ExponentialFilter(0.25)
+        self.assertEqual(iir.update(1.0), 1.0)
+        self.assertEqual(iir.update(0.0), 0.75)
+
+    def test_median_rejects_spike(self):
+        """Test a single-sample spike doesn't get through the median"""
+        median = MedianFilter(3)
+        for value in (0.5, 0.5):
+            median.update(value)
+        self.assertEqual(median.update(1.0), 0.5)
+
+    def test_make_filter(self):
+        """Test filters are built by name"""
+        self.assertIsNone(make_filter(None))
+        self.assertIsInstance(make_filter('median', size=7), MedianFilter)
+        self.assertEqual(make_filter('iir', alpha=0.5).alpha, 0.5)
+        with self.assertRaises(ValueError):
+            make_filter('kalman')
+
+
+class TestAnalogSampler(unittest.TestCase):
+    """Test scanning, oversampling and publishing"""
+
+    def test_channel_objects_created_once(self):
+        """Test each input gets one AnalogIn however many scans run"""
+        CountingAnalogIn.created = 0
+        mcp = FakeMCP3008([0.5] * 8)
+        sampler = AnalogSampler(mcp, [AnalogInput('a', 0), AnalogInput('b', 3)],
+                                analog_in=CountingAnalogIn)
+        for _ in range(10):
+            sampler.scan()
+        self.assertEqual(CountingAnalogIn.created, 2)
+
+    def test_oversample_and_scale(self):
+        """Test each scan reads oversample conversions and scales to the input's range"""
+        mcp = FakeMCP3008([0.0, 1.0])
+        sampler = AnalogSampler(mcp, [AnalogInput('pedal', 1, oversample=8,
+                                                  value_min=0, value_max=100)])
+        values = sampler.scan()
+        self.assertEqual(mcp.reads, 8)
+        self.assertAlmostEqual(values['pedal'], 100.0 * 1023 * 64 / 65535, places=6)
+        self.assertEqual(sampler.get('pedal'), values['pedal'])
+        self.assertIsNone(sampler.get('missing'))
+
+    def test_filter_reduces_noise(self):
+        """Test oversampling plus filtering keeps a noisy input steady"""
+        mcp = FakeMCP3008([0.5] * 8, noise=0.05, seed=1)
+        raw = AnalogSampler(mcp, [AnalogInput('raw', 0, oversample=1)])
+        smooth = AnalogSampler(mcp, [AnalogInput('smooth', 0, oversample=8,
+                                                 filter=make_filter('average', size=8))])
+        raw_values = []
+        smooth_values = []
+        for _ in range(200):
+            raw_values.append(raw.scan()['raw'])
+            smooth_values.append(smooth.scan()['smooth'])
+        spread = lambda values: max(values[20:]) - min(values[20:])
+        self.assertLess(spread(smooth_values), spread(raw_values) / 4)
+
+    def test_publish_with_deadband(self):
+        """Test only inputs with a signal are published, and only when they move"""
+        store = SignalStore()
+        mcp = FakeMCP3008([0.25, 0.75])
+        sampler = AnalogSampler(mcp, [AnalogInput('dimmer', 0, signal='DashDimmer',
+                                                  deadband=0.01),
+                                      AnalogInput('spare', 1)], store=store)
+        sampler.scan()
+        self.assertEqual(store.version, 1)
+        self.assertAlmostEqual(store.snapshot().get('DashDimmer'), 0.25, places=2)
+        self.assertNotIn('spare', store.snapshot())
+        sampler.scan()
+        self.assertEqual(store.version, 1)
+        mcp.levels[0] = 0.5
+        sampler.scan()
+        self.assertEqual(store.version, 2)
+
+    def test_from_config(self):
+        """Test inputs and filters are built from the analog section"""
+        config = GameConfig("/nonexistent/config.json")
+        config.config['analog'] = {'rate_hz': 50, 'inputs': {
+            'dimmer': {'channel': 2, 'filter': 'median', 'size': 3, 'signal': 'DashDimmer'}}}
+        sampler = AnalogSampler.from_config(config, FakeMCP3008(), FakeAnalogIn)
+        self.assertAlmostEqual(sampler.period, 0.02)
+        dimmer = sampler.inputs[0]
+        self.assertEqual(dimmer.channel, 2)
+        self.assertIsInstance(dimmer.filter, MedianFilter)
+        with self.assertRaises(ValueError):
+            AnalogInput('bad', 8)
+
+    def test_bad_inputs_skipped(self):
+        """Test a bad channel, filter or missing channel skips that input, not the sampler"""
+        config = GameConfig("/nonexistent/config.json")
+        config.config['analog'] = {'inputs': {
+            'dimmer': {'channel': 2, 'singal': 'DashDimmer'},
+            'pedal': {'channel': 9},
+            'fuel': {'channel': 3, 'filter': 'kalman'},
+            'spare': {'oversample': 2}}}
+        sampler = AnalogSampler.from_config(config, FakeMCP3008(), FakeAnalogIn)
+        self.assertEqual([analog_input.name for analog_input in sampler.inputs], ['dimmer'])
+        self.assertIsNone(sampler.inputs[0].signal)
+
+    def test_thread_scans(self):
+        """Test the background loop keeps values fresh"""
+        sampler = AnalogSampler(FakeMCP3008([0.5] * 8), [AnalogInput('a', 0)], rate_hz=200)
+        sampler.start()
+        try:
+            time.sleep(0.1)
+        finally:
+            sampler.stop()
+        self.assertGreater(sampler.scans, 5)
+        self.assertAlmostEqual(sampler.get('a'), 0.5, places=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
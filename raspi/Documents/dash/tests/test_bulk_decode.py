@@ -0,0 +1,101 @@
+"""
+Test cases for vectorized bulk decoding
+"""
+
+import unittest
+import random
+import tempfile
+import sys
+import os
+
+# Add the dash directory to path so src is importable as a package
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.bulk_decode import NUMPY_AVAILABLE
+from src.can_decoder import CANTOOLS_AVAILABLE, CAR_CAN_DBC, EV_CAN_DBC, DecoderTable
+from src.capture import RECORD, CaptureWriter
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+    from src.bulk_decode import (RECORD_DTYPE, BulkDecoder, decode_log, load_columns,
+                                 save_columns)
+
+
+def random_frames(db, count: int, seed: int = 52):
+    """Random payloads for every message in a DBC"""
+    rng = random.Random(seed)
+    messages = [m for m in db.messages if m.length and not m.is_extended_frame]
+    frames = []
+    for i in range(count):
+        message = rng.choice(messages)
+        data = bytes(rng.getrandbits(8) for _ in range(message.length))
+        frames.append((i * 0.001, message.frame_id, data))
+    return frames
+
+
+@unittest.skipUnless(NUMPY_AVAILABLE and CANTOOLS_AVAILABLE, "numpy/cantools not installed")
+class TestBulkDecoder(unittest.TestCase):
+    """Test bulk decoding matches the per-frame decoder"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def capture(self, frames) -> str:
+        path = os.path.join(self.tmp.name, 'drive.d52')
+        with CaptureWriter(path, 'test.dbc') as writer:
+            for timestamp, frame_id, data in frames:
+                writer.write_frame(timestamp, frame_id, data)
+        return path
+
+    def test_record_dtype_matches_capture(self):
+        """Test the NumPy view uses the capture's record layout"""
+        self.assertEqual(RECORD_DTYPE.itemsize, RECORD.size)
+
+    def test_matches_per_frame_decode(self):
+        """Test every signal of every message decodes the same as the decoder table"""
+        for dbc_file in (CAR_CAN_DBC, EV_CAN_DBC):
+            table = DecoderTable.from_file(dbc_file)
+            for frame_id in list(table._all):
+                table.subscribe_message(frame_id)
+            frames = random_frames(table.db, 3000)
+
+            columns = decode_log(self.capture(frames), dbc_file)
+
+            expected = {}
+            for timestamp, frame_id, data in frames:
+                for name, value in (table.decode(frame_id, data) or {}).items():
+                    expected.setdefault(name, ([], []))
+                    expected[name][0].append(timestamp)
+                    expected[name][1].append(value)
+
+            self.assertEqual(set(columns), set(expected))
+            for name, (timestamps, values) in expected.items():
+                np.testing.assert_array_equal(columns[name][0], timestamps, err_msg=name)
+                np.testing.assert_allclose(columns[name][1], values, err_msg=name)
+
+    def test_subset_and_roundtrip(self):
+        """Test decoding chosen signals and saving them to .npz"""
+        decoder = BulkDecoder.from_file(CAR_CAN_DBC, ['VehicleSpeedCluster', 'BatteryGIDS'])
+        frames = random_frames(decoder.db, 2000)
+        columns = decode_log(self.capture(frames), CAR_CAN_DBC,
+                             ['VehicleSpeedCluster', 'BatteryGIDS'])
+        self.assertEqual(set(columns), {'VehicleSpeedCluster', 'BatteryGIDS'})
+
+        path = os.path.join(self.tmp.name, 'drive.npz')
+        save_columns(path, columns)
+        loaded = load_columns(path)
+        for name in columns:
+            np.testing.assert_array_equal(loaded[name][0], columns[name][0])
+            np.testing.assert_array_equal(loaded[name][1], columns[name][1])
+
+    def test_unknown_signal(self):
+        """Test asking for a signal the DBC lacks fails up front"""
+        with self.assertRaises(KeyError):
+            BulkDecoder.from_file(CAR_CAN_DBC, ['NoSuchSignal'])
+
+
+if __name__ == '__main__':
+    unittest.main()
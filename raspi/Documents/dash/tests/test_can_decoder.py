@@ -0,0 +1,67 @@
+"""
+Test cases for the precompiled CAN decoder table
+"""
+
+import unittest
+import random
+import sys
+import os
+
+# Add the dash directory to path so src is importable as a package
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.can_decoder import DecoderTable, CANTOOLS_AVAILABLE, CAR_CAN_DBC, EV_CAN_DBC
+
+
+@unittest.skipUnless(CANTOOLS_AVAILABLE, "cantools not installed")
+class TestDecoderTable(unittest.TestCase):
+    """Test the decoder table against cantools"""
+
+    def test_matches_cantools_for_every_message(self):
+        """Test every signal decodes the same as decode_message"""
+        rng = random.Random(0)
+        for dbc_file in (CAR_CAN_DBC, EV_CAN_DBC):
+            table = DecoderTable.from_file(dbc_file)
+            for message in table.db.messages:
+                if message.length == 0:
+                    continue
+                table.subscribe_message(message.frame_id)
+                for _ in range(20):
+                    data = bytes(rng.getrandbits(8) for _ in range(message.length))
+                    try:
+                        expected = table.db.decode_message(message.frame_id, data,
+                                                           decode_choices=False)
+                    except Exception:
+                        # cantools rejects unknown multiplexer values
+                        continue
+                    self.assertEqual(table.decode(message.frame_id, data), expected,
+                                     f"{message.name} {data.hex()}")
+
+    def test_only_subscribed_signals_decoded(self):
+        """Test unsubscribed signals and IDs are skipped"""
+        table = DecoderTable.from_file(CAR_CAN_DBC, ['BatteryGIDS', 'VehicleSpeedCluster'])
+        self.assertEqual(table.ids, {0x5B3, 0x280})
+
+        data = table.db.encode_message(0x5B3, {
+            'BatteryPackTemperature': 80, 'BatteryStateOfHealth': 92,
+            'Unknown_5B3_4': 0, 'BatteryGIDS': 250, 'BatteryAvailableChargeBars': 0,
+            'MuxedCapacityAndSOH': 0, 'FullChargeTime': 0, 'FullChargeTimeMux': 0})
+        self.assertEqual(table.decode(0x5B3, data), {'BatteryGIDS': 250})
+        self.assertIsNone(table.decode(0x284, bytes(8)))
+
+    def test_short_frame(self):
+        """Test frames shorter than 8 bytes are padded"""
+        table = DecoderTable.from_file(CAR_CAN_DBC)
+        table.subscribe_message(0x130)
+        self.assertEqual(table.decode(0x130, b'\x01\x02\x03'),
+                         table.db.decode_message(0x130, b'\x01\x02\x03'))
+
+    def test_unknown_signal(self):
+        """Test subscribing to a missing signal raises KeyError"""
+        table = DecoderTable.from_file(EV_CAN_DBC)
+        with self.assertRaises(KeyError):
+            table.subscribe(['NoSuchSignal'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+"""
+Test cases for the asyncio CAN ingest service
+"""
+
+import unittest
+import asyncio
+import threading
+import sys
+import os
+import time
+
+# Add the dash directory to path so src is importable as a package
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.can_bus import CAN_AVAILABLE, open_virtual_pair
+from src.can_decoder import CANTOOLS_AVAILABLE, CAR_CAN_DBC, DecoderTable
+from src.can_service import (CanIngestService, SignalUpdate, POLICY_BLOCK,
+                             POLICY_DROP_OLDEST)
+from src.signal_store import SignalStore
+
+if CAN_AVAILABLE:
+    import can
+
+
+def speed_frame(decoders, speed: float):
+    data = decoders.db.encode_message(0x280, {
+        'Unknown_280_0': 0, 'Unknown_280_1': 0, 'Unknown_280_2': 0,
+        'Unknown_280_3': 0, 'VehicleSpeedCluster': speed,
+        'Unknown_280_6': 0, 'Unknown_280_7': 0})
+    return can.Message(arbitration_id=0x280, data=data, is_extended_id=False)
+
+
+class TestSubscriptionPolicies(unittest.TestCase):
+    """Test queue policies without a bus"""
+
+    def test_drop_oldest(self):
+        """Test a full drop-oldest queue keeps the newest updates"""
+        async def scenario():
+            service = CanIngestService(None, None)
+            sub = service.subscribe('slow', maxsize=2, policy=POLICY_DROP_OLDEST)
+            await service.publish([SignalUpdate(0x280, {'speed': i}, float(i))
+                                   for i in range(5)])
+            lag = sub.lag()
+            values = [sub.get_nowait().values['speed'] for _ in range(2)]
+            return lag, values
+
+        lag, values = asyncio.run(scenario())
+        self.assertEqual(values, [3, 4])
+        self.assertEqual(lag.dropped, 3)
+        self.assertEqual(lag.queued, 2)
+        self.assertEqual(lag.lag_seconds, 4.0)
+
+    def test_signal_filter(self):
+        """Test subscribers only see the signals they asked for"""
+        async def scenario():
+            service = CanIngestService(None, None)
+            sub = service.subscribe('gids', signals=['BatteryGIDS'])
+            await service.publish([SignalUpdate(0x280, {'VehicleSpeedCluster': 1}, 1.0),
+                                   SignalUpdate(0x5B3, {'BatteryGIDS': 250,
+                                                        'BatteryStateOfHealth': 90}, 2.0)])
+            return sub.get_nowait(), sub.get_nowait()
+
+        first, second = asyncio.run(scenario())
+        self.assertEqual(first.values, {'BatteryGIDS': 250})
+        self.assertIsNone(second)
+
+    def test_block_applies_backpressure(self):
+        """Test a full blocking queue holds up publish until drained"""
+        async def scenario():
+            service = CanIngestService(None, None)
+            sub = service.subscribe('gauges', maxsize=1, policy=POLICY_BLOCK)
+            publish = asyncio.ensure_future(service.publish(
+                [SignalUpdate(0x280, {'speed': i}, float(i)) for i in range(3)]))
+            await asyncio.sleep(0.01)
+            blocked = not publish.done()
+            received = [(await sub.get()).values['speed'] for _ in range(3)]
+            await publish
+            return blocked, received, sub.lag().dropped
+
+        blocked, received, dropped = asyncio.run(scenario())
+        self.assertTrue(blocked)
+        self.assertEqual(received, [0, 1, 2])
+        self.assertEqual(dropped, 0)
+
+
+@unittest.skipUnless(CAN_AVAILABLE and CANTOOLS_AVAILABLE, "python-can/cantools not installed")
+class TestCanIngestService(unittest.TestCase):
+    """Test the service against the virtual bus"""
+
+    def test_fan_out(self):
+        """Test every subscriber and the store get the decoded frames"""
+        decoders = DecoderTable.from_file(CAR_CAN_DBC, ['VehicleSpeedCluster'])
+        sender, ingest = open_virtual_pair('test_can_service', decoders.ids)
+        store = SignalStore()
+
+        async def scenario():
+            service = CanIngestService(ingest.bus, decoders, store)
+            dash = service.subscribe('dash')
+            logger = service.subscribe('logger', policy=POLICY_BLOCK)
+            task = asyncio.ensure_future(service.run())
+            await asyncio.sleep(0.05)
+
+            for speed in (10.0, 20.0, 30.0):
+                sender.send(speed_frame(decoders, speed))
+            dash_speeds = [(await asyncio.wait_for(dash.get(), 2.0)).values['VehicleSpeedCluster']
+                           for _ in range(3)]
+            logger_speeds = [(await asyncio.wait_for(logger.get(), 2.0)).values['VehicleSpeedCluster']
+                             for _ in range(3)]
+
+            service.stop()
+            await asyncio.wait_for(task, 2.0)
+            return dash_speeds, logger_speeds
+
+        try:
+            dash_speeds, logger_speeds = asyncio.run(scenario())
+        finally:
+            ingest.close()
+            sender.shutdown()
+
+        self.assertEqual(dash_speeds, [10.0, 20.0, 30.0])
+        self.assertEqual(logger_speeds, [10.0, 20.0, 30.0])
+        self.assertEqual(store.snapshot().get('VehicleSpeedCluster'), 30.0)
+
+    def test_stop_from_another_thread(self):
+        """Test stop() ends run() on the loop's thread, whether it comes before or after the start"""
+        decoders = DecoderTable.from_file(CAR_CAN_DBC, ['VehicleSpeedCluster'])
+        sender, ingest = open_virtual_pair('test_can_service_stop', decoders.ids)
+        try:
+            for stop_first in (True, False):
+                service = CanIngestService(ingest.bus, decoders)
+                if stop_first:
+                    service.stop()
+                thread = threading.Thread(target=asyncio.run, args=(service.run(),))
+                thread.start()
+                time.sleep(0.05)
+                service.stop()
+                thread.join(2.0)
+                self.assertFalse(thread.is_alive())
+        finally:
+            ingest.close()
+            sender.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+"""
+Test cases for the binary CAN capture format
+"""
+
+import unittest
+import tempfile
+import sys
+import os
+
+# Add the dash directory to path so src is importable as a package
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.capture import (CaptureFormatError, CaptureReader, CaptureWriter, FLAG_EXTENDED,
+                         RECORD, replay_to_store)
+from src.can_decoder import CANTOOLS_AVAILABLE, CAR_CAN_DBC, DecoderTable
+from src.signal_store import SignalStore
+
+
+class TestCapture(unittest.TestCase):
+    """Test writing, reading and replaying captures"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'drive.cap')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_frames(self, count: int, flush_every: int = 7):
+        with CaptureWriter(self.path, 'CAR-can_AZE0_fixed.dbc', flush_every) as writer:
+            for i in range(count):
+                writer.write_frame(100.0 + i * 0.01, 0x280 + (i % 3), bytes([i % 256] * 8))
+            writer.write_frame(200.0, 0x18DAF1DB, b'\x01\x02', FLAG_EXTENDED)
+
+    def test_round_trip(self):
+        """Test frames and header come back unchanged"""
+        self.write_frames(100)
+        with CaptureReader(self.path) as reader:
+            self.assertEqual(reader.dbc_name, 'CAR-can_AZE0_fixed.dbc')
+            self.assertEqual(len(reader), 101)
+            self.assertEqual(reader[5].arbitration_id, 0x282)
+            self.assertEqual(reader[5].data, bytes([5] * 8))
+            last = reader[-1]
+            self.assertEqual(last.payload, b'\x01\x02')
+            self.assertTrue(last.flags & FLAG_EXTENDED)
+            self.assertEqual([f.timestamp for f in reader][:2], [100.0, 100.01])
+            self.assertAlmostEqual(reader.duration, 100.0)
+
+    def test_fixed_record_size(self):
+        """Test the file is header plus 24 bytes per frame"""
+        self.write_frames(10)
+        with CaptureReader(self.path) as reader:
+            self.assertEqual(RECORD.size, 24)
+            self.assertEqual(os.path.getsize(self.path), reader.header_size + 11 * 24)
+
+    def test_truncated_record_ignored(self):
+        """Test a half-written final record is skipped"""
+        self.write_frames(10)
+        with open(self.path, 'ab') as f:
+            f.write(b'\x00' * 10)
+        with CaptureReader(self.path) as reader:
+            self.assertEqual(len(reader), 11)
+
+    def test_not_a_capture(self):
+        """Test other files are rejected"""
+        with open(self.path, 'wb') as f:
+            f.write(b'(1700000000.0) can0 280#0000000000000000\n')
+        with self.assertRaises(CaptureFormatError):
+            CaptureReader(self.path)
+
+    def test_replay_speed(self):
+        """Test real-time replay sleeps by the scaled frame spacing"""
+        self.write_frames(3)
+        sleeps = []
+        with CaptureReader(self.path) as reader:
+            frames = []
+            count = reader.replay(frames.append, speed=1000.0, sleep=sleeps.append)
+        self.assertEqual(count, 4)
+        self.assertEqual(len(frames), 4)
+        self.assertGreater(sum(sleeps), 0.09)
+
+    @unittest.skipUnless(CANTOOLS_AVAILABLE, "cantools not installed")
+    def test_replay_into_decoder(self):
+        """Test a capture decodes through the same table and store as the live bus"""
+        decoders = DecoderTable.from_file(CAR_CAN_DBC, ['VehicleSpeedCluster'])
+        data = decoders.db.encode_message(0x280, {
+            'Unknown_280_0': 0, 'Unknown_280_1': 0, 'Unknown_280_2': 0,
+            'Unknown_280_3': 0, 'VehicleSpeedCluster': 42.0,
+            'Unknown_280_6': 0, 'Unknown_280_7': 0})
+        with CaptureWriter(self.path, 'CAR-can_AZE0_fixed.dbc') as writer:
+            writer.write_frame(1.0, 0x284, bytes(8))
+            writer.write_frame(2.0, 0x280, data)
+
+        store = SignalStore()
+        with CaptureReader(self.path) as reader:
+            self.assertEqual(replay_to_store(reader, decoders, store), 2)
+        self.assertEqual(store.snapshot().get_signal('VehicleSpeedCluster'), (42.0, 2.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
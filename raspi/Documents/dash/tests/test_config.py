@@ -0,0 +1,159 @@
+"""
+Test cases for config validation, compiled accessors and hot reload
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# Add the dash directory to path so src is importable as a package
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.config import ConfigWatcher, GameConfig, changed_keys
+from src.fake_hardware import FakeMotorKit
+from src.game import DashGame
+from src.gauge_driver import GaugeDriver
+
+
+class ConfigFileTest(unittest.TestCase):
+    """Tests against a config file in a temporary directory"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'game_config.json')
+        self.settings = {
+            'display': {'fps': 30, 'idle_fps': 2},
+            'gauges': {'channels': {'pon': {'motor': 'motor3', 'value_max': 160,
+                                            'slew_rate': 0.6}}},
+        }
+        self.write()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def write(self, text=None):
+        with open(self.path, 'w') as f:
+            f.write(text if text is not None else json.dumps(self.settings))
+        # Make sure the mtime moves even on coarse-grained filesystems
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+
+
+class TestValidation(ConfigFileTest):
+    """Test the schema fills and fixes settings"""
+
+    def test_missing_filled_from_defaults(self):
+        """Test settings absent from the file get their typed defaults"""
+        config = GameConfig(self.path)
+        self.assertEqual(config.get('display.fps'), 30)
+        self.assertEqual(config.get('display.width'), 800)
+        self.assertEqual(config.get('history.span'), 60)
+
+    def test_wrong_type_replaced(self):
+        """Test a mistyped setting falls back to its default"""
+        self.settings['display']['fps'] = "fast"
+        self.settings['game'] = {'debug_mode': 1}
+        self.write()
+        config = GameConfig(self.path)
+        self.assertEqual(config.get('display.fps'), 60)
+        self.assertIs(config.get('game.debug_mode'), False)
+        self.assertEqual(config.validate({'display': {'fps': 59.94}}), [])
+
+    def test_save_keeps_defaults_out_of_the_file(self):
+        """Test saving writes back the file's own settings plus set(), not the defaults"""
+        config = GameConfig(self.path)
+        config.set('gauges.channels.pon.calibration', [[0, 0.1], [160, 0.9]])
+        self.assertEqual(config.get('gauges.channels.pon.calibration'), [[0, 0.1], [160, 0.9]])
+        config.save_config()
+        with open(self.path) as f:
+            saved = json.load(f)
+        self.settings['gauges']['channels']['pon']['calibration'] = [[0, 0.1], [160, 0.9]]
+        self.assertEqual(saved, self.settings)
+        self.assertEqual(GameConfig(self.path).get('display.width'), 800)
+
+    def test_changed_keys(self):
+        """Test diffs are reported by dotted leaf key"""
+        self.assertEqual(changed_keys({'a': {'b': 1, 'c': 2}}, {'a': {'b': 1, 'c': 3, 'd': 4}}),
+                         {'a.c', 'a.d'})
+
+
+class TestReload(ConfigFileTest):
+    """Test accessors, reload and subscribers"""
+
+    def test_accessor_follows_reload(self):
+        """Test a compiled getter returns the new value after a reload"""
+        config = GameConfig(self.path)
+        fps = config.accessor('display.fps')
+        missing = config.accessor('display.nope', 'x')
+        self.assertEqual(fps(), 30)
+        self.assertEqual(missing(), 'x')
+        self.settings['display']['fps'] = 45
+        self.write()
+        self.assertEqual(config.reload(), {'display.fps'})
+        self.assertEqual(fps(), 45)
+
+    def test_subscribers_by_prefix(self):
+        """Test only subscribers for a changed section are called"""
+        config = GameConfig(self.path)
+        calls = []
+        config.subscribe(lambda c, changed: calls.append(('display', changed)), ['display'])
+        config.subscribe(lambda c, changed: calls.append(('can', changed)), ['can'])
+        config.subscribe(lambda c, changed: calls.append(('all', changed)))
+        self.settings['display']['idle_fps'] = 1
+        self.write()
+        config.reload()
+        self.assertEqual(calls, [('display', {'display.idle_fps'}),
+                                 ('all', {'display.idle_fps'})])
+
+    def test_bad_file_keeps_settings(self):
+        """Test a half-written or broken file doesn't replace working settings"""
+        config = GameConfig(self.path)
+        version = config.version
+        self.write('{"display": {"fps": ')
+        self.assertEqual(config.reload(), set())
+        self.assertEqual(config.get('display.fps'), 30)
+        self.assertEqual(config.version, version)
+
+    def test_watcher_reloads_on_change(self):
+        """Test the watcher reloads only when the file's mtime moves"""
+        config = GameConfig(self.path)
+        watcher = ConfigWatcher(config, interval=0.01)
+        self.assertEqual(watcher.check(), set())
+        self.settings['display']['fps'] = 50
+        self.write()
+        self.assertEqual(watcher.check(), {'display.fps'})
+        self.assertEqual(watcher.check(), set())
+        self.assertEqual(watcher.reloads, 1)
+
+    def test_gauge_recalibrated(self):
+        """Test the gauge driver picks up new calibration without losing position"""
+        config = GameConfig(self.path)
+        driver = GaugeDriver.from_config(config, FakeMotorKit())
+        config.subscribe(driver.apply_config, ['gauges'])
+        channel = driver.channels['pon']
+        channel.position = 0.7
+        self.settings['gauges']['channels']['pon']['value_max'] = 200
+        self.write()
+        config.reload()
+        self.assertEqual(channel.value_max, 200)
+        self.assertEqual(channel.slew_rate, 0.6)
+        self.assertEqual(channel.position, 0.7)
+
+    def test_dash_applies_between_frames(self):
+        """Test the dash takes new frame rates on its next update, not on the watcher thread"""
+        config = GameConfig(self.path)
+        game = DashGame(config=config)
+        self.settings['display']['fps'] = 20
+        self.write()
+        config.reload()
+        self.assertAlmostEqual(game.pacer.min_interval, 1 / 30)
+        game.update()
+        self.assertAlmostEqual(game.pacer.min_interval, 1 / 20)
+        self.assertIsNone(game.config_changes)
+
+
+if __name__ == '__main__':
+    unittest.main()
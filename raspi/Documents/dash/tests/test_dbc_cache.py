@@ -0,0 +1,72 @@
+"""
+Tests for the parsed DBC cache
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.can_decoder import CAR_CAN_DBC
+from src.dbc_cache import CANTOOLS_AVAILABLE, cache_path, load_dbc
+
+
+@unittest.skipUnless(CANTOOLS_AVAILABLE, "cantools not installed")
+class TestDbcCache(unittest.TestCase):
+    """Cache hits, misses and bad entries"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tmp, 'cache')
+        self.dbc = os.path.join(self.tmp, 'car.dbc')
+        shutil.copy(CAR_CAN_DBC, self.dbc)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_first_load_fills_cache(self):
+        """A miss parses the DBC and writes an entry the next load uses"""
+        db = load_dbc(self.dbc, self.cache_dir)
+        path = cache_path(self.dbc, self.cache_dir)
+        self.assertTrue(os.path.exists(path))
+
+        cached = load_dbc(self.dbc, self.cache_dir)
+        self.assertEqual([m.frame_id for m in cached.messages],
+                         [m.frame_id for m in db.messages])
+        data = bytes([0x40, 0x1F, 0, 0, 0, 0, 0, 0])
+        self.assertEqual(cached.decode_message(0x5B3, data, decode_choices=False),
+                         db.decode_message(0x5B3, data, decode_choices=False))
+
+    def test_changed_dbc_misses(self):
+        """Editing the DBC gives it a new cache entry"""
+        load_dbc(self.dbc, self.cache_dir)
+        before = cache_path(self.dbc, self.cache_dir)
+        with open(self.dbc, 'a') as f:
+            f.write("\n")
+        after = cache_path(self.dbc, self.cache_dir)
+        self.assertNotEqual(before, after)
+        self.assertFalse(os.path.exists(after))
+        load_dbc(self.dbc, self.cache_dir)
+        self.assertTrue(os.path.exists(after))
+
+    def test_corrupt_entry_reparses(self):
+        """A damaged cache file falls back to parsing and is replaced"""
+        path = cache_path(self.dbc, self.cache_dir)
+        os.makedirs(self.cache_dir)
+        with open(path, 'wb') as f:
+            f.write(b'not a pickle')
+        db = load_dbc(self.dbc, self.cache_dir)
+        self.assertTrue(db.messages)
+        self.assertTrue(load_dbc(self.dbc, self.cache_dir).messages)
+
+    def test_cache_disabled(self):
+        """use_cache=False never touches the cache directory"""
+        load_dbc(self.dbc, self.cache_dir, use_cache=False)
+        self.assertFalse(os.path.exists(self.cache_dir))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,203 @@
+"""
+Test cases for ISO-TP diagnostic polling
+"""
+
+import unittest
+import sys
+import os
+import time
+
+# Add the dash directory to path so src is importable as a package
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.can_bus import CAN_AVAILABLE, BusIngest
+from src.diagnostics import (CELL_COUNT, DECODERS, DiagnosticPoller, DiagnosticQuery, IsoTpError,
+                             Receiver, Sender, VirtualEcu, flow_control, lbc_responses, segment)
+from src.signal_store import SignalStore
+
+if CAN_AVAILABLE:
+    import can
+
+
+def transfer(payload: bytes, block_size: int = 0) -> bytes:
+    """Run a payload through a Sender and a Receiver, flow control included"""
+    sender = Sender(payload)
+    receiver = Receiver(block_size=block_size)
+    while True:
+        for data in sender.ready(0.0):
+            result = receiver.feed(data)
+            if result is not None:
+                return result
+        if receiver.flow_control_due:
+            sender.flow_control(receiver.flow_control(), 0.0)
+
+
+class TestIsoTp(unittest.TestCase):
+    """Test segmentation, reassembly and flow control"""
+
+    def test_single_frame(self):
+        """Test a short payload goes in one padded frame"""
+        frames = segment(b'\x21\x02')
+        self.assertEqual(frames, [b'\x02\x21\x02\xff\xff\xff\xff\xff'])
+        self.assertEqual(Receiver().feed(frames[0]), b'\x21\x02')
+
+    def test_multi_frame_round_trip(self):
+        """Test long payloads survive segmentation and the sequence number wrapping"""
+        payload = bytes(range(256)) * 2
+        frames = segment(payload)
+        self.assertEqual(frames[0][:2], b'\x12\x00')
+        self.assertEqual(frames[16][0], 0x20)
+        self.assertEqual(transfer(payload), payload)
+        self.assertEqual(transfer(payload, block_size=3), payload)
+
+    def test_sender_waits_for_flow_control(self):
+        """Test only the first frame goes until flow control, then blocks and gaps apply"""
+        sender = Sender(bytes(40))
+        self.assertEqual(len(sender.ready(0.0)), 1)
+        self.assertEqual(sender.ready(0.0), [])
+        sender.flow_control(flow_control(block_size=2, st_min=10), 0.0)
+        self.assertEqual(len(sender.ready(0.0)), 1)
+        self.assertEqual(sender.ready(0.005), [])
+        self.assertEqual(len(sender.ready(0.010)), 1)
+        self.assertEqual(sender.ready(1.0), [])
+        sender.flow_control(flow_control(), 1.0)
+        self.assertEqual(len(sender.ready(1.0)), 3)
+        self.assertTrue(sender.done)
+
+    def test_out_of_sequence(self):
+        """Test a missing consecutive frame is an error"""
+        frames = segment(bytes(30))
+        receiver = Receiver()
+        receiver.feed(frames[0])
+        with self.assertRaises(IsoTpError):
+            receiver.feed(frames[2])
+
+
+class TestLbcDecoders(unittest.TestCase):
+    """Test the LBC group replies decode"""
+
+    def test_groups(self):
+        """Test cell voltages, temperatures and shunts round trip through the encoders"""
+        cells = [3.9 + 0.001 * i for i in range(CELL_COUNT)]
+        shunts = [i in (5, 40) for i in range(CELL_COUNT)]
+        responses = lbc_responses(cells, (20, -3, 25), shunts)
+
+        values = DECODERS['cell_voltages'][0](responses[b'\x21\x02'])
+        self.assertEqual(len(values['LBC_CellVoltages']), CELL_COUNT)
+        self.assertAlmostEqual(values['LBC_CellVoltageMin'], 3.9)
+        self.assertAlmostEqual(values['LBC_CellVoltageSpread'], 95.0)
+
+        values = DECODERS['temperatures'][0](responses[b'\x21\x04'])
+        self.assertEqual(values['LBC_ModuleTemperatures'], (20, -3, 25))
+        self.assertEqual(values['LBC_ModuleTemperatureMin'], -3)
+
+        values = DECODERS['shunts'][0](responses[b'\x21\x06'])
+        self.assertEqual(values['LBC_ShuntCount'], 2)
+        self.assertTrue(values['LBC_Shunts'][40])
+
+
+class FakeBus:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, message):
+        self.sent.append(message)
+
+
+class FakeIngest:
+    def __init__(self):
+        self.bus = FakeBus()
+
+
+@unittest.skipUnless(CAN_AVAILABLE, "python-can not installed")
+class TestPollSchedule(unittest.TestCase):
+    """Test when queries are sent again"""
+
+    def test_next_request_waits_an_interval(self):
+        """Test the first reply, a failure or a late poller never triggers an immediate resend"""
+        ingest = FakeIngest()
+        poller = DiagnosticPoller(ingest, [DiagnosticQuery('cells', b'\x21\x02', interval=2.0)])
+        poller.start_due(1000.0)
+        self.assertEqual(poller.requests, 1)
+        poller.finish(poller._active[0x7BB], b'\x61\x02', 1000.1)
+        poller.start_due(1000.1)
+        self.assertEqual(poller.requests, 1)
+        poller.start_due(1002.1)
+        self.assertEqual(poller.requests, 2)
+
+        # Replies kept coming on schedule; then the poller stalls for several intervals
+        poller.fail(poller._active[0x7BB], 1002.2, IsoTpError("test"))
+        poller.start_due(1010.0)
+        self.assertEqual(poller.requests, 3)
+        poller.finish(poller._active[0x7BB], b'\x61\x02', 1010.0)
+        poller.start_due(1010.5)
+        self.assertEqual(poller.requests, 3)
+        poller.start_due(1012.0)
+        self.assertEqual(poller.requests, 4)
+
+
+@unittest.skipUnless(CAN_AVAILABLE, "python-can not installed")
+class TestDiagnosticPoller(unittest.TestCase):
+    """Test polling a VirtualEcu over the virtual bus"""
+
+    def setUp(self):
+        self.ecu_bus = can.interface.Bus(channel='test_diag', interface='virtual')
+        self.ecu = VirtualEcu(self.ecu_bus, lbc_responses())
+        self.ecu.start()
+        self.ingest = BusIngest({0x7BB}, channel='test_diag', interface='virtual')
+        self.ingest.open()
+
+    def tearDown(self):
+        self.ecu.stop()
+        self.ecu_bus.shutdown()
+        self.ingest.close()
+
+    def wait_until(self, condition, timeout: float = 2.0) -> bool:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if condition():
+                return True
+            time.sleep(0.005)
+        return False
+
+    def test_polls_and_publishes(self):
+        """Test each query is answered, cached and its numbers reach the store"""
+        store = SignalStore()
+        queries = [DiagnosticQuery.from_dict(name, {'request': request, 'decoder': name,
+                                                    'interval': 0.2})
+                   for name, request in (('cell_voltages', '2102'), ('temperatures', '2104'),
+                                         ('shunts', '2106'))]
+        poller = DiagnosticPoller(self.ingest, queries, store, block_size=8)
+        poller.start()
+        try:
+            self.assertTrue(self.wait_until(lambda: len(poller.results) == 3))
+            self.assertEqual(len(poller.result('cell_voltages').values['LBC_CellVoltages']),
+                             CELL_COUNT)
+            self.assertAlmostEqual(store.snapshot().get('LBC_CellVoltageMin'), 3.95)
+            self.assertEqual(store.snapshot().get('LBC_ModuleTemperatureMax'), 22)
+            # Refreshed on the interval
+            first = poller.result('shunts').timestamp
+            self.assertTrue(self.wait_until(lambda: poller.result('shunts').timestamp > first))
+            self.assertIsNone(poller.result('shunts', max_age=-1.0))
+        finally:
+            poller.stop()
+        self.assertEqual(poller.errors, {})
+
+    def test_negative_response_and_timeout(self):
+        """Test an unsupported request and a silent ECU are counted and retried"""
+        queries = [DiagnosticQuery('missing', b'\x21\x99', interval=0.05),
+                   DiagnosticQuery('silent', b'\x21\x02', interval=0.05,
+                                   request_id=0x79C, response_id=0x7BC)]
+        self.ingest.set_ids({0x7BB, 0x7BC})
+        poller = DiagnosticPoller(self.ingest, queries, timeout=0.05)
+        poller.start()
+        try:
+            self.assertTrue(self.wait_until(
+                lambda: poller.errors.get('missing', 0) >= 2 and poller.errors.get('silent', 0) >= 2))
+        finally:
+            poller.stop()
+        self.assertEqual(poller.results, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,208 @@
+"""
+Test cases for the drive logger
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+import sqlite3
+import time
+
+# Add the dash directory to path so src is importable as a package
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.drive_logger import DriveLogger, read_session, session_files, session_size
+from src.signal_store import SignalStore
+
+
+class TestDriveLogger(unittest.TestCase):
+    """Test batching, sessions and the disk cap"""
+
+    def setUp(self):
+        self.temp = tempfile.TemporaryDirectory()
+        self.directory = self.temp.name
+        self.store = SignalStore()
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def make_logger(self, **kwargs):
+        return DriveLogger(self.directory, **kwargs).attach(self.store)
+
+    def test_nothing_written_until_flush(self):
+        """Test publishes only queue in memory"""
+        logger = self.make_logger()
+        self.store.update({'speed': 50.0}, 1000.0)
+        self.assertEqual(session_files(self.directory), [])
+        self.assertEqual(logger.flush(), 1)
+        logger.stop()
+        self.assertEqual(len(session_files(self.directory)), 1)
+
+    def test_round_trip_in_one_chunk_per_signal(self):
+        """Test a flush writes one chunk per signal and reads back in order"""
+        logger = self.make_logger()
+        for i in range(100):
+            self.store.update({'speed': float(i), 'gids': 200 - i}, 1000.0 + i * 0.1)
+        self.assertEqual(logger.flush(), 200)
+        logger.stop()
+
+        path = session_files(self.directory)[0]
+        conn = sqlite3.connect(path)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0], 2)
+        conn.close()
+        columns = read_session(path)
+        times, values = columns['speed']
+        self.assertEqual(list(values), [float(i) for i in range(100)])
+        self.assertAlmostEqual(times[-1], 1009.9)
+        self.assertEqual(columns['gids'][1][0], 200.0)
+
+    def test_signal_filter_and_non_numeric(self):
+        """Test only the configured signals are kept and text values are skipped"""
+        logger = self.make_logger(signals=['speed', 'gear'])
+        self.store.update({'speed': 50.0, 'gids': 200, 'gear': 'D'}, 1000.0)
+        logger.flush()
+        logger.stop()
+        columns = read_session(session_files(self.directory)[0])
+        self.assertEqual(set(columns), {'speed'})
+
+    def test_gap_starts_new_session(self):
+        """Test data after a long gap goes to a new file"""
+        logger = self.make_logger(session_gap=60.0)
+        self.store.update({'speed': 50.0}, 1000.0)
+        self.store.update({'speed': 51.0}, 1030.0)
+        self.store.update({'speed': 0.0}, 5000.0)
+        logger.flush()
+        logger.stop()
+        files = session_files(self.directory)
+        self.assertEqual(len(files), 2)
+        self.assertEqual(list(read_session(files[0])['speed'][1]), [50.0, 51.0])
+        self.assertEqual(list(read_session(files[1])['speed'][1]), [0.0])
+
+    def test_mode_change_starts_new_session(self):
+        """Test a change of the mode signal (e.g. plugged in) splits sessions"""
+        logger = self.make_logger(mode_signal='ChargeMode')
+        self.store.update({'ChargeMode': 0, 'speed': 10.0}, 1000.0)
+        self.store.update({'ChargeMode': 0, 'speed': 0.0}, 1001.0)
+        self.store.update({'ChargeMode': 1}, 1002.0)
+        logger.flush()
+        logger.stop()
+        self.assertEqual(len(session_files(self.directory)), 2)
+
+    def test_disk_cap_removes_oldest_sessions(self):
+        """Test old sessions are deleted once the directory is over the cap"""
+        logger = self.make_logger(session_gap=1.0, max_total_mb=0.0)
+        for session in range(3):
+            self.store.update({'speed': float(session)}, 1000.0 + session * 100)
+            logger.flush()
+        logger.stop()
+        files = session_files(self.directory)
+        self.assertEqual(len(files), 1)
+        self.assertEqual(list(read_session(files[0])['speed'][1]), [2.0])
+        self.assertGreater(session_size(files[0]), 0)
+
+    def test_unwritable_directory_retries(self):
+        """Test a session that can't be opened is retried later and nothing is lost or unbounded"""
+        blocked = os.path.join(self.directory, 'blocked')
+        with open(blocked, 'w'):
+            pass
+        logger = DriveLogger(blocked, max_pending=5, retry_delay=0.0).attach(self.store)
+        for i in range(20):
+            self.store.update({'speed': float(i)}, 1000.0 + i)
+        self.assertEqual(logger.flush(), 0)
+        self.assertEqual(logger.write_errors, 1)
+        self.assertEqual(logger._pending_frames, 5)
+        self.assertEqual(logger.dropped, 15)
+
+        os.remove(blocked)
+        self.assertEqual(logger.flush(), 5)
+        logger.stop()
+        self.assertEqual(list(read_session(session_files(blocked)[0])['speed'][1]),
+                         [15.0, 16.0, 17.0, 18.0, 19.0])
+
+    def test_pending_capped_in_frames(self):
+        """Test the cap counts frames, not batches, and trims part of the oldest batch"""
+        logger = self.make_logger(max_pending=5)
+        logger.record([({'speed': float(i)}, 1000.0 + i) for i in range(4)])
+        logger.record([({'speed': float(i)}, 1000.0 + i) for i in range(4, 7)])
+        self.assertEqual(logger._pending_frames, 5)
+        self.assertEqual(logger.dropped, 2)
+        self.assertEqual(logger.flush(), 5)
+        logger.stop()
+        self.assertEqual(list(read_session(session_files(self.directory)[0])['speed'][1]),
+                         [2.0, 3.0, 4.0, 5.0, 6.0])
+
+    def test_failed_write_is_requeued(self):
+        """Test a chunk whose transaction fails is written on the next attempt"""
+        logger = self.make_logger(retry_delay=0.0)
+        self.store.update({'speed': 1.0}, 1000.0)
+        logger.flush()
+        logger._conn.execute("ALTER TABLE chunks RENAME TO moved")
+        self.store.update({'speed': 2.0}, 1001.0)
+        self.store.update({'speed': 3.0}, 1002.0)
+        self.assertEqual(logger.flush(), 0)
+        self.assertEqual(logger.write_errors, 1)
+        self.assertEqual(logger._pending_frames, 2)
+
+        logger._conn.execute("ALTER TABLE moved RENAME TO chunks")
+        self.store.update({'speed': 4.0}, 1003.0)
+        self.assertEqual(logger.flush(), 3)
+        logger.stop()
+        files = session_files(self.directory)
+        self.assertEqual(len(files), 1)
+        self.assertEqual(list(read_session(files[0])['speed'][1]), [1.0, 2.0, 3.0, 4.0])
+
+    def test_thread_survives_flush_errors(self):
+        """Test the writer keeps running while the card fails"""
+        blocked = os.path.join(self.directory, 'blocked')
+        with open(blocked, 'w'):
+            pass
+        logger = DriveLogger(blocked, flush_interval=0.01, retry_delay=0.01).attach(self.store)
+        logger.start()
+        self.store.update({'speed': 1.0}, 1000.0)
+        deadline = time.monotonic() + 2.0
+        while logger.write_errors < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertGreaterEqual(logger.write_errors, 2)
+        self.assertTrue(logger.is_alive())
+        os.remove(blocked)
+        logger.stop()
+        self.assertEqual(list(read_session(session_files(blocked)[0])['speed'][1]), [1.0])
+
+    def test_limit_checked_after_every_flush(self):
+        """Test old sessions are removed while one long session keeps growing"""
+        logger = self.make_logger(session_gap=1.0)
+        self.store.update({'speed': 1.0}, 1000.0)
+        self.store.update({'speed': 2.0}, 2000.0)
+        logger.flush()
+        logger.max_total_bytes = 0
+        self.store.update({'speed': 3.0}, 2000.5)
+        logger.flush()
+        logger.stop()
+        self.assertEqual(len(session_files(self.directory)), 1)
+
+    def test_thread_flushes_on_stop(self):
+        """Test the writer thread writes what's queued when stopped"""
+        logger = self.make_logger(flush_interval=60.0)
+        logger.start()
+        self.store.update({'speed': 42.0}, 1000.0)
+        logger.stop()
+        self.assertFalse(logger.is_alive())
+        columns = read_session(session_files(self.directory)[0])
+        self.assertEqual(list(columns['speed'][1]), [42.0])
+
+    def test_max_pending_wakes_writer(self):
+        """Test a long queue triggers an early flush"""
+        logger = self.make_logger(flush_interval=60.0, max_pending=10)
+        logger.start()
+        for i in range(20):
+            self.store.update({'speed': float(i)}, 1000.0 + i)
+        deadline = time.monotonic() + 2.0
+        while logger.flushes == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertGreaterEqual(logger.flushes, 1)
+        logger.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
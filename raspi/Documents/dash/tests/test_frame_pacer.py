@@ -0,0 +1,158 @@
+"""
+Test cases for adaptive frame pacing
+"""
+
+import unittest
+import threading
+import time
+import sys
+import os
+
+# Add the dash directory to path so src is importable as a package
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# Render off-screen
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+try:
+    import pygame
+    PYGAME_AVAILABLE = True
+except ImportError:
+    PYGAME_AVAILABLE = False
+
+from src.frame_pacer import FramePacer
+from src.histogram import Histogram
+from src.history import HistoryRecorder
+from src.signal_store import SignalStore
+
+if PYGAME_AVAILABLE:
+    from src.game import DashGame
+
+
+class FakeClock:
+    """Manually advanced clock whose sleep just moves time forward"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.waits = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.waits.append(seconds)
+        self.now += seconds
+
+
+class TestFramePacer(unittest.TestCase):
+    """Test frame pacing decisions"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.pacer = FramePacer(max_fps=50, idle_fps=5, idle_after=1.0,
+                                clock=self.clock, sleep=self.clock.sleep)
+
+    def test_caps_at_max_fps(self):
+        """Test changing frames are spaced at 1/max_fps"""
+        self.clock.now += 0.005  # render work
+        period = self.pacer.tick(True)
+        self.assertAlmostEqual(period, 0.02)
+        self.assertFalse(self.pacer.idle)
+
+    def test_drops_to_idle_rate(self):
+        """Test static frames fall back to the idle rate"""
+        for _ in range(60):
+            self.pacer.tick(False)
+        self.assertTrue(self.pacer.idle)
+        self.assertAlmostEqual(self.pacer.tick(False), 0.2)
+
+        # A change brings the full rate straight back
+        self.assertAlmostEqual(self.pacer.tick(True), 0.02)
+        self.assertFalse(self.pacer.idle)
+
+    def test_histograms_recorded(self):
+        """Test every tick records a frame time"""
+        for _ in range(10):
+            self.pacer.tick(True)
+        self.assertEqual(self.pacer.frame_times.count, 10)
+        self.assertAlmostEqual(self.pacer.frame_times.percentile(50), 0.02)
+
+    def test_zero_fps_is_uncapped(self):
+        """Test an fps of 0 renders flat out instead of failing, at startup and on reload"""
+        pacer = FramePacer(max_fps=0, idle_fps=0, clock=self.clock, sleep=self.clock.sleep)
+        self.clock.now += 0.005
+        self.assertAlmostEqual(pacer.tick(True), 0.005)
+        self.assertEqual(self.clock.waits, [])
+
+        self.pacer.set_rates(0, 0)
+        self.assertEqual(self.pacer.min_interval, 0.0)
+        self.assertEqual(self.pacer.idle_interval, 1.0)
+
+
+class TestIdleWake(unittest.TestCase):
+    """Test an idle pacer wakes when data is published"""
+
+    def test_wakes_on_publish(self):
+        store = SignalStore()
+        pacer = FramePacer(max_fps=60, idle_fps=1, idle_after=0.0,
+                           wait_for_data=lambda timeout: store.wait_for_update(timeout, 0))
+        timer = threading.Timer(0.05, lambda: store.update({'speed': 1.0}))
+        timer.start()
+        start = time.monotonic()
+        pacer.tick(False)
+        elapsed = time.monotonic() - start
+        timer.join()
+        self.assertLess(elapsed, 0.5)
+
+
+@unittest.skipUnless(PYGAME_AVAILABLE, "pygame not installed")
+class TestDashIdle(unittest.TestCase):
+    """Test the dash goes idle on a live bus whose values don't change"""
+
+    def tearDown(self):
+        pygame.quit()
+
+    def test_unchanged_values_go_idle(self):
+        """Test publishes of the same values don't count as changes"""
+        store = SignalStore()
+        game = DashGame(signal_store=store, history=HistoryRecorder([]))
+        clock = FakeClock()
+        game.pacer = FramePacer(max_fps=50, idle_fps=5, idle_after=1.0,
+                                clock=clock, sleep=clock.sleep)
+        game.initialize_pygame()
+        idle_frames = 0
+        while clock.now < 3.0:
+            store.update({'VehicleSpeedCluster': 40.0, 'BatteryGIDS': 200}, clock.now)
+            game.update()
+            game.draw()
+            game.pacer.tick(game.drawn)
+            idle_frames += game.pacer.idle
+        self.assertTrue(game.pacer.idle)
+        self.assertGreater(idle_frames, 5)
+
+        # A new value draws and brings the full rate back
+        store.update({'VehicleSpeedCluster': 41.0}, clock.now)
+        game.update()
+        game.draw()
+        self.assertTrue(game.drawn)
+        game.pacer.tick(game.drawn)
+        self.assertFalse(game.pacer.idle)
+
+
+class TestHistogram(unittest.TestCase):
+    """Test the bucketed histogram"""
+
+    def test_percentiles(self):
+        """Test percentiles come from bucket bounds and max is exact"""
+        histogram = Histogram()
+        for _ in range(99):
+            histogram.record(0.0015)
+        histogram.record(0.3)
+        self.assertEqual(histogram.percentile(50), 0.002)
+        self.assertEqual(histogram.percentile(99), 0.002)
+        self.assertEqual(histogram.max, 0.3)
+        self.assertEqual(histogram.count, 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+"""
+Test cases for gauge calibration tables and the sweep routine
+"""
+
+import unittest
+import sys
+import os
+
+# Add the dash directory to path so src is importable as a package
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.fake_hardware import FakeMotor, FakeMotorKit
+from src.gauge_calibration import (CalibrationTable, collapse, interpolate, is_monotonic, sweep,
+                                   sweep_throttles)
+from src.gauge_driver import GaugeChannel, GaugeDriver
+from src.signal_store import SignalStore
+
+# A needle that reads low in the middle of the dial
+POINTS = [[0, 0.6], [40, 0.7], [80, 0.76], [120, 0.82], [160, 0.9]]
+
+
+class FakeConfig:
+    def __init__(self, settings):
+        self.settings = settings
+
+    def get(self, key, default=None):
+        return self.settings.get(key, default)
+
+
+class TestCalibrationTable(unittest.TestCase):
+    """Test compiled lookups match the piecewise-linear points"""
+
+    def test_matches_points(self):
+        """Test the table agrees with direct interpolation across the range"""
+        table = CalibrationTable(POINTS)
+        for value, throttle in POINTS:
+            self.assertAlmostEqual(table(value), throttle)
+        for value in range(0, 161, 3):
+            self.assertAlmostEqual(table(value), interpolate(table.points, value), places=3)
+
+    def test_clamps_and_nan(self):
+        """Test values off either end, or NaN, land on the end points"""
+        table = CalibrationTable(POINTS)
+        self.assertEqual(table(-10), 0.6)
+        self.assertEqual(table(500), 0.9)
+        self.assertEqual(table(float('nan')), 0.6)
+
+    def test_unordered_and_decreasing(self):
+        """Test points may come in any order and throttle may fall as value rises"""
+        table = CalibrationTable([[100, 0.2], [0, 0.8]])
+        self.assertAlmostEqual(table(25), 0.65)
+
+    def test_degenerate_points(self):
+        """Test one point is a constant and no points are rejected"""
+        self.assertEqual(CalibrationTable([[5, 0.4]])(100), 0.4)
+        self.assertEqual(CalibrationTable.linear(0, 0, 0.6, 0.9)(10), 0.6)
+        with self.assertRaises(ValueError):
+            CalibrationTable([])
+
+    def test_pegged_needle(self):
+        """Test readings repeated at a dial stop keep the throttle where the needle starts to move"""
+        points = [(0.0, 0.6), (0.0, 0.63), (0.0, 0.66), (50.0, 0.75), (160.0, 0.9), (160.0, 0.88)]
+        self.assertTrue(is_monotonic(points))
+        self.assertEqual(collapse(points), [(0.0, 0.66), (50.0, 0.75), (160.0, 0.88)])
+        table = CalibrationTable(points)
+        self.assertEqual(table(0), 0.66)
+        self.assertAlmostEqual(table(25), 0.705)
+
+
+class TestCalibratedChannel(unittest.TestCase):
+    """Test the gauge driver maps through the calibration"""
+
+    def test_channel_uses_calibration(self):
+        """Test calibration points override the linear range"""
+        channel = GaugeChannel('pon', 'motor3', value_max=160, min_position=0.6,
+                               max_position=0.9, slew_rate=100.0, calibration=POINTS)
+        channel.target_value = 80
+        self.assertAlmostEqual(channel.step(0.02), 0.76)
+
+    def test_bad_calibration_falls_back(self):
+        """Test unusable points leave the gauge on its linear range instead of failing"""
+        config = FakeConfig({'gauges.channels': {'pon': {
+            'motor': 'motor3', 'value_max': 100, 'min_position': 0.6, 'max_position': 0.9,
+            'calibration': [[0, 'low'], [100]]}}})
+        driver = GaugeDriver.from_config(config, FakeMotorKit())
+        self.assertAlmostEqual(driver.channels['pon'].throttle_for(50), 0.75)
+        driver.apply_config(config)
+        self.assertAlmostEqual(driver.channels['pon'].throttle_for(50), 0.75)
+
+    def test_reload_recompiles(self):
+        """Test new points from a config reload take effect on the next step"""
+        store = SignalStore()
+        settings = {'motor': 'motor3', 'signal': 'speed', 'value_max': 160,
+                    'min_position': 0.6, 'max_position': 0.9, 'slew_rate': 100.0}
+        kit = FakeMotorKit()
+        driver = GaugeDriver(kit, [GaugeChannel.from_dict('pon', settings)], source=store.snapshot)
+        store.update({'speed': 80.0})
+        driver.step(0.02)
+        self.assertAlmostEqual(kit.motor3.throttle, 0.75)
+
+        driver.apply_config(FakeConfig({'gauges.channels': {
+            'pon': dict(settings, calibration=POINTS)}}))
+        driver.step(0.02)
+        self.assertAlmostEqual(kit.motor3.throttle, 0.76)
+
+
+class TestSweep(unittest.TestCase):
+    """Test the guided sweep records calibration points"""
+
+    def test_sweep_averages_both_directions(self):
+        """Test each throttle is visited up and down and the readings averaged"""
+        motor = FakeMotor()
+        throttles = sweep_throttles(0.6, 0.9, steps=3)
+        visits = []
+
+        def read(throttle):
+            # The needle trails by 2 on the way up and leads by 2 on the way down
+            visits.append(throttle)
+            up = len(visits) <= len(throttles)
+            return (throttle - 0.6) * 500 + (-2 if up else 2)
+
+        points = sweep(motor, throttles, read, sleep=lambda seconds: None)
+        self.assertEqual(motor.history, throttles + throttles[-2::-1])
+        self.assertEqual([throttle for _, throttle in points], throttles)
+        self.assertAlmostEqual(points[1][0], 50.0)
+        self.assertTrue(is_monotonic(points))
+
+    def test_skipped_readings(self):
+        """Test a None reading drops that point"""
+        readings = iter([0.0, None, 100.0])
+        points = sweep(FakeMotor(), [0.6, 0.7, 0.8], lambda throttle: next(readings),
+                       both_ways=False, sleep=lambda seconds: None)
+        self.assertEqual(points, [(0.0, 0.6), (100.0, 0.8)])
+        self.assertFalse(is_monotonic([(0.0, 0.6), (50.0, 0.7), (40.0, 0.8)]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+"""
+Test cases for the gauge motor driver
+"""
+
+import unittest
+import time
+import sys
+import os
+
+# Add the dash directory to path so src is importable as a package
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.fake_hardware import FakeMotorKit
+from src.gauge_driver import GaugeChannel, GaugeDriver
+from src.signal_store import SignalStore
+
+
+def speed_channel(**overrides) -> GaugeChannel:
+    settings = dict(motor='motor3', signal='VehicleSpeedCluster', value_min=0, value_max=100,
+                    min_position=0.6, max_position=0.9, slew_rate=1.0, damping=0.0,
+                    deadband=0.005)
+    settings.update(overrides)
+    return GaugeChannel('pon', **settings)
+
+
+class FakeConfig:
+    def __init__(self, settings):
+        self.settings = settings
+
+    def get(self, key, default=None):
+        return self.settings.get(key, default)
+
+
+class TestGaugeChannel(unittest.TestCase):
+    """Test calibration, slew limiting and the deadband"""
+
+    def test_calibrated_range(self):
+        """Test values map onto the throttle range and clamp"""
+        channel = speed_channel()
+        self.assertAlmostEqual(channel.throttle_for(0), 0.6)
+        self.assertAlmostEqual(channel.throttle_for(50), 0.75)
+        self.assertAlmostEqual(channel.throttle_for(500), 0.9)
+        self.assertAlmostEqual(channel.throttle_for(-5), 0.6)
+
+    def test_slew_limit(self):
+        """Test the throttle moves no faster than slew_rate"""
+        channel = speed_channel(slew_rate=0.5)
+        channel.target_value = 0
+        channel.step(0.02)
+        channel.target_value = 100
+        self.assertAlmostEqual(channel.step(0.02), 0.61)
+        self.assertAlmostEqual(channel.step(0.02), 0.62)
+
+    def test_deadband_skips_writes(self):
+        """Test tiny changes are not written but the needle still lands"""
+        channel = speed_channel(slew_rate=0.01)
+        channel.target_value = 50
+        self.assertAlmostEqual(channel.step(0.02), 0.75)
+        channel.target_value = 50.5  # 0.0015 throttle away
+        self.assertAlmostEqual(channel.step(0.02), 0.7515)
+        self.assertIsNone(channel.step(0.02))
+
+
+class TestGaugeDriver(unittest.TestCase):
+    """Test the driver against a fake MotorKit"""
+
+    def test_follows_store_and_coalesces_writes(self):
+        """Test a steady signal stops generating I2C writes"""
+        kit = FakeMotorKit()
+        store = SignalStore()
+        driver = GaugeDriver(kit, [speed_channel()], source=store.snapshot)
+
+        store.update({'VehicleSpeedCluster': 40.0})
+        for _ in range(200):
+            driver.step(0.02)
+
+        self.assertAlmostEqual(kit.motor3.throttle, 0.72)
+        self.assertEqual(kit.motor3.writes, 1)
+        self.assertEqual(kit.motor4.writes, 0)
+
+    def test_thread_runs_and_parks(self):
+        """Test the background loop drives the motor and parks on stop"""
+        kit = FakeMotorKit()
+        driver = GaugeDriver(kit, [speed_channel(signal=None)], rate_hz=200)
+        driver.set_target('pon', 100)
+        driver.start()
+        time.sleep(0.1)
+        driver.stop()
+
+        self.assertGreater(driver.ticks, 5)
+        self.assertIn(0.9, kit.motor3.history)
+        self.assertEqual(kit.motor3.throttle, 0.0)
+
+    def test_unknown_and_bad_settings(self):
+        """Test a misspelled key is ignored and a gauge missing its motor is skipped"""
+        config = FakeConfig({'gauges.channels': {
+            'pon': {'motor': 'motor3', 'value_max': 160, 'slew_rtae': 2.0},
+            'b3b': {'value_max': 100}}})
+        driver = GaugeDriver.from_config(config, FakeMotorKit())
+        self.assertEqual(list(driver.channels), ['pon'])
+        self.assertEqual(driver.channels['pon'].value_max, 160)
+        self.assertEqual(driver.channels['pon'].slew_rate, 1.0)
+
+    def test_removed_setting_restores_default(self):
+        """Test a setting dropped from the file on reload goes back to its default"""
+        config = FakeConfig({'gauges.channels': {'pon': {'motor': 'motor3', 'damping': 0.5}}})
+        driver = GaugeDriver.from_config(config, FakeMotorKit())
+        self.assertEqual(driver.channels['pon'].damping, 0.5)
+        driver.apply_config(FakeConfig({'gauges.channels': {'pon': {'motor': 'motor3'}}}))
+        self.assertEqual(driver.channels['pon'].damping, 0.0)
+        self.assertEqual(driver.channels['pon'].motor, 'motor3')
+
+
+if __name__ == '__main__':
+    unittest.main()
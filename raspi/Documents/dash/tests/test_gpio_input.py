@@ -0,0 +1,171 @@
+"""
+Test cases for edge-triggered button input
+"""
+
+import unittest
+import time
+import sys
+import os
+
+# Add the dash directory to path so src is importable as a package
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.config import GameConfig
+from src.fake_hardware import FakeGPIO
+from src.gpio_input import (DOUBLE_PRESS, LONG_PRESS, PRESS, RELEASE, ButtonEvent,
+                            ButtonInput, start_button_input)
+from src.game import DashGame
+
+PIN = 18
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestButtonInput(unittest.TestCase):
+    """Test debounce, gestures and the event queue"""
+
+    def setUp(self):
+        self.gpio = FakeGPIO()
+        self.clock = FakeClock()
+        self.woken = 0
+        self.buttons = ButtonInput(self.gpio, {'button_1': PIN}, debounce=0.02, long_press=0.05,
+                                   double_press=0.3, on_event=self.wake, clock=self.clock)
+        self.buttons.start()
+
+    def tearDown(self):
+        self.buttons.stop()
+
+    def wake(self):
+        self.woken += 1
+
+    def press(self, hold: float = 0.1, gap: float = 0.5):
+        """Press and release at the fake clock"""
+        self.gpio.drive(PIN, FakeGPIO.LOW)
+        self.clock.now += hold
+        self.gpio.drive(PIN, FakeGPIO.HIGH)
+        self.clock.now += gap
+
+    def kinds(self):
+        return [event.kind for event in self.buttons.drain()]
+
+    def test_setup(self):
+        """Test the pin is a pulled-up input with an edge callback on both edges"""
+        self.assertEqual(self.gpio.directions[PIN], FakeGPIO.IN)
+        self.assertEqual(self.gpio.callbacks[PIN][0], FakeGPIO.BOTH)
+        self.assertFalse(self.buttons.buttons['button_1'].pressed)
+
+    def test_press_release(self):
+        """Test a press and release become two events and wake the loop"""
+        self.press()
+        events = self.buttons.drain()
+        self.assertEqual([e.kind for e in events], [PRESS, RELEASE])
+        self.assertEqual(events[0], ButtonEvent('button_1', PRESS, 100.0))
+        self.assertEqual(self.woken, 2)
+        self.assertEqual(self.buttons.drain(), [])
+
+    def test_bounce_ignored(self):
+        """Test contact bounce inside the debounce window is dropped"""
+        gpio = self.gpio
+        gpio.drive(PIN, FakeGPIO.LOW)
+        for _ in range(3):
+            self.clock.now += 0.002
+            gpio.drive(PIN, FakeGPIO.HIGH)
+            self.clock.now += 0.002
+            gpio.drive(PIN, FakeGPIO.LOW)
+        self.clock.now += 0.2
+        gpio.drive(PIN, FakeGPIO.HIGH)
+        self.assertEqual(self.kinds(), [PRESS, RELEASE])
+        self.assertEqual(self.buttons.bounces, 3)
+
+    def test_release_inside_window_settles(self):
+        """Test a real release ignored as a bounce is picked up once the window is over"""
+        self.gpio.drive(PIN, FakeGPIO.LOW)
+        self.clock.now += 0.005
+        self.gpio.drive(PIN, FakeGPIO.HIGH)
+        self.assertEqual(self.kinds(), [PRESS])
+        self.clock.now += 0.05
+        time.sleep(0.1)
+        self.assertFalse(self.buttons.buttons['button_1'].pressed)
+        self.clock.now += 0.5
+        self.press()
+        self.assertEqual(self.kinds(), [RELEASE, PRESS, RELEASE])
+
+    def test_double_press(self):
+        """Test a second press inside the window is a double, a third starts over"""
+        self.press(hold=0.05, gap=0.1)
+        self.press(hold=0.05, gap=0.1)
+        self.press(hold=0.05, gap=1.0)
+        self.press(hold=0.05)
+        self.assertEqual(self.kinds(), [PRESS, RELEASE, DOUBLE_PRESS, RELEASE,
+                                        PRESS, RELEASE, PRESS, RELEASE])
+
+    def test_long_press(self):
+        """Test holding past long_press sends LONG_PRESS before the release"""
+        self.gpio.drive(PIN, FakeGPIO.LOW)
+        time.sleep(0.15)
+        self.clock.now += 1.0
+        self.gpio.drive(PIN, FakeGPIO.HIGH)
+        self.assertEqual(self.kinds(), [PRESS, LONG_PRESS, RELEASE])
+
+    def test_short_press_not_long(self):
+        """Test releasing before long_press cancels it"""
+        self.press(hold=0.03)
+        time.sleep(0.1)
+        self.assertEqual(self.kinds(), [PRESS, RELEASE])
+
+    def test_no_polling(self):
+        """Test the pin is read once per edge, not once per frame"""
+        reads = self.gpio.reads
+        for _ in range(100):
+            self.buttons.drain()
+        self.assertEqual(self.gpio.reads, reads)
+
+    def test_stop_removes_callbacks(self):
+        """Test stop() unregisters the edge callback"""
+        self.buttons.stop()
+        self.assertNotIn(PIN, self.gpio.callbacks)
+
+
+class TestButtonConfig(unittest.TestCase):
+    """Test starting from config and dispatching to the dash"""
+
+    def config(self):
+        config = GameConfig("/nonexistent/config.json")
+        config.config['raspberry_pi'] = {'gpio_pins': {'button_1': 18, 'button_2': 19,
+                                                       'led_1': 20}}
+        config.config['buttons']['actions'] = {'button_1.press': 'toggle_debug',
+                                               'button_2.long_press': 'quit'}
+        return config
+
+    def test_start_from_config(self):
+        """Test only the button pins are set up, and only when there is GPIO"""
+        gpio = FakeGPIO()
+        buttons = start_button_input(self.config(), gpio)
+        self.assertEqual(sorted(buttons.buttons), ['button_1', 'button_2'])
+        self.assertEqual(sorted(gpio.callbacks), [18, 19])
+        self.assertIsNone(start_button_input(self.config(), None))
+
+    def test_dash_actions(self):
+        """Test DashGame drains the queue and runs the configured actions"""
+        config = self.config()
+        gpio = FakeGPIO()
+        buttons = start_button_input(config, gpio)
+        game = DashGame(config=config, buttons=buttons)
+        game.running = True
+        debug = game.debug_mode
+        gpio.drive(18, FakeGPIO.LOW)
+        game.handle_button(buttons.drain()[0])
+        self.assertNotEqual(game.debug_mode, debug)
+        game.handle_button(ButtonEvent('button_2', LONG_PRESS, 0.0))
+        self.assertFalse(game.running)
+        buttons.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+"""
+Test cases for the signal history ring buffers
+"""
+
+import unittest
+import sys
+import os
+
+# Add the dash directory to path so src is importable as a package
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.history import HistoryRecorder, RingBuffer, SignalHistory
+from src.signal_store import SignalStore
+
+
+class TestRingBuffer(unittest.TestCase):
+    """Test the fixed-capacity buffer"""
+
+    def test_overwrites_oldest(self):
+        """Test memory stays fixed and the oldest samples are dropped"""
+        ring = RingBuffer(4)
+        for i in range(10):
+            ring.append(float(i), i * 10)
+        self.assertEqual(len(ring), 4)
+        self.assertEqual(len(ring.times), 4)
+        self.assertEqual(ring[0], (6.0, 60.0))
+        self.assertEqual(ring[-1], (9.0, 90.0))
+
+    def test_since(self):
+        """Test windowed reads across the wrap point"""
+        ring = RingBuffer(5)
+        for i in range(7):
+            ring.append(float(i), i)
+        self.assertEqual([t for t, _ in ring.since(4.0)], [4.0, 5.0, 6.0])
+        self.assertEqual(len(list(ring.since(0.0))), 5)
+        self.assertEqual(list(ring.since(10.0)), [])
+
+
+class TestSignalHistory(unittest.TestCase):
+    """Test downsampling and tier selection"""
+
+    def setUp(self):
+        # Tiny tiers: 100 raw samples, 1 s x 60, 10 s x 100
+        self.history = SignalHistory('speed', [(0.0, 100), (1.0, 60), (10.0, 100)])
+        # 5 minutes at 10 Hz, value = seconds elapsed
+        for i in range(3000):
+            self.history.add(i / 10.0, i / 10.0)
+
+    def test_downsampled_means(self):
+        """Test each coarse sample is the mean of its bucket"""
+        raw, seconds, tens = self.history.tiers
+        self.assertEqual(len(raw.buffer), 100)
+        timestamp, value = seconds.buffer[-1]
+        self.assertEqual(timestamp, 298.0)
+        self.assertAlmostEqual(value, 298.45, places=4)
+        self.assertAlmostEqual(tens.buffer[0][1], 4.95, places=4)
+
+    def test_window_picks_tier_that_covers_span(self):
+        """Test the raw tier serves short windows and coarser tiers longer ones"""
+        self.assertEqual(len(self.history.window(5.0)), 51)
+        minute = self.history.window(55.0)
+        self.assertTrue(all(t % 1.0 == 0 for t, _ in minute))
+        drive = self.history.window(290.0)
+        self.assertTrue(all(t % 10.0 == 0 for t, _ in drive))
+
+    def test_sparkline_one_point_per_column(self):
+        """Test the sparkline has at most one point per pixel"""
+        points = self.history.sparkline(20, 8.0)
+        self.assertLessEqual(len(points), 20)
+        xs = [x for x, _ in points]
+        self.assertEqual(xs, sorted(set(xs)))
+        # The last column averages the newest 0.4 s
+        self.assertEqual(xs[-1], 19)
+        self.assertAlmostEqual(points[-1][1], 299.7, delta=0.1)
+
+
+class TestHistoryRecorder(unittest.TestCase):
+    """Test recording from the signal store"""
+
+    def test_records_store_publishes(self):
+        """Test only the chosen signals are recorded, every frame"""
+        store = SignalStore()
+        recorder = HistoryRecorder(['speed']).attach(store)
+        store.update_batch([({'speed': 10.0, 'gids': 200}, 1.0), ({'speed': 11.0}, 1.02)])
+        store.update({'speed': 12.0}, 1.04)
+        self.assertIsNone(recorder.get('gids'))
+        self.assertEqual([v for _, v in recorder.get('speed').window(1.0)], [10.0, 11.0, 12.0])
+
+    def test_all_numeric_signals(self):
+        """Test recording everything skips non-numeric values"""
+        recorder = HistoryRecorder()
+        recorder.record([({'speed': 10.0, 'gear': 'D'}, 1.0)])
+        self.assertIsNotNone(recorder.get('speed'))
+        self.assertIsNone(recorder.get('gear'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+"""
+Test cases for CAN-to-pixel latency tracking
+"""
+
+import unittest
+import json
+import tempfile
+import threading
+import sys
+import os
+
+# Add the dash directory to path so src is importable as a package
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.fake_hardware import FakeMotorKit
+from src.gauge_driver import GaugeChannel, GaugeDriver
+from src.latency import LatencyTracker
+from src.signal_store import SignalStore
+
+
+class FakeClock:
+    def __init__(self, now: float = 100.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestLatencyTracker(unittest.TestCase):
+    """Test per-stage recording and reporting"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.latency = LatencyTracker(clock=self.clock)
+
+    def test_concurrent_readers_lose_no_counts(self):
+        """Test one stage recorded from several threads, as with a reader per bus"""
+        def reader():
+            for _ in range(2000):
+                self.latency.record_batch('decode', [99.99, 99.98])
+                self.latency.record('decode', 99.97)
+
+        threads = [threading.Thread(target=reader) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.latency.histograms['decode'].count, 4 * 2000 * 3)
+
+    def test_record_measures_from_bus_timestamp(self):
+        """Test latency is the clock minus the frame's bus timestamp"""
+        self.latency.record('decode', 99.999)
+        self.latency.record_batch('store', [99.998, 99.995])
+        self.assertAlmostEqual(self.latency.histograms['decode'].max, 0.001)
+        self.assertEqual(self.latency.histograms['store'].count, 2)
+        self.assertAlmostEqual(self.latency.histograms['store'].max, 0.005)
+
+    def test_clock_skew_clamped(self):
+        """Test a timestamp slightly in the future doesn't record negative latency"""
+        self.latency.record('render', 100.5)
+        self.assertEqual(self.latency.histograms['render'].max, 0.0)
+
+    def test_lines_only_for_stages_with_samples(self):
+        """Test the overlay lines skip empty stages"""
+        self.latency.record('render', 99.99)
+        lines = self.latency.lines()
+        self.assertEqual(len(lines), 1)
+        self.assertTrue(lines[0].startswith('render'))
+
+    def test_dump_json(self):
+        """Test the dump writes every stage's summary and buckets"""
+        self.latency.record('actuate', 99.99)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'latency.json')
+            self.latency.dump(path)
+            with open(path) as f:
+                data = json.load(f)
+        self.assertEqual(set(data), {'decode', 'store', 'render', 'actuate'})
+        self.assertEqual(data['actuate']['count'], 1)
+        self.assertEqual(sum(data['actuate']['buckets'].values()), 1)
+
+
+class TestActuateLatency(unittest.TestCase):
+    """Test the gauge driver records actuation latency"""
+
+    def test_one_sample_per_frame(self):
+        """Test a slewing needle records each CAN frame once, on its first write"""
+        clock = FakeClock(10.0)
+        latency = LatencyTracker(clock=clock)
+        store = SignalStore()
+        channel = GaugeChannel('pon', 'motor3', 'VehicleSpeedCluster', 0, 100,
+                               0.6, 0.9, slew_rate=0.5)
+        driver = GaugeDriver(FakeMotorKit(), [channel], source=store.snapshot, latency=latency)
+
+        store.update({'VehicleSpeedCluster': 0}, 9.99)
+        driver.step(0.02)
+        store.update({'VehicleSpeedCluster': 100}, 9.995)
+        for _ in range(5):
+            driver.step(0.02)
+
+        histogram = latency.histograms['actuate']
+        self.assertEqual(histogram.count, 2)
+        self.assertAlmostEqual(histogram.max, 0.01)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+"""
+Test cases for the derived metrics engine
+"""
+
+import unittest
+import sys
+import os
+
+# Add the dash directory to path so src is importable as a package
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.metrics import (Formula, Integral, MetricsEngine, RollingRatio, leaf_metrics,
+                         KM_PER_MILE)
+from src.signal_store import SignalStore
+
+
+class TestMetricsEngine(unittest.TestCase):
+    """Test dependency ordering and incremental recomputation"""
+
+    def test_order_and_cycles(self):
+        """Test metrics run after their inputs and cycles are rejected"""
+        engine = MetricsEngine([Formula('c', ['b'], lambda b: b + 1),
+                                Formula('b', ['a'], lambda a: a * 2)])
+        self.assertEqual([m.name for m in engine.metrics], ['b', 'c'])
+        self.assertEqual(engine.signals, {'a'})
+        self.assertEqual(engine.process({'a': 3}, 0.0), {'b': 6, 'c': 7})
+
+        with self.assertRaises(ValueError):
+            MetricsEngine([Formula('x', ['y'], abs), Formula('y', ['x'], abs)])
+
+    def test_only_changed_inputs_recompute(self):
+        """Test a repeated value or an unrelated signal costs nothing"""
+        engine = MetricsEngine([Formula('double', ['a'], lambda a: a * 2)])
+        engine.process({'a': 1}, 0.0)
+        self.assertEqual(engine.computations, 1)
+        self.assertEqual(engine.process({'a': 1}, 0.1), {})
+        self.assertEqual(engine.process({'other': 5}, 0.2), {})
+        self.assertEqual(engine.computations, 1)
+
+    def test_waits_for_all_inputs(self):
+        """Test a metric isn't computed until every input has arrived"""
+        engine = MetricsEngine([Formula('power', ['i', 'v'], lambda i, v: i * v)])
+        self.assertEqual(engine.process({'i': 10}, 0.0), {})
+        self.assertEqual(engine.process({'v': 300}, 0.1), {'power': 3000})
+
+    def test_integral_every_sample(self):
+        """Test a constant input still integrates"""
+        engine = MetricsEngine([Integral('distance', 'speed')])
+        for i in range(11):
+            engine.process({'speed': 2.0}, i * 0.1)
+        self.assertAlmostEqual(engine.values['distance'], 2.0)
+
+    def test_rolling_ratio_window(self):
+        """Test the ratio only covers the window and keeps the deque bounded"""
+        engine = MetricsEngine([RollingRatio('rate', 'energy', 'distance', window=10.0)])
+        # 1 energy per distance for 20 s, then 3 per distance
+        energy = distance = 0.0
+        for t in range(40):
+            distance += 1.0
+            energy += 1.0 if t < 20 else 3.0
+            engine.process({'energy': energy, 'distance': distance}, float(t))
+        self.assertAlmostEqual(engine.values['rate'], 3.0)
+        self.assertLessEqual(len(engine.metrics[0].samples), 12)
+
+
+class TestLeafMetrics(unittest.TestCase):
+    """Test the standard metrics through the signal store"""
+
+    def test_range_from_drive(self):
+        """Test kWh, efficiency and range from GIDs and speed"""
+        store = SignalStore()
+        MetricsEngine(leaf_metrics(gid_wh=80.0, window=300.0)).attach(store)
+
+        # 60 mph for 2 minutes, losing 4 GIDs (320 Wh) per mile
+        speed = 60 * KM_PER_MILE
+        for i in range(1201):
+            t = i * 0.1
+            values = {'VehicleSpeedCluster': speed}
+            if i % 5 == 0:
+                values['BatteryGIDS'] = 250 - int(4 * t / 60.0)
+            store.update(values, t)
+
+        snapshot = store.snapshot()
+        self.assertAlmostEqual(snapshot.get('trip_miles'), 2.0, places=3)
+        self.assertAlmostEqual(snapshot.get('kwh_remaining'), 242 * 0.08)
+        self.assertAlmostEqual(snapshot.get('wh_per_mile'), 320, delta=1)
+        self.assertAlmostEqual(snapshot.get('range_miles'), 242 * 80 / 320, delta=1)
+        self.assertIsNone(snapshot.get('power_kw'))
+
+        store.update({'LB_Current': 50.0, 'LB_Total_Voltage': 360.0}, 121.0)
+        self.assertAlmostEqual(store.snapshot().get('power_kw'), 18.0)
+
+        # Regen: -20 A arrives as the unsigned decode of its two's complement
+        store.update({'LB_Current': 1004.0, 'LB_Total_Voltage': 380.0}, 122.0)
+        self.assertAlmostEqual(store.snapshot().get('power_kw'), -7.6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+"""
+Test cases for reading EV-CAN and CAR-CAN into one signal namespace
+"""
+
+import unittest
+import asyncio
+import sys
+import os
+import time
+
+# Add the dash directory to path so src is importable as a package
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.can_bus import CAN_AVAILABLE, BusIngest
+from src.can_decoder import CANTOOLS_AVAILABLE, CAR_CAN_DBC, EV_CAN_DBC
+from src.signal_store import SignalStore
+
+if CAN_AVAILABLE and CANTOOLS_AVAILABLE:
+    import can
+    from src.can_reader import CanReader
+    from src.can_service import CanIngestService
+    from src.multi_bus import CanBusConfig, MultiBusDecoder
+
+
+def frame(decoder, bus: str, frame_id: int, values: dict):
+    """Encode a frame with the given signals set and the rest zero"""
+    db = decoder.tables[bus].db
+    message = db.get_message_by_frame_id(frame_id)
+    data = {signal.name: values.get(signal.name, 0) for signal in message.signals}
+    return can.Message(arbitration_id=frame_id, data=db.encode_message(frame_id, data, strict=False),
+                       is_extended_id=False)
+
+
+def wait_for(store, names, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        snapshot = store.snapshot()
+        if all(name in snapshot for name in names):
+            return True
+        time.sleep(0.005)
+    return False
+
+
+@unittest.skipUnless(CAN_AVAILABLE and CANTOOLS_AVAILABLE, "python-can/cantools not installed")
+class TestMultiBusDecoder(unittest.TestCase):
+    """Test name resolution across the two DBCs"""
+
+    def setUp(self):
+        self.buses = [CanBusConfig('car', CAR_CAN_DBC, 'test_mb_car', 'virtual'),
+                      CanBusConfig('ev', EV_CAN_DBC, 'test_mb_ev', 'virtual')]
+        self.decoder = MultiBusDecoder.from_buses(self.buses, prefer=['car', 'ev'])
+
+    def test_resolve(self):
+        """Test unique, shared and qualified names each find the right bus"""
+        self.assertEqual(self.decoder.resolve('LB_SOC'), ('ev', 'LB_SOC'))
+        self.assertEqual(self.decoder.resolve('BatteryGIDS'), ('car', 'BatteryGIDS'))
+        self.assertIn('MotorTemperature', self.decoder.shared)
+        self.assertEqual(self.decoder.resolve('MotorTemperature'), ('car', 'MotorTemperature'))
+        self.assertEqual(self.decoder.resolve('ev.MotorTemperature'), ('ev', 'MotorTemperature'))
+        with self.assertRaises(KeyError):
+            self.decoder.resolve('ev.BatteryGIDS')
+        with self.assertRaises(KeyError):
+            self.decoder.resolve('NoSuchSignal')
+
+    def test_prefer_order(self):
+        """Test can.prefer decides which bus a shared bare name comes from"""
+        decoder = MultiBusDecoder.from_buses(self.buses, prefer=['ev'])
+        self.assertEqual(decoder.resolve('MotorTemperature'), ('ev', 'MotorTemperature'))
+
+    def test_overlapping_id_decodes_per_bus(self):
+        """Test 0x55A from each bus is published under its own name"""
+        decoder = self.decoder
+        ids = decoder.subscribe(['MotorTemperature', 'ev.MotorTemperature'])
+        self.assertEqual(ids, {'car': {0x55A}, 'ev': {0x55A}})
+        car = frame(decoder, 'car', 0x55A, {'MotorTemperature': 60})
+        ev = frame(decoder, 'ev', 0x55A, {'MotorTemperature': 70})
+        self.assertEqual(decoder.decode('car', 0x55A, car.data), {'MotorTemperature': 60})
+        self.assertEqual(decoder.decode('ev', 0x55A, ev.data), {'ev.MotorTemperature': 70})
+        self.assertEqual(decoder.subscribed, {'MotorTemperature', 'ev.MotorTemperature'})
+
+    def test_same_signal_under_two_names(self):
+        """Test a signal subscribed bare and qualified is published under both"""
+        self.decoder.subscribe(['BatteryGIDS', 'car.BatteryGIDS'])
+        data = frame(self.decoder, 'car', 0x5B3, {'BatteryGIDS': 200}).data
+        self.assertEqual(self.decoder.decode('car', 0x5B3, data),
+                         {'BatteryGIDS': 200, 'car.BatteryGIDS': 200})
+
+
+@unittest.skipUnless(CAN_AVAILABLE and CANTOOLS_AVAILABLE, "python-can/cantools not installed")
+class TestMultiBusIngest(unittest.TestCase):
+    """Test both buses feeding one store over the virtual bus"""
+
+    def setUp(self):
+        self.buses = [CanBusConfig('car', CAR_CAN_DBC, 'test_mbi_car', 'virtual'),
+                      CanBusConfig('ev', EV_CAN_DBC, 'test_mbi_ev', 'virtual')]
+        self.decoder = MultiBusDecoder.from_buses(self.buses, prefer=['car', 'ev'],
+                                                  signals=['BatteryGIDS', 'LB_SOC'])
+        self.senders = {bus.name: can.interface.Bus(channel=bus.channel, interface='virtual')
+                        for bus in self.buses}
+        self.ingests = {}
+        for bus in self.buses:
+            ingest = BusIngest(self.decoder.ids(bus.name), channel=bus.channel, interface='virtual')
+            ingest.open()
+            self.ingests[bus.name] = ingest
+
+    def tearDown(self):
+        for sender in self.senders.values():
+            sender.shutdown()
+        for ingest in self.ingests.values():
+            ingest.close()
+
+    def test_reader_merges_buses(self):
+        """Test one reader thread publishes both buses into one store, and resubscribe reaches each"""
+        store = SignalStore()
+        reader = CanReader(self.ingests, self.decoder, store)
+        reader.start()
+        try:
+            self.senders['car'].send(frame(self.decoder, 'car', 0x5B3, {'BatteryGIDS': 210}))
+            self.senders['ev'].send(frame(self.decoder, 'ev', 0x55B, {'LB_SOC': 80}))
+            self.assertTrue(wait_for(store, ['BatteryGIDS', 'LB_SOC']))
+            self.assertEqual(store.snapshot().get('BatteryGIDS'), 210)
+            self.assertAlmostEqual(store.snapshot().get('LB_SOC'), 80)
+
+            reader.resubscribe(['BatteryGIDS', 'LB_SOC', 'ev.MotorTemperature'])
+            self.assertEqual(self.ingests['ev'].ids, {0x55B, 0x55A})
+            self.senders['ev'].send(frame(self.decoder, 'ev', 0x55A, {'MotorTemperature': 70}))
+            self.assertTrue(wait_for(store, ['ev.MotorTemperature']))
+            self.assertNotIn('MotorTemperature', store.snapshot())
+        finally:
+            reader.stop()
+        self.assertFalse(reader.is_alive())
+
+    def test_service_routes_by_channel(self):
+        """Test one asyncio service reading both buses decodes each with its own DBC"""
+        store = SignalStore()
+
+        async def scenario():
+            service = CanIngestService([ingest.bus for ingest in self.ingests.values()],
+                                       self.decoder, store)
+            task = asyncio.ensure_future(service.run())
+            await asyncio.sleep(0.05)
+            self.senders['car'].send(frame(self.decoder, 'car', 0x5B3, {'BatteryGIDS': 199}))
+            self.senders['ev'].send(frame(self.decoder, 'ev', 0x55B, {'LB_SOC': 55.0}))
+            deadline = time.monotonic() + 2.0
+            while len(store.snapshot()) < 2 and time.monotonic() < deadline:
+                await asyncio.sleep(0.01)
+            service.stop()
+            await asyncio.wait_for(task, 2.0)
+
+        asyncio.run(scenario())
+        self.assertEqual(store.snapshot().get('BatteryGIDS'), 199)
+        self.assertAlmostEqual(store.snapshot().get('LB_SOC'), 55.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
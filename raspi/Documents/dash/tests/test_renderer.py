@@ -0,0 +1,105 @@
+"""
+Test cases for the retained-mode renderer
+"""
+
+import unittest
+import sys
+import os
+
+# Add the dash directory to path so src is importable as a package
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# Render off-screen
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+try:
+    import pygame
+    PYGAME_AVAILABLE = True
+except ImportError:
+    PYGAME_AVAILABLE = False
+
+from src.signal_store import SignalStore
+
+if PYGAME_AVAILABLE:
+    from src.renderer import Renderer, Label, TextPanel, ValueDisplay
+
+
+@unittest.skipUnless(PYGAME_AVAILABLE, "pygame not installed")
+class TestRenderer(unittest.TestCase):
+    """Test dirty-rectangle rendering"""
+
+    def setUp(self):
+        pygame.init()
+        self.screen = pygame.display.set_mode((800, 480))
+        self.renderer = Renderer(self.screen)
+        font = self.renderer.fonts.get(36)
+        self.renderer.add(Label("Speed:", (10, 10), font))
+        self.speed = self.renderer.add(ValueDisplay('speed', (200, 10), self.renderer.atlas(36),
+                                                    fmt="{:.1f}"))
+        self.gids = self.renderer.add(ValueDisplay('gids', (200, 60), self.renderer.atlas(36)))
+        self.store = SignalStore()
+
+    def tearDown(self):
+        pygame.quit()
+
+    def test_first_frame_is_full(self):
+        """Test the first frame pushes the whole screen"""
+        rects = self.renderer.render(self.store.snapshot())
+        self.assertEqual(rects, [self.screen.get_rect()])
+
+    def test_only_changed_widgets_redrawn(self):
+        """Test a change to one signal pushes just that widget"""
+        self.store.update({'speed': 10.0, 'gids': 250}, 1.0)
+        self.renderer.render(self.store.snapshot())
+
+        self.store.update({'speed': 12.5}, 2.0)
+        self.assertEqual(self.renderer.render(self.store.snapshot()), [self.speed.rect])
+        self.assertEqual(self.speed.text, "12.5")
+
+    def test_unchanged_frame_pushes_nothing(self):
+        """Test frames with no new data or identical text push nothing"""
+        self.store.update({'speed': 10.0}, 1.0)
+        self.renderer.render(self.store.snapshot())
+        self.assertEqual(self.renderer.render(self.store.snapshot()), [])
+
+        # New publish but the formatted text is the same
+        self.store.update({'speed': 10.01}, 2.0)
+        self.assertEqual(self.renderer.render(self.store.snapshot()), [])
+
+    def test_redrawn_lists_widgets_with_new_data(self):
+        """Test redrawn holds only the widgets whose value changed"""
+        self.store.update({'speed': 10.0}, 1.0)
+        self.renderer.render(self.store.snapshot())
+        self.assertEqual(self.renderer.redrawn, [self.speed, self.gids])
+
+        self.store.update({'speed': 12.5}, 2.0)
+        self.renderer.render(self.store.snapshot())
+        self.assertEqual(self.renderer.redrawn, [self.speed])
+
+        self.renderer.render(self.store.snapshot())
+        self.assertEqual(self.renderer.redrawn, [])
+
+    def test_text_panel_refreshes_without_publishes(self):
+        """Test a panel fed by a callback keeps updating while the signals are static"""
+        lines = ["frame 1"]
+        panel = self.renderer.add(TextPanel(pygame.Rect(10, 400, 300, 30),
+                                            self.renderer.fonts.get(22), lambda: lines,
+                                            interval=0.0))
+        self.store.update({'speed': 10.0}, 1.0)
+        self.renderer.render(self.store.snapshot())
+        self.assertEqual(self.renderer.render(self.store.snapshot()), [])
+
+        lines = ["frame 2"]
+        self.assertEqual(self.renderer.render(self.store.snapshot()), [panel.rect])
+        panel.visible = False
+        lines = ["frame 3"]
+        self.assertEqual(self.renderer.render(self.store.snapshot()), [])
+
+    def test_font_and_atlas_cached(self):
+        """Test fonts and atlases are created once"""
+        self.assertIs(self.renderer.fonts.get(36), self.renderer.fonts.get(36))
+        self.assertIs(self.renderer.atlas(36), self.renderer.atlas(36))
+
+
+if __name__ == '__main__':
+    unittest.main()
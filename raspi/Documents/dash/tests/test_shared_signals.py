@@ -0,0 +1,235 @@
+"""
+Test cases for the shared-memory signal table and the process supervisor
+"""
+
+import multiprocessing
+import os
+import sys
+import time
+import unittest
+
+# Add the dash directory to path so src is importable as a package
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.config import GameConfig
+from src.shared_signals import HEADER, SLOT, _SEQ, SharedSignalTable, SharedStoreMirror
+from src.signal_store import SignalStore
+from src.supervisor import Supervisor, shared_signal_names
+
+NAMES = ['VehicleSpeedCluster', 'BatteryGIDS', 'range_miles']
+
+
+def write_pairs(table_name, names, count):
+    """Writer process: value and timestamp always equal, so a torn read shows up"""
+    table = SharedSignalTable.attach(table_name, names)
+    for i in range(1, count + 1):
+        table.publish([({'VehicleSpeedCluster': float(i), 'BatteryGIDS': float(i)}, float(i))])
+    table.close()
+
+
+def die_mid_write(table_name, names):
+    """Writer process killed between a slot's two sequence stores"""
+    table = SharedSignalTable.attach(table_name, names, writer=True)
+    table.publish([({'BatteryGIDS': 92.0}, 1.0)])
+    offset = HEADER.size + table.index['BatteryGIDS'] * SLOT.size
+    _SEQ.pack_into(table.shm.buf, offset, table._written[table.index['BatteryGIDS']] + 1)
+    os._exit(1)
+
+
+def restarted_writer(table_name, names):
+    """Writer process started after one died"""
+    table = SharedSignalTable.attach(table_name, names, writer=True)
+    table.publish([({'BatteryGIDS': 91.0}, 2.0)])
+    table.close()
+
+
+def crash(config_file, table_name, names, stop_event, core):
+    """Role that dies straight away"""
+    os._exit(3)
+
+
+def wait_for_stop(config_file, table_name, names, stop_event, core):
+    """Role that runs until told to stop"""
+    stop_event.wait()
+
+
+class CountingMirror(SharedStoreMirror):
+    polls = 0
+
+    def poll(self) -> bool:
+        self.polls += 1
+        return super().poll()
+
+
+class TestSharedSignalTable(unittest.TestCase):
+    """Test the seqlock table within and across processes"""
+
+    def setUp(self):
+        self.table = SharedSignalTable.create(NAMES)
+
+    def tearDown(self):
+        self.table.close()
+
+    def test_publish_and_read(self):
+        """Test values written by one handle are read through another"""
+        reader = SharedSignalTable.attach(self.table.name, NAMES)
+        try:
+            self.assertIsNone(reader.read('BatteryGIDS'))
+            self.table.publish([({'BatteryGIDS': 250, 'Unknown': 1}, 10.0)])
+            self.assertEqual(reader.read('BatteryGIDS'), (250.0, 10.0))
+            self.assertEqual(reader.version, 1)
+            self.assertEqual(self.table.unknown, 1)
+        finally:
+            reader.close()
+
+    def test_changes_grouped_by_timestamp(self):
+        """Test changes() returns only new values, as store-ready batches"""
+        reader = SharedSignalTable.attach(self.table.name, NAMES)
+        try:
+            self.table.publish([({'VehicleSpeedCluster': 50}, 1.0),
+                                ({'BatteryGIDS': 200, 'range_miles': 70}, 2.0)])
+            self.assertEqual(reader.changes(),
+                             [({'VehicleSpeedCluster': 50.0}, 1.0),
+                              ({'BatteryGIDS': 200.0, 'range_miles': 70.0}, 2.0)])
+            self.assertEqual(reader.changes(), [])
+        finally:
+            reader.close()
+
+    def test_attach_checks_layout(self):
+        """Test attaching with a different signal list is refused"""
+        with self.assertRaises(ValueError):
+            SharedSignalTable.attach(self.table.name, NAMES[:2])
+
+    def test_mirror_into_store(self):
+        """Test the mirror publishes table changes into a local store"""
+        store = SignalStore()
+        mirror = SharedStoreMirror(self.table, store)
+        self.assertFalse(mirror.poll())
+        self.table.publish([({'VehicleSpeedCluster': 88}, 5.0)])
+        self.assertTrue(mirror.poll())
+        entry = store.snapshot().get_signal('VehicleSpeedCluster')
+        self.assertEqual((entry.value, entry.timestamp), (88.0, 5.0))
+        self.assertFalse(mirror.poll())
+
+    def test_mirror_polls_at_its_interval(self):
+        """Test a busy table doesn't make the mirror poll faster, and batches arrive together"""
+        store = SignalStore()
+        mirror = CountingMirror(self.table, store, poll_interval=0.05)
+        mirror.start()
+        try:
+            start = time.monotonic()
+            while time.monotonic() - start < 0.3:
+                self.table.publish([({'VehicleSpeedCluster': time.monotonic()}, 1.0)])
+                time.sleep(0.001)
+        finally:
+            mirror.stop()
+        self.assertLessEqual(mirror.polls, 9)
+        self.assertGreater(mirror.polls, 2)
+
+    def test_restarted_writer_continues_sequences(self):
+        """Test a new writer's first value isn't mistaken for one the reader already saw"""
+        reader = SharedSignalTable.attach(self.table.name, NAMES)
+        try:
+            for value in (92.0, 91.0):
+                writer = SharedSignalTable.attach(self.table.name, NAMES, writer=True)
+                writer.publish([({'BatteryGIDS': value}, value)])
+                writer.close()
+                self.assertEqual(reader.changes(), [({'BatteryGIDS': value}, value)])
+        finally:
+            reader.close()
+
+    def test_writer_killed_mid_publish_and_restarted(self):
+        """Test a slot stranded odd doesn't stop the mirror, and a restarted writer gets through"""
+        store = SignalStore()
+        mirror = SharedStoreMirror(self.table, store, poll_interval=0.001)
+        mirror.start()
+        try:
+            for target in (die_mid_write, restarted_writer):
+                process = multiprocessing.Process(target=target, args=(self.table.name, NAMES))
+                process.start()
+                process.join(5.0)
+                if target is die_mid_write:
+                    self.assertIsNone(self.table.read('BatteryGIDS'))
+                    self.table.publish([({'VehicleSpeedCluster': 30.0}, 1.5)])
+            deadline = time.monotonic() + 2.0
+            while store.snapshot().get('BatteryGIDS') != 91.0 and time.monotonic() < deadline:
+                time.sleep(0.005)
+            self.assertTrue(mirror.is_alive())
+            self.assertEqual(store.snapshot().get('BatteryGIDS'), 91.0)
+            self.assertEqual(store.snapshot().get('VehicleSpeedCluster'), 30.0)
+        finally:
+            mirror.stop()
+
+    def test_no_torn_reads_across_processes(self):
+        """Test a reader never sees a value from one write with the timestamp of another"""
+        count = 20000
+        writer = multiprocessing.Process(target=write_pairs, args=(self.table.name, NAMES, count))
+        writer.start()
+        reads = 0
+        last = 0.0
+        while writer.is_alive() or reads == 0:
+            entry = self.table.read('VehicleSpeedCluster')
+            if entry is not None:
+                value, timestamp = entry
+                self.assertEqual(value, timestamp)
+                self.assertGreaterEqual(value, last)
+                last = value
+                reads += 1
+        writer.join()
+        self.assertEqual(self.table.read('BatteryGIDS'), (float(count), float(count)))
+
+
+class TestSupervisor(unittest.TestCase):
+    """Test starting, restarting and stopping role processes"""
+
+    def make(self, targets, **kwargs):
+        config = GameConfig("/nonexistent/config.json")
+        config.config['can']['signals'] = ['BatteryGIDS']
+        return Supervisor(config, roles=list(targets), role_targets=targets, **kwargs)
+
+    def test_signal_names(self):
+        """Test the table covers CAN signals, metrics and gauge signals once each"""
+        config = GameConfig("/nonexistent/config.json")
+        config.config['can']['signals'] = ['BatteryGIDS', 'VehicleSpeedCluster']
+        config.config['gauges']['channels'] = {'pon': {'signal': 'VehicleSpeedCluster'}}
+        names = shared_signal_names(config)
+        self.assertEqual(names[:2], ['BatteryGIDS', 'VehicleSpeedCluster'])
+        self.assertIn('range_miles', names)
+        self.assertEqual(len(names), len(set(names)))
+
+    def test_restart_with_backoff(self):
+        """Test a crashing process is restarted after a back-off that doubles"""
+        supervisor = self.make({'ingest': crash, 'gauges': wait_for_stop},
+                               min_backoff=0.5, max_backoff=2.0)
+        try:
+            supervisor.start()
+            crashing, steady = supervisor.processes
+            crashing.process.join(2.0)
+            now = time.monotonic()
+            self.assertEqual(supervisor.check(now), [])
+            self.assertEqual(crashing.backoff, 0.5)
+            self.assertEqual(supervisor.check(now + 0.6), ['ingest'])
+            crashing.process.join(2.0)
+            supervisor.check(now + 0.7)
+            self.assertEqual(crashing.backoff, 1.0)
+            self.assertEqual(crashing.restarts, 1)
+            self.assertTrue(steady.process.is_alive())
+        finally:
+            supervisor.stop()
+        self.assertFalse(steady.process.is_alive())
+        self.assertIsNone(supervisor.table)
+
+    def test_dash_quit_stops_everything(self):
+        """Test a clean exit of the dash (window closed) ends supervision"""
+        supervisor = self.make({'dash': lambda *args: None})
+        try:
+            supervisor.start()
+            supervisor.processes[0].process.join(2.0)
+            self.assertEqual(supervisor.check(), [])
+            self.assertTrue(supervisor.stopping)
+        finally:
+            supervisor.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
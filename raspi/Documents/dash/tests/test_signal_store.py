@@ -0,0 +1,113 @@
+"""
+Test cases for the signal store and background CAN reader
+"""
+
+import unittest
+import threading
+import time
+import sys
+import os
+
+# Add the dash directory to path so src is importable as a package
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.signal_store import SignalStore
+from src.can_bus import CAN_AVAILABLE, open_virtual_pair
+from src.can_decoder import CANTOOLS_AVAILABLE, CAR_CAN_DBC, DecoderTable
+from src.can_reader import CanReader
+
+if CAN_AVAILABLE:
+    import can
+
+
+class TestSignalStore(unittest.TestCase):
+    """Test the latest-value store"""
+
+    def test_update_and_snapshot(self):
+        """Test values and timestamps are published"""
+        store = SignalStore()
+        store.update({'BatteryGIDS': 250}, 10.0)
+        store.update({'VehicleSpeedCluster': 55.5}, 11.0)
+
+        snapshot = store.snapshot()
+        self.assertEqual(snapshot.version, 2)
+        self.assertEqual(snapshot.get('BatteryGIDS'), 250)
+        self.assertEqual(snapshot.get_signal('VehicleSpeedCluster').timestamp, 11.0)
+        self.assertEqual(snapshot.get('Missing', 0), 0)
+
+    def test_snapshot_is_immutable(self):
+        """Test an old snapshot is unaffected by later writes"""
+        store = SignalStore()
+        store.update({'BatteryGIDS': 250}, 1.0)
+        old = store.snapshot()
+        store.update({'BatteryGIDS': 249}, 2.0)
+
+        self.assertEqual(old.get('BatteryGIDS'), 250)
+        self.assertEqual(store.snapshot().get('BatteryGIDS'), 249)
+
+    def test_batch_is_one_publish(self):
+        """Test a batch of frames shows up as a single consistent snapshot"""
+        store = SignalStore()
+        stop = threading.Event()
+        torn = []
+
+        def writer():
+            i = 0
+            while not stop.is_set():
+                i += 1
+                store.update_batch([({'a': i}, float(i)), ({'b': i}, float(i))])
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        deadline = time.monotonic() + 0.2
+        while time.monotonic() < deadline:
+            snapshot = store.snapshot()
+            if snapshot.get('a') != snapshot.get('b'):
+                torn.append(snapshot.version)
+        stop.set()
+        thread.join()
+
+        self.assertEqual(torn, [])
+
+    def test_listeners_see_every_batch(self):
+        """Test listeners get each batch, and a failing listener doesn't stop publishing"""
+        store = SignalStore()
+        seen = []
+        store.add_listener(lambda updates: 1 / 0)
+        store.add_listener(seen.append)
+        store.update_batch(iter([({'a': 1}, 1.0), ({'a': 2}, 2.0)]))
+        store.update({'b': 3}, 3.0)
+        self.assertEqual(seen, [[({'a': 1}, 1.0), ({'a': 2}, 2.0)], [({'b': 3}, 3.0)]])
+        self.assertEqual(store.snapshot().get('a'), 2)
+
+
+@unittest.skipUnless(CAN_AVAILABLE and CANTOOLS_AVAILABLE, "python-can/cantools not installed")
+class TestCanReader(unittest.TestCase):
+    """Test the background reader against the virtual bus"""
+
+    def test_reader_publishes_decoded_signals(self):
+        """Test frames on the bus end up in the store"""
+        decoders = DecoderTable.from_file(CAR_CAN_DBC, ['VehicleSpeedCluster'])
+        sender, ingest = open_virtual_pair('test_can_reader', decoders.ids)
+        store = SignalStore()
+        reader = CanReader({'can': ingest}, decoders, store)
+        reader.start()
+        try:
+            data = decoders.db.encode_message(0x280, {
+                'Unknown_280_0': 0, 'Unknown_280_1': 0, 'Unknown_280_2': 0,
+                'Unknown_280_3': 0, 'VehicleSpeedCluster': 88.5,
+                'Unknown_280_6': 0, 'Unknown_280_7': 0})
+            sender.send(can.Message(arbitration_id=0x280, data=data, is_extended_id=False))
+
+            deadline = time.monotonic() + 2.0
+            while 'VehicleSpeedCluster' not in store.snapshot() and time.monotonic() < deadline:
+                time.sleep(0.005)
+            self.assertAlmostEqual(store.snapshot().get('VehicleSpeedCluster'), 88.5)
+        finally:
+            reader.stop()
+            sender.shutdown()
+        self.assertFalse(reader.is_alive())
+
+
+if __name__ == '__main__':
+    unittest.main()
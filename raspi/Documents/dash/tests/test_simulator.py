@@ -0,0 +1,115 @@
+"""
+Test cases for the drive simulator
+"""
+
+import unittest
+import sys
+import os
+
+# Add the dash directory to path so src is importable as a package
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.simulator import (CAN_AVAILABLE, CANTOOLS_AVAILABLE, CAR_BUS, EV_BUS, DriveModel,
+                           DriveSimulator, bus_capacity)
+from src.can_bus import open_virtual_pair, wait_for_frames
+from src.can_decoder import CAR_CAN_DBC, EV_CAN_DBC, DecoderTable
+
+
+class TestDriveModel(unittest.TestCase):
+    """Test the vehicle model"""
+
+    def test_drive_moves_and_drains(self):
+        """Test a few minutes of driving covers distance and uses energy"""
+        model = DriveModel(seed=1, soc=0.8)
+        start_energy = model.energy
+        top_speed = 0.0
+        for _ in range(3000):
+            model.advance(0.1)
+            top_speed = max(top_speed, model.speed_kph)
+        self.assertGreater(model.distance, 1000)
+        self.assertGreater(top_speed, 40)
+        self.assertLess(model.energy, start_energy)
+        self.assertLess(model.soc, 0.8)
+
+    def test_same_seed_same_drive(self):
+        """Test the speed profile is reproducible"""
+        a, b = DriveModel(seed=7), DriveModel(seed=7)
+        for _ in range(500):
+            a.advance(0.1)
+            b.advance(0.1)
+        self.assertEqual(a.speed, b.speed)
+
+
+@unittest.skipUnless(CANTOOLS_AVAILABLE, "cantools not installed")
+class TestDriveSimulator(unittest.TestCase):
+    """Test frame generation"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.car = DecoderTable.from_file(CAR_CAN_DBC, ['VehicleSpeedCluster', 'BatteryGIDS'])
+        cls.ev = DecoderTable.from_file(EV_CAN_DBC, ['LB_SOC', 'LB_Remain_Capacity'])
+
+    def test_periods(self):
+        """Test each message is sent at its period, on its own bus, and frames come out in order"""
+        frames = list(DriveSimulator().bus_frames(2.0))
+        timestamps = [t for t, _, _, _ in frames]
+        self.assertEqual(timestamps, sorted(timestamps))
+        counts = {}
+        for _, bus, frame_id, _ in frames:
+            counts[bus, frame_id] = counts.get((bus, frame_id), 0) + 1
+        self.assertEqual(counts[CAR_BUS, 0x280], 100)
+        self.assertEqual(counts[EV_BUS, 0x1DB], 200)
+        self.assertEqual(counts[CAR_BUS, 0x5B3], 4)
+        self.assertNotIn((EV_BUS, 0x5B3), counts)
+        self.assertEqual(len(list(DriveSimulator().frames(2.0, bus=EV_BUS))), 200 + 20 + 20)
+
+    def test_frames_decode(self):
+        """Test the encoded frames decode back to the model's values"""
+        simulator = DriveSimulator(model=DriveModel(seed=3, soc=0.5))
+        decoded = {}
+        tables = {CAR_BUS: self.car, EV_BUS: self.ev}
+        for _, bus, frame_id, data in simulator.bus_frames(60.0):
+            values = tables[bus].decode(frame_id, data)
+            if values:
+                decoded.update(values)
+        model = simulator.model
+        self.assertEqual(decoded['BatteryGIDS'], model.gids)
+        self.assertEqual(decoded['LB_Remain_Capacity'], model.gids)
+        self.assertAlmostEqual(decoded['LB_SOC'], model.soc * 1000, delta=1)
+        self.assertAlmostEqual(decoded['VehicleSpeedCluster'], model.speed_kph, delta=1)
+
+    def test_stress_fills_bus(self):
+        """Test stress mode pads each bus to the requested load with other IDs from its DBC"""
+        simulator = DriveSimulator(stress_load=1.0)
+        for bus in (CAR_BUS, EV_BUS):
+            frames = list(simulator.frames(1.0, bus=bus))
+            self.assertAlmostEqual(len(frames), bus_capacity(), delta=5)
+            filler = [frame_id for _, frame_id, _ in frames
+                      if frame_id in simulator.filler_ids[bus]]
+            self.assertGreater(len(filler), len(frames) * 0.9)
+
+    @unittest.skipUnless(CAN_AVAILABLE, "python-can not installed")
+    def test_run_on_virtual_bus(self):
+        """Test each bus's traffic goes out on its own virtual bus, which the reader can filter"""
+        car_sender, car = open_virtual_pair('test_simulator_car', ids=self.car.ids)
+        ev_sender, ev = open_virtual_pair('test_simulator_ev', ids=self.ev.ids)
+        try:
+            stats = DriveSimulator(stress_load=0.5).run({CAR_BUS: car_sender, EV_BUS: ev_sender},
+                                                        0.2, realtime=False)
+            car_frames = wait_for_frames(car, stats.count(self.car.ids, CAR_BUS))
+            ev_frames = wait_for_frames(ev, stats.count(self.ev.ids, EV_BUS))
+        finally:
+            car.close()
+            ev.close()
+            car_sender.shutdown()
+            ev_sender.shutdown()
+        self.assertEqual(stats.send_errors, 0)
+        self.assertGreater(stats.total, len(car_frames) + len(ev_frames))
+        self.assertGreater(len(car_frames), 0)
+        self.assertGreater(len(ev_frames), 0)
+        self.assertTrue(all(frame.arbitration_id in self.car.ids for frame in car_frames))
+        self.assertTrue(all(frame.arbitration_id in self.ev.ids for frame in ev_frames))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,238 @@
+"""
+Test cases for per-signal staleness detection
+"""
+
+import unittest
+import sys
+import os
+
+# Add the dash directory to path so src is importable as a package
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# Render off-screen
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+try:
+    import pygame
+    PYGAME_AVAILABLE = True
+except ImportError:
+    PYGAME_AVAILABLE = False
+
+from src.fake_hardware import FakeMotorKit
+from src.gauge_driver import GaugeChannel, GaugeDriver
+from src.signal_store import SignalStore
+from src.staleness import Deadline, StalenessMonitor, TimerWheel, signal_periods
+
+if PYGAME_AVAILABLE:
+    from src.game import DashGame
+    from src.renderer import Renderer, ValueDisplay
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTimerWheel(unittest.TestCase):
+    """Test the hashed timer wheel"""
+
+    def test_expires_only_when_due(self):
+        """Test an item expires on the tick after its deadline, not before"""
+        wheel = TimerWheel(tick=0.1, slots=8, start=0.0)
+        item = Deadline('speed', 0.1, 0.2)
+        item.deadline = 0.25
+        wheel.schedule(item)
+        self.assertEqual(wheel.advance(0.2), [])
+        self.assertEqual(wheel.advance(0.31), [item])
+        self.assertFalse(item.scheduled)
+
+    def test_moved_deadline_is_refiled(self):
+        """Test an item whose deadline moved on goes round again instead of expiring"""
+        wheel = TimerWheel(tick=0.1, slots=8, start=0.0)
+        item = Deadline('speed', 0.1, 0.2)
+        item.deadline = 0.25
+        wheel.schedule(item)
+        item.deadline = 2.0
+        self.assertEqual(wheel.advance(1.0), [])
+        self.assertTrue(item.scheduled)
+        self.assertEqual(wheel.advance(2.05), [item])
+
+
+class TestSignalStoreStale(unittest.TestCase):
+    """Test the stale set carried by snapshots"""
+
+    def test_mark_and_clear(self):
+        """Test marking publishes a new snapshot and the next arrival clears the mark"""
+        store = SignalStore()
+        store.update({'speed': 50.0, 'gids': 200}, 1.0)
+        version = store.version
+        store.mark_stale(['speed', 'never_seen'])
+        snapshot = store.snapshot()
+        self.assertEqual(snapshot.version, version + 1)
+        self.assertTrue(snapshot.is_stale('speed'))
+        self.assertFalse(snapshot.is_stale('never_seen'))
+        self.assertEqual(snapshot.get('speed'), 50.0)
+
+        store.update({'gids': 199}, 2.0)
+        self.assertTrue(store.snapshot().is_stale('speed'))
+        store.update({'speed': 51.0}, 3.0)
+        self.assertFalse(store.snapshot().is_stale('speed'))
+
+    def test_marking_twice_does_not_publish(self):
+        """Test re-marking a stale signal doesn't wake readers"""
+        store = SignalStore()
+        store.update({'speed': 50.0}, 1.0)
+        store.mark_stale(['speed'])
+        version = store.version
+        store.mark_stale(['speed'])
+        self.assertEqual(store.version, version)
+
+
+class TestStalenessMonitor(unittest.TestCase):
+    """Test timeout detection against a fake clock"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.store = SignalStore()
+        self.monitor = StalenessMonitor(self.store, {'speed': 0.02, 'soh': 0.5},
+                                        ['speed', 'soh', 'learned'], timeout_periods=2.0,
+                                        min_timeout=0.1, tick=0.05, clock=self.clock).attach()
+
+    def publish(self, values):
+        self.store.update(values, self.clock.now)
+
+    def test_times_out_per_signal_period(self):
+        """Test each signal times out after its own period, not a global one"""
+        self.publish({'speed': 50.0, 'soh': 90.0})
+        self.clock.now += 0.2
+        self.assertEqual(self.monitor.check(), ['speed'])
+        self.assertTrue(self.store.snapshot().is_stale('speed'))
+        self.assertFalse(self.store.snapshot().is_stale('soh'))
+        self.clock.now += 1.0
+        self.assertEqual(self.monitor.check(), ['soh'])
+
+    def test_steady_arrivals_never_stale(self):
+        """Test a signal arriving on time is never marked"""
+        for _ in range(100):
+            self.publish({'speed': 50.0})
+            self.clock.now += 0.02
+            self.assertEqual(self.monitor.check(), [])
+
+    def test_recovers_and_can_go_stale_again(self):
+        """Test a signal that comes back is tracked again"""
+        self.publish({'speed': 50.0})
+        self.clock.now += 0.2
+        self.monitor.check()
+        self.publish({'speed': 51.0})
+        self.assertFalse(self.store.snapshot().is_stale('speed'))
+        self.assertEqual(self.monitor.stale(), [])
+        self.clock.now += 0.2
+        self.assertEqual(self.monitor.check(), ['speed'])
+
+    def test_learns_unknown_period(self):
+        """Test a signal with no known period gets one from its arrivals"""
+        for _ in range(20):
+            self.publish({'learned': 1})
+            self.clock.now += 0.25
+        self.assertAlmostEqual(self.monitor.deadlines['learned'].period, 0.25)
+        self.assertAlmostEqual(self.monitor.deadlines['learned'].timeout, 0.5)
+
+    def test_untracked_signals_ignored(self):
+        """Test signals outside the tracked set are never marked"""
+        self.publish({'other': 1})
+        self.clock.now += 10.0
+        self.assertEqual(self.monitor.check(), [])
+
+
+class TestSignalPeriods(unittest.TestCase):
+    """Test periods from DBC cycle times and config overrides"""
+
+    def test_override_and_cycle_time(self):
+        class Signal:
+            def __init__(self, name):
+                self.name = name
+
+        class Message:
+            def __init__(self, frame_id, cycle_time, names):
+                self.frame_id = frame_id
+                self.cycle_time = cycle_time
+                self.signals = [Signal(name) for name in names]
+
+        class Database:
+            messages = [Message(0x280, 20, ['speed']), Message(0x5B3, None, ['soh', 'gids']),
+                        Message(0x123, None, ['unknown'])]
+
+        periods = signal_periods(Database(), {0x5B3: 0.5})
+        self.assertEqual(periods, {'speed': 0.02, 'soh': 0.5, 'gids': 0.5})
+
+
+class TestGaugeParking(unittest.TestCase):
+    """Test needles park when their signal goes stale"""
+
+    def test_stale_needle_parks_then_returns(self):
+        store = SignalStore()
+        kit = FakeMotorKit()
+        channel = GaugeChannel('speed', 'motor1', signal='speed', value_max=100.0,
+                               slew_rate=100.0, park_position=0.0)
+        driver = GaugeDriver(kit, [channel], source=store.snapshot)
+        store.update({'speed': 50.0}, 1.0)
+        driver.step(0.02)
+        self.assertAlmostEqual(kit.motor1.throttle, 0.5)
+
+        store.mark_stale(['speed'])
+        driver.step(0.02)
+        self.assertAlmostEqual(kit.motor1.throttle, 0.0)
+
+        store.update({'speed': 50.0}, 2.0)
+        driver.step(0.02)
+        self.assertAlmostEqual(kit.motor1.throttle, 0.5)
+
+
+@unittest.skipUnless(PYGAME_AVAILABLE, "pygame not installed")
+class TestStaleDisplay(unittest.TestCase):
+    """Test stale values are redrawn dimmed"""
+
+    def setUp(self):
+        pygame.init()
+        self.screen = pygame.display.set_mode((320, 240))
+        self.renderer = Renderer(self.screen)
+        self.speed = self.renderer.add(ValueDisplay('speed', (10, 10), self.renderer.atlas(36)))
+
+    def tearDown(self):
+        pygame.quit()
+
+    def test_going_stale_redraws(self):
+        store = SignalStore()
+        store.update({'speed': 88.0}, 1.0)
+        self.renderer.render(store.snapshot())
+        store.mark_stale(['speed'])
+        self.assertEqual(self.renderer.render(store.snapshot()), [self.speed.rect])
+        self.assertTrue(self.speed.stale)
+        self.assertEqual(self.speed.text, "88")
+
+
+@unittest.skipUnless(PYGAME_AVAILABLE, "pygame not installed")
+class TestStaleRenderLatency(unittest.TestCase):
+    """Test stale redraws don't count as render latency"""
+
+    def tearDown(self):
+        pygame.quit()
+
+    def test_stale_redraw_not_recorded(self):
+        store = SignalStore()
+        game = DashGame(signal_store=store)
+        game.initialize_pygame()
+        render = game.latency.histograms['render']
+        store.update({'VehicleSpeedCluster': 50.0}, game.latency.clock())
+        game.update()
+        game.draw()
+        self.assertEqual(render.count, 1)
+
+        store.mark_stale(['VehicleSpeedCluster'])
+        game.update()
+        game.draw()
+        self.assertEqual(render.count, 1)
+        self.assertLess(render.max, 1.0)
@@ -0,0 +1,105 @@
+"""
+Test cases for the stepper motion planner
+"""
+
+import unittest
+import time
+import sys
+import os
+
+# Add the dash directory to path so src is importable as a package
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.fake_hardware import FakeMotorKit
+from src.stepper_planner import (MotorKitStepper, SimulatedStepper, StepperGauge,
+                                 StepperPlanner, StepperScheduler)
+
+
+def run_to_rest(planner: StepperPlanner, limit: int = 10000):
+    """Plan steps until the planner stops; returns the (direction, interval) list"""
+    steps = []
+    while len(steps) < limit:
+        planned = planner.plan_step()
+        if planned is None:
+            return steps
+        steps.append(planned)
+    raise AssertionError("planner never came to rest")
+
+
+class TestStepperPlanner(unittest.TestCase):
+    """Test the trapezoidal profile"""
+
+    def test_reaches_target(self):
+        """Test a move lands exactly on its target and stops"""
+        planner = StepperPlanner(max_speed=400, acceleration=2000)
+        planner.move_to(100)
+        steps = run_to_rest(planner)
+        self.assertEqual(len(steps), 100)
+        self.assertEqual(planner.position, 100)
+        self.assertFalse(planner.is_moving)
+
+    def test_trapezoidal_profile(self):
+        """Test the needle accelerates, cruises at max speed and decelerates"""
+        planner = StepperPlanner(max_speed=400, acceleration=2000)
+        planner.move_to(200)
+        intervals = [interval for _, interval in run_to_rest(planner)]
+
+        self.assertGreater(intervals[0], intervals[10])
+        self.assertAlmostEqual(min(intervals), 1 / 400)
+        self.assertGreater(intervals[-1], intervals[-10])
+
+    def test_retarget_mid_move(self):
+        """Test reversing mid-move brakes, turns around and lands on the new target"""
+        planner = StepperPlanner(max_speed=400, acceleration=2000)
+        planner.move_to(100)
+        for _ in range(30):
+            planner.plan_step()
+        planner.move_to(10)
+        steps = run_to_rest(planner)
+
+        self.assertEqual(planner.position, 10)
+        directions = [direction for direction, _ in steps]
+        # Keeps going forward while braking, then reverses
+        self.assertEqual(directions[0], 1)
+        self.assertEqual(directions[-1], -1)
+
+
+class TestStepperScheduler(unittest.TestCase):
+    """Test the background scheduler with simulated and fake-kit backends"""
+
+    def test_background_move(self):
+        """Test moves run in the background and can be retargeted"""
+        backend = SimulatedStepper()
+        scheduler = StepperScheduler(StepperPlanner(max_speed=2000, acceleration=50000), backend)
+        scheduler.start()
+        try:
+            start = time.monotonic()
+            scheduler.move_to(200)
+            self.assertLess(time.monotonic() - start, 0.01)
+            scheduler.move_to(50)
+            self.assertTrue(scheduler.wait_until_arrived(2.0))
+        finally:
+            scheduler.stop()
+
+        self.assertEqual(backend.position, 50)
+        self.assertEqual(scheduler.position, 50)
+
+    def test_gauge_on_fake_kit(self):
+        """Test a stepper gauge following a value on the fake MotorKit"""
+        kit = FakeMotorKit()
+        scheduler = StepperScheduler(StepperPlanner(max_speed=2000, acceleration=50000),
+                                     MotorKitStepper(kit.stepper1))
+        gauge = StepperGauge(scheduler, value_min=0, value_max=100, steps=200)
+        scheduler.start()
+        try:
+            gauge.set_value(25)
+            self.assertTrue(scheduler.wait_until_arrived(2.0))
+        finally:
+            scheduler.stop()
+
+        self.assertEqual(kit.stepper1.position, 50)
+        self.assertTrue(kit.stepper1.released)
+
+
+if __name__ == '__main__':
+    unittest.main()
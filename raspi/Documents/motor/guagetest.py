@@ -1,39 +1,71 @@
 # SPDX-FileCopyrightText: 2021 ladyada for Adafruit Industries
 # SPDX-License-Identifier: MIT
 
-"""Simple test for using adafruit_motorkit with a stepper motor"""
-import time
-import math
-import board
-from adafruit_motorkit import MotorKit
-from adafruit_motor import motor
+"""
+Guided calibration sweep of one gauge
 
+Steps the gauge's motor from min_position to max_position and back. At each
+stop, type what the needle reads on the dial (blank skips the point). The
+measured [value, throttle] points are printed, and with --save written to the
+gauge's 'calibration' in the dash config, where a running dash picks them up.
 
-PON_MIN_POSITION = 0.60
-PON_MAX_POSITION = 0.9
+    python guagetest.py pon --steps 12
+    python guagetest.py b3b --save
+"""
+import argparse
+import json
+import os
+import sys
+from adafruit_motorkit import MotorKit
 
-B3B_MIN_POSITION = 0.60
-B3B_MAX_POSITION = 0.9
+# The calibration code lives with the dash code
+DASH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dash')
+sys.path.insert(0, DASH)
+from src.config import GameConfig
+from src.gauge_calibration import is_monotonic, sweep, sweep_throttles
 
-kit = MotorKit()
-kit.motor3.throttle = 0.0
-kit.motor4.throttle = 0.0
 
-beginTime = time.time()
-now = time.time()
-finishTime = beginTime + 60
+def ask(throttle):
+    while True:
+        text = input(f'Throttle {throttle:.3f}: needle reads (blank to skip) ? ').strip()
+        if not text:
+            return None
+        try:
+            return float(text)
+        except ValueError:
+            print('Enter a number')
 
-while now < finishTime:
-    runTime = now - beginTime
-    throttle3 = PON_MIN_POSITION + ( (PON_MAX_POSITION - PON_MIN_POSITION) * 0.5 * (1.0 + math.sin(runTime)) )
-    kit.motor3.throttle = throttle3
 
-    throttle4 = B3B_MIN_POSITION + ( (B3B_MAX_POSITION - B3B_MIN_POSITION) * 0.5 * (1.0 + math.sin(runTime*2.0)) )
-    kit.motor4.throttle = throttle4
-    now = time.time()
-    print(f'Throttle3 = {throttle3}    Throttle4 = {throttle4}', end="\r")
+parser = argparse.ArgumentParser(description='Measure calibration points for one gauge')
+parser.add_argument('gauge', help='Gauge name under gauges.channels, e.g. pon or b3b')
+parser.add_argument('--config', default=os.path.join(DASH, 'config', 'game_config.json'))
+parser.add_argument('--steps', type=int, default=10, help='Intervals between min and max throttle')
+parser.add_argument('--settle', type=float, default=1.0, help='Seconds to wait after each move')
+parser.add_argument('--one-way', action='store_true', help="Don't sweep back down")
+parser.add_argument('--save', action='store_true', help='Write the points into the config file')
+args = parser.parse_args()
 
-kit.motor3.throttle = 0.0
+config = GameConfig(args.config)
+gauge = config.get('gauges.channels', {}).get(args.gauge)
+if gauge is None:
+    sys.exit(f'No gauge {args.gauge} in {args.config}')
 
-#time.sleep(timeStep)
+kit = MotorKit()
+motor = getattr(kit, gauge['motor'])
+throttles = sweep_throttles(gauge.get('min_position', 0.0), gauge.get('max_position', 1.0),
+                            args.steps)
+try:
+    points = sweep(motor, throttles, ask, args.settle, both_ways=not args.one_way)
+finally:
+    motor.throttle = gauge.get('park_position', 0.0)
 
+print(json.dumps([[round(value, 3), round(throttle, 4)] for value, throttle in points]))
+if not is_monotonic(points):
+    print('The readings go back on themselves; check them and sweep again')
+    if args.save:
+        sys.exit('Not saved')
+elif args.save:
+    config.set(f'gauges.channels.{args.gauge}.calibration',
+               [[value, throttle] for value, throttle in points])
+    config.save_config()
+    print(f'Saved to {args.config}')
@@ -1,6 +1,13 @@
 import can
 import cantools
 import time
+import os
+import sys
+
+# The decoder table and bus ingest live with the dash code
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dash'))
+from src.can_decoder import DecoderTable
+from src.can_bus import BusIngest
 
 # Load the DBC file
 try:
@@ -9,36 +16,31 @@ except FileNotFoundError:
     print("Error: EV-can_ZE0.dbc not found. Please place it in the same directory.")
     exit()
 
+decoders = DecoderTable(db, ['LB_SOC'])
+
 def main():
     """
     Initializes the CAN bus and continuously reads and decodes messages.
     """
     try:
         # Initialize the CAN bus interface (ensure 'can0' is correct for your setup)
-        bus = can.interface.Bus(channel='can0', bustype='socketcan')
+        # Only the LBC SOC frames are let through by the socketcan filters
+        ingest = BusIngest(decoders.ids, channel='can0', interface='socketcan')
+        ingest.open()
         print("Successfully connected to can0.")
-        print("Listening for LBC messages (SOC, SOH)...")
-
-        while True:
-            message = bus.recv()  # Wait for a message
+        print("Listening for LBC messages (SOC)...")
 
-            if message.arbitration_id == 0x55B: # LBC SOC message ID
+        for batch in ingest.iter_batches():
+            for message in batch:
                 try:
-                    decoded_message = db.decode_message(message.arbitration_id, message.data)
-                    soc = decoded_message.get('LBC_StateOfCharge')
-                    if soc is not None:
-                        print(f"Received LBC SOC: {soc:.1f}%")
+                    decoded_message = decoders.decode(message.arbitration_id, message.data)
                 except Exception as e:
-                    print(f"Error decoding message 0x55B: {e}")
+                    print(f"Error decoding message {hex(message.arbitration_id)}: {e}")
+                    continue
 
-            elif message.arbitration_id == 0x5B3: # LBC SOH message ID
-                try:
-                    decoded_message = db.decode_message(message.arbitration_id, message.data)
-                    soh = decoded_message.get('SOH')
-                    if soh is not None:
-                        print(f"Received SOH: {soh:.1f}%")
-                except Exception as e:
-                    print(f"Error decoding message 0x5B3: {e}")
+                soc = decoded_message.get('LB_SOC') if decoded_message else None
+                if soc is not None:
+                    print(f"Received LBC SOC: {soc:.1f}%")
 
     except can.CanError as e:
         print(f"CAN Error: {e}")
@@ -46,9 +48,8 @@ def main():
     except KeyboardInterrupt:
         print("\nShutting down logger.")
     finally:
-        if 'bus' in locals() and bus:
-            bus.shutdown()
+        if 'ingest' in locals() and ingest:
+            ingest.close()
 
 if __name__ == "__main__":
     main()
-
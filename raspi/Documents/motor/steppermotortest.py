@@ -1,27 +1,34 @@
 # SPDX-FileCopyrightText: 2021 ladyada for Adafruit Industries
 # SPDX-License-Identifier: MIT
 
-"""Simple test for using adafruit_motorkit with a stepper motor"""
-import time
+"""Stepper sweep through the non-blocking motion planner"""
+import os
+import sys
 import board
 from adafruit_motorkit import MotorKit
 from adafruit_motor import stepper
 
+# The motion planner lives with the dash code
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dash'))
+from src.stepper_planner import MotorKitStepper, StepperPlanner, StepperScheduler
+
 mystyle = stepper.SINGLE
 kit = MotorKit(i2c=board.I2C())
-timeStep = 0.02
+maxSpeed = 200        # steps per second
+acceleration = 800    # steps per second squared
 loops = 5
 distance = 200
 
-for j in range(loops):
-   for i in range(distance):
-       kit.stepper1.onestep(style=mystyle)
-       #kit.stepper1.release();
-       time.sleep(timeStep)
-
-   for i in range(distance):
-       kit.stepper1.onestep(direction=stepper.BACKWARD, style=mystyle)
-       #kit.stepper1.release();
-       time.sleep(timeStep)
+scheduler = StepperScheduler(StepperPlanner(maxSpeed, acceleration),
+                             MotorKitStepper(kit.stepper1, style=mystyle))
+scheduler.start()
 
-kit.stepper1.release();
+try:
+    for j in range(loops):
+        for target in (distance, 0):
+            scheduler.move_to(target)
+            # The sweep runs in the background; this loop is free to do other work
+            while not scheduler.wait_until_arrived(0.05):
+                print(f"Position {scheduler.position:4d}", end="\r")
+finally:
+    scheduler.stop()